@@ -0,0 +1,140 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from . import import_time
+
+BASELINES_FILE = Path(__file__).resolve().parent / "baselines.json"
+
+
+def load_baselines() -> dict:
+    """
+    Read the stored baselines.
+
+    Returns
+    -------
+    dict
+        Baselines per benchmark, empty if none were stored.
+    """
+    if not BASELINES_FILE.exists():
+        return {}
+    return json.loads(BASELINES_FILE.read_text())
+
+
+def save_baselines(baselines: dict) -> None:
+    """
+    Store the baselines.
+
+    Parameters
+    ----------
+    baselines : dict
+        Baselines per benchmark.
+    """
+    BASELINES_FILE.write_text(json.dumps(
+        baselines, indent=2, sort_keys=True) + "\n")
+
+
+def _import_time(args: argparse.Namespace, baselines: dict) -> list[str]:
+    """
+    Run the import time benchmark.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Command line arguments.
+    baselines : dict
+        Baselines per benchmark, updated with `--update`.
+
+    Returns
+    -------
+    list[str]
+        Regressions.
+    """
+    results = import_time.run(args.runs)
+    for module, result in results.items():
+        print("%-40s %8.1f ms" % (module, result["ms"]))
+    if args.update:
+        baselines["import_time_ms"] = {module: result["ms"]
+                                       for module, result in results.items()}
+        return []
+    return import_time.check(results, baselines.get("import_time_ms", {}), args.tolerance)
+
+
+def _client_overhead(args: argparse.Namespace, baselines: dict) -> list[str]:
+    """
+    Run the client overhead benchmark.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Command line arguments.
+    baselines : dict
+        Baselines per benchmark, updated with `--update`.
+
+    Returns
+    -------
+    list[str]
+        Regressions.
+    """
+    from . import client_overhead
+
+    results = client_overhead.run(args.runs, args.calls)
+    for name, result in results.items():
+        if "cpu_ms" in result:
+            print("%-40s %8.2f ms CPU" % (name, result["cpu_ms"]))
+        else:
+            print("%-40s %8.1f us CPU %10.1f calls/s" %
+                  (name, result["cpu_us"], result["calls_per_sec"]))
+    if args.update:
+        baselines["client_cpu"] = client_overhead.baselines_of(results)
+        return []
+    return client_overhead.check(results, baselines.get("client_cpu", {}), args.tolerance)
+
+
+BENCHMARKS = {
+    "import-time": _import_time,
+    "client-overhead": _client_overhead,
+}
+
+
+def main() -> int:
+    """
+    Run the benchmarks selected on the command line.
+
+    Returns
+    -------
+    int
+        Exit status, 1 when a benchmark regressed.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmarks of the synology_api client, compared with stored baselines.")
+    parser.add_argument("benchmark", choices=list(
+        BENCHMARKS) + ["all"], help="Benchmark to run.")
+    parser.add_argument("--runs", type=int, default=7,
+                        help="Repetitions, the median is kept.")
+    parser.add_argument("--calls", type=int, default=500,
+                        help="Calls per repetition of the client overhead scenarios.")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="Allowed ratio of a result to its baseline.")
+    parser.add_argument("--update", action="store_true",
+                        help="Store the results as the new baselines.")
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    selected = list(BENCHMARKS) if args.benchmark == "all" else [
+        args.benchmark]
+    regressions = []
+    for name in selected:
+        regressions.extend(BENCHMARKS[name](args, baselines))
+
+    if args.update:
+        save_baselines(baselines)
+        return 0
+    for regression in regressions:
+        print("REGRESSION: " + regression, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
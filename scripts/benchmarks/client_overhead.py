@@ -0,0 +1,236 @@
+"""
+CPU spent by the synology_api client per API call.
+
+Representative service methods run against the in-process fake DSM of the
+test suite, through `FakeDsmAdapter`: no socket is opened and the CPU time
+the fake spends answering is subtracted, so the figures are the cost of the
+client itself (parameter building, request preparation, request hashes, JSON
+decoding and error routing). The login is measured separately, it is
+dominated by the RSA and Noise cryptography of DSM 7.
+"""
+import statistics
+import time
+
+from synology_api.auth import Authentication
+from synology_api.base_api import BaseApi
+from synology_api.filestation import FileStation
+from synology_api.photos import Photos
+from synology_api.session_registry import SessionRegistry
+from synology_api.surveillancestation import SurveillanceStation
+from tests.fake_dsm import FakeDsm, FakeDsmAdapter
+
+HOST = 'fake-dsm'
+PORT = '5000'
+USERNAME = 'admin'
+PASSWORD = 'pass'
+
+# Size of the canned answers, close to a typical page of each API
+FILES = 100
+ALBUM_ITEMS = 100
+CAMERAS = 10
+COMPOUND_REQUESTS = 10
+
+# Microseconds always allowed above a baseline, timer noise of fast calls
+MIN_SLACK_US = 20.0
+
+
+def _album_items(request):
+    """Answer SYNO.Foto.Browse.Item list with a page of photos."""
+    offset = int(request.params.get('offset', 0))
+    limit = int(request.params.get('limit', ALBUM_ITEMS))
+    return {'list': [
+        {'id': index, 'filename': 'IMG_%04d.jpg' % index, 'filesize': 2500000 + index,
+         'time': 1700000000 + index, 'indexed_time': 1700000000000 + index,
+         'owner_user_id': 1, 'folder_id': 7, 'type': 'photo',
+         'additional': {'resolution': {'width': 4032, 'height': 3024}, 'orientation': 1}}
+        for index in range(offset, min(offset + limit, ALBUM_ITEMS))]}
+
+
+def _cameras(request):
+    """Answer SYNO.SurveillanceStation.Camera List."""
+    return {'total': CAMERAS, 'cameras': [
+        {'id': index, 'name': 'Camera %d' % index, 'ip': '10.0.0.%d' % (index + 10), 'port': 80,
+         'model': 'Generic', 'vendor': 'ONVIF', 'status': 1, 'enabled': True, 'recStatus': 0,
+         'resolution': '1920x1080', 'fps': 25}
+        for index in range(CAMERAS)]}
+
+
+def build_fake() -> FakeDsm:
+    """
+    Create the fake DSM answering the benchmarked APIs.
+
+    Returns
+    -------
+    FakeDsm
+        Fake with files, a photo album and cameras.
+    """
+    fake = FakeDsm(USERNAME, PASSWORD)
+    for index in range(FILES):
+        fake.add_file('/home/file-%03d.txt' % index, b'x' * index)
+    fake.add_api('SYNO.Foto.Browse.Item', _album_items, 'entry.cgi', 1, 4)
+    fake.add_api('SYNO.SurveillanceStation.Camera',
+                 _cameras, 'entry.cgi', 1, 9)
+    return fake
+
+
+def connect(fake: FakeDsm) -> tuple[Authentication, FakeDsmAdapter]:
+    """
+    Log in to the fake DSM through an in-process adapter.
+
+    Parameters
+    ----------
+    fake : FakeDsm
+        Fake DSM to answer the requests.
+
+    Returns
+    -------
+    tuple[Authentication, FakeDsmAdapter]
+        Logged in session, and the adapter counting the fake CPU time.
+    """
+    session = Authentication(HOST, PORT, USERNAME,
+                             PASSWORD, debug=False, dsm_version=7)
+    adapter = FakeDsmAdapter(fake)
+    session._requests_session.mount('http://%s:%s/' % (HOST, PORT), adapter)
+    session.login()
+    return session, adapter
+
+
+def _measure(call, adapter: FakeDsmAdapter, calls: int) -> tuple[float, float]:
+    """
+    Call a function repeatedly.
+
+    Returns
+    -------
+    tuple[float, float]
+        Client CPU microseconds per call, and calls per second.
+    """
+    server_time = adapter.server_time
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    for _ in range(calls):
+        call()
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - started_cpu - (adapter.server_time - server_time)
+    return cpu / calls * 1e6, calls / elapsed
+
+
+def _measure_login(fake: FakeDsm, runs: int) -> float:
+    """Get the median client CPU milliseconds of a DSM 7 login."""
+    timings = []
+    for _ in range(runs):
+        started_cpu = time.process_time()
+        session, adapter = connect(fake)
+        timings.append((time.process_time() - started_cpu -
+                       adapter.server_time) * 1000)
+        session.logout()
+    return statistics.median(timings)
+
+
+def run(runs: int = 7, calls: int = 500) -> dict[str, dict[str, float]]:
+    """
+    Measure the client overhead of every scenario.
+
+    Parameters
+    ----------
+    runs : int, optional
+        Repetitions of each scenario, the median is kept. Defaults to 7.
+    calls : int, optional
+        Calls per repetition. Defaults to 500.
+
+    Returns
+    -------
+    dict[str, dict[str, float]]
+        Per scenario, `cpu_us` (client CPU microseconds per call) and
+        `calls_per_sec`. The `login` scenario has `cpu_ms` instead.
+    """
+    fake = build_fake()
+    registry_backup = BaseApi.session_registry
+    BaseApi.session_registry = SessionRegistry()
+    try:
+        session, adapter = connect(fake)
+        session.get_api_list()
+        BaseApi.session_registry.register(
+            SessionRegistry.make_key(HOST, PORT, USERNAME), session)
+        filestation = FileStation(HOST, PORT, USERNAME, PASSWORD, debug=False)
+        photos = Photos(HOST, PORT, USERNAME, PASSWORD, debug=False)
+        surveillance = SurveillanceStation(
+            HOST, PORT, USERNAME, PASSWORD, debug=False)
+        compound = [{'api': 'SYNO.FileStation.Info',
+                     'method': 'get', 'version': 2}] * COMPOUND_REQUESTS
+
+        scenarios = {
+            'FileStation.get_file_list': lambda: filestation.get_file_list(
+                '/home', offset=0, limit=FILES, additional=['size', 'time']),
+            'Photos.list_items_in_album': lambda: photos.list_items_in_album(
+                1, limit=ALBUM_ITEMS, additional=['resolution', 'orientation']),
+            'SurveillanceStation.camera_list': lambda: surveillance.camera_list(basic=True),
+            'Authentication.request_multi_datas': lambda: session.request_multi_datas(compound),
+        }
+        results = {}
+        for name, call in scenarios.items():
+            # Warm up the memoized catalog lookups and the connection path
+            call()
+            samples = [_measure(call, adapter, calls) for _ in range(runs)]
+            results[name] = {
+                'cpu_us': round(statistics.median(cpu for cpu, _ in samples), 1),
+                'calls_per_sec': round(statistics.median(rate for _, rate in samples), 1),
+            }
+        session.logout()
+        results['login'] = {'cpu_ms': round(_measure_login(fake, runs), 2)}
+    finally:
+        BaseApi.session_registry = registry_backup
+    return results
+
+
+def baselines_of(results: dict[str, dict[str, float]]) -> dict[str, float]:
+    """
+    Get the figures stored as baselines.
+
+    Parameters
+    ----------
+    results : dict[str, dict[str, float]]
+        Output of `run`.
+
+    Returns
+    -------
+    dict[str, float]
+        Client CPU microseconds per call of each scenario, and login
+        milliseconds under `login`.
+    """
+    return {name: result.get('cpu_us', result.get('cpu_ms')) for name, result in results.items()}
+
+
+def check(results: dict[str, dict[str, float]], baselines: dict[str, float],
+          tolerance: float) -> list[str]:
+    """
+    Compare the client CPU time with its baselines.
+
+    Parameters
+    ----------
+    results : dict[str, dict[str, float]]
+        Output of `run`.
+    baselines : dict[str, float]
+        Output of `baselines_of` for a reference run.
+    tolerance : float
+        Allowed ratio of a figure to its baseline, e.g. 1.5. At least
+        `MIN_SLACK_US` above the baseline is always allowed.
+
+    Returns
+    -------
+    list[str]
+        One message per regression, empty when none.
+    """
+    regressions = []
+    for name, value in baselines_of(results).items():
+        baseline = baselines.get(name)
+        if name == 'login':
+            # Milliseconds, the slack is converted
+            slack = MIN_SLACK_US / 1000
+            unit = 'ms'
+        else:
+            slack = MIN_SLACK_US
+            unit = 'us'
+        if baseline is not None and value > max(baseline * tolerance, baseline + slack):
+            regressions.append('%s: %.1f %s CPU, baseline %.1f %s' %
+                               (name, value, unit, baseline, unit))
+    return regressions
@@ -0,0 +1,118 @@
+"""
+Import time of the synology_api package.
+
+Each module is imported in a fresh interpreter, several times, and the median
+time is kept. The modules third-party dependencies load at import are listed
+too: the package imports its submodules, and the submodules their heavy
+dependencies, on first use only.
+"""
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+_BASE_DIR = Path(__file__).resolve().parents[2]
+
+IMPORT_TARGETS = (
+    'synology_api',
+    'synology_api.filestation',
+    'synology_api.photos',
+    'synology_api.surveillancestation',
+    'synology_api.core_storage',
+)
+
+# Dependencies loaded by the functions needing them, never by an import
+LAZY_DEPENDENCIES = ('aiohttp', 'cryptography', 'noise', 'tqdm', 'treelib')
+
+# Milliseconds always allowed above a baseline, timer noise of fast imports
+MIN_SLACK_MS = 5.0
+
+_PROBE = '''
+import sys, time, json
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+'''
+
+
+def measure_import(module: str) -> tuple[float, list[str]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Parameters
+    ----------
+    module : str
+        Dotted module name.
+
+    Returns
+    -------
+    tuple[float, list[str]]
+        Milliseconds the import took, and the modules loaded afterwards.
+    """
+    output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module)],
+                            cwd=_BASE_DIR, check=True, capture_output=True, text=True).stdout
+    result = json.loads(output)
+    return result['ms'], result['modules']
+
+
+def run(runs: int = 7) -> dict[str, dict[str, object]]:
+    """
+    Measure the import time of every target.
+
+    Parameters
+    ----------
+    runs : int, optional
+        Imports per target, the median is kept. Defaults to 7.
+
+    Returns
+    -------
+    dict[str, dict[str, object]]
+        Per module, `ms` (median milliseconds) and `eager_dependencies`
+        (lazy dependencies loaded anyway).
+    """
+    results = {}
+    for module in IMPORT_TARGETS:
+        timings = []
+        for _ in range(runs):
+            elapsed, modules = measure_import(module)
+            timings.append(elapsed)
+        loaded = {name.split('.')[0] for name in modules}
+        results[module] = {
+            'ms': round(statistics.median(timings), 2),
+            'eager_dependencies': [name for name in LAZY_DEPENDENCIES if name in loaded],
+        }
+    return results
+
+
+def check(results: dict[str, dict[str, object]], baselines: dict[str, float],
+          tolerance: float) -> list[str]:
+    """
+    Compare import times with their baselines.
+
+    Parameters
+    ----------
+    results : dict[str, dict[str, object]]
+        Output of `run`.
+    baselines : dict[str, float]
+        Baseline milliseconds per module.
+    tolerance : float
+        Allowed ratio of a time to its baseline, e.g. 1.5. At least
+        `MIN_SLACK_MS` above the baseline is always allowed.
+
+    Returns
+    -------
+    list[str]
+        One message per regression, empty when none.
+    """
+    regressions = []
+    for module, result in results.items():
+        if result['eager_dependencies']:
+            regressions.append('%s loads %s at import' % (
+                module, ', '.join(result['eager_dependencies'])))
+        baseline = baselines.get(module)
+        if baseline is not None and result['ms'] > max(baseline * tolerance, baseline + MIN_SLACK_MS):
+            regressions.append('%s: %.1f ms, baseline %.1f ms' %
+                               (module, result['ms'], baseline))
+    return regressions
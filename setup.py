@@ -18,6 +18,7 @@ setup(
                       'requests_toolbelt', 'tqdm', 'cryptography', 'treelib',
                       'noiseprotocol',
                       ],
+    extras_require={'async': ['aiohttp'], 'fast-json': ['orjson']},
     url='https://github.com/N4S4/synology-api',
     author='Renato Visaggio',
     author_email='synology.python.api@gmail.com'
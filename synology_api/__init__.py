@@ -1,49 +1,189 @@
-"""Synology API Python Client."""
-from . import \
-    audiostation, \
-    async_client, \
-    auth, \
-    base_api, \
-    chat, \
-    cloud_sync, \
-    calendar, \
-    core_active_backup, \
-    core_backup, \
-    core_certificate, \
-    core_directory, \
-    core_directory_service_check, \
-    core_external_device, \
-    core_group, \
-    core_iscsi, \
-    core_network, \
-    core_notification, \
-    core_package, \
-    core_security, \
-    core_security_auth, \
-    core_service_apps, \
-    core_service_hw, \
-    core_service_user, \
-    core_share, \
-    core_storage, \
-    core_sys_info, \
-    core_system, \
-    core_upgrade, \
-    core_user, \
-    dhcp_server, \
-    directory_server, \
-    docker_api, \
-    downloadstation, \
-    drive_admin_console, \
-    filestation, \
-    ldap_server, \
-    log_center, \
-    notestation, \
-    oauth, \
-    photos, \
-    security_advisor, \
-    snapshot, \
-    surveillancestation, \
-    universal_search, \
-    usb_copy, \
-    virtualization, \
-    vpn
+"""
+Synology API Python Client.
+
+The submodules are imported on first access (PEP 562), so ``import
+synology_api`` stays cheap and a script only loads the APIs it uses, with their
+dependencies::
+
+    import synology_api
+
+    fs = synology_api.filestation.FileStation(...)
+"""
+from __future__ import annotations
+
+import importlib
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+_SUBMODULES: frozenset[str] = frozenset([
+    'api_cache',
+    'audiostation',
+    'async_auth',
+    'async_client',
+    'auth',
+    'base_api',
+    'batch',
+    'chat',
+    'cloud_sync',
+    'calendar',
+    'cassette',
+    'circuit_breaker',
+    'core_active_backup',
+    'core_backup',
+    'core_certificate',
+    'core_directory',
+    'core_directory_service_check',
+    'core_external_device',
+    'core_group',
+    'core_iscsi',
+    'core_network',
+    'core_notification',
+    'core_package',
+    'core_security',
+    'core_security_auth',
+    'core_service_apps',
+    'core_service_hw',
+    'core_service_user',
+    'core_share',
+    'core_storage',
+    'core_sys_info',
+    'core_system',
+    'core_upgrade',
+    'core_user',
+    'dhcp_server',
+    'directory_server',
+    'docker_api',
+    'downloadstation',
+    'drive_admin_console',
+    'filestation',
+    'governor',
+    'http_adapter',
+    'instrumentation',
+    'json_codec',
+    'ldap_server',
+    'log_center',
+    'notestation',
+    'oauth',
+    'photos',
+    'quickconnect_cache',
+    'response_cache',
+    'retry',
+    'security_advisor',
+    'session_registry',
+    'session_store',
+    'single_flight',
+    'snapshot',
+    'streaming',
+    'surveillancestation',
+    'universal_search',
+    'usb_copy',
+    'virtualization',
+    'vpn',
+])
+
+__all__ = sorted(_SUBMODULES)
+
+if TYPE_CHECKING:
+    from . import \
+        api_cache, \
+        audiostation, \
+        async_auth, \
+        async_client, \
+        auth, \
+        base_api, \
+        batch, \
+        chat, \
+        cloud_sync, \
+        calendar, \
+        cassette, \
+        circuit_breaker, \
+        core_active_backup, \
+        core_backup, \
+        core_certificate, \
+        core_directory, \
+        core_directory_service_check, \
+        core_external_device, \
+        core_group, \
+        core_iscsi, \
+        core_network, \
+        core_notification, \
+        core_package, \
+        core_security, \
+        core_security_auth, \
+        core_service_apps, \
+        core_service_hw, \
+        core_service_user, \
+        core_share, \
+        core_storage, \
+        core_sys_info, \
+        core_system, \
+        core_upgrade, \
+        core_user, \
+        dhcp_server, \
+        directory_server, \
+        docker_api, \
+        downloadstation, \
+        drive_admin_console, \
+        filestation, \
+        governor, \
+        http_adapter, \
+        instrumentation, \
+        json_codec, \
+        ldap_server, \
+        log_center, \
+        notestation, \
+        oauth, \
+        photos, \
+        quickconnect_cache, \
+        response_cache, \
+        retry, \
+        security_advisor, \
+        session_registry, \
+        session_store, \
+        single_flight, \
+        snapshot, \
+        streaming, \
+        surveillancestation, \
+        universal_search, \
+        usb_copy, \
+        virtualization, \
+        vpn
+
+
+def __getattr__(name: str) -> ModuleType:
+    """
+    Import a submodule on first access.
+
+    Parameters
+    ----------
+    name : str
+        Attribute name.
+
+    Returns
+    -------
+    ModuleType
+        The submodule.
+
+    Raises
+    ------
+    AttributeError
+        If `name` is not a submodule of the package.
+    """
+    if name not in _SUBMODULES:
+        raise AttributeError('module %r has no attribute %r' %
+                             (__name__, name))
+    # The import binds the submodule in the package namespace, later
+    # accesses no longer reach __getattr__
+    return importlib.import_module('.' + name, __name__)
+
+
+def __dir__() -> list[str]:
+    """
+    List the package attributes, submodules not yet imported included.
+
+    Returns
+    -------
+    list[str]
+        Attribute names.
+    """
+    return sorted(set(globals()) | _SUBMODULES)
@@ -0,0 +1,212 @@
+"""
+On-disk cache of the `SYNO.API.Info` catalog.
+
+Short-lived processes can pass an `ApiCatalogCache` to `Authentication` (or
+`BaseApi`) to skip the catalog download at startup. Entries are keyed by NAS
+host, port and DSM version, written atomically so several processes can share
+the same cache directory.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+# Bump when the file layout changes, older files are then ignored.
+CACHE_FORMAT_VERSION = 1
+
+# APIs queried to check a cached catalog against the NAS, their versions change with DSM builds.
+VALIDATION_APIS: tuple[str, ...] = (
+    'SYNO.API.Auth', 'SYNO.API.Info', 'SYNO.Entry.Request')
+
+
+def default_cache_dir() -> str:
+    """
+    Get the default cache directory.
+
+    Returns
+    -------
+    str
+        `$XDG_CACHE_HOME/synology_api`, or `~/.cache/synology_api`.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'synology_api')
+
+
+def write_json_atomic(path: str, entry: object) -> None:
+    """
+    Write a JSON file through a temporary file renamed over it.
+
+    Concurrent readers never see a partial file and concurrent writers simply
+    let the last one win. Write errors are ignored, cache files are only an
+    optimization.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file.
+    entry : object
+        JSON serializable content.
+    """
+    directory, name = os.path.split(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix='.%s.' % os.path.splitext(name)[0], suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+                json.dump(entry, tmp_file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+    return
+
+
+class ApiCatalogCache(object):
+    """
+    File based cache of DSM API catalogs.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Directory holding the cache files. Defaults to `default_cache_dir()`.
+    max_age : float, optional
+        Seconds after which an entry is considered stale. `None` keeps entries
+        until they are invalidated. Defaults to one week.
+    validate : bool, optional
+        Check a cached catalog with a tiny `SYNO.API.Info` query of `VALIDATION_APIS`
+        before using it. Defaults to `False`, the catalog is then only refreshed when
+        a request fails with "API does not exist" or the entry expires.
+    """
+
+    def __init__(self,
+                 directory: Optional[str] = None,
+                 max_age: Optional[float] = 7 * 24 * 3600,
+                 validate: bool = False
+                 ) -> None:
+        """
+        Initialize the catalog cache.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory holding the cache files. Defaults to `default_cache_dir()`.
+        max_age : float, optional
+            Seconds after which an entry is considered stale. `None` keeps entries
+            until they are invalidated. Defaults to one week.
+        validate : bool, optional
+            Check a cached catalog with a tiny `SYNO.API.Info` query of `VALIDATION_APIS`
+            before using it. Defaults to `False`.
+        """
+        self.directory: str = directory or default_cache_dir()
+        self.max_age: Optional[float] = max_age
+        self.validate: bool = validate
+
+    @staticmethod
+    def make_key(host: Optional[str], port: Optional[str], dsm_version: int) -> str:
+        """
+        Build the cache key of a NAS.
+
+        Parameters
+        ----------
+        host : str
+            IP address, host name or QuickConnect ID of the NAS.
+        port : str
+            Port of the NAS.
+        dsm_version : int
+            DSM major version used to talk to the NAS.
+
+        Returns
+        -------
+        str
+            Hex digest usable as a file name.
+        """
+        identity = '%s:%s:%s' % (str(host).lower(), port, dsm_version)
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """
+        Get the file path of a cache entry.
+
+        Parameters
+        ----------
+        key : str
+            Cache key from `make_key`.
+
+        Returns
+        -------
+        str
+            Path of the JSON file.
+        """
+        return os.path.join(self.directory, 'api_info_%s.json' % key)
+
+    def load(self, key: str) -> Optional[dict[str, dict[str, object]]]:
+        """
+        Read a cached catalog.
+
+        Parameters
+        ----------
+        key : str
+            Cache key from `make_key`.
+
+        Returns
+        -------
+        dict[str, dict[str, object]] or None
+            The catalog, or None if missing, stale or unreadable.
+        """
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get('format') != CACHE_FORMAT_VERSION:
+            return None
+        if self.max_age is not None and time.time() - entry.get('stored_at', 0) > self.max_age:
+            return None
+        catalog = entry.get('catalog')
+        if not isinstance(catalog, dict) or not catalog:
+            return None
+        return catalog
+
+    def store(self, key: str, catalog: dict[str, dict[str, object]]) -> None:
+        """
+        Write a catalog, replacing any previous entry atomically.
+
+        The entry is written to a temporary file in the cache directory and
+        renamed over the final name, so concurrent readers never see a partial
+        file and concurrent writers simply let the last one win. Write errors
+        are ignored, the cache is only an optimization.
+
+        Parameters
+        ----------
+        key : str
+            Cache key from `make_key`.
+        catalog : dict[str, dict[str, object]]
+            API information keyed by API name.
+        """
+        entry = {'format': CACHE_FORMAT_VERSION,
+                 'stored_at': time.time(), 'catalog': catalog}
+        write_json_atomic(self._path(key), entry)
+        return
+
+    def invalidate(self, key: str) -> None:
+        """
+        Delete a cache entry.
+
+        Parameters
+        ----------
+        key : str
+            Cache key from `make_key`.
+        """
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+        return
@@ -0,0 +1,1408 @@
+"""
+Native asyncio transport for Synology DSM.
+
+`AsyncAuthentication` sends DSM requests with aiohttp instead of `requests`,
+so a single event loop can keep thousands of calls in flight without a thread
+per call. It shares login, request hash, error handling and API catalog logic
+with `Authentication`; only the I/O is asynchronous.
+
+The API classes run on it unchanged: once an `AsyncAuthentication` is
+registered (see `connect`), their methods return coroutines::
+
+    import asyncio
+    from synology_api import async_auth
+    from synology_api.filestation import FileStation
+
+    async def main():
+        await async_auth.connect('192.168.1.2', '5001', 'admin', 'pass', secure=True)
+        fs = FileStation('192.168.1.2', '5001', 'admin', 'pass', secure=True)
+        info, shares = await asyncio.gather(fs.get_info(), fs.get_list_share())
+        await fs.logout()
+
+    asyncio.run(main())
+
+Methods that post-process the response of `request_data` themselves are the
+exception and still need the blocking transport. aiohttp is an optional
+dependency: `pip install synology-api[async]`.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import time
+import urllib.parse
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from . import auth as syn
+from .auth import Authentication
+from .base_api import BaseApi
+from .api_cache import VALIDATION_APIS
+from .json_codec import decode_response, get_json_codec
+from .batch import SubRequestResult, COMPOUND_CHUNK_BYTES
+from .response_cache import MISSING
+from .instrumentation import RequestEvent
+from .error_codes import SESSION_EXPIRED_CODES, CODE_API_NOT_FOUND
+from .exceptions import SynoConnectionError, HTTPError, JSONDecodeError
+from .governor import is_overload_error
+from .session_registry import SessionRegistry
+
+# Size of the chunks read from a streamed upload body.
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+@contextlib.contextmanager
+def _requests_errors() -> Iterator[None]:
+    """
+    Re-raise aiohttp transport errors as their `requests` counterparts.
+
+    Retry policies and error translation are then shared with the blocking transport.
+
+    Yields
+    ------
+    None
+        Runs the wrapped block.
+    """
+    try:
+        yield
+    except asyncio.TimeoutError as e:
+        raise requests.exceptions.Timeout(str(e) or 'Request timed out') from e
+    except aiohttp.ClientError as e:
+        # Connection errors, but also truncated bodies, bad responses, ...
+        raise requests.exceptions.ConnectionError(str(e) or repr(e)) from e
+
+
+@contextlib.contextmanager
+def _syno_errors() -> Iterator[None]:
+    """
+    Translate transport errors into synology_api exceptions, when they are enabled.
+
+    Yields
+    ------
+    None
+        Runs the wrapped block.
+    """
+    try:
+        yield
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        if not syn.USE_EXCEPTIONS:
+            raise
+        raise SynoConnectionError(error_message=e.args[0])
+    except requests.exceptions.HTTPError as e:
+        if not syn.USE_EXCEPTIONS:
+            raise
+        raise HTTPError(error_message=str(e.args))
+    except requests.exceptions.JSONDecodeError as e:
+        if not syn.USE_EXCEPTIONS:
+            raise
+        raise JSONDecodeError(error_message=str(e.args))
+
+
+def _encode_pairs(params: Optional[dict[str, object]]) -> list[tuple[str, str]]:
+    """
+    Flatten request parameters the way `requests` encodes them.
+
+    Parameters
+    ----------
+    params : dict[str, object], optional
+        Query or form parameters.
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        Key/value pairs, `None` values dropped and lists repeated.
+    """
+    pairs = []
+    for key, value in (params or {}).items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        pairs.extend((key, str(item)) for item in values if item is not None)
+    return pairs
+
+
+async def _iter_upload(data: Any) -> AsyncIterator[bytes]:
+    """
+    Read a `MultipartEncoder` (or any object with `read`) as an async body.
+
+    Parameters
+    ----------
+    data : Any
+        Upload body with a `read(size)` method.
+
+    Yields
+    ------
+    bytes
+        Chunks of the body.
+    """
+    while True:
+        chunk = data.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+class AsyncResponse(object):
+    """
+    Response of an `AsyncAuthentication` request, with its body already read.
+
+    Mirrors the parts of `requests.Response` used by the API modules.
+
+    Parameters
+    ----------
+    status_code : int
+        HTTP status code.
+    reason : str
+        HTTP reason phrase.
+    url : str
+        Final URL of the request.
+    headers : dict[str, str]
+        Response headers.
+    cookies : dict[str, str]
+        Cookies set by the response.
+    content : bytes
+        Response body.
+    """
+
+    def __init__(self,
+                 status_code: int,
+                 reason: str,
+                 url: str,
+                 headers: dict[str, str],
+                 cookies: dict[str, str],
+                 content: bytes
+                 ) -> None:
+        """
+        Initialize the response.
+
+        Parameters
+        ----------
+        status_code : int
+            HTTP status code.
+        reason : str
+            HTTP reason phrase.
+        url : str
+            Final URL of the request.
+        headers : dict[str, str]
+            Response headers.
+        cookies : dict[str, str]
+            Cookies set by the response.
+        content : bytes
+            Response body.
+        """
+        self.status_code: int = status_code
+        self.reason: str = reason
+        self.url: str = url
+        self.headers: dict[str, str] = headers
+        self.cookies: dict[str, str] = cookies
+        self.content: bytes = content
+
+    @property
+    def text(self) -> str:
+        """
+        Get the body decoded as text.
+
+        Returns
+        -------
+        str
+            UTF-8 decoded body.
+        """
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        """
+        Decode the body as JSON.
+
+        Returns
+        -------
+        Any
+            Decoded body.
+
+        Raises
+        ------
+        requests.exceptions.JSONDecodeError
+            If the body is not JSON, as `requests.Response.json` does.
+        """
+        try:
+            return json.loads(self.content)
+        except ValueError as e:
+            raise requests.exceptions.JSONDecodeError(
+                str(e), self.text, getattr(e, 'pos', 0))
+
+    def raise_for_status(self) -> None:
+        """
+        Raise `requests.exceptions.HTTPError` for 4xx and 5xx responses.
+
+        Raises
+        ------
+        requests.exceptions.HTTPError
+            If the status code is an error.
+        """
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                '%s Error: %s for url: %s' % (
+                    self.status_code, self.reason, self.url),
+                response=self)
+        return
+
+
+class AsyncAuthentication(Authentication):
+    """
+    Authentication and API requests for Synology DSM over asyncio.
+
+    Takes the same parameters as `Authentication`. `login`, `logout`,
+    `request_data`, `request_multi_datas` and `request_webapi_data` are
+    coroutines, `stream_data` streams downloads. QuickConnect IDs are resolved
+    when the object is created, before any coroutine runs. A `governor` bounds
+    the requests in flight of the coroutines, in the lane of their task.
+
+    Parameters
+    ----------
+    *args : Any
+        Positional parameters of `Authentication`.
+    **kwargs : Any
+        Keyword parameters of `Authentication`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Initialize the asyncio transport.
+
+        Parameters
+        ----------
+        *args : Any
+            Positional parameters of `Authentication`.
+        **kwargs : Any
+            Keyword parameters of `Authentication`.
+        """
+        if aiohttp is None:
+            raise ImportError(
+                'AsyncAuthentication requires aiohttp: pip install synology-api[async]')
+        super(AsyncAuthentication, self).__init__(*args, **kwargs)
+        self._client_session: Optional[aiohttp.ClientSession] = None
+        self._async_login_lock: asyncio.Lock = asyncio.Lock()
+        self._async_catalog_lock: asyncio.Lock = asyncio.Lock()
+
+    async def __aenter__(self) -> 'AsyncAuthentication':
+        """
+        Log in and load the API catalog.
+
+        Returns
+        -------
+        AsyncAuthentication
+            This session.
+        """
+        await self.login()
+        await self.fetch_api_list()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        """
+        Release the connections, the DSM session stays open.
+
+        Parameters
+        ----------
+        *args : Any
+            Exception type, value and traceback.
+        """
+        await self.aclose()
+
+    # -- transport ------------------------------------------------------
+
+    def _get_client_session(self) -> aiohttp.ClientSession:
+        """
+        Get the aiohttp session, created on first use inside the running loop.
+
+        Returns
+        -------
+        aiohttp.ClientSession
+            Session with a connection pool sized like the blocking transport.
+        """
+        if self._client_session is None or self._client_session.closed:
+            policy = self._retry_policy
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_connections * self._pool_maxsize,
+                limit_per_host=self._pool_maxsize,
+                ssl=None if self._verify else False)
+            # unsafe: DSM is usually reached by IP address, whose cookies aiohttp rejects by default.
+            cookie_jar = aiohttp.CookieJar(unsafe=True)
+            if self._requests_session is not None:
+                # Relay cookies primed by the QuickConnect resolution.
+                cookie_jar.update_cookies(
+                    requests.utils.dict_from_cookiejar(self._requests_session.cookies))
+            self._client_session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=cookie_jar,
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=policy.connect_timeout, sock_read=policy.read_timeout))
+        return self._client_session
+
+    def _open(self,
+              method: str,
+              url: str,
+              params: Optional[dict[str, object]] = None,
+              data: Any = None,
+              headers: Optional[dict[str, str]] = None):
+        """
+        Start a request, to be used as an async context manager.
+
+        Parameters
+        ----------
+        method : str
+            'get' or 'post'.
+        url : str
+            Request URL.
+        params : dict[str, object], optional
+            Query parameters.
+        data : Any, optional
+            Form parameters as a dict, or an upload body with a `read` method.
+        headers : dict[str, str], optional
+            Request headers.
+
+        Returns
+        -------
+        aiohttp.client._RequestContextManager
+            Pending request.
+        """
+        # requests leaves out None headers, such as the token before login
+        headers = {name: value for name, value in (self._merge_headers(headers) or {}).items()
+                   if value is not None}
+        kwargs = {}
+        if isinstance(data, dict):
+            data = urllib.parse.urlencode(_encode_pairs(data))
+            headers.setdefault(
+                'Content-Type', 'application/x-www-form-urlencoded')
+        elif hasattr(data, 'read'):
+            data = _iter_upload(data)
+            # DSM answers an upload once the file is written, no read timeout
+            kwargs['timeout'] = aiohttp.ClientTimeout(
+                sock_connect=self._retry_policy.connect_timeout)
+        return self._get_client_session().request(
+            method.upper(), url, params=_encode_pairs(params), data=data, headers=headers, **kwargs)
+
+    async def _arequest(self,
+                        method: str,
+                        url: str,
+                        params: Optional[dict[str, object]] = None,
+                        data: Any = None,
+                        headers: Optional[dict[str, str]] = None
+                        ) -> AsyncResponse:
+        """
+        Send a request and read its response.
+
+        Parameters
+        ----------
+        method : str
+            'get' or 'post'.
+        url : str
+            Request URL.
+        params : dict[str, object], optional
+            Query parameters.
+        data : Any, optional
+            Form parameters as a dict, or an upload body with a `read` method.
+        headers : dict[str, str], optional
+            Request headers.
+
+        Returns
+        -------
+        AsyncResponse
+            Response with its body read.
+        """
+        self._check_circuit()
+        with self._reporting_circuit_errors(), _requests_errors():
+            async with self._open(method, url, params, data, headers) as response:
+                content = await response.read()
+                self._record_circuit(status_code=response.status)
+                return AsyncResponse(
+                    response.status, response.reason or '', str(response.url),
+                    dict(response.headers),
+                    {name: morsel.value for name,
+                        morsel in response.cookies.items()},
+                    content)
+
+    @contextlib.contextmanager
+    def _reporting_circuit_errors(self) -> Iterator[None]:
+        """
+        Report the transport errors of the wrapped request to the circuit breaker.
+
+        Yields
+        ------
+        None
+            Runs the wrapped block.
+        """
+        try:
+            yield
+        except requests.exceptions.RequestException as e:
+            self._record_circuit(error=e)
+            raise
+
+    async def _asend_with_retry(self,
+                                send: Callable[[], Awaitable[AsyncResponse]],
+                                idempotent: bool
+                                ) -> AsyncResponse:
+        """
+        Send a request, replaying it on transient failures according to the retry policy.
+
+        Parameters
+        ----------
+        send : Callable[[], Awaitable[AsyncResponse]]
+            Sends the request and calls `raise_for_status`, once per attempt.
+        idempotent : bool
+            Whether the API call may be replayed.
+
+        Returns
+        -------
+        AsyncResponse
+            Response of the first successful attempt.
+        """
+        self._last_used = time.monotonic()
+        policy = self._retry_policy
+        max_retries = policy.max_retries if idempotent else 0
+        retry_number = 0
+        slept = 0.0
+        while True:
+            try:
+                return await self._asend_governed(send)
+            except requests.exceptions.RequestException as e:
+                retry_number += 1
+                if retry_number > max_retries or not policy.is_retryable_error(e):
+                    raise
+                delay = policy.get_backoff(retry_number)
+                if policy.retry_budget is not None and slept + delay > policy.retry_budget:
+                    raise
+                if self._debug is True:
+                    print('Request failed, retry %d/%d in %.2fs: %s' %
+                          (retry_number, max_retries, delay, e))
+                await asyncio.sleep(delay)
+                slept += delay
+
+    async def _asend_governed(self, send: Callable[[], Awaitable[AsyncResponse]]) -> AsyncResponse:
+        """
+        Send one attempt of a request in a slot of the governor, if any.
+
+        Parameters
+        ----------
+        send : Callable[[], Awaitable[AsyncResponse]]
+            Sends the request and calls `raise_for_status`.
+
+        Returns
+        -------
+        AsyncResponse
+            Response of the attempt.
+        """
+        governor = self._governor
+        if governor is None:
+            return await send()
+        started = await governor.aacquire()
+        congested = False
+        try:
+            return await send()
+        except requests.exceptions.RequestException as e:
+            congested = is_overload_error(e)
+            raise
+        finally:
+            governor.release(started, congested)
+
+    async def _asend_with_relogin(self,
+                                  send: Callable[[], Awaitable[AsyncResponse]],
+                                  idempotent: bool,
+                                  replayable: bool = True
+                                  ) -> AsyncResponse:
+        """
+        Send a request, logging in again and replaying it once if the session expired.
+
+        Parameters
+        ----------
+        send : Callable[[], Awaitable[AsyncResponse]]
+            Sends the request, reading the live sid and token on each call.
+        idempotent : bool
+            Whether the API call may be replayed on transport errors.
+        replayable : bool, optional
+            Whether the request can be sent a second time after a new login. Defaults to True.
+
+        Returns
+        -------
+        AsyncResponse
+            Response of the request, sent with a valid session.
+        """
+        sent_sid = self._sid
+        response = await self._asend_with_retry(send, idempotent)
+        if not self._auto_relogin or not replayable or sent_sid is None:
+            return response
+
+        try:
+            error_code = self._get_error_code(decode_response(response))
+        except ValueError:
+            return response
+        if error_code not in SESSION_EXPIRED_CODES:
+            return response
+
+        if self._debug is True:
+            print('Session expired: ' +
+                  self._get_error_message(error_code, 'Auth') + ', logging in again')
+        await self._arelogin(sent_sid)
+        return await self._asend_with_retry(send, idempotent)
+
+    async def _arelogin(self, expired_sid: Optional[str]) -> None:
+        """
+        Renew an expired session, once for all the tasks that noticed the expiry.
+
+        Parameters
+        ----------
+        expired_sid : str, optional
+            The sid the failed request was sent with.
+        """
+        async with self._async_login_lock:
+            if self._sid != expired_sid:
+                # Another task already logged in again.
+                return
+            self._session_expire = True
+            await self.login()
+            self._call_hooks(self._hooks, 'on_relogin')
+
+    async def aclose(self) -> None:
+        """Save the session to the session store, if any, and release all connections."""
+        client_session, self._client_session = self._client_session, None
+        if client_session is not None:
+            await client_session.close()
+        super(AsyncAuthentication, self).close()
+
+    def close(self) -> Optional[asyncio.Future]:
+        """
+        Release the connections from synchronous code, e.g. `SessionRegistry.close`.
+
+        Returns
+        -------
+        asyncio.Future or None
+            The scheduled `aclose`, when called inside a running event loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # The loop owning the aiohttp session is gone, only the blocking part can be released.
+            super(AsyncAuthentication, self).close()
+            return None
+        return asyncio.ensure_future(self.aclose())
+
+    # -- login ----------------------------------------------------------
+
+    async def get_ik_message(self) -> str:
+        """
+        Get the IK message for authentication.
+
+        Returns
+        -------
+        str
+            The IK message.
+        """
+        url = self._base_url + 'entry.cgi/SYNO.API.Auth.UIConfig'
+        data = {
+            "api": "SYNO.API.Auth.UIConfig",
+            "method": "get",
+            "version": "1"
+        }
+        response = await self._arequest('post', url, data=data)
+        if response.status_code != 200:
+            raise Exception("Failed to access the URL for IK message. Status code: {}".format(
+                response.status_code))
+        if "_SSID" not in response.cookies:
+            raise Exception("Cookie '_SSID' not found in the response.")
+        return self._start_noise_handshake(response.cookies["_SSID"])
+
+    async def _aget_enc_info(self) -> dict[str, object]:
+        """
+        Retrieve encryption information from the Synology API.
+
+        Returns
+        -------
+        dict[str, object]
+            Encryption information including public key and cipher details.
+        """
+        req_params = {
+            "method": "getinfo",
+            "version": 1,
+            "format": "module"
+        }
+        response = await self.request_data('SYNO.API.Encryption', "encryption.cgi", req_params)
+        return response["data"]
+
+    async def login(self) -> None:
+        """
+        Log in to the Synology DSM and obtain a session ID and token.
+
+        Raises
+        ------
+        SynoConnectionError
+            If a connection error occurs.
+        HTTPError
+            If an HTTP error occurs.
+        JSONDecodeError
+            If the response cannot be decoded as JSON.
+        LoginError
+            If login fails due to an API error.
+        """
+        if (self._session_expire or self._sid is None) and await self._aresume_session():
+            return
+        if not self._session_expire and self._sid is not None:
+            if self._debug is True:
+                print('User already logged in')
+            return
+
+        ik_message = await self.get_ik_message() if self._version >= 7 else None
+        enc_info = None if self._secure else await self._aget_enc_info()
+        params = self._get_login_params(ik_message, enc_info)
+
+        with _syno_errors():
+            response = await self._arequest(
+                'post', self._base_url + self._login_api, data=params)
+            response.raise_for_status()
+            session_request_json = decode_response(response)
+        self._handle_login_response(session_request_json)
+        return
+
+    async def _aresume_session(self) -> bool:
+        """
+        Resume the session saved in the session store, if it is still valid.
+
+        Returns
+        -------
+        bool
+            True if the saved session was restored, False if a full login is needed.
+        """
+        if not self._restore_saved_session():
+            return False
+        try:
+            response = await self._arequest('get', self._base_url + 'entry.cgi', self._session_check_params,
+                                            headers=self._get_request_headers())
+            response.raise_for_status()
+            valid = not self._get_error_code(decode_response(response))
+        except (requests.exceptions.RequestException, ValueError):
+            valid = False
+        return self._finish_session_resume(valid)
+
+    async def logout(self) -> None:
+        """
+        Log out from the Synology DSM and invalidate the session.
+
+        Raises
+        ------
+        SynoConnectionError
+            If a connection error occurs.
+        HTTPError
+            If an HTTP error occurs.
+        JSONDecodeError
+            If the response cannot be decoded as JSON.
+        LogoutError
+            If logout fails due to an API error.
+        """
+        param = {'version': self._version,
+                 'method': 'logout', 'session': 'webui'}
+        with _syno_errors():
+            response = await self._arequest(
+                'get', self._base_url + self._login_api + '?api=SYNO.API.Auth', param)
+            response.raise_for_status()
+            error_code = self._get_error_code(decode_response(response))
+        self._finish_logout(error_code)
+        return
+
+    # -- API catalog ----------------------------------------------------
+
+    def get_api_list(self, app: Optional[str] = None) -> None:
+        """
+        Filter the loaded API catalog by application name.
+
+        Parameters
+        ----------
+        app : str, optional
+            Filter APIs by application name, the matches are added to `app_api_list`.
+
+        Raises
+        ------
+        RuntimeError
+            If the catalog was not loaded with `fetch_api_list` yet.
+        """
+        if not self._api_catalog_loaded:
+            raise RuntimeError(
+                'The API catalog is not loaded, await fetch_api_list() first')
+        if app is not None:
+            self.app_api_list.update(self._get_app_api_list(app))
+        return
+
+    async def fetch_api_list(self, app: Optional[str] = None, refresh: bool = False) -> None:
+        """
+        Load the `SYNO.API.Info` catalog, then filter it like `get_api_list`.
+
+        Parameters
+        ----------
+        app : str, optional
+            Filter APIs by application name, the matches are added to `app_api_list`.
+        refresh : bool, optional
+            Download the catalog again even if it is already loaded. Defaults to False.
+        """
+        async with self._async_catalog_lock:
+            if refresh or not self._api_catalog_loaded:
+                catalog = None if refresh else self._load_cached_api_catalog()
+                if catalog is not None and self._api_cache.validate:
+                    current = await self._aquery_api_catalog(','.join(VALIDATION_APIS))
+                    if any(catalog.get(name) != info for name, info in current.items()):
+                        catalog = None
+                from_cache = catalog is not None
+                if catalog is None:
+                    catalog = await self._aquery_api_catalog()
+                self._install_api_catalog(catalog, from_cache)
+        self.get_api_list(app)
+        return
+
+    async def _aquery_api_catalog(self, query: str = 'all') -> dict[str, dict[str, object]]:
+        """
+        Send a `SYNO.API.Info` query.
+
+        Parameters
+        ----------
+        query : str, optional
+            Comma separated API names, or `all`. Defaults to `all`.
+
+        Returns
+        -------
+        dict[str, dict[str, object]]
+            API information keyed by API name.
+        """
+        url = self._base_url + 'query.cgi?api=SYNO.API.Info'
+        list_query = {'version': '1', 'method': 'query', 'query': query}
+
+        async def send() -> AsyncResponse:
+            """
+            Send one attempt of the catalog query.
+
+            Returns
+            -------
+            AsyncResponse
+                Response of the attempt, checked with `raise_for_status`.
+            """
+            response = await self._arequest('get', url, list_query)
+            response.raise_for_status()
+            return response
+
+        with _syno_errors():
+            response = await self._asend_with_retry(send, True)
+            return decode_response(response)['data']
+
+    # -- API requests ---------------------------------------------------
+
+    async def request_data(self,
+                           api_name: str,
+                           api_path: str,
+                           req_param: dict[str, object],
+                           method: Optional[str] = None,
+                           data: Any = None,
+                           response_json: bool = True
+                           ) -> dict[str, object] | str | list | AsyncResponse:
+        """
+        Send a request to the Synology API and handle errors based on the API name.
+
+        Parameters
+        ----------
+        api_name : str
+            The name of the Synology API to call.
+        api_path : str
+            The path to the API endpoint.
+        req_param : dict[str, object]
+            The parameters to include in the request.
+        method : str, optional
+            The HTTP method to use ('get' or 'post'). Defaults to 'get' if not specified.
+        data : Any, optional
+            Upload body, e.g. a `MultipartEncoder`.
+        response_json : bool, optional
+            Whether to return the response as JSON. If False, returns the response object.
+
+        Returns
+        -------
+        dict[str, object] or str or list or AsyncResponse
+            The response from the API, either as a JSON-decoded object or the response.
+        """
+        self._lowercase_booleans(req_param)
+        if data is not None or response_json is not True:
+            return await self._asend_request(api_name, api_path, req_param, method, data,
+                                             response_json)
+
+        # Reads may be answered by the cache, or by an identical call in flight
+        cache = self._response_cache
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(
+                api_name, req_param, self._request_scope)
+            if cache_key is not None:
+                cached = cache.get(cache_key)
+                if cached is not MISSING:
+                    return cached
+                cache_generation = cache.generation
+
+        def send() -> Awaitable[dict[str, object] | str | list]:
+            """
+            Start sending the request, for the caller or the coalesced waiters.
+
+            Returns
+            -------
+            Awaitable[dict[str, object] | str | list]
+                Coroutine returning the decoded response.
+            """
+            return self._asend_request(api_name, api_path, req_param, method)
+
+        flight_key = None
+        if self._single_flight is not None:
+            flight_key = self._single_flight.make_key(
+                api_name, req_param, self._request_scope)
+        if flight_key is not None:
+            response = await self._single_flight.ado(flight_key, send)
+        else:
+            response = await send()
+
+        if cache_key is not None and isinstance(response, dict) and not self._get_error_code(response):
+            cache.put(cache_key, response, cache_generation)
+        return response
+
+    async def _asend_request(self,
+                             api_name: str,
+                             api_path: str,
+                             req_param: dict[str, object],
+                             method: Optional[str] = None,
+                             data: Any = None,
+                             response_json: bool = True
+                             ) -> dict[str, object] | str | list | AsyncResponse:
+        """
+        Send an API request and check its error code, bypassing cache and coalescing.
+
+        The request is reported to the hooks of the session, if any.
+
+        Parameters
+        ----------
+        api_name : str
+            The name of the Synology API to call.
+        api_path : str
+            The path to the API endpoint.
+        req_param : dict[str, object]
+            The parameters to include in the request.
+        method : str, optional
+            The HTTP method to use ('get' or 'post'). Defaults to 'get'.
+        data : Any, optional
+            Upload body.
+        response_json : bool, optional
+            Whether to return the response as JSON. Defaults to True.
+
+        Returns
+        -------
+        dict[str, object] or str or list or AsyncResponse
+            The response, see `request_data`.
+        """
+        hooks = self._hooks
+        if not hooks:
+            return await self._asend_checked_request(None, api_name, api_path, req_param, method,
+                                                     data, response_json)
+        url = ('%s%s' % (self._base_url, api_path)) + '?api=' + api_name
+        with self._observe_request(hooks, api_name, req_param, method, url, data) as event:
+            return await self._asend_checked_request(event, api_name, api_path, req_param, method,
+                                                     data, response_json)
+
+    async def _asend_checked_request(self,
+                                     event: Optional[RequestEvent],
+                                     api_name: str,
+                                     api_path: str,
+                                     req_param: dict[str, object],
+                                     method: Optional[str] = None,
+                                     data: Any = None,
+                                     response_json: bool = True
+                                     ) -> dict[str, object] | str | list | AsyncResponse:
+        """
+        Send an API request and check its error code.
+
+        Parameters
+        ----------
+        event : RequestEvent, optional
+            Event completed with the attempts, response and error code,
+            None without hooks.
+        api_name : str
+            The name of the Synology API to call.
+        api_path : str
+            The path to the API endpoint.
+        req_param : dict[str, object]
+            The parameters to include in the request.
+        method : str, optional
+            The HTTP method to use ('get' or 'post'). Defaults to 'get'.
+        data : Any, optional
+            Upload body.
+        response_json : bool, optional
+            Whether to return the response as JSON. Defaults to True.
+
+        Returns
+        -------
+        dict[str, object] or str or list or AsyncResponse
+            The response, see `request_data`.
+        """
+        if method is None:
+            method = 'get'
+        url = ('%s%s' % (self._base_url, api_path)) + '?api=' + api_name
+
+        async def send() -> AsyncResponse:
+            """
+            Send one attempt of the request with the live sid.
+
+            Returns
+            -------
+            AsyncResponse
+                Response of the attempt, checked with `raise_for_status`.
+            """
+            req_param['_sid'] = self._sid
+            if event is not None:
+                event.attempts += 1
+            if method == 'get':
+                response = await self._arequest(
+                    'get', url, req_param, headers=self._get_request_headers())
+            elif data is None:
+                response = await self._arequest(
+                    'post', url, data=req_param, headers=self._get_request_headers())
+            else:
+                upload_url = ('%s%s' % (self._base_url, api_path)) + \
+                    '/' + api_name
+                response = await self._arequest(
+                    'post', upload_url, req_param, data=data,
+                    headers=self._get_request_headers({"Content-Type": data.content_type}))
+            if event is not None:
+                event.record_response(response)
+            response.raise_for_status()
+            return response
+
+        # A streamed upload body can not be sent twice
+        idempotent = data is None and self._retry_policy.is_idempotent(
+            req_param.get('method'))
+        try:
+            with _syno_errors():
+                response = await self._asend_with_relogin(send, idempotent, replayable=data is None)
+        finally:
+            self._invalidate_cache(
+                [{'api': api_name, 'method': req_param.get('method')}])
+
+        error_code = 0
+        try:
+            error_code = self._get_error_code(decode_response(response))
+        except requests.exceptions.JSONDecodeError:
+            if not syn.USE_EXCEPTIONS:
+                raise
+
+        if error_code:
+            if event is not None:
+                event.error_code = error_code
+            if error_code == CODE_API_NOT_FOUND and self._api_catalog_from_cache:
+                # The cached catalog is outdated, e.g. after a DSM update.
+                await self.fetch_api_list(refresh=True)
+            self._raise_api_error(api_name, error_code)
+
+        if response_json is True:
+            return decode_response(response)
+        else:
+            return response
+
+    async def request_multi_datas(self,
+                                  compound: Optional[list[dict[str, object]]] = None,
+                                  method: Optional[str] = None,
+                                  mode: Optional[str] = "sequential",
+                                  response_json: bool = True,
+                                  stop_when_error: bool = True,
+                                  max_chunk_bytes: int = COMPOUND_CHUNK_BYTES,
+                                  max_chunk_requests: Optional[int] = None,
+                                  concurrency: int = 1,
+                                  as_results: bool = False
+                                  ) -> dict[str, object] | str | list | AsyncResponse | list[SubRequestResult]:
+        """
+        Send multiple requests to the Synology API, either sequentially or in parallel.
+
+        Parameters
+        ----------
+        compound : list[dict[str, object]], optional
+            Requests to execute, see `Authentication.request_multi_datas`.
+        method : str, optional
+            The HTTP method to use ('get' or 'post'). Defaults to 'get', or
+            'post' when the URL would be too long.
+        mode : str, optional
+            "sequential" or "parallel". Defaults to "sequential".
+        response_json : bool, optional
+            Whether to return the response as JSON. If False, returns the response object.
+        stop_when_error : bool, optional
+            Skip the remaining requests after the first failed one. Defaults to True.
+        max_chunk_bytes : int, optional
+            Maximum size of the JSON encoded requests of one chunk. Defaults to 64 KiB.
+        max_chunk_requests : int, optional
+            Maximum number of requests of one chunk. Defaults to no limit.
+        concurrency : int, optional
+            Number of chunks sent at once. Defaults to 1.
+        as_results : bool, optional
+            Return one `SubRequestResult` per request of `compound`. Defaults to False.
+
+        Returns
+        -------
+        dict[str, object] or str or list or AsyncResponse or list[SubRequestResult]
+            The response from the API.
+        """
+        chunks = self._split_compound(
+            compound or [], max_chunk_bytes, max_chunk_requests)
+        if concurrency > 1 and stop_when_error and len(chunks) > 1:
+            raise ValueError(
+                'stop_when_error requires the chunks to be sent one at a time')
+
+        if as_results:
+            outcomes = await self._asend_compound_chunks(
+                chunks, method, mode, stop_when_error, concurrency, capture_errors=True)
+            return self._compound_results(chunks, outcomes)
+
+        responses = await self._asend_compound_chunks(
+            chunks, method, mode, stop_when_error, concurrency)
+        if response_json is True:
+            return self._merge_compound_responses([decode_response(response) for response in responses])
+        else:
+            return responses[0] if len(responses) == 1 else responses
+
+    async def _asend_compound(self,
+                              compound: list[dict[str, object]],
+                              method: Optional[str],
+                              mode: Optional[str],
+                              stop_when_error: bool
+                              ) -> AsyncResponse:
+        """
+        Send one compound request.
+
+        Parameters
+        ----------
+        compound : list[dict[str, object]]
+            Requests to execute.
+        method : str, optional
+            'get' or 'post', None to pick from the URL length.
+        mode : str, optional
+            "sequential" or "parallel".
+        stop_when_error : bool
+            Skip the remaining requests after the first failed one.
+
+        Returns
+        -------
+        AsyncResponse
+            Response of the compound request.
+        """
+        url, req_param = self._get_multi_request(
+            compound, mode, stop_when_error)
+        method = self._get_compound_method(url, req_param, method)
+        hooks = self._hooks
+        if hooks:
+            with self._observe_request(hooks, req_param['api'], req_param, method, url) as event:
+                return await self._asend_compound_request(event, compound, url, req_param, method)
+        return await self._asend_compound_request(None, compound, url, req_param, method)
+
+    async def _asend_compound_request(self,
+                                      event: Optional[RequestEvent],
+                                      compound: list[dict[str, object]],
+                                      url: str,
+                                      req_param: dict[str, object],
+                                      method: str
+                                      ) -> AsyncResponse:
+        """
+        Send the request of a compound.
+
+        Parameters
+        ----------
+        event : RequestEvent, optional
+            Event completed with the attempts and response, None without hooks.
+        compound : list[dict[str, object]]
+            Requests to execute.
+        url : str
+            Request URL.
+        req_param : dict[str, object]
+            Parameters of the SYNO.Entry.Request call.
+        method : str
+            'get' or 'post'.
+
+        Returns
+        -------
+        AsyncResponse
+            Response of the compound request.
+        """
+        async def send() -> AsyncResponse:
+            """
+            Send one attempt of the compound request with the live sid.
+
+            Returns
+            -------
+            AsyncResponse
+                Response of the attempt, checked with `raise_for_status`.
+            """
+            req_param['_sid'] = self._sid
+            if event is not None:
+                event.attempts += 1
+            if method == 'get':
+                response = await self._arequest(
+                    'get', url, req_param, headers=self._get_request_headers())
+            else:
+                response = await self._arequest(
+                    'post', url, data=req_param, headers=self._get_request_headers())
+            if event is not None:
+                event.record_response(response)
+            response.raise_for_status()
+            return response
+
+        # The compound is only replayed when every sub request is read-only
+        idempotent = all(self._retry_policy.is_idempotent(request.get('method'))
+                         for request in compound)
+        try:
+            with _syno_errors():
+                return await self._asend_with_relogin(send, idempotent)
+        finally:
+            self._invalidate_cache(compound)
+
+    async def _asend_compound_chunks(self,
+                                     chunks: list[list[dict[str, object]]],
+                                     method: Optional[str],
+                                     mode: Optional[str],
+                                     stop_when_error: bool,
+                                     concurrency: int,
+                                     capture_errors: bool = False
+                                     ) -> list[AsyncResponse | Exception]:
+        """
+        Send the chunks of a compound, one at a time or concurrently.
+
+        Parameters
+        ----------
+        chunks : list[list[dict[str, object]]]
+            Chunks from `_split_compound`.
+        method : str, optional
+            'get' or 'post', None to pick from the URL length of each chunk.
+        mode : str, optional
+            "sequential" or "parallel".
+        stop_when_error : bool
+            Do not send the chunks following a failed one.
+        concurrency : int
+            Number of chunks sent at once.
+        capture_errors : bool, optional
+            Return the exception of a failed chunk instead of raising it. Defaults to False.
+
+        Returns
+        -------
+        list[AsyncResponse or Exception]
+            Outcome of each chunk sent, in order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send_chunk(chunk: list[dict[str, object]]) -> AsyncResponse | Exception:
+            """
+            Send one chunk, once a slot of the semaphore is free.
+
+            Parameters
+            ----------
+            chunk : list[dict[str, object]]
+                Requests of the chunk.
+
+            Returns
+            -------
+            AsyncResponse or Exception
+                Response of the chunk, or its error when errors are captured.
+            """
+            try:
+                async with semaphore:
+                    return await self._asend_compound(chunk, method, mode, stop_when_error)
+            except Exception as e:
+                if not capture_errors:
+                    raise
+                return e
+
+        if concurrency > 1 and len(chunks) > 1:
+            return list(await asyncio.gather(*(send_chunk(chunk) for chunk in chunks)))
+        outcomes = []
+        for chunk in chunks:
+            outcomes.append(await send_chunk(chunk))
+            if stop_when_error and self._is_compound_failed(outcomes[-1]):
+                break
+        return outcomes
+
+    async def request_webapi_data(self,
+                                  api_name: str,
+                                  api_path: str,
+                                  req_param: dict[str, object],
+                                  method: Optional[str] = None,
+                                  response_json: bool = True
+                                  ) -> dict[str, object] | str | list | AsyncResponse:
+        """
+        Send a DSM webapi request using the browser-style JSON API contract.
+
+        Parameters
+        ----------
+        api_name : str
+            DSM API name.
+        api_path : str
+            API endpoint path from `SYNO.API.Info`.
+        req_param : dict
+            Request parameters containing at least `method` and `version`.
+        method : str, optional
+            HTTP method to use. Defaults to `post`.
+        response_json : bool, optional
+            If true, return decoded JSON; otherwise return the response object.
+
+        Returns
+        -------
+        dict, str, list or AsyncResponse
+            Decoded API response, or the response object.
+        """
+        if method is None:
+            method = 'post'
+        if method not in ('get', 'post'):
+            raise ValueError("Unsupported request method: %s" % method)
+        encoded_param = self._encode_webapi_params(api_name, req_param)
+        url = ('%s%s' % (self._base_url, api_path)) + '/' + api_name
+
+        async def send() -> AsyncResponse:
+            """
+            Send one attempt of the webapi request with the live sid.
+
+            Returns
+            -------
+            AsyncResponse
+                Response of the attempt, checked with `raise_for_status`.
+            """
+            headers = self._get_request_headers(
+                {"Cookie": "id=%s" % self._sid})
+            if method == 'get':
+                response = await self._arequest('get', url, encoded_param, headers=headers)
+            else:
+                response = await self._arequest('post', url, data=encoded_param, headers=headers)
+            response.raise_for_status()
+            return response
+
+        try:
+            with _syno_errors():
+                response = await self._asend_with_relogin(
+                    send, self._retry_policy.is_idempotent(req_param["method"]))
+        finally:
+            self._invalidate_cache(
+                [{'api': api_name, 'method': req_param['method']}])
+
+        error_code = 0
+        try:
+            error_code = self._get_error_code(decode_response(response))
+        except requests.exceptions.JSONDecodeError:
+            pass
+        if error_code:
+            self._raise_webapi_error(api_name, error_code)
+
+        if response_json is True:
+            return decode_response(response)
+        else:
+            return response
+
+    async def stream_data(self,
+                          api_name: str,
+                          api_path: str,
+                          req_param: dict[str, object],
+                          method: Optional[str] = None,
+                          chunk_size: int = 64 * 1024
+                          ) -> AsyncIterator[bytes]:
+        """
+        Send a request and yield the response body in chunks, e.g. for file downloads.
+
+        Parameters
+        ----------
+        api_name : str
+            The name of the Synology API to call.
+        api_path : str
+            The path to the API endpoint.
+        req_param : dict[str, object]
+            The parameters to include in the request.
+        method : str, optional
+            The HTTP method to use ('get' or 'post'). Defaults to 'get'.
+        chunk_size : int, optional
+            Maximum size of the yielded chunks. Defaults to 64 KiB.
+
+        Yields
+        ------
+        bytes
+            Chunks of the response body.
+        """
+        self._lowercase_booleans(req_param)
+        if method is None:
+            method = 'get'
+        url = ('%s%s' % (self._base_url, api_path)) + '?api=' + api_name
+
+        for attempt in range(2):
+            sent_sid = self._sid
+            req_param['_sid'] = sent_sid
+            params, data = (req_param, None) if method == 'get' else (
+                None, req_param)
+            self._check_circuit()
+            with _syno_errors(), self._reporting_circuit_errors(), _requests_errors():
+                async with self._open(method, url, params, data, self._get_request_headers()) as response:
+                    self._record_circuit(status_code=response.status)
+                    if response.status >= 400:
+                        raise requests.exceptions.HTTPError(
+                            '%s Error: %s for url: %s' % (response.status, response.reason, response.url))
+                    if response.content_type != 'application/json':
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            yield chunk
+                        return
+                    # DSM reports errors of download APIs as JSON
+                    content = await response.read()
+
+            error_code = 0
+            try:
+                error_code = self._get_error_code(
+                    get_json_codec().loads(content))
+            except ValueError:
+                pass
+            if error_code in SESSION_EXPIRED_CODES and self._auto_relogin and attempt == 0:
+                await self._arelogin(sent_sid)
+                continue
+            if error_code:
+                self._raise_api_error(api_name, error_code)
+            yield content
+            return
+
+
+async def connect(ip_address: Optional[str] = None,
+                  port: Optional[str] = None,
+                  username: Optional[str] = None,
+                  password: Optional[str] = None,
+                  session_registry: Optional[SessionRegistry] = None,
+                  **kwargs: Any
+                  ) -> AsyncAuthentication:
+    """
+    Log in asynchronously and register the session for the API classes.
+
+    API objects created afterwards with the same host, port, username and
+    QuickConnect ID (or without credentials, when it is the only session of
+    the registry) run on the returned session, their methods return coroutines.
+
+    Parameters
+    ----------
+    ip_address : str, optional
+        The IP/DNS address of the NAS.
+    port : str, optional
+        The port of the NAS.
+    username : str, optional
+        The username to use for authentication.
+    password : str, optional
+        The password to use for authentication.
+    session_registry : SessionRegistry, optional
+        Registry to register the session in. Defaults to `BaseApi.session_registry`.
+    **kwargs : Any
+        Other keyword parameters of `Authentication`.
+
+    Returns
+    -------
+    AsyncAuthentication
+        Logged in session with its API catalog loaded.
+    """
+    session = AsyncAuthentication(
+        ip_address, port, username, password, **kwargs)
+    await session.login()
+    await session.fetch_api_list()
+    registry = BaseApi.session_registry if session_registry is None else session_registry
+    registry.register(SessionRegistry.make_key(
+        ip_address, port, username, kwargs.get('quickconnect_id')), session)
+    return session
@@ -1,39 +1,61 @@
 """Provides authentication and API request handling for Synology DSM, including session management, encryption utilities, and error handling for various Synology services."""
 from __future__ import annotations
+import contextlib
+import contextvars
 import secrets
-from typing import Optional, Any, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Optional, Any, Union, Callable, Iterable, Iterator
 import requests
 import json
 
 from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
 
 from .error_codes import error_codes, CODE_SUCCESS, CODE_UNKNOWN, download_station_error_codes, file_station_error_codes
+from .error_codes import SESSION_EXPIRED_CODES, CODE_API_NOT_FOUND
 from .error_codes import auth_error_codes, virtualization_error_codes
 from .error_codes import iscsi_lun_error_codes, iscsi_target_error_codes
 from urllib3 import disable_warnings
 from urllib3.exceptions import InsecureRequestWarning
 from .exceptions import CoreError
+from .exceptions import CircuitOpenError
 from .exceptions import SynoConnectionError, HTTPError, JSONDecodeError, LoginError, LogoutError, DownloadStationError
 from .exceptions import FileStationError, AudioStationError, ActiveBackupError, ActiveBackupMicrosoftError, VirtualizationError, BackupError
 from .exceptions import CertificateError, CloudSyncError, DHCPServerError, DirectoryServerError, DockerError, DriveAdminError
 from .exceptions import LogCenterError, NoteStationError, OAUTHError, PhotosError, SecurityAdvisorError, TaskSchedulerError, EventSchedulerError
 from .exceptions import UniversalSearchError, USBCopyError, VPNError, CoreSysInfoError, UndefinedError
 from .exceptions import LunError, TargetError
+from .retry import RetryPolicy, NO_RETRY, is_upload_body
+from .api_cache import ApiCatalogCache, VALIDATION_APIS
+from .session_store import SessionStore, NONCE_RESERVATION
+from .json_codec import decode_response, get_json_codec
+from requests.adapters import BaseAdapter
+from .http_adapter import AbortableHTTPAdapter, RequestAborted
+from .batch import RequestBatch, BatchCall, SubRequestResult, DEFAULT_BATCH_SIZE, COMPOUND_CHUNK_BYTES, MAX_GET_URL_LENGTH
+from .streaming import StreamedResponse, DEFAULT_CHUNK_SIZE
+from .response_cache import ResponseCache, MISSING
+from .single_flight import SingleFlight
+from .governor import ConcurrencyGovernor, is_overload_error
+from .circuit_breaker import CircuitBreaker, is_failure_error, is_failure_status, probe_request
+from .quickconnect_cache import QuickConnectCache
+from .instrumentation import RequestEvent, RequestHooks, estimate_request_size
 import hashlib
 from os import urandom
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives.ciphers import algorithms, Cipher, modes
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
 import base64
 import hashlib
 import urllib
-from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
 import base64
-from noise.connection import NoiseConnection, Keypair
 import time
 
+if TYPE_CHECKING:
+    # cryptography and noise are imported at login, not with the module
+    from noise.connection import NoiseConnection
+
 USE_EXCEPTIONS: bool = True
-QUICKCONNECT_GLOBAL_URL = "https://global.quickconnect.to/Serv.php"
+QUICKCONNECT_GLOBAL_URL = "https://global.quickconnect.to/Serv.php"
+QUICKCONNECT_PINGPONG_PATH = "/webman/pingpong.cgi"
+# Seconds a direct QuickConnect endpoint has to answer its ping
+QUICKCONNECT_PROBE_TIMEOUT = 2.0
 
 
 class Authentication:
@@ -64,23 +86,65 @@ class Authentication:
         Device ID for device binding.
     device_name : str, optional
         Device name for device binding.
-    quickconnect_id : str, optional
-        QuickConnect ID for relay-based access.
+    quickconnect_id : str, optional
+        QuickConnect ID for relay-based access.
+    pool_connections : int, optional
+        Number of per-host connection pools kept by the HTTP session (default is 10).
+    pool_maxsize : int, optional
+        Maximum number of keep-alive connections per host (default is 10).
+    retry_policy : RetryPolicy, optional
+        Timeouts and retry behaviour of API requests (default is timeouts only, no retry).
+    auto_relogin : bool, optional
+        Log in again and replay the request when DSM reports an expired session (default is True).
+    api_cache : ApiCatalogCache, optional
+        On-disk cache of the `SYNO.API.Info` catalog shared between processes (default is None).
+    session_store : SessionStore, optional
+        Store used to resume a session saved by a previous process instead of logging in (default is None).
+    response_cache : ResponseCache, optional
+        Cache answering repeated read calls from memory (default is None).
+    single_flight : SingleFlight, optional
+        Coalescing of identical read calls sent at the same time (default is None).
+    governor : ConcurrencyGovernor, optional
+        Adaptive limit of the requests in flight to the NAS, with priority lanes (default is None).
+    quickconnect_cache : QuickConnectCache, optional
+        Cache of resolved QuickConnect relays, shared between instances and processes (default is None).
+    quickconnect_direct : bool, optional
+        Race the direct LAN and WAN addresses of a QuickConnect NAS before falling back to the relay (default is True).
+    hooks : Iterable[RequestHooks], optional
+        Callbacks around every API request, e.g. a `MetricsCollector` (default is None).
+    transport : BaseAdapter, optional
+        Transport adapter sending the HTTP requests, e.g. a `RecordingTransport` or `ReplayTransport` (default is None).
+    circuit_breaker : CircuitBreaker, optional
+        Fail fast while the NAS stops answering, until a health probe succeeds (default is None).
     """
 
     def __init__(self,
-                 ip_address: Optional[str] = None,
-                 port: Optional[str] = None,
-                 username: Optional[str] = None,
-                 password: Optional[str] = None,
+                 ip_address: Optional[str] = None,
+                 port: Optional[str] = None,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
                  secure: bool = False,
                  cert_verify: bool = False,
                  dsm_version: int = 7,
                  debug: bool = True,
                  otp_code: Optional[str] = None,
                  device_id: Optional[str] = None,
-                 device_name: Optional[str] = None,
-                 quickconnect_id: Optional[str] = None
+                 device_name: Optional[str] = None,
+                 quickconnect_id: Optional[str] = None,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 auto_relogin: bool = True,
+                 api_cache: Optional[ApiCatalogCache] = None,
+                 session_store: Optional[SessionStore] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 governor: Optional[ConcurrencyGovernor] = None,
+                 quickconnect_cache: Optional[QuickConnectCache] = None,
+                 quickconnect_direct: bool = True,
+                 hooks: Optional[Iterable[RequestHooks]] = None,
+                 transport: Optional[BaseAdapter] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None
                  ) -> None:
         """
         Initialize the Authentication object for Synology DSM.
@@ -109,34 +173,94 @@ class Authentication:
             Device ID for device binding (default is None).
         device_name : str, optional
             Device name for device binding (default is None).
-        quickconnect_id : str, optional
-            QuickConnect ID for relay-based access. When provided, HTTPS is
-            always used and `ip_address`/`port` are not required.
+        quickconnect_id : str, optional
+            QuickConnect ID for relay-based access. When provided, HTTPS is
+            always used and `ip_address`/`port` are not required.
+        pool_connections : int, optional
+            Number of per-host connection pools kept by the HTTP session
+            (default is 10).
+        pool_maxsize : int, optional
+            Maximum number of keep-alive connections per host (default is 10).
+        retry_policy : RetryPolicy, optional
+            Timeouts and retry behaviour of API requests. Defaults to
+            `NO_RETRY`: connect/read timeouts are applied, failed calls are
+            not replayed.
+        auto_relogin : bool, optional
+            Log in again and replay the request when DSM answers with a
+            session expiry code (106, 107 or 119). Defaults to True.
+        api_cache : ApiCatalogCache, optional
+            On-disk cache of the `SYNO.API.Info` catalog. When given, the
+            catalog is read from it instead of being downloaded, and refreshed
+            once if a request fails with "API does not exist". Defaults to None.
+        session_store : SessionStore, optional
+            Store of login sessions. When given, `login` first tries the
+            session saved for this NAS and account, checked with a cheap
+            request, and only performs a full login when it has expired.
+            Defaults to None.
+        response_cache : ResponseCache, optional
+            Cache of read-only responses. When given, `request_data` answers
+            repeated read calls from it until they expire, and write calls
+            drop the cached responses of their API namespace. Defaults to None.
+        single_flight : SingleFlight, optional
+            Coalescing of read calls. When given, identical read calls of
+            `request_data` running at the same time share one HTTP request
+            and its response or exception. Defaults to None.
+        governor : ConcurrencyGovernor, optional
+            Limit of the HTTP requests in flight, adapted to the latency and
+            errors of the NAS. Waiting requests are served by lane priority,
+            see `lane`. Share it between the sessions of one NAS. Defaults to None.
+        quickconnect_cache : QuickConnectCache, optional
+            Cache of QuickConnect relay resolutions. When given, a cached relay
+            is reused after a ping instead of asking Synology's global service,
+            and resolved again when a request through it fails. Defaults to None.
+        quickconnect_direct : bool, optional
+            Probe the LAN and WAN addresses QuickConnect lists for the NAS at
+            once, with a short timeout, and connect directly to the first to
+            answer. The relay is used when none answers, or always when False.
+            The route is chosen again when requests through it fail, see
+            `quickconnect_path`. Defaults to True.
+        hooks : Iterable[RequestHooks], optional
+            Called before and after every API request sent to the NAS with a
+            `RequestEvent` (API, method, sizes, status, DSM error code,
+            attempts, latency), and on every new login after an expiry. Use a
+            `MetricsCollector` for aggregated metrics, see `add_hooks`.
+            Defaults to None.
+        transport : BaseAdapter, optional
+            `requests` transport adapter mounted for HTTP and HTTPS instead of
+            the connection pool, e.g. a `RecordingTransport` saving the
+            exchanges to a cassette or a `ReplayTransport` answering from one,
+            see `synology_api.cassette`. `abort_request` then has no effect.
+            Defaults to None.
+        circuit_breaker : CircuitBreaker, optional
+            Counts the consecutive connection errors, timeouts and 429/5xx
+            answers of the NAS. Past its threshold, requests fail at once with
+            `CircuitOpenError` until a background `SYNO.API.Info` probe gets an
+            answer. Share it between the sessions of one NAS. Defaults to None.
 
         Returns
         -------
         None
             Just setter, no return values.
         """
-        if quickconnect_id:
-            missing_credentials = not all([username, password])
-        else:
-            missing_credentials = not all(
-                [ip_address, port, username, password])
-        if missing_credentials:
-            raise ValueError(
-                "Missing required credentials for initial authentication.")
-
-        self._quickconnect_id: Optional[str] = quickconnect_id
-        self._ip_address: Optional[str] = ip_address
-        self._port: Optional[str] = port
+        if quickconnect_id:
+            missing_credentials = not all([username, password])
+        else:
+            missing_credentials = not all(
+                [ip_address, port, username, password])
+        if missing_credentials:
+            raise ValueError(
+                "Missing required credentials for initial authentication.")
+
+        self._quickconnect_id: Optional[str] = quickconnect_id
+        self._ip_address: Optional[str] = ip_address
+        self._port: Optional[str] = port
         self._username: str = username
         self._password: str = password
-        self._secure: bool = True if self._quickconnect_id else secure
+        self._secure: bool = True if self._quickconnect_id else secure
         self._sid: Optional[str] = None
         self._syno_token: Optional[str] = None
-        self._noise_connection: Optional[NoiseConnection] = None
-        self._noise_handshake_hash: Optional[str] = None
+        self._noise_connection: Optional[NoiseConnection] = None
+        self._noise_handshake_hash: Optional[str] = None
         self._session_expire: bool = True
         self._verify: bool = cert_verify
         self._version: int = dsm_version
@@ -148,525 +272,1590 @@ class Authentication:
         if self._verify is False:
             disable_warnings(InsecureRequestWarning)
 
-        self._requests_session: Optional[requests.Session] = None
-        self._quickconnect_headers: dict[str, str] = {}
-        if self._quickconnect_id:
-            self._base_url = self._build_quickconnect_base_url()
-        else:
-            schema = 'https' if secure else 'http'
-            self._base_url = '%s://%s:%s/webapi/' % (
-                schema, self._ip_address, self._port)
+        self._pool_connections: int = pool_connections
+        self._pool_maxsize: int = pool_maxsize
+        self._transport: Optional[BaseAdapter] = transport
+        self._circuit_breaker: Optional[CircuitBreaker] = circuit_breaker
+        self._retry_policy: RetryPolicy = retry_policy or NO_RETRY
+        self._auto_relogin: bool = auto_relogin
+        self._login_lock: threading.RLock = threading.RLock()
+        self._last_used: float = time.monotonic()
+        # Serializes nonce allocation of the X-SYNO-HASH cipher state.
+        self._request_hash_lock: threading.Lock = threading.Lock()
+        # First nonce not reserved by the last save to the session store
+        self._nonce_reserved_until: Optional[int] = None
+        # Keeps the saved reservations in increasing order
+        self._session_save_lock: threading.Lock = threading.Lock()
+        self._requests_session: Optional[requests.Session] = self._build_requests_session(
+        )
+        self._quickconnect_headers: dict[str, str] = {}
+        self._quickconnect_cache: Optional[QuickConnectCache] = quickconnect_cache
+        self._quickconnect_direct: bool = quickconnect_direct
+        self._quickconnect_route: Optional[dict[str, object]] = None
+        # The route in use comes from the cache, resolve it again on failure
+        self._quickconnect_route_cached: bool = False
+        if self._quickconnect_id:
+            self._base_url = self._build_quickconnect_base_url()
+        else:
+            schema = 'https' if secure else 'http'
+            self._base_url = '%s://%s:%s/webapi/' % (
+                schema, self._ip_address, self._port)
 
         self.full_api_list = {}
         self.app_api_list = {}
-
-    def _quickconnect_payload(self, command: str) -> list[dict[str, object]]:
-        """
-        Build a QuickConnect relay discovery request.
-
-        Parameters
-        ----------
-        command : str
-            QuickConnect command to send to Synology's relay service.
-
-        Returns
-        -------
-        list[dict[str, object]]
-            Request payload accepted by the QuickConnect service.
-        """
-        return [{
-            "version": 1,
-            "command": command,
-            "id": "mainapp_https",
-            "serverID": self._quickconnect_id,
-            "stop_when_error": False,
-            "stop_when_success": command == "request_tunnel",
-            "is_gofile": False,
-            "path": ""
-        }]
-
-    @staticmethod
-    def _quickconnect_response_data(response_json: list[dict[str, object]],
-                                    command: str) -> dict[str, object]:
-        """
-        Validate and unwrap a QuickConnect response.
-
-        Parameters
-        ----------
-        response_json : list[dict[str, object]]
-            JSON returned by Synology's QuickConnect service.
-        command : str
-            Command used for the request, included in error messages.
-
-        Returns
-        -------
-        dict[str, object]
-            First successful response item.
-        """
-        if not response_json or response_json[0].get("errno") != 0:
-            error = response_json[0] if response_json else {}
-            errno = error.get("errno", "unknown")
-            errinfo = error.get("errinfo", "")
-            raise SynoConnectionError(
-                error_message=f"QuickConnect {command} failed: {errno} {errinfo}".strip())
-        return response_json[0]
-
-    def _build_quickconnect_base_url(self) -> str:
-        """
-        Resolve a QuickConnect ID to a relay URL and prime relay cookies.
-
-        Returns
-        -------
-        str
-            Base DSM webapi URL through the QuickConnect relay.
-        """
-        try:
-            server_info_response = requests.post(
-                QUICKCONNECT_GLOBAL_URL,
-                json=self._quickconnect_payload("get_server_info"),
-                verify=self._verify
-            )
-            server_info_response.raise_for_status()
-            server_info = self._quickconnect_response_data(
-                server_info_response.json(), "get_server_info")
-            control_host = server_info.get("env", {}).get("control_host")
-            if not control_host:
-                raise SynoConnectionError(
-                    error_message="QuickConnect get_server_info did not return a control_host")
-
-            tunnel_response = requests.post(
-                f"https://{control_host}/Serv.php",
-                json=self._quickconnect_payload("request_tunnel"),
-                verify=self._verify
-            )
-            tunnel_response.raise_for_status()
-            tunnel_info = self._quickconnect_response_data(
-                tunnel_response.json(), "request_tunnel")
-        except requests.exceptions.ConnectionError as e:
-            raise SynoConnectionError(error_message=e.args[0])
-        except requests.exceptions.HTTPError as e:
-            raise HTTPError(error_message=str(e.args))
-        except requests.exceptions.JSONDecodeError as e:
-            raise JSONDecodeError(error_message=str(e.args))
-
-        relay_region = tunnel_info.get("env", {}).get("relay_region")
-        pingpong_path = tunnel_info.get("server", {}).get("pingpong_path")
-        if not relay_region or not pingpong_path:
-            raise SynoConnectionError(
-                error_message="QuickConnect request_tunnel did not return relay_region and pingpong_path")
-
-        quickconnect_origin = f"https://{self._quickconnect_id}.{relay_region}.quickconnect.to"
-        self._ip_address = f"{self._quickconnect_id}.{relay_region}.quickconnect.to"
-        self._port = "443"
-        self._quickconnect_headers = {
-            "Origin": quickconnect_origin,
-            "Referer": quickconnect_origin
-        }
-        self._requests_session = requests.Session()
-        try:
-            ping_response = self._get(
-                f"{quickconnect_origin}{pingpong_path}", verify=self._verify)
-            ping_response.raise_for_status()
-        except requests.exceptions.ConnectionError as e:
-            raise SynoConnectionError(error_message=e.args[0])
-        except requests.exceptions.HTTPError as e:
-            raise HTTPError(error_message=str(e.args))
-
-        return f"{quickconnect_origin}/webapi/"
-
-    def _merge_headers(self, headers: Optional[dict[str, str]] = None) -> dict[str, str] | None:
-        """
-        Merge QuickConnect relay headers into request headers.
-
-        Parameters
-        ----------
-        headers : dict[str, str], optional
-            Request-specific headers.
-
-        Returns
-        -------
-        dict[str, str] or None
-            Merged headers, or None when no headers are needed.
-        """
-        if not self._quickconnect_headers:
-            return headers
-        merged_headers = self._quickconnect_headers.copy()
-        if headers:
-            merged_headers.update(headers)
-        return merged_headers
-
-    def _get(self, url: str, params: Optional[dict[str, object]] = None, **kwargs) -> requests.Response:
-        """
-        Send a GET request through the active transport.
-
-        Parameters
-        ----------
-        url : str
-            Request URL.
-        params : dict[str, object], optional
-            Query parameters.
-        **kwargs : object
-            Additional request keyword arguments.
-
-        Returns
-        -------
-        requests.Response
-            Response from requests.
-        """
-        kwargs["headers"] = self._merge_headers(kwargs.get("headers"))
-        if kwargs["headers"] is None:
-            kwargs.pop("headers")
-        if self._requests_session:
-            return self._requests_session.get(url, params=params, **kwargs)
-        return requests.get(url, params=params, **kwargs)
-
-    def _post(self, url: str, data: Any = None, **kwargs) -> requests.Response:
-        """
-        Send a POST request through the active transport.
-
-        Parameters
-        ----------
-        url : str
-            Request URL.
-        data : Any, optional
-            Request body.
-        **kwargs : object
-            Additional request keyword arguments.
-
-        Returns
-        -------
-        requests.Response
-            Response from requests.
-        """
-        kwargs["headers"] = self._merge_headers(kwargs.get("headers"))
-        if kwargs["headers"] is None:
-            kwargs.pop("headers")
-        if self._requests_session:
-            return self._requests_session.post(url, data=data, **kwargs)
-        return requests.post(url, data=data, **kwargs)
-
-    def get_ik_message(self) -> str:
+        self._api_catalog_loaded: bool = False
+        self._api_catalog_from_cache: bool = False
+        self._api_cache: Optional[ApiCatalogCache] = api_cache
+        self._app_api_index: dict[str, dict[str, dict[str, object]]] = {}
+        self._catalog_lock: threading.Lock = threading.Lock()
+        self._session_store: Optional[SessionStore] = session_store
+        self._response_cache: Optional[ResponseCache] = response_cache
+        self._single_flight: Optional[SingleFlight] = single_flight
+        self._governor: Optional[ConcurrencyGovernor] = governor
+        # Replaced, never mutated, so senders iterate without a lock
+        self._hooks: tuple[RequestHooks, ...] = tuple(hooks or ())
+        # Stack of the batches capturing request_data calls, per thread
+        self._batch_local: threading.local = threading.local()
+
+    def _build_requests_session(self) -> requests.Session:
         """
-        Get the IK message for authentication.
+        Create the keep-alive HTTP session shared by every request of this object.
 
         Returns
         -------
-        str
-            The IK message.
+        requests.Session
+            Session with a connection pool, or the given transport, mounted
+            for HTTP and HTTPS.
         """
+        session = requests.Session()
+        if self._transport is not None:
+            adapter = self._transport
+            self._http_adapter: Optional[AbortableHTTPAdapter] = None
+        else:
+            adapter = self._http_adapter = AbortableHTTPAdapter(
+                pool_connections=self._pool_connections, pool_maxsize=self._pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
 
-        url = self._base_url + 'entry.cgi/SYNO.API.Auth.UIConfig'
-        data = {
-            "api": "SYNO.API.Auth.UIConfig",
-            "method": "get",
-            "version": "1"
-        }
-        response = self._post(url, data=data, verify=self._verify)
+    def abort_request(self, thread_id: int) -> bool:
+        """
+        Abort the HTTP request a thread is blocked on.
 
-        # Try to get cookie "_SSID"
-        if response.status_code != 200:
-            raise Exception("Failed to access the URL for IK message. Status code: {}".format(
-                response.status_code))
-        cookies = response.cookies
-        if "_SSID" not in cookies:
-            raise Exception("Cookie '_SSID' not found in the response.")
-        _SSID_encoded = cookies["_SSID"]
-        _SSID = self.decode_ssid_cookie(_SSID_encoded)
+        The blocked call fails with `RequestAborted`, without retry, and so does
+        every request that thread sends until `reset_aborted_request` is called.
 
-        private_bytes = X25519PrivateKey.generate().private_bytes_raw()
+        Parameters
+        ----------
+        thread_id : int
+            `threading.get_ident()` of the thread sending the request.
 
-        noise = NoiseConnection.from_name(b"Noise_IK_25519_ChaChaPoly_BLAKE2b")
-        noise.set_as_initiator()
-        noise.set_keypair_from_private_bytes(Keypair.STATIC, private_bytes)
-        noise.set_keypair_from_public_bytes(Keypair.REMOTE_STATIC, _SSID)
+        Returns
+        -------
+        bool
+            True if a connection was in use by the thread and got shut down.
+        """
+        if self._http_adapter is None:
+            return False
+        return self._http_adapter.abort(thread_id)
 
-        noise.start_handshake()
+    def reset_aborted_request(self, thread_id: Optional[int] = None) -> None:
+        """
+        Let a thread send requests again after `abort_request`.
 
-        payload = json.dumps({
-            "time": int(time.time()),
-        }).encode('utf-8')
+        Parameters
+        ----------
+        thread_id : int, optional
+            Thread to reset. Defaults to the current thread.
+        """
+        if self._http_adapter is not None:
+            self._http_adapter.reset(thread_id)
+        return
 
-        message = noise.write_message(payload)
-        self._noise_connection = noise
-        ik_message = self.encode_ssid_cookie(message)
+    def close(self) -> None:
+        """
+        Release the pooled connections held by the HTTP session.
 
-        return ik_message
+        The session stays usable, new connections are opened on demand. With a
+        session store, the session is saved, reserving new request-hash nonces.
+        """
+        self._save_session()
+        if self._requests_session:
+            self._requests_session.close()
+        return
 
-    def verify_cert_enabled(self) -> bool:
+    def _quickconnect_payload(self, command: str) -> list[dict[str, object]]:
         """
-        Check if SSL certificate verification is enabled.
+        Build a QuickConnect relay discovery request.
+
+        Parameters
+        ----------
+        command : str
+            QuickConnect command to send to Synology's relay service.
 
         Returns
         -------
-        bool
-            True if certificate verification is enabled, False otherwise.
-        """
-        return self._verify
-
-    def login(self) -> None:
+        list[dict[str, object]]
+            Request payload accepted by the QuickConnect service.
         """
-        Log in to the Synology DSM and obtain a session ID and token.
+        return [{
+            "version": 1,
+            "command": command,
+            "id": "mainapp_https",
+            "serverID": self._quickconnect_id,
+            "stop_when_error": False,
+            "stop_when_success": command == "request_tunnel",
+            "is_gofile": False,
+            "path": ""
+        }]
 
-        Raises
-        ------
-        SynoConnectionError
-            If a connection error occurs.
-        HTTPError
-            If an HTTP error occurs.
-        JSONDecodeError
-            If the response cannot be decoded as JSON.
-        LoginError
-            If login fails due to an API error.
+    @staticmethod
+    def _quickconnect_response_data(response_json: list[dict[str, object]],
+                                    command: str) -> dict[str, object]:
         """
-        login_api = 'entry.cgi' if self._quickconnect_id else 'auth.cgi'
-        params = {'api': "SYNO.API.Auth", 'version': self._version,
-                  'method': 'login', 'enable_syno_token': 'yes', 'client': 'browser'}
+        Validate and unwrap a QuickConnect response.
 
-        if self._version >= 7:
-            params.update({'ik_message': self.get_ik_message()})
+        Parameters
+        ----------
+        response_json : list[dict[str, object]]
+            JSON returned by Synology's QuickConnect service.
+        command : str
+            Command used for the request, included in error messages.
 
-        params_enc = {
-            'account': self._username,
-            'enable_device_token': 'no',
-            'logintype': 'local',
-            'otp_code': '',
-            'rememberme': 0,
-            'passwd': self._password,
-            'session': 'webui',  # Hardcoded for handle non administrator users API usage
-            'format': 'cookie'
-        }
-        if self._secure:
-            params.update(params_enc)
-        else:
-            encrypted_params = self.encrypt_params(params_enc)
-            params.update(encrypted_params)
+        Returns
+        -------
+        dict[str, object]
+            First successful response item.
+        """
+        if not response_json or response_json[0].get("errno") != 0:
+            error = response_json[0] if response_json else {}
+            errno = error.get("errno", "unknown")
+            errinfo = error.get("errinfo", "")
+            raise SynoConnectionError(
+                error_message=f"QuickConnect {command} failed: {errno} {errinfo}".strip())
+        return response_json[0]
+
+    def _build_quickconnect_base_url(self) -> str:
+        """
+        Resolve a QuickConnect ID to the fastest reachable DSM endpoint.
 
-        if self._otp_code:
-            params['otp_code'] = self._otp_code
-        if self._device_id is not None and self._device_name is not None:
-            params['device_id'] = self._device_id
-            params['device_name'] = self._device_name
-        if self._device_id is not None and self._device_name is None or self._device_id is None and self._device_name is not None:
-            print("device_id and device_name must be set together")
+        The direct LAN and WAN addresses listed by QuickConnect are probed at
+        once and the first to answer is used, the relay is the fallback. A
+        route found in the QuickConnect cache is only checked with its ping
+        request, and resolved again if that fails.
 
-        if not self._session_expire and self._sid is not None:
-            self._session_expire = False
-            if self._debug is True:
-                print('User already logged in')
-        else:
-            # Check request for error:
-            session_request_json: dict[str, object] = {}
-            if USE_EXCEPTIONS:
+        Returns
+        -------
+        str
+            Base DSM webapi URL of the chosen route.
+        """
+        cache = self._quickconnect_cache
+        if cache is not None:
+            route = cache.load(self._quickconnect_id)
+            if route is not None:
                 try:
-                    session_request = self._post(
-                        self._base_url + login_api, data=params, verify=self._verify)
-                    session_request.raise_for_status()
-                    session_request_json = session_request.json()
-                except requests.exceptions.ConnectionError as e:
-                    raise SynoConnectionError(error_message=e.args[0])
-                except requests.exceptions.HTTPError as e:
-                    raise HTTPError(error_message=str(e.args))
-                except requests.exceptions.JSONDecodeError as e:
-                    raise JSONDecodeError(error_message=str(e.args))
-            else:
-                # Will raise its own errors:
-                session_request = self._post(
-                    self._base_url + login_api, data=params, verify=self._verify)
-                session_request_json = session_request.json()
+                    base_url = self._connect_quickconnect_route(route)
+                    self._quickconnect_route_cached = True
+                    return base_url
+                except (SynoConnectionError, HTTPError):
+                    cache.invalidate(self._quickconnect_id)
+
+        route = self._resolve_quickconnect_route()
+        # A direct route already answered its probe
+        base_url = self._connect_quickconnect_route(
+            route, ping=route["path"] == "relay")
+        if cache is not None:
+            cache.store(self._quickconnect_id, route)
+        return base_url
 
-            # Check dsm response for error:
-            error_code = self._get_error_code(session_request_json)
-            if not error_code:
-                self._sid = session_request_json['data']['sid']
-                self._syno_token = session_request_json['data']['synotoken']
-                self._finish_noise_handshake(session_request_json['data'])
-                self._session_expire = False
-                if self._debug is True:
-                    print('User logged in, new session started!')
-            else:
-                self._sid = None
-                if self._debug is True:
-                    print('Login failed: ' +
-                          self._get_error_message(error_code, 'Auth'))
-                if USE_EXCEPTIONS:
-                    raise LoginError(error_code=error_code)
-        return
-
-    def _finish_noise_handshake(self, login_data: dict[str, object]) -> None:
-        """
-        Complete the DSM 7 Noise handshake when the login response provides it.
-
-        Parameters
-        ----------
-        login_data : dict
-            The `data` object returned by `SYNO.API.Auth.login`.
-
-        Returns
-        -------
-        None
-            Updates the stored Noise state used for request hashes.
-        """
-        ik_message = login_data.get("ik_message")
-        if not self._noise_connection or not isinstance(ik_message, str):
-            return
-
-        self._noise_connection.read_message(
-            self.decode_ssid_cookie(ik_message))
-        self._noise_handshake_hash = self.encode_ssid_cookie(
-            self._noise_connection.get_handshake_hash()
-        )
+    @property
+    def quickconnect_path(self) -> Optional[str]:
+        """
+        Get the QuickConnect route the requests take.
 
-    def logout(self) -> None:
+        Returns
+        -------
+        str or None
+            'lan' or 'wan' for a direct connection to the NAS, 'relay' through
+            Synology's relay, None without QuickConnect.
         """
-        Log out from the Synology DSM and invalidate the session.
+        if self._quickconnect_route is None:
+            return None
+        return self._quickconnect_route.get("path", "relay")
 
-        Raises
-        ------
-        SynoConnectionError
-            If a connection error occurs.
-        HTTPError
-            If an HTTP error occurs.
-        JSONDecodeError
-            If the response cannot be decoded as JSON.
-        LogoutError
-            If logout fails due to an API error.
+    def _refresh_quickconnect_route(self, failed_base_url: str) -> None:
         """
-        logout_api = 'entry.cgi?api=SYNO.API.Auth' if self._quickconnect_id else 'auth.cgi?api=SYNO.API.Auth'
-        param = {'version': self._version,
-                 'method': 'logout', 'session': 'webui'}
+        Choose the QuickConnect route again after a request through it failed.
 
-        if USE_EXCEPTIONS:
-            try:
-                response = self._get(
-                    self._base_url + logout_api, param, verify=self._verify)
-                response.raise_for_status()
-                response_json = response.json()
-                error_code = self._get_error_code(response_json)
-            except requests.exceptions.ConnectionError as e:
-                raise SynoConnectionError(error_message=e.args[0])
-            except requests.exceptions.HTTPError as e:
-                raise HTTPError(error_message=str(e.args))
-            except requests.exceptions.JSONDecodeError as e:
-                raise JSONDecodeError(error_message=str(e.args))
-        else:
-            response = self._get(
-                self._base_url + logout_api, param, verify=self._verify)
-            error_code = self._get_error_code(response.json())
-        self._session_expire = True
-        self._sid = None
-        self._noise_connection = None
-        self._noise_handshake_hash = None
-        if self._debug is True:
-            if not error_code:
-                print('Successfully logged out.')
-            else:
-                print('Logout failed: ' +
-                      self._get_error_message(error_code, 'Auth'))
-        if USE_EXCEPTIONS and error_code:
-            raise LogoutError(error_code=error_code)
+        Only direct routes and cached relays are raced again, a freshly
+        resolved relay is kept. Later requests use the new route. Errors are
+        ignored, the failed request reports its own.
 
+        Parameters
+        ----------
+        failed_base_url : str
+            Base URL the failed request was sent to.
+        """
+        with self._login_lock:
+            if self._base_url != failed_base_url:
+                # Another thread already chose a new route.
+                return
+            if not self._quickconnect_route_cached and self.quickconnect_path == "relay":
+                return
+            self._quickconnect_route_cached = False
+            if self._quickconnect_cache is not None:
+                self._quickconnect_cache.invalidate(self._quickconnect_id)
+            try:
+                self._base_url = self._build_quickconnect_base_url()
+            except (SynoConnectionError, HTTPError, JSONDecodeError):
+                pass
         return
 
-    def get_api_list(self, app: Optional[str] = None) -> None:
+    def _quickconnect_request(self, url: str, command: str) -> dict[str, object]:
         """
-        Retrieve the list of available APIs from the Synology DSM.
+        Send a command to Synology's QuickConnect service.
 
         Parameters
         ----------
-        app : str, optional
-            Filter APIs by application name.
+        url : str
+            URL of the service.
+        command : str
+            QuickConnect command.
 
-        Raises
-        ------
-        SynoConnectionError
-            If a connection error occurs.
-        HTTPError
-            If an HTTP error occurs.
-        JSONDecodeError
-            If the response cannot be decoded as JSON.
+        Returns
+        -------
+        dict[str, object]
+            First successful response item.
         """
-        query_path = 'query.cgi?api=SYNO.API.Info'
-        list_query = {'version': '1', 'method': 'query', 'query': 'all'}
-
-        if USE_EXCEPTIONS:
-            # Check request for error, and raise our own error.:
-            try:
-                response = self._get(
-                    self._base_url + query_path, list_query, verify=self._verify)
-                response.raise_for_status()
-                response_json = response.json()
-            except requests.exceptions.ConnectionError as e:
-                raise SynoConnectionError(error_message=e.args[0])
-            except requests.exceptions.HTTPError as e:
-                raise HTTPError(error_message=str(e.args))
-            except requests.JSONDecodeError as e:
-                raise JSONDecodeError(error_message=str(e.args))
-        else:
-            # Will raise its own errors:
-            response_json = self._get(
-                self._base_url + query_path, list_query, verify=self._verify).json()
-
-        if app is not None:
-            for key in response_json['data']:
-                if app.lower() in key.lower():
-                    self.app_api_list[key] = response_json['data'][key]
-        else:
-            self.full_api_list = response_json['data']
-
-        return
-
-    def show_api_name_list(self) -> None:
-        """Print the list of available API names."""
-        prev_key = ''
-        for key in self.full_api_list:
-            if key != prev_key:
-                print(key)
-                prev_key = key
-        return
+        try:
+            response = requests.post(
+                url,
+                json=self._quickconnect_payload(command),
+                verify=self._verify,
+                timeout=self._retry_policy.timeout
+            )
+            response.raise_for_status()
+            return self._quickconnect_response_data(decode_response(response), command)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            raise SynoConnectionError(error_message=e.args[0])
+        except requests.exceptions.HTTPError as e:
+            raise HTTPError(error_message=str(e.args))
+        except requests.exceptions.JSONDecodeError as e:
+            raise JSONDecodeError(error_message=str(e.args))
+
+    def _resolve_quickconnect_route(self) -> dict[str, object]:
+        """
+        Ask Synology's QuickConnect service for the endpoints of the NAS and pick one.
 
-    def show_json_response_type(self) -> None:
-        """Print API names that return JSON data."""
-        for key in self.full_api_list:
-            for sub_key in self.full_api_list[key]:
-                if sub_key == 'requestFormat':
-                    if self.full_api_list[key]['requestFormat'] == 'JSON':
-                        print(key + '   Returns JSON data')
-        return
+        Returns
+        -------
+        dict[str, object]
+            The route: `path` ('lan', 'wan' or 'relay'), with `host` and
+            `port` of a direct route, or `control_host` and `relay_region` of
+            the relay, and the `pingpong_path` of the NAS.
+        """
+        self._quickconnect_headers = {}
+        server_info = self._quickconnect_request(
+            QUICKCONNECT_GLOBAL_URL, "get_server_info")
+        control_host = server_info.get("env", {}).get("control_host")
+        if not control_host:
+            raise SynoConnectionError(
+                error_message="QuickConnect get_server_info did not return a control_host")
+
+        if self._quickconnect_direct:
+            route = self._race_quickconnect_endpoints(
+                self._quickconnect_candidates(server_info))
+            if route is not None:
+                return route
+
+        tunnel_info = self._quickconnect_request(
+            f"https://{control_host}/Serv.php", "request_tunnel")
+        relay_region = tunnel_info.get("env", {}).get("relay_region")
+        pingpong_path = tunnel_info.get("server", {}).get("pingpong_path")
+        if not relay_region or not pingpong_path:
+            raise SynoConnectionError(
+                error_message="QuickConnect request_tunnel did not return relay_region and pingpong_path")
+        return {"path": "relay", "control_host": control_host, "relay_region": relay_region,
+                "pingpong_path": pingpong_path}
 
-    def search_by_app(self, app: str) -> None:
+    @staticmethod
+    def _quickconnect_candidates(server_info: dict[str, object]) -> list[dict[str, object]]:
         """
-        Search and print API names containing the specified application name.
+        List the direct endpoints of the NAS found in a `get_server_info` answer.
 
         Parameters
         ----------
-        app : str
-            Application name to search for.
+        server_info : dict[str, object]
+            Answer of the QuickConnect service.
+
+        Returns
+        -------
+        list[dict[str, object]]
+            Direct routes, LAN addresses first. Empty without the `ezid` that
+            identifies the NAS in its ping answers.
         """
-        print_check = 0
-        for key in self.full_api_list:
-            if app.lower() in key.lower():
-                print(key)
-                print_check += 1
+        server = server_info.get("server") or {}
+        service = server_info.get("service") or {}
+        smartdns = server_info.get("smartdns") or {}
+        port = service.get("port")
+        ext_port = service.get("ext_port") or port
+        ezid = server.get("ezid")
+        if not port or not ezid:
+            return []
+
+        hosts = []
+        # The smartdns names carry a valid certificate, plain addresses do not
+        for host in smartdns.get("lan") or []:
+            hosts.append(("lan", host, port))
+        for interface in server.get("interface") or []:
+            hosts.append(("lan", interface.get("ip"), port))
+        hosts.append(("wan", smartdns.get("external"), ext_port))
+        for key in ("ddns", "fqdn"):
+            hosts.append(("wan", server.get(key), ext_port))
+        hosts.append(
+            ("wan", (server.get("external") or {}).get("ip"), ext_port))
+
+        candidates = []
+        seen = set()
+        for path, host, host_port in hosts:
+            if not host or host == "NULL" or host in seen:
                 continue
-        if print_check == 0:
-            print('Not Found')
-        return
+            seen.add(host)
+            candidates.append({"path": path, "host": host, "port": str(host_port),
+                               "pingpong_path": QUICKCONNECT_PINGPONG_PATH, "ezid": ezid})
+        return candidates
 
-    def _random_AES_passphrase(self, length):
+    @staticmethod
+    def _is_quickconnect_nas(response: requests.Response, route: dict[str, object]) -> bool:
         """
-        Generate a random passphrase for AES encryption.
+        Tell whether a ping answer comes from the NAS of a direct route.
+
+        Another DSM may listen on a LAN or WAN address of the NAS, on another
+        network, its ping answer carries another `ezid`.
 
         Parameters
         ----------
-        length : int
-            Length of the passphrase.
+        response : requests.Response
+            Answer of the ping request.
+        route : dict[str, object]
+            Direct route the ping was sent to.
 
         Returns
         -------
-        bytes
-            Randomly generated passphrase.
+        bool
+            True if the answer is a successful DSM ping with the `ezid` of the route.
         """
-        available = ('0123456789'
+        try:
+            answer = decode_response(response)
+        except ValueError:
+            return False
+        return (isinstance(answer, dict) and bool(answer.get("success"))
+                and answer.get("ezid") == route.get("ezid"))
+
+    def _race_quickconnect_endpoints(self, candidates: list[dict[str, object]]
+                                     ) -> Optional[dict[str, object]]:
+        """
+        Probe direct endpoints at once and keep the first to answer.
+
+        Parameters
+        ----------
+        candidates : list[dict[str, object]]
+            Direct routes to probe.
+
+        Returns
+        -------
+        dict[str, object] or None
+            The fastest reachable route, None if none answered in time.
+        """
+        if not candidates:
+            return None
+
+        def probe(route: dict[str, object]) -> dict[str, object]:
+            """
+            Ping a direct route of the NAS.
+
+            Parameters
+            ----------
+            route : dict[str, object]
+                Direct route to ping.
+
+            Returns
+            -------
+            dict[str, object]
+                The route, if the NAS answered.
+            """
+            response = self._get_unguarded(
+                f"https://{route['host']}:{route['port']}{route['pingpong_path']}",
+                verify=self._verify, timeout=QUICKCONNECT_PROBE_TIMEOUT)
+            response.raise_for_status()
+            if not self._is_quickconnect_nas(response, route):
+                raise ValueError("Not a ping answer of this NAS")
+            return route
+
+        executor = ThreadPoolExecutor(max_workers=len(candidates))
+        try:
+            futures = [executor.submit(probe, route) for route in candidates]
+            for future in as_completed(futures):
+                try:
+                    route = future.result()
+                except (requests.exceptions.RequestException, ValueError, AttributeError):
+                    continue
+                if self._debug is True:
+                    print('QuickConnect: using %s endpoint %s' %
+                          (route['path'], route['host']))
+                return route
+        finally:
+            # Slower probes finish in the background
+            executor.shutdown(wait=False)
+        return None
+
+    def _connect_quickconnect_route(self, route: dict[str, object], ping: bool = True) -> str:
+        """
+        Send the requests through a route, checked with a ping that primes relay cookies.
+
+        Parameters
+        ----------
+        route : dict[str, object]
+            Route returned by `_resolve_quickconnect_route`.
+        ping : bool, optional
+            Check the route with its ping request. Defaults to True.
+
+        Returns
+        -------
+        str
+            Base DSM webapi URL of the route.
+        """
+        ping_kwargs = {}
+        if route.get("path", "relay") == "relay":
+            host = f"{self._quickconnect_id}.{route['relay_region']}.quickconnect.to"
+            port = "443"
+            quickconnect_origin = f"https://{host}"
+            headers = {
+                "Origin": quickconnect_origin,
+                "Referer": quickconnect_origin
+            }
+        else:
+            host = route["host"]
+            port = route["port"]
+            quickconnect_origin = f"https://{host}:{port}"
+            headers = {}
+            # A direct route known from another network must fail fast
+            ping_kwargs["timeout"] = QUICKCONNECT_PROBE_TIMEOUT
+        self._ip_address = host
+        self._port = port
+        self._quickconnect_headers = headers
+        self._quickconnect_route = dict(route)
+        if ping:
+            try:
+                ping_response = self._get_unguarded(
+                    f"{quickconnect_origin}{route['pingpong_path']}", verify=self._verify,
+                    **ping_kwargs)
+                ping_response.raise_for_status()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                raise SynoConnectionError(error_message=e.args[0])
+            except requests.exceptions.HTTPError as e:
+                raise HTTPError(error_message=str(e.args))
+            if headers == {} and not self._is_quickconnect_nas(ping_response, route):
+                raise SynoConnectionError(
+                    error_message=f"QuickConnect: {host} is not {self._quickconnect_id}")
+
+        return f"{quickconnect_origin}/webapi/"
+
+    def _merge_headers(self, headers: Optional[dict[str, str]] = None) -> dict[str, str] | None:
+        """
+        Merge QuickConnect relay headers into request headers.
+
+        Parameters
+        ----------
+        headers : dict[str, str], optional
+            Request-specific headers.
+
+        Returns
+        -------
+        dict[str, str] or None
+            Merged headers, or None when no headers are needed.
+        """
+        if not self._quickconnect_headers:
+            return headers
+        merged_headers = self._quickconnect_headers.copy()
+        if headers:
+            merged_headers.update(headers)
+        return merged_headers
+
+    def _get(self, url: str, params: Optional[dict[str, object]] = None, **kwargs) -> requests.Response:
+        """
+        Send a GET request through the active transport.
+
+        Parameters
+        ----------
+        url : str
+            Request URL.
+        params : dict[str, object], optional
+            Query parameters.
+        **kwargs : object
+            Additional request keyword arguments.
+
+        Returns
+        -------
+        requests.Response
+            Response from requests.
+        """
+        return self._send_through_breaker(lambda: self._get_unguarded(url, params, **kwargs))
+
+    def _get_unguarded(self, url: str, params: Optional[dict[str, object]] = None,
+                       **kwargs) -> requests.Response:
+        """
+        Send a GET request through the active transport, past the circuit breaker.
+
+        Used by the QuickConnect route probes, whose unreachable candidates
+        say nothing about the health of the NAS.
+
+        Parameters
+        ----------
+        url : str
+            Request URL.
+        params : dict[str, object], optional
+            Query parameters.
+        **kwargs : object
+            Additional request keyword arguments.
+
+        Returns
+        -------
+        requests.Response
+            Response from requests.
+        """
+        kwargs["headers"] = self._merge_headers(kwargs.get("headers"))
+        if kwargs["headers"] is None:
+            kwargs.pop("headers")
+        if self._retry_policy.timeout is not None:
+            kwargs.setdefault("timeout", self._retry_policy.timeout)
+        if self._requests_session:
+            return self._requests_session.get(url, params=params, **kwargs)
+        return requests.get(url, params=params, **kwargs)
+
+    def _post(self, url: str, data: Any = None, **kwargs) -> requests.Response:
+        """
+        Send a POST request through the active transport.
+
+        Parameters
+        ----------
+        url : str
+            Request URL.
+        data : Any, optional
+            Request body.
+        **kwargs : object
+            Additional request keyword arguments.
+
+        Returns
+        -------
+        requests.Response
+            Response from requests.
+        """
+        kwargs["headers"] = self._merge_headers(kwargs.get("headers"))
+        if kwargs["headers"] is None:
+            kwargs.pop("headers")
+        if is_upload_body(data, kwargs.get("files")):
+            # DSM answers an upload once the file is written, no read timeout
+            if self._retry_policy.upload_timeout is not None:
+                kwargs.setdefault("timeout", self._retry_policy.upload_timeout)
+        elif self._retry_policy.timeout is not None:
+            kwargs.setdefault("timeout", self._retry_policy.timeout)
+        if self._requests_session:
+            return self._send_through_breaker(
+                lambda: self._requests_session.post(url, data=data, **kwargs))
+        return self._send_through_breaker(lambda: requests.post(url, data=data, **kwargs))
+
+    def _send_through_breaker(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Send an HTTP request unless the circuit breaker is open, and report its outcome.
+
+        Parameters
+        ----------
+        send : Callable[[], requests.Response]
+            Sends the request.
+
+        Returns
+        -------
+        requests.Response
+            Response of the NAS.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit breaker is open, nothing is sent.
+        """
+        self._check_circuit()
+        try:
+            response = send()
+        except requests.exceptions.RequestException as e:
+            self._record_circuit(error=e)
+            raise
+        self._record_circuit(status_code=response.status_code)
+        return response
+
+    def _check_circuit(self) -> None:
+        """
+        Fail fast while the circuit breaker is open.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit breaker is open.
+        """
+        breaker = self._circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenError(
+                self._ip_address or self._quickconnect_id, breaker.retry_after)
+        return
+
+    def _record_circuit(self,
+                        status_code: Optional[int] = None,
+                        error: Optional[BaseException] = None
+                        ) -> None:
+        """
+        Report the outcome of an HTTP request to the circuit breaker.
+
+        Parameters
+        ----------
+        status_code : int, optional
+            HTTP status of the response.
+        error : BaseException, optional
+            Exception raised instead of a response.
+        """
+        breaker = self._circuit_breaker
+        if breaker is None:
+            return
+        if error is not None:
+            failed = is_failure_error(error)
+        else:
+            failed = is_failure_status(status_code)
+        if failed:
+            breaker.record_failure(self._probe_health)
+        elif error is None:
+            breaker.record_success()
+        return
+
+    def _probe_health(self) -> bool:
+        """
+        Check that the NAS answers, bypassing the circuit breaker.
+
+        Returns
+        -------
+        bool
+            True if a tiny `SYNO.API.Info` query succeeded.
+        """
+        return probe_request(self._requests_session or requests.Session(), self._base_url,
+                             self._circuit_breaker.probe_timeout, self._verify)
+
+    def _send_with_retry(self, send: Callable[[], requests.Response], idempotent: bool) -> requests.Response:
+        """
+        Send a request, replaying it on transient failures according to the retry policy.
+
+        Parameters
+        ----------
+        send : Callable[[], requests.Response]
+            Sends the request and calls `raise_for_status`. It is called again
+            for every attempt, so request headers (and the request hash) are
+            rebuilt each time.
+        idempotent : bool
+            Whether the API call may be replayed. Non idempotent calls are sent once.
+
+        Returns
+        -------
+        requests.Response
+            Response of the first successful attempt.
+        """
+        self._last_used = time.monotonic()
+        policy = self._retry_policy
+        max_retries = policy.max_retries if idempotent else 0
+        retry_number = 0
+        slept = 0.0
+        while True:
+            try:
+                return self._send_governed(send)
+            except requests.exceptions.RequestException as e:
+                retry_number += 1
+                if retry_number > max_retries or not policy.is_retryable_error(e):
+                    raise
+                if isinstance(e, RequestAborted) or (
+                        self._http_adapter is not None and self._http_adapter.is_aborted()):
+                    raise
+                delay = policy.get_backoff(retry_number)
+                if policy.retry_budget is not None and slept + delay > policy.retry_budget:
+                    raise
+                if self._debug is True:
+                    print('Request failed, retry %d/%d in %.2fs: %s' %
+                          (retry_number, max_retries, delay, e))
+                time.sleep(delay)
+                slept += delay
+
+    def _send_governed(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Send one attempt of a request in a slot of the governor, if any.
+
+        Parameters
+        ----------
+        send : Callable[[], requests.Response]
+            Sends the request and calls `raise_for_status`.
+
+        Returns
+        -------
+        requests.Response
+            Response of the attempt.
+        """
+        governor = self._governor
+        if governor is None:
+            return send()
+        started = governor.acquire()
+        congested = False
+        try:
+            return send()
+        except requests.exceptions.RequestException as e:
+            congested = is_overload_error(
+                e) and not isinstance(e, RequestAborted)
+            raise
+        finally:
+            governor.release(started, congested)
+
+    def _send_with_relogin(self,
+                           send: Callable[[], requests.Response],
+                           idempotent: bool,
+                           replayable: bool = True
+                           ) -> requests.Response:
+        """
+        Send a request, logging in again and replaying it once if the session expired.
+
+        Parameters
+        ----------
+        send : Callable[[], requests.Response]
+            Sends the request, reading the live sid and token on each call.
+        idempotent : bool
+            Whether the API call may be replayed on transport errors.
+        replayable : bool, optional
+            Whether the request can be sent a second time after a new login.
+            False for streamed upload bodies. Defaults to True.
+
+        Returns
+        -------
+        requests.Response
+            Response of the request, sent with a valid session.
+        """
+        sent_sid = self._sid
+        sent_base_url = self._base_url
+        try:
+            response = self._send_with_retry(send, idempotent)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if self._quickconnect_route is not None:
+                self._refresh_quickconnect_route(sent_base_url)
+            raise
+        if not self._auto_relogin or not replayable or sent_sid is None:
+            return response
+        if isinstance(response, StreamedResponse) and not response.is_json:
+            return response
+
+        try:
+            error_code = self._get_error_code(decode_response(response))
+        except ValueError:
+            return response
+        if error_code not in SESSION_EXPIRED_CODES:
+            return response
+
+        if self._debug is True:
+            print('Session expired: ' +
+                  self._get_error_message(error_code, 'Auth') + ', logging in again')
+        self._relogin(sent_sid)
+        return self._send_with_retry(send, idempotent)
+
+    def _relogin(self, expired_sid: Optional[str]) -> None:
+        """
+        Renew an expired session, once for all the threads that noticed the expiry.
+
+        The first caller logs in while holding the login lock, the others wait
+        for it and find the sid already replaced.
+
+        Parameters
+        ----------
+        expired_sid : str, optional
+            The sid the failed request was sent with.
+        """
+        with self._login_lock:
+            if self._sid != expired_sid:
+                # Another thread already logged in again.
+                return
+            self._session_expire = True
+            self.login()
+            self._call_hooks(self._hooks, 'on_relogin')
+
+    def get_ik_message(self) -> str:
+        """
+        Get the IK message for authentication.
+
+        Returns
+        -------
+        str
+            The IK message.
+        """
+
+        url = self._base_url + 'entry.cgi/SYNO.API.Auth.UIConfig'
+        data = {
+            "api": "SYNO.API.Auth.UIConfig",
+            "method": "get",
+            "version": "1"
+        }
+        response = self._post(url, data=data, verify=self._verify)
+
+        # Try to get cookie "_SSID"
+        if response.status_code != 200:
+            raise Exception("Failed to access the URL for IK message. Status code: {}".format(
+                response.status_code))
+        cookies = response.cookies
+        if "_SSID" not in cookies:
+            raise Exception("Cookie '_SSID' not found in the response.")
+        return self._start_noise_handshake(cookies["_SSID"])
+
+    def _start_noise_handshake(self, ssid_cookie: str) -> str:
+        """
+        Start the DSM 7 Noise handshake against the server key of the `_SSID` cookie.
+
+        Parameters
+        ----------
+        ssid_cookie : str
+            Value of the `_SSID` cookie set by `SYNO.API.Auth.UIConfig`.
+
+        Returns
+        -------
+        str
+            The IK message to send with the login request.
+        """
+        from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+        from noise.connection import NoiseConnection, Keypair
+
+        _SSID = self.decode_ssid_cookie(ssid_cookie)
+
+        private_bytes = X25519PrivateKey.generate().private_bytes_raw()
+
+        noise = NoiseConnection.from_name(b"Noise_IK_25519_ChaChaPoly_BLAKE2b")
+        noise.set_as_initiator()
+        noise.set_keypair_from_private_bytes(Keypair.STATIC, private_bytes)
+        noise.set_keypair_from_public_bytes(Keypair.REMOTE_STATIC, _SSID)
+
+        noise.start_handshake()
+
+        payload = json.dumps({
+            "time": int(time.time()),
+        }).encode('utf-8')
+
+        message = noise.write_message(payload)
+        self._noise_connection = noise
+        ik_message = self.encode_ssid_cookie(message)
+
+        return ik_message
+
+    def verify_cert_enabled(self) -> bool:
+        """
+        Check if SSL certificate verification is enabled.
+
+        Returns
+        -------
+        bool
+            True if certificate verification is enabled, False otherwise.
+        """
+        return self._verify
+
+    def login(self) -> None:
+        """
+        Log in to the Synology DSM and obtain a session ID and token.
+
+        Raises
+        ------
+        SynoConnectionError
+            If a connection error occurs.
+        HTTPError
+            If an HTTP error occurs.
+        JSONDecodeError
+            If the response cannot be decoded as JSON.
+            LoginError
+            If login fails due to an API error.
+        """
+        if (self._session_expire or self._sid is None) and self._resume_session():
+            return
+
+        login_api = self._login_api
+        ik_message = self.get_ik_message() if self._version >= 7 else None
+        params = self._get_login_params(ik_message)
+
+        if not self._session_expire and self._sid is not None:
+            self._session_expire = False
+            if self._debug is True:
+                print('User already logged in')
+        else:
+            # Check request for error:
+            session_request_json: dict[str, object] = {}
+            if USE_EXCEPTIONS:
+                try:
+                    session_request = self._post(
+                        self._base_url + login_api, data=params, verify=self._verify)
+                    session_request.raise_for_status()
+                    session_request_json = decode_response(session_request)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    raise SynoConnectionError(error_message=e.args[0])
+                except requests.exceptions.HTTPError as e:
+                    raise HTTPError(error_message=str(e.args))
+                except requests.exceptions.JSONDecodeError as e:
+                    raise JSONDecodeError(error_message=str(e.args))
+            else:
+                # Will raise its own errors:
+                session_request = self._post(
+                    self._base_url + login_api, data=params, verify=self._verify)
+                session_request_json = decode_response(session_request)
+
+            self._handle_login_response(session_request_json)
+        return
+
+    @property
+    def _login_api(self) -> str:
+        """
+        Get the CGI path of `SYNO.API.Auth`.
+
+        Returns
+        -------
+        str
+            `entry.cgi` through QuickConnect, `auth.cgi` otherwise.
+        """
+        return 'entry.cgi' if self._quickconnect_id else 'auth.cgi'
+
+    def _get_login_params(self,
+                          ik_message: Optional[str] = None,
+                          enc_info: Optional[dict[str, object]] = None
+                          ) -> dict[str, object]:
+        """
+        Build the `SYNO.API.Auth` login parameters.
+
+        Parameters
+        ----------
+        ik_message : str, optional
+            IK message of the Noise handshake, sent on DSM 7.
+        enc_info : dict[str, object], optional
+            `SYNO.API.Encryption` information used to encrypt the credentials
+            over plain HTTP. Requested from the NAS when not given.
+
+        Returns
+        -------
+        dict[str, object]
+            Parameters of the login request.
+        """
+        params = {'api': "SYNO.API.Auth", 'version': self._version,
+                  'method': 'login', 'enable_syno_token': 'yes', 'client': 'browser'}
+
+        if ik_message is not None:
+            params.update({'ik_message': ik_message})
+
+        params_enc = {
+            'account': self._username,
+            'enable_device_token': 'no',
+            'logintype': 'local',
+            'otp_code': '',
+            'rememberme': 0,
+            'passwd': self._password,
+            'session': 'webui',  # Hardcoded for handle non administrator users API usage
+            'format': 'cookie'
+        }
+        if self._secure:
+            params.update(params_enc)
+        else:
+            encrypted_params = self.encrypt_params(params_enc, enc_info)
+            params.update(encrypted_params)
+
+        if self._otp_code:
+            params['otp_code'] = self._otp_code
+        if self._device_id is not None and self._device_name is not None:
+            params['device_id'] = self._device_id
+            params['device_name'] = self._device_name
+        if self._device_id is not None and self._device_name is None or self._device_id is None and self._device_name is not None:
+            print("device_id and device_name must be set together")
+        return params
+
+    def _handle_login_response(self, session_request_json: dict[str, object]) -> None:
+        """
+        Store the session of a successful login response, or raise its error.
+
+        Parameters
+        ----------
+        session_request_json : dict[str, object]
+            Decoded response of `SYNO.API.Auth.login`.
+
+        Raises
+        ------
+        LoginError
+            If login fails due to an API error.
+        """
+        # Check dsm response for error:
+        error_code = self._get_error_code(session_request_json)
+        if not error_code:
+            self._sid = session_request_json['data']['sid']
+            self._syno_token = session_request_json['data']['synotoken']
+            self._finish_noise_handshake(session_request_json['data'])
+            self._session_expire = False
+            self._save_session()
+            if self._debug is True:
+                print('User logged in, new session started!')
+        else:
+            self._sid = None
+            if self._debug is True:
+                print('Login failed: ' +
+                      self._get_error_message(error_code, 'Auth'))
+            if USE_EXCEPTIONS:
+                raise LoginError(error_code=error_code)
+        return
+
+    def _finish_noise_handshake(self, login_data: dict[str, object]) -> None:
+        """
+        Complete the DSM 7 Noise handshake when the login response provides it.
+
+        Parameters
+        ----------
+        login_data : dict
+            The `data` object returned by `SYNO.API.Auth.login`.
+
+        Returns
+        -------
+        None
+            Updates the stored Noise state used for request hashes.
+        """
+        ik_message = login_data.get("ik_message")
+        if not self._noise_connection or not isinstance(ik_message, str):
+            return
+
+        self._noise_connection.read_message(
+            self.decode_ssid_cookie(ik_message))
+        self._noise_handshake_hash = self.encode_ssid_cookie(
+            self._noise_connection.get_handshake_hash()
+        )
+        # Nonces start again from 0 with the new cipher state
+        self._nonce_reserved_until = None
+
+    @property
+    def _session_store_key(self) -> str:
+        """
+        Get the session store key of this NAS and account.
+
+        Returns
+        -------
+        str
+            Key built from the NAS identity, the username and the DSM version.
+        """
+        return SessionStore.make_key(self._quickconnect_id or self._ip_address, self._port,
+                                     self._username, self._version)
+
+    @property
+    def _request_scope(self) -> tuple[str, str, str]:
+        """
+        Get the identity of this session in the keys of shared response caches.
+
+        Returns
+        -------
+        tuple[str, str, str]
+            NAS address or QuickConnect ID, port and username.
+        """
+        return self._quickconnect_id or self._ip_address, str(self._port), self._username
+
+    def _export_session_state(self) -> dict[str, object]:
+        """
+        Snapshot the current session for a session store.
+
+        On DSM 7, the next `NONCE_RESERVATION` nonces are reserved for this
+        process: the saved nonce is past them, `_get_request_hash` saves again
+        before using it.
+
+        Returns
+        -------
+        dict[str, object]
+            Sid, Synology token, cookies and, on DSM 7, the Noise key and the
+            first nonce free for the process resuming the session.
+        """
+        noise_state = None
+        noise_connection = self._noise_connection
+        if noise_connection and self._noise_handshake_hash and noise_connection.handshake_finished:
+            cipher_state = noise_connection.noise_protocol.cipher_state_encrypt
+            with self._request_hash_lock:
+                nonce = max(self._nonce_reserved_until or 0,
+                            cipher_state.n + NONCE_RESERVATION)
+                self._nonce_reserved_until = nonce
+            noise_state = {
+                'handshake_hash': self._noise_handshake_hash,
+                'key': self.encode_ssid_cookie(cipher_state.k),
+                'nonce': nonce,
+            }
+        cookies = {}
+        if self._requests_session:
+            cookies = requests.utils.dict_from_cookiejar(
+                self._requests_session.cookies)
+        return {
+            'stored_at': time.time(),
+            'sid': self._sid,
+            'syno_token': self._syno_token,
+            'noise': noise_state,
+            'cookies': cookies,
+        }
+
+    def _import_session_state(self, state: dict[str, object]) -> None:
+        """
+        Restore a session saved by `_export_session_state`.
+
+        Parameters
+        ----------
+        state : dict[str, object]
+            Saved session state.
+        """
+        self._sid = state['sid']
+        self._syno_token = state.get('syno_token')
+        self._noise_connection = None
+        self._noise_handshake_hash = None
+        self._nonce_reserved_until = None
+        noise_state = state.get('noise')
+        if noise_state:
+            from noise.connection import NoiseConnection
+            from noise.state import CipherState
+
+            noise = NoiseConnection.from_name(
+                b"Noise_IK_25519_ChaChaPoly_BLAKE2b")
+            cipher_state = CipherState(noise.noise_protocol)
+            cipher_state.initialize_key(
+                self.decode_ssid_cookie(noise_state['key']))
+            cipher_state.set_nonce(noise_state['nonce'])
+            noise.noise_protocol.cipher_state_encrypt = cipher_state
+            noise.handshake_finished = True
+            self._noise_connection = noise
+            self._noise_handshake_hash = noise_state['handshake_hash']
+        if self._requests_session and state.get('cookies'):
+            requests.utils.add_dict_to_cookiejar(
+                self._requests_session.cookies, state['cookies'])
+
+    def _save_session(self) -> None:
+        """Save the current session to the session store, if any."""
+        if self._session_store is None or self._sid is None:
+            return
+        with self._session_save_lock:
+            self._session_store.save(
+                self._session_store_key, self._export_session_state())
+
+    def _resume_session(self) -> bool:
+        """
+        Resume the session saved in the session store, if it is still valid.
+
+        Returns
+        -------
+        bool
+            True if the saved session was restored, False if a full login is needed.
+        """
+        if not self._restore_saved_session():
+            return False
+        return self._finish_session_resume(self._is_session_valid())
+
+    def _restore_saved_session(self) -> bool:
+        """
+        Load the session saved in the session store, without checking it.
+
+        Returns
+        -------
+        bool
+            True if a saved session other than the current one was restored.
+        """
+        if self._session_store is None:
+            return False
+        state = self._session_store.load(self._session_store_key)
+        if not state or not state.get('sid') or state['sid'] == self._sid:
+            # Nothing saved, or the very session that just expired.
+            return False
+        self._import_session_state(state)
+        # Reserve nonces before the validity check hashes its request
+        self._save_session()
+        return True
+
+    def _finish_session_resume(self, valid: bool) -> bool:
+        """
+        Keep a restored session if DSM accepted it, forget it otherwise.
+
+        Parameters
+        ----------
+        valid : bool
+            Result of the validity check of the restored session.
+
+        Returns
+        -------
+        bool
+            `valid`.
+        """
+        if valid:
+            self._session_expire = False
+            self._save_session()
+            if self._debug is True:
+                print('User logged in, saved session resumed!')
+            return True
+
+        self._session_store.delete(self._session_store_key)
+        self._sid = None
+        self._syno_token = None
+        self._noise_connection = None
+        self._noise_handshake_hash = None
+        return False
+
+    @property
+    def _session_check_params(self) -> dict[str, object]:
+        """
+        Get the parameters of the request used to check a restored session.
+
+        Returns
+        -------
+        dict[str, object]
+            A `SYNO.Core.NormalUser` get, cheap and allowed to every user.
+        """
+        return {'api': 'SYNO.Core.NormalUser', 'version': 1,
+                'method': 'get', '_sid': self._sid}
+
+    def _is_session_valid(self) -> bool:
+        """
+        Check the current sid with a cheap authenticated request.
+
+        Returns
+        -------
+        bool
+            True if DSM accepted the sid and request hash.
+        """
+        try:
+            response = self._get(self._base_url + 'entry.cgi', self._session_check_params,
+                                 headers=self._get_request_headers(), verify=self._verify)
+            response.raise_for_status()
+            return not self._get_error_code(decode_response(response))
+        except (requests.exceptions.RequestException, ValueError):
+            return False
+
+    def logout(self) -> None:
+        """
+        Log out from the Synology DSM and invalidate the session.
+
+        Raises
+        ------
+        SynoConnectionError
+            If a connection error occurs.
+        HTTPError
+            If an HTTP error occurs.
+        JSONDecodeError
+            If the response cannot be decoded as JSON.
+        LogoutError
+            If logout fails due to an API error.
+        """
+        logout_api = self._login_api + '?api=SYNO.API.Auth'
+        param = {'version': self._version,
+                 'method': 'logout', 'session': 'webui'}
+
+        if USE_EXCEPTIONS:
+            try:
+                response = self._get(
+                    self._base_url + logout_api, param, verify=self._verify)
+                response.raise_for_status()
+                response_json = decode_response(response)
+                error_code = self._get_error_code(response_json)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                raise SynoConnectionError(error_message=e.args[0])
+            except requests.exceptions.HTTPError as e:
+                raise HTTPError(error_message=str(e.args))
+            except requests.exceptions.JSONDecodeError as e:
+                raise JSONDecodeError(error_message=str(e.args))
+        else:
+            response = self._get(
+                self._base_url + logout_api, param, verify=self._verify)
+            error_code = self._get_error_code(decode_response(response))
+        self._finish_logout(error_code)
+        return
+
+    def _finish_logout(self, error_code: int) -> None:
+        """
+        Drop the session state after a logout request.
+
+        Parameters
+        ----------
+        error_code : int
+            Error code of the logout response, 0 on success.
+
+        Raises
+        ------
+        LogoutError
+            If logout failed due to an API error.
+        """
+        if self._session_store is not None:
+            self._session_store.delete(self._session_store_key)
+        self._session_expire = True
+        self._sid = None
+        self._noise_connection = None
+        self._noise_handshake_hash = None
+        if self._debug is True:
+            if not error_code:
+                print('Successfully logged out.')
+            else:
+                print('Logout failed: ' +
+                      self._get_error_message(error_code, 'Auth'))
+        if USE_EXCEPTIONS and error_code:
+            raise LogoutError(error_code=error_code)
+
+        return
+
+    def get_api_list(self, app: Optional[str] = None) -> None:
+        """
+        Retrieve the list of available APIs from the Synology DSM.
+
+        The `SYNO.API.Info` catalog is downloaded once per session and kept in
+        `full_api_list`, later calls only filter it locally.
+
+        Parameters
+        ----------
+        app : str, optional
+            Filter APIs by application name, the matches are added to `app_api_list`.
+
+        Raises
+        ------
+        SynoConnectionError
+            If a connection error occurs.
+        HTTPError
+            If an HTTP error occurs.
+        JSONDecodeError
+            If the response cannot be decoded as JSON.
+        """
+        self._load_api_catalog()
+        if app is not None:
+            self.app_api_list.update(self._get_app_api_list(app))
+        return
+
+    def _get_app_api_list(self, app: str) -> dict[str, dict[str, object]]:
+        """
+        Get the APIs whose name contains an application name, from the loaded catalog.
+
+        Results are memoized per application name until the catalog is reloaded.
+
+        Parameters
+        ----------
+        app : str
+            Application name, e.g. `FileStation` or `Foto`.
+
+        Returns
+        -------
+        dict[str, dict[str, object]]
+            API information keyed by API name.
+        """
+        app_key = app.lower()
+        app_apis = self._app_api_index.get(app_key)
+        if app_apis is None:
+            app_apis = {name: info for name, info in self.full_api_list.items()
+                        if app_key in name.lower()}
+            self._app_api_index[app_key] = app_apis
+        return app_apis
+
+    def _load_api_catalog(self, refresh: bool = False) -> dict[str, dict[str, object]]:
+        """
+        Download the `SYNO.API.Info` catalog, unless it is already loaded.
+
+        Parameters
+        ----------
+        refresh : bool, optional
+            Download the catalog again even if it is already loaded. Defaults to False.
+
+        Returns
+        -------
+        dict[str, dict[str, object]]
+            The catalog, keyed by API name (same object as `full_api_list`).
+
+        Raises
+        ------
+        SynoConnectionError
+            If a connection error occurs.
+        HTTPError
+            If an HTTP error occurs.
+        JSONDecodeError
+            If the response cannot be decoded as JSON.
+        """
+        with self._catalog_lock:
+            if self._api_catalog_loaded and not refresh:
+                return self.full_api_list
+
+            catalog = None if refresh else self._load_cached_api_catalog()
+            if catalog is not None and self._api_cache.validate \
+                    and not self._is_api_catalog_current(catalog):
+                catalog = None
+            from_cache = catalog is not None
+            if catalog is None:
+                catalog = self._query_api_catalog()
+            self._install_api_catalog(catalog, from_cache)
+        return self.full_api_list
+
+    def _load_cached_api_catalog(self) -> Optional[dict[str, dict[str, object]]]:
+        """
+        Read the catalog of this NAS from the catalog cache, if any.
+
+        Returns
+        -------
+        dict[str, dict[str, object]] or None
+            Cached catalog, or None without cache or entry.
+        """
+        if self._api_cache is None:
+            return None
+        return self._api_cache.load(self._api_cache_key)
+
+    def _install_api_catalog(self, catalog: dict[str, dict[str, object]], from_cache: bool) -> None:
+        """
+        Make a catalog the current one, and store it in the catalog cache if it was downloaded.
+
+        Parameters
+        ----------
+        catalog : dict[str, dict[str, object]]
+            API information keyed by API name.
+        from_cache : bool
+            Whether the catalog was read from the catalog cache.
+        """
+        self._api_catalog_from_cache = from_cache
+        if not from_cache and self._api_cache is not None:
+            self._api_cache.store(self._api_cache_key, catalog)
+
+        # Updated in place, modules keep references to this dict.
+        self.full_api_list.clear()
+        self.full_api_list.update(catalog)
+        apps = list(self._app_api_index)
+        self._app_api_index = {}
+        for app in apps:
+            self.app_api_list.update(self._get_app_api_list(app))
+        self._api_catalog_loaded = True
+        return
+
+    @property
+    def _api_cache_key(self) -> str:
+        """
+        Get the key of this NAS in the catalog cache.
+
+        Returns
+        -------
+        str
+            Key built from the host (or QuickConnect ID), port and DSM version.
+        """
+        host = self._quickconnect_id or self._ip_address
+        return ApiCatalogCache.make_key(host, self._port, self._version)
+
+    def _is_api_catalog_current(self, catalog: dict[str, dict[str, object]]) -> bool:
+        """
+        Check a cached catalog against a tiny live query of a few core APIs.
+
+        Parameters
+        ----------
+        catalog : dict[str, dict[str, object]]
+            Cached catalog.
+
+        Returns
+        -------
+        bool
+            True if the NAS still reports the same information for `VALIDATION_APIS`.
+        """
+        current = self._query_api_catalog(','.join(VALIDATION_APIS))
+        return all(catalog.get(name) == info for name, info in current.items())
+
+    def _query_api_catalog(self, query: str = 'all') -> dict[str, dict[str, object]]:
+        """
+        Send a `SYNO.API.Info` query.
+
+        Parameters
+        ----------
+        query : str, optional
+            Comma separated API names, or `all`. Defaults to `all`.
+
+        Returns
+        -------
+        dict[str, dict[str, object]]
+            API information keyed by API name.
+        """
+        query_path = 'query.cgi?api=SYNO.API.Info'
+        list_query = {'version': '1', 'method': 'query', 'query': query}
+
+        def send() -> requests.Response:
+            """
+            Send one attempt of the catalog query.
+
+            Returns
+            -------
+            requests.Response
+                Response of the attempt, checked with `raise_for_status`.
+            """
+            response = self._get(
+                self._base_url + query_path, list_query, verify=self._verify)
+            response.raise_for_status()
+            return response
+
+        if USE_EXCEPTIONS:
+            # Check request for error, and raise our own error.:
+            try:
+                response = self._send_with_retry(send, True)
+                response_json = decode_response(response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                raise SynoConnectionError(error_message=e.args[0])
+            except requests.exceptions.HTTPError as e:
+                raise HTTPError(error_message=str(e.args))
+            except requests.JSONDecodeError as e:
+                raise JSONDecodeError(error_message=str(e.args))
+        else:
+            # Will raise its own errors:
+            response_json = decode_response(self._get(
+                self._base_url + query_path, list_query, verify=self._verify))
+
+        return response_json['data']
+
+    def show_api_name_list(self) -> None:
+        """Print the list of available API names."""
+        prev_key = ''
+        for key in self.full_api_list:
+            if key != prev_key:
+                print(key)
+                prev_key = key
+        return
+
+    def show_json_response_type(self) -> None:
+        """Print API names that return JSON data."""
+        for key in self.full_api_list:
+            for sub_key in self.full_api_list[key]:
+                if sub_key == 'requestFormat':
+                    if self.full_api_list[key]['requestFormat'] == 'JSON':
+                        print(key + '   Returns JSON data')
+        return
+
+    def search_by_app(self, app: str) -> None:
+        """
+        Search and print API names containing the specified application name.
+
+        Parameters
+        ----------
+        app : str
+            Application name to search for.
+        """
+        print_check = 0
+        for key in self.full_api_list:
+            if app.lower() in key.lower():
+                print(key)
+                print_check += 1
+                continue
+        if print_check == 0:
+            print('Not Found')
+        return
+
+    def _random_AES_passphrase(self, length):
+        """
+        Generate a random passphrase for AES encryption.
+
+        Parameters
+        ----------
+        length : int
+            Length of the passphrase.
+
+        Returns
+        -------
+        bytes
+            Randomly generated passphrase.
+        """
+        available = ('0123456789'
                      'abcdefghijklmnopqrstuvwxyz'
                      'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
                      '~!@#$%^&*()_+-/')
@@ -676,204 +1865,960 @@ class Authentication:
             key += secrets.choice(available).encode('utf-8')
             length -= 1
 
-        return key
+        return key
+
+    def _get_enc_info(self):
+        """
+        Retrieve encryption information from the Synology API.
+
+        Returns
+        -------
+        dict
+            Encryption information including public key and cipher details.
+        """
+        api_name = 'SYNO.API.Encryption'
+        req_params = {
+            "method": "getinfo",
+            "version": 1,
+            "format": "module"
+        }
+        # Sent past batches, cache and coalescing, a re-login may run inside a batch
+        response = self._send_request(api_name, "encryption.cgi", req_params)
+        return response["data"]
+
+    def _encrypt_RSA(self, modulus, passphrase, text):
+        """
+        Encrypt text using RSA public key encryption.
+
+        Parameters
+        ----------
+        modulus : int
+            RSA modulus.
+        passphrase : int
+            RSA public exponent.
+        text : str or bytes
+            Text to encrypt.
+
+        Returns
+        -------
+        bytes
+            Encrypted ciphertext.
+        """
+        from cryptography.hazmat.backends import default_backend
+        from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+        public_numbers = rsa.RSAPublicNumbers(passphrase, modulus)
+        public_key = public_numbers.public_key(default_backend())
+
+        if isinstance(text, str):
+            text = text.encode('utf-8')
+
+        ciphertext = public_key.encrypt(
+            text,
+            padding.PKCS1v15()
+        )
+        return ciphertext
+
+    def _encrypt_AES(self, passphrase, text):
+        """
+        Encrypt text using AES encryption.
+
+        Parameters
+        ----------
+        passphrase : bytes
+            AES passphrase.
+        text : str
+            Text to encrypt.
+
+        Returns
+        -------
+        bytes
+            Encrypted ciphertext.
+        """
+        cipher = AESCipher(passphrase)
+
+        return cipher.encrypt(text)
 
-    def _get_enc_info(self):
+    def encrypt_params(self, params, enc_info=None):
         """
-        Retrieve encryption information from the Synology API.
+        Encrypt login parameters using RSA and AES.
+
+        Parameters
+        ----------
+        params : dict
+            Parameters to encrypt.
+        enc_info : dict, optional
+            Encryption information from `SYNO.API.Encryption`, requested when not given.
 
         Returns
         -------
         dict
-            Encryption information including public key and cipher details.
+            Encrypted parameters suitable for login.
         """
-        api_name = 'SYNO.API.Encryption'
-        req_params = {
-            "method": "getinfo",
-            "version": 1,
-            "format": "module"
+        if enc_info is None:
+            enc_info = self._get_enc_info()
+        public_key = enc_info["public_key"]
+        cipher_key = enc_info["cipherkey"]
+        cipher_token = enc_info["ciphertoken"]
+        server_time = enc_info["server_time"]
+        random_passphrase = self._random_AES_passphrase(501)
+
+        params[cipher_token] = server_time
+
+        encrypted_passphrase = self._encrypt_RSA(int(public_key, 16),
+                                                 int("10001", 16),
+                                                 random_passphrase)
+
+        encrypted_params = self._encrypt_AES(random_passphrase,
+                                             urllib.parse.urlencode(params))
+
+        enc_params = {
+            "rsa": base64.b64encode(encrypted_passphrase).decode("utf-8"),
+            "aes": base64.b64encode(encrypted_params).decode("utf-8")
         }
-        response = self.request_data(api_name, "encryption.cgi", req_params)
-        return response["data"]
 
-    def _encrypt_RSA(self, modulus, passphrase, text):
+        return {cipher_key: json.dumps(enc_params)}
+
+    def _get_request_hash(self) -> Optional[str]:
         """
-        Encrypt text using RSA public key encryption.
+        Build the DSM web UI request hash from the active Noise session.
+
+        Every hash consumes one nonce of the Noise cipher state. Nonces are
+        allocated under a lock, so concurrent requests sharing the session each
+        get their own, in increasing order. With a session store, the session
+        is saved again before a nonce past the saved reservation is used.
+
+        Returns
+        -------
+        str or None
+            Header value for `X-SYNO-HASH`, or `None` if the session does not
+            expose a finished Noise handshake.
+        """
+        noise_connection = self._noise_connection
+        handshake_hash = self._noise_handshake_hash
+        if not noise_connection or not handshake_hash:
+            return None
+        if not noise_connection.handshake_finished:
+            return None
+
+        cipher_state = noise_connection.noise_protocol.cipher_state_encrypt
+        while True:
+            with self._request_hash_lock:
+                # Reading the nonce and encrypting (which advances it) must not interleave.
+                nonce = cipher_state.n
+                reserved_until = self._nonce_reserved_until
+                if (reserved_until is None or nonce < reserved_until
+                        or self._session_store is None or self._sid is None):
+                    encrypted_empty = cipher_state.encrypt_with_ad(b'', b'')
+                    break
+            self._save_session()
+
+        return "{}{}.{}".format(
+            handshake_hash[:8],
+            self.encode_ssid_cookie(encrypted_empty),
+            self.encode_ssid_cookie(str(nonce).encode('utf-8')),
+        )
+
+    def _get_request_headers(self, headers: Optional[dict[str, object]] = None) -> dict[str, object]:
+        """
+        Return request headers shared by DSM API calls.
 
         Parameters
         ----------
-        modulus : int
-            RSA modulus.
-        passphrase : int
-            RSA public exponent.
-        text : str or bytes
-            Text to encrypt.
+        headers : dict, optional
+            Extra headers to merge into the request.
 
         Returns
         -------
-        bytes
-            Encrypted ciphertext.
+        dict
+            Headers containing the Synology token and, when available, the
+            DSM Noise request hash.
         """
-        public_numbers = rsa.RSAPublicNumbers(passphrase, modulus)
-        public_key = public_numbers.public_key(default_backend())
+        request_headers = {"X-SYNO-TOKEN": self._syno_token}
+        if headers:
+            request_headers.update(headers)
 
-        if isinstance(text, str):
-            text = text.encode('utf-8')
+        request_hash = self._get_request_hash()
+        if request_hash:
+            request_headers["X-SYNO-HASH"] = request_hash
 
-        ciphertext = public_key.encrypt(
-            text,
-            padding.PKCS1v15()
-        )
-        return ciphertext
+        return request_headers
+
+    def batch(self,
+              mode: str = 'sequential',
+              batch_size: int = DEFAULT_BATCH_SIZE,
+              concurrency: int = 1
+              ) -> RequestBatch:
+        """
+        Create a batch capturing the `request_data` calls of the current thread.
+
+        Inside ``with session.batch() as b:``, API methods of every module using
+        this session return a `BatchCall` handle instead of the response. The
+        calls are sent as `SYNO.Entry.Request` compound requests when the block
+        exits, or earlier through `b.flush()` or a handle's `result()`. Uploads
+        and calls asking for the raw response are sent immediately. Only API
+        methods returning the response unchanged are deferred: indexing a
+        handle flushes the batch, so methods reading the response, e.g. for a
+        task id, send their call at once. Methods testing the type of the
+        response cannot run inside a batch.
+
+        Parameters
+        ----------
+        mode : str, optional
+            "sequential" or "parallel" execution of the calls by DSM. Defaults to "sequential".
+        batch_size : int, optional
+            Maximum number of calls per compound request. Defaults to 50.
+        concurrency : int, optional
+            Number of compound requests sent at once. Defaults to 1.
+
+        Returns
+        -------
+        RequestBatch
+            The batch, to use as a context manager.
+        """
+        return RequestBatch(self, mode=mode, batch_size=batch_size, concurrency=concurrency)
+
+    def lane(self, name: str) -> contextlib.AbstractContextManager:
+        """
+        Send the requests of the current thread in a priority lane of the governor.
+
+        Waiting requests of the 'interactive' lane go before those of the
+        'bulk' lane, e.g. ``with session.lane('bulk'): photos.list_items(...)``.
+        Without governor, the block runs unchanged.
+
+        Parameters
+        ----------
+        name : str
+            Lane name, one of the governor lanes.
+
+        Returns
+        -------
+        contextlib.AbstractContextManager
+            Context manager applying the lane.
+        """
+        if self._governor is None:
+            return contextlib.nullcontext()
+        return self._governor.lane(name)
+
+    def add_hooks(self, *hooks: RequestHooks) -> None:
+        """
+        Call hooks around the API requests of the session.
+
+        Parameters
+        ----------
+        *hooks : RequestHooks
+            Hooks to add, e.g. a `MetricsCollector`.
+        """
+        self._hooks = self._hooks + \
+            tuple(hook for hook in hooks if hook not in self._hooks)
+        return
+
+    def remove_hooks(self, *hooks: RequestHooks) -> None:
+        """
+        Stop calling hooks around the API requests of the session.
+
+        Parameters
+        ----------
+        *hooks : RequestHooks
+            Hooks to remove.
+        """
+        self._hooks = tuple(hook for hook in self._hooks if hook not in hooks)
+        return
+
+    def _call_hooks(self, hooks: tuple[RequestHooks, ...], name: str, *args: Any) -> None:
+        """
+        Call a method of hooks, ignoring their errors.
+
+        Parameters
+        ----------
+        hooks : tuple[RequestHooks, ...]
+            Hooks to call.
+        name : str
+            'before_request', 'after_request' or 'on_relogin'.
+        *args : Any
+            Arguments of the method.
+        """
+        for hook in hooks:
+            try:
+                getattr(hook, name)(*args)
+            except Exception as e:
+                if self._debug is True:
+                    print('Request hook %r failed: %s' % (hook, e))
+        return
+
+    @contextlib.contextmanager
+    def _observe_request(self,
+                         hooks: tuple[RequestHooks, ...],
+                         api_name: str,
+                         req_param: dict[str, object],
+                         http_method: Optional[str],
+                         url: str,
+                         data: Any = None
+                         ) -> Iterator[RequestEvent]:
+        """
+        Report a request to hooks, before it is sent and once it completed.
+
+        Parameters
+        ----------
+        hooks : tuple[RequestHooks, ...]
+            Hooks of the session.
+        api_name : str
+            API name.
+        req_param : dict[str, object]
+            Parameters of the request.
+        http_method : str, optional
+            'get' or 'post'.
+        url : str
+            Request URL.
+        data : Any, optional
+            Upload body.
+
+        Yields
+        ------
+        RequestEvent
+            Event to complete with the attempts, response and DSM error code.
+        """
+        event = RequestEvent(api_name, req_param.get('method'), req_param.get('version'),
+                             http_method or 'get', estimate_request_size(url, req_param, data))
+        self._call_hooks(hooks, 'before_request', event)
+        event.started = time.perf_counter()
+        try:
+            yield event
+        except BaseException as e:
+            event.exception = e
+            raise
+        finally:
+            event.duration = time.perf_counter() - event.started
+            self._call_hooks(hooks, 'after_request', event)
+
+    def _active_batch(self) -> Optional[RequestBatch]:
+        """
+        Get the innermost batch capturing the calls of the current thread.
+
+        Returns
+        -------
+        RequestBatch or None
+            The batch, or None outside of any batch.
+        """
+        stack = getattr(self._batch_local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def _push_batch(self, batch: RequestBatch) -> None:
+        """
+        Make a batch capture the calls of the current thread.
+
+        Parameters
+        ----------
+        batch : RequestBatch
+            Batch entering its ``with`` block.
+        """
+        if getattr(self._batch_local, 'stack', None) is None:
+            self._batch_local.stack = []
+        self._batch_local.stack.append(batch)
+        return
+
+    def _pop_batch(self, batch: RequestBatch) -> None:
+        """
+        Stop a batch capturing the calls of the current thread.
+
+        Parameters
+        ----------
+        batch : RequestBatch
+            Batch leaving its ``with`` block.
+        """
+        self._batch_local.stack.remove(batch)
+        return
+
+    def request_multi_datas(self,
+                            compound: dict[object] = None,
+                            method: Optional[str] = None,
+                            # "sequential" or "parallel"
+                            mode: Optional[str] = "sequential",
+                            response_json: bool = True,
+                            stop_when_error: bool = True,
+                            max_chunk_bytes: int = COMPOUND_CHUNK_BYTES,
+                            max_chunk_requests: Optional[int] = None,
+                            concurrency: int = 1,
+                            as_results: bool = False
+                            ) -> dict[str, object] | str | list | requests.Response | list[SubRequestResult]:  # 'post' or 'get'
+        """
+        Send multiple requests to the Synology API, either sequentially or in parallel.
+
+        Large compounds are split into chunks sent as separate compound
+        requests, and a chunk whose URL would be too long is sent as a POST.
+
+        Parameters
+        ----------
+        compound : dict[object], optional
+            A JSON structure containing multiple requests to be executed.
+            Example:
+            compound = [
+                {
+                    "api": "SYNO.Core.User",
+                    "method": "list",
+                    "version": self.core_list["SYNO.Core.User"]
+                }
+            ].
+        method : str, optional
+            The HTTP method to use ('get' or 'post'). If not specified, 'get'
+            unless the URL would exceed `MAX_GET_URL_LENGTH`.
+        mode : str, optional
+            The execution mode for the requests, either "sequential" or "parallel".
+            Defaults to "sequential".
+        response_json : bool, optional
+            Whether to return the response as JSON. If False, returns the raw response object,
+            or the list of raw responses when the compound was split.
+        stop_when_error : bool, optional
+            Skip the remaining requests, including later chunks, after the first failed one. Defaults to True.
+        max_chunk_bytes : int, optional
+            Maximum size of the JSON encoded requests of one chunk. Defaults to 64 KiB.
+        max_chunk_requests : int, optional
+            Maximum number of requests of one chunk. Defaults to no limit.
+        concurrency : int, optional
+            Number of chunks sent at once over the connection pool. Requires
+            `stop_when_error` to be False when above 1. Defaults to 1.
+        as_results : bool, optional
+            Return one `SubRequestResult` per request of `compound`, holding its
+            response or the exception `request_data` would raise for it. Transport
+            errors are reported there too instead of being raised. Defaults to False.
+
+        Returns
+        -------
+        dict[str, object] or str or list or requests.Response or list[SubRequestResult]
+            The response from the API, either as a JSON-decoded object, string, list, or the raw response.
+            The `result` lists of split compounds are merged into one response.
+
+        Raises
+        ------
+        SynoConnectionError
+            If a connection error occurs.
+        HTTPError
+            If an HTTP error occurs.
+        """
+        chunks = self._split_compound(
+            compound or [], max_chunk_bytes, max_chunk_requests)
+        if concurrency > 1 and stop_when_error and len(chunks) > 1:
+            raise ValueError(
+                'stop_when_error requires the chunks to be sent one at a time')
+
+        if as_results:
+            outcomes = self._send_compound_chunks(
+                chunks, method, mode, stop_when_error, concurrency, capture_errors=True)
+            return self._compound_results(chunks, outcomes)
+
+        responses = self._send_compound_chunks(
+            chunks, method, mode, stop_when_error, concurrency)
+        if response_json is True:
+            return self._merge_compound_responses([decode_response(response) for response in responses])
+        else:
+            return responses[0] if len(responses) == 1 else responses
+
+    def _send_compound(self,
+                       compound: list[dict[str, object]],
+                       method: Optional[str],
+                       mode: Optional[str],
+                       stop_when_error: bool
+                       ) -> requests.Response:
+        """
+        Send one compound request.
+
+        Parameters
+        ----------
+        compound : list[dict[str, object]]
+            Requests to execute.
+        method : str, optional
+            'get' or 'post', None to pick from the URL length.
+        mode : str, optional
+            "sequential" or "parallel".
+        stop_when_error : bool
+            Skip the remaining requests after the first failed one.
+
+        Returns
+        -------
+        requests.Response
+            Response of the compound request.
+        """
+        url, req_param = self._get_multi_request(
+            compound, mode, stop_when_error)
+        method = self._get_compound_method(url, req_param, method)
+        hooks = self._hooks
+        if hooks:
+            with self._observe_request(hooks, req_param['api'], req_param, method, url) as event:
+                return self._send_compound_request(event, compound, url, req_param, method)
+        return self._send_compound_request(None, compound, url, req_param, method)
+
+    def _send_compound_request(self,
+                               event: Optional[RequestEvent],
+                               compound: list[dict[str, object]],
+                               url: str,
+                               req_param: dict[str, object],
+                               method: str
+                               ) -> requests.Response:
+        """
+        Send the request of a compound.
+
+        Parameters
+        ----------
+        event : RequestEvent, optional
+            Event completed with the attempts and response, None without hooks.
+        compound : list[dict[str, object]]
+            Requests to execute.
+        url : str
+            Request URL.
+        req_param : dict[str, object]
+            Parameters of the SYNO.Entry.Request call.
+        method : str
+            'get' or 'post'.
+
+        Returns
+        -------
+        requests.Response
+            Response of the compound request.
+        """
+        # Request need some headers to work properly
+        # X-SYNO-TOKEN is the token that we get when we login
+        # We get it from the self._syno_token variable and by param 'enable_syno_token':'yes' in the login request
+
+        def send() -> requests.Response:
+            """
+            Send one attempt of the compound request with the live sid.
+
+            Returns
+            -------
+            requests.Response
+                Response of the attempt, checked with `raise_for_status`.
+            """
+            req_param['_sid'] = self._sid
+            if event is not None:
+                event.attempts += 1
+            if method == 'get':
+                response = self._get(
+                    url,
+                    req_param,
+                    verify=self._verify,
+                    headers=self._get_request_headers(),
+                )
+            elif method == 'post':
+                response = self._post(
+                    url,
+                    req_param,
+                    verify=self._verify,
+                    headers=self._get_request_headers(),
+                )
+            if event is not None:
+                event.record_response(response)
+            response.raise_for_status()
+            return response
+
+        # The compound is only replayed when every sub request is read-only
+        idempotent = all(self._retry_policy.is_idempotent(request.get('method'))
+                         for request in compound)
+        try:
+            return self._send_with_relogin(send, idempotent)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            raise SynoConnectionError(error_message=e.args[0])
+        except requests.exceptions.HTTPError as e:
+            raise HTTPError(error_message=str(e.args))
+        finally:
+            self._invalidate_cache(compound)
+
+    def _send_compound_chunks(self,
+                              chunks: list[list[dict[str, object]]],
+                              method: Optional[str],
+                              mode: Optional[str],
+                              stop_when_error: bool,
+                              concurrency: int,
+                              capture_errors: bool = False
+                              ) -> list[requests.Response | Exception]:
+        """
+        Send the chunks of a compound, one at a time or through a thread pool.
+
+        Parameters
+        ----------
+        chunks : list[list[dict[str, object]]]
+            Chunks from `_split_compound`.
+        method : str, optional
+            'get' or 'post', None to pick from the URL length of each chunk.
+        mode : str, optional
+            "sequential" or "parallel".
+        stop_when_error : bool
+            Do not send the chunks following a failed one.
+        concurrency : int
+            Number of chunks sent at once.
+        capture_errors : bool, optional
+            Return the exception of a failed chunk instead of raising it. Defaults to False.
+
+        Returns
+        -------
+        list[requests.Response or Exception]
+            Outcome of each chunk sent, in order. Shorter than `chunks` when
+            `stop_when_error` skipped the last ones.
+        """
+        def send_chunk(chunk: list[dict[str, object]]) -> requests.Response | Exception:
+            """
+            Send one chunk as a compound request.
+
+            Parameters
+            ----------
+            chunk : list[dict[str, object]]
+                Requests of the chunk.
+
+            Returns
+            -------
+            requests.Response or Exception
+                Response of the chunk, or its error when errors are captured.
+            """
+            try:
+                return self._send_compound(chunk, method, mode, stop_when_error)
+            except Exception as e:
+                if not capture_errors:
+                    raise
+                return e
+
+        if concurrency > 1 and len(chunks) > 1:
+            # Workers run in a copy of the caller's context, to keep its governor lane
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as pool:
+                return list(pool.map(lambda chunk: context.copy().run(send_chunk, chunk), chunks))
+        outcomes = []
+        for chunk in chunks:
+            outcomes.append(send_chunk(chunk))
+            if stop_when_error and self._is_compound_failed(outcomes[-1]):
+                break
+        return outcomes
+
+    def _get_compound_method(self, url: str, req_param: dict[str, object], method: Optional[str]) -> str:
+        """
+        Pick the HTTP method of a compound request.
+
+        Parameters
+        ----------
+        url : str
+            Request URL.
+        req_param : dict[str, object]
+            Request parameters, without `_sid`.
+        method : str, optional
+            Method asked for by the caller.
+
+        Returns
+        -------
+        str
+            `method` if given, else 'get' when the URL fits in `MAX_GET_URL_LENGTH`, 'post' otherwise.
+        """
+        if method is not None:
+            return method
+        length = len(url) + 1 + len(urllib.parse.urlencode(req_param)) + \
+            len('&_sid=') + len(self._sid or '')
+        return 'get' if length <= MAX_GET_URL_LENGTH else 'post'
+
+    @staticmethod
+    def _split_compound(compound: list[dict[str, object]],
+                        max_chunk_bytes: int,
+                        max_chunk_requests: Optional[int]
+                        ) -> list[list[dict[str, object]]]:
+        """
+        Split a compound into chunks bounded in size and number of requests.
+
+        Parameters
+        ----------
+        compound : list[dict[str, object]]
+            Requests to execute.
+        max_chunk_bytes : int
+            Maximum size of the JSON encoded requests of one chunk. A single
+            larger request gets a chunk of its own.
+        max_chunk_requests : int, optional
+            Maximum number of requests of one chunk.
+
+        Returns
+        -------
+        list[list[dict[str, object]]]
+            At least one chunk, possibly empty.
+        """
+        chunks: list[list[dict[str, object]]] = [[]]
+        size = 2
+        for request in compound:
+            request_size = len(json.dumps(request)) + 2
+            full = max_chunk_requests is not None and len(
+                chunks[-1]) >= max_chunk_requests
+            if chunks[-1] and (full or size + request_size > max_chunk_bytes):
+                chunks.append([])
+                size = 2
+            chunks[-1].append(request)
+            size += request_size
+        return chunks
+
+    @staticmethod
+    def _is_compound_failed(outcome: requests.Response | Exception) -> bool:
+        """
+        Check whether a compound request failed, entirely or in one of its requests.
+
+        Parameters
+        ----------
+        outcome : requests.Response or Exception
+            Response or error of the compound request.
+
+        Returns
+        -------
+        bool
+            True on any failure.
+        """
+        if isinstance(outcome, Exception):
+            return True
+        try:
+            response = decode_response(outcome)
+        except ValueError:
+            return True
+        return not response.get('success') or bool(response.get('data', {}).get('has_fail'))
 
-    def _encrypt_AES(self, passphrase, text):
+    @staticmethod
+    def _merge_compound_responses(responses: list[dict[str, object]]) -> dict[str, object]:
         """
-        Encrypt text using AES encryption.
+        Merge the responses of the chunks of a compound.
 
         Parameters
         ----------
-        passphrase : bytes
-            AES passphrase.
-        text : str
-            Text to encrypt.
+        responses : list[dict[str, object]]
+            JSON responses of the chunks, in order.
 
         Returns
         -------
-        bytes
-            Encrypted ciphertext.
+        dict[str, object]
+            A single compound response, or the first failed chunk response.
         """
-        cipher = AESCipher(passphrase)
-
-        return cipher.encrypt(text)
-
-    def encrypt_params(self, params):
+        if len(responses) == 1:
+            return responses[0]
+        results = []
+        has_fail = False
+        for response in responses:
+            if not response.get('success'):
+                return response
+            results.extend(response['data'].get('result', []))
+            has_fail = has_fail or bool(response['data'].get('has_fail'))
+        return {'success': True, 'data': {'has_fail': has_fail, 'result': results}}
+
+    def _compound_results(self,
+                          chunks: list[list[dict[str, object]]],
+                          outcomes: list[requests.Response | Exception]
+                          ) -> list[SubRequestResult]:
         """
-        Encrypt login parameters using RSA and AES.
+        Build one result per request of a compound.
 
         Parameters
         ----------
-        params : dict
-            Parameters to encrypt.
+        chunks : list[list[dict[str, object]]]
+            Chunks of the compound.
+        outcomes : list[requests.Response or Exception]
+            Outcome of each chunk sent, from `_send_compound_chunks`.
 
         Returns
         -------
-        dict
-            Encrypted parameters suitable for login.
+        list[SubRequestResult]
+            Results, in the order of the compound.
         """
-        enc_info = self._get_enc_info()
-        public_key = enc_info["public_key"]
-        cipher_key = enc_info["cipherkey"]
-        cipher_token = enc_info["ciphertoken"]
-        server_time = enc_info["server_time"]
-        random_passphrase = self._random_AES_passphrase(501)
+        results = []
+        for index, chunk in enumerate(chunks):
+            outcome = outcomes[index] if index < len(outcomes) else None
+            results.extend(self._chunk_results(chunk, outcome))
+        return results
+
+    def _chunk_results(self,
+                       chunk: list[dict[str, object]],
+                       outcome: requests.Response | Exception | None
+                       ) -> list[SubRequestResult]:
+        """
+        Build one result per request of a chunk.
 
-        params[cipher_token] = server_time
+        Parameters
+        ----------
+        chunk : list[dict[str, object]]
+            Requests of the chunk.
+        outcome : requests.Response or Exception or None
+            Outcome of the chunk, None if it was not sent.
 
-        encrypted_passphrase = self._encrypt_RSA(int(public_key, 16),
-                                                 int("10001", 16),
-                                                 random_passphrase)
+        Returns
+        -------
+        list[SubRequestResult]
+            Results, in the order of the chunk.
+        """
+        def result(request: dict[str, object], **kwargs: Any) -> SubRequestResult:
+            """
+            Build the result of a sub-request.
 
-        encrypted_params = self._encrypt_AES(random_passphrase,
-                                             urllib.parse.urlencode(params))
+            Parameters
+            ----------
+            request : dict[str, object]
+                The sub-request.
+            **kwargs : Any
+                Other fields of `SubRequestResult`.
 
-        enc_params = {
-            "rsa": base64.b64encode(encrypted_passphrase).decode("utf-8"),
-            "aes": base64.b64encode(encrypted_params).decode("utf-8")
-        }
+            Returns
+            -------
+            SubRequestResult
+                Result naming the API, method and version of the sub-request.
+            """
+            return SubRequestResult(request.get('api'), request.get('method'),
+                                    request.get('version'), **kwargs)
+
+        if outcome is None:
+            return [result(request, skipped=True) for request in chunk]
+        if isinstance(outcome, Exception):
+            return [result(request, exception=outcome) for request in chunk]
+        try:
+            response = decode_response(outcome)
+        except requests.exceptions.JSONDecodeError as e:
+            error = JSONDecodeError(error_message=str(e.args))
+            return [result(request, exception=error) for request in chunk]
+
+        error_code = self._get_error_code(response)
+        if error_code:
+            error = self._get_api_exception('SYNO.Entry.Request', error_code)
+            return [result(request, response=response, exception=error) for request in chunk]
+
+        entries = response.get('data', {}).get('result', [])
+        results = []
+        for index, request in enumerate(chunk):
+            if index >= len(entries):
+                # Not executed, after a failure with stop_when_error
+                results.append(result(request, skipped=True))
+                continue
+            entry = {key: value for key, value in entries[index].items()
+                     if key in ('success', 'data', 'error')}
+            error_code = self._get_error_code(entry)
+            error = self._get_api_exception(
+                request.get('api'), error_code) if error_code else None
+            results.append(result(request, response=entry, exception=error))
+        return results
+
+    def _get_api_exception(self, api_name: str, error_code: int) -> Optional[Exception]:
+        """
+        Build the exception `request_data` raises for an error code, without reporting it.
 
-        return {cipher_key: json.dumps(enc_params)}
+        Parameters
+        ----------
+        api_name : str
+            Name of the API that failed.
+        error_code : int
+            DSM error code.
 
-    def _get_request_hash(self) -> Optional[str]:
-        """
-        Build the DSM web UI request hash from the active Noise session.
-
-        Returns
-        -------
-        str or None
-            Header value for `X-SYNO-HASH`, or `None` if the session does not
-            expose a finished Noise handshake.
-        """
-        if not self._noise_connection or not self._noise_handshake_hash:
-            return None
-        if not self._noise_connection.handshake_finished:
-            return None
-
-        cipher_state = self._noise_connection.noise_protocol.cipher_state_encrypt
-        nonce = cipher_state.n
-        encrypted_empty = cipher_state.encrypt_with_ad(b'', b'')
-
-        return "{}{}.{}".format(
-            self._noise_handshake_hash[:8],
-            self.encode_ssid_cookie(encrypted_empty),
-            self.encode_ssid_cookie(str(nonce).encode('utf-8')),
-        )
-
-    def _get_request_headers(self, headers: Optional[dict[str, object]] = None) -> dict[str, object]:
-        """
-        Return request headers shared by DSM API calls.
-
-        Parameters
-        ----------
-        headers : dict, optional
-            Extra headers to merge into the request.
-
-        Returns
-        -------
-        dict
-            Headers containing the Synology token and, when available, the
-            DSM Noise request hash.
-        """
-        request_headers = {"X-SYNO-TOKEN": self._syno_token}
-        if headers:
-            request_headers.update(headers)
-
-        request_hash = self._get_request_hash()
-        if request_hash:
-            request_headers["X-SYNO-HASH"] = request_hash
-
-        return request_headers
-
-    def request_multi_datas(self,
-                            compound: dict[object] = None,
-                            method: Optional[str] = None,
-                            # "sequential" or "parallel"
-                            mode: Optional[str] = "sequential",
-                            response_json: bool = True
-                            ) -> dict[str, object] | str | list | requests.Response:  # 'post' or 'get'
+        Returns
+        -------
+        Exception or None
+            The exception, None when exceptions are disabled.
         """
-        Send multiple requests to the Synology API, either sequentially or in parallel.
+        if USE_EXCEPTIONS:
+            # Download station error:
+            if api_name.find('DownloadStation') > -1:
+                return DownloadStationError(error_code=error_code)
+            # File station error:
+            elif api_name.find('FileStation') > -1:
+                return FileStationError(error_code=error_code)
+            # Audio station error:
+            elif api_name.find('AudioStation') > -1:
+                return AudioStationError(error_code=error_code)
+            # ABM (ActiveBackupOffice365) error:
+            elif api_name.find('ActiveBackupOffice365') > -1:
+                return ActiveBackupMicrosoftError(error_code=error_code)
+            # Active backup error:
+            elif api_name.find('ActiveBackup') > -1:
+                return ActiveBackupError(error_code=error_code)
+            # Virtualization error:
+            elif api_name.find('Virtualization') > -1:
+                return VirtualizationError(error_code=error_code)
+            # Syno backup error:
+            elif api_name.find('SYNO.Backup') > -1:
+                return BackupError(error_code=error_code)
+            # CloudSync error:
+            elif api_name.find('CloudSync') > -1:
+                return CloudSyncError(error_code=error_code)
+            # Core certificate error:
+            elif api_name.find('Core.Certificate') > -1:
+                return CertificateError(error_code=error_code)
+            # DHCP Server error:
+            elif api_name.find('DHCPServer') > -1 or api_name == 'SYNO.Core.TFTP':
+                return DHCPServerError(error_code=error_code)
+            # Active Directory error:
+            elif api_name.find('ActiveDirectory') > -1 or api_name in ('SYNO.Auth.ForgotPwd', 'SYNO.Entry.Request'):
+                return DirectoryServerError(error_code=error_code)
+            # Docker Error:
+            elif api_name.find('Docker') > -1:
+                return DockerError(error_code=error_code)
+            # Synology drive admin error:
+            elif api_name.find('SynologyDrive') > -1 or api_name == 'SYNO.C2FS.Share':
+                return DriveAdminError(error_code=error_code)
+            # Log center error:
+            elif api_name.find('LogCenter') > -1:
+                return LogCenterError(error_code=error_code)
+            # Note station error:
+            elif api_name.find('NoteStation') > -1:
+                return NoteStationError(error_code=error_code)
+            # OAUTH error:
+            elif api_name.find('SYNO.OAUTH') > -1:
+                return OAUTHError(error_code=error_code)
+            # Photo station error:
+            elif api_name.find('SYNO.Foto') > -1:
+                return PhotosError(error_code=error_code)
+            # Security advisor error:
+            elif api_name.find('SecurityAdvisor') > -1:
+                return SecurityAdvisorError(error_code=error_code)
+            # Task Scheduler error:
+            elif api_name.find('SYNO.Core.TaskScheduler') > -1:
+                return TaskSchedulerError(error_code=error_code)
+            # Event Scheduler error:
+            elif api_name.find('SYNO.Core.EventScheduler') > -1:
+                return EventSchedulerError(error_code=error_code)
+            # ISCSI LUN error:
+            elif api_name.find('SYNO.Core.ISCSI.LUN') > -1:
+                return LunError(error_code=error_code)
+            # ISCSI Target error:
+            elif api_name.find('SYNO.Core.ISCSI.Target') > -1:
+                return TargetError(error_code=error_code)
+            # Universal search error:
+            elif api_name.find('SYNO.Finder') > -1:
+                return UniversalSearchError(error_code=error_code)
+            # USB Copy error:
+            elif api_name.find('SYNO.USBCopy') > -1:
+                return USBCopyError(error_code=error_code)
+            # VPN Server error:
+            elif api_name.find('VPNServer') > -1:
+                return VPNError(error_code=error_code)
+            # Core:
+            elif api_name.find('SYNO.Core') > -1:
+                return CoreError(error_code=error_code)
+            # Core Sys Info:
+            elif api_name.find('SYNO.Storage') > -1:
+                return CoreSysInfoError(error_code=error_code)
+            elif api_name.find('SYNO.ResourceMonitor') > -1:
+                return CoreSysInfoError(error_code=error_code)
+            elif (api_name in ('SYNO.Backup.Service.NetworkBackup', 'SYNO.Finder.FileIndexing.Status',
+                               'SYNO.S2S.Server.Pair')):
+                return CoreSysInfoError(error_code=error_code)
+            # Unhandled API:
+            else:
+                return UndefinedError(
+                    error_code=error_code, api_name=api_name)
+        return None
+
+    def _get_multi_request(self,
+                           compound: Optional[list[dict[str, object]]],
+                           mode: Optional[str],
+                           stop_when_error: bool = True
+                           ) -> tuple[str, dict[str, object]]:
+        """
+        Build the URL and parameters of a `SYNO.Entry.Request` compound request.
 
         Parameters
         ----------
-        compound : dict[object], optional
-            A JSON structure containing multiple requests to be executed.
-            Example:
-            compound = [
-                {
-                    "api": "SYNO.Core.User",
-                    "method": "list",
-                    "version": self.core_list["SYNO.Core.User"]
-                }
-            ].
-        method : str, optional
-            The HTTP method to use ('get' or 'post'). Defaults to 'get' if not specified.
+        compound : list[dict[str, object]], optional
+            Requests to execute.
         mode : str, optional
-            The execution mode for the requests, either "sequential" or "parallel".
-            Defaults to "sequential".
-        response_json : bool, optional
-            Whether to return the response as JSON. If False, returns the raw response object.
+            "sequential" or "parallel".
+        stop_when_error : bool, optional
+            Skip the remaining requests after the first failed one. Defaults to True.
 
         Returns
         -------
-        dict[str, object] or str or list or requests.Response
-            The response from the API, either as a JSON-decoded object, string, list, or the raw response.
-
-        Raises
-        ------
-        SynoConnectionError
-            If a connection error occurs.
-        HTTPError
-            If an HTTP error occurs.
+        tuple[str, dict[str, object]]
+            Request URL and parameters, without `_sid`.
         """
         api_path = self.full_api_list['SYNO.Entry.Request']['path']
         api_version = self.full_api_list['SYNO.Entry.Request']['maxVersion']
@@ -884,131 +2829,162 @@ class Authentication:
             "method": "request",
             "version": f"{api_version}",
             "mode": mode,
-            "stop_when_error": "true",
-            "_sid": self._sid,
-            "compound": json.dumps(compound)
+            "stop_when_error": "true" if stop_when_error else "false",
+            "compound": get_json_codec().dumps(compound)
         }
+        return url, req_param
+
+    def request_webapi_data(self,
+                            api_name: str,
+                            api_path: str,
+                            req_param: dict[str, object],
+                            method: Optional[str] = None,
+                            response_json: bool = True
+                            ) -> dict[str, object] | str | list | requests.Response:
+        """
+        Send a DSM webapi request using the browser-style JSON API contract.
+
+        DSM APIs marked with `requestFormat: JSON` are submitted by the DSM UI
+        to `/webapi/<path>/<api>` with API/method/version left raw and request
+        parameters JSON-stringified. The UI also authenticates these requests
+        with the session cookie instead of an `_sid` form parameter.
+
+        Parameters
+        ----------
+        api_name : str
+            DSM API name.
+        api_path : str
+            API endpoint path from `SYNO.API.Info`.
+        req_param : dict
+            Request parameters containing at least `method` and `version`.
+        method : str, optional
+            HTTP method to use. Defaults to `post`.
+        response_json : bool, optional
+            If true, return decoded JSON; otherwise return the response object.
 
+        Returns
+        -------
+        dict, str, list or requests.Response
+            Decoded API response, or the raw response object when
+            `response_json` is false.
+        """
         if method is None:
-            method = 'get'
+            method = 'post'
 
-        # Request need some headers to work properly
-        # X-SYNO-TOKEN is the token that we get when we login
-        # We get it from the self._syno_token variable and by param 'enable_syno_token':'yes' in the login request
-
-        if method == 'get':
-            response = self._get(
-                url,
-                req_param,
-                verify=self._verify,
-                headers=self._get_request_headers(),
-            )
-        elif method == 'post':
-            response = self._post(
-                url,
-                req_param,
-                verify=self._verify,
-                headers=self._get_request_headers(),
-            )
+        encoded_param = self._encode_webapi_params(api_name, req_param)
+
+        url = ('%s%s' % (self._base_url, api_path)) + '/' + api_name
+        if method not in ('get', 'post'):
+            raise ValueError("Unsupported request method: %s" % method)
+
+        def send() -> requests.Response:
+            """
+            Send one attempt of the webapi request with the live sid.
+
+            Returns
+            -------
+            requests.Response
+                Response of the attempt, checked with `raise_for_status`.
+            """
+            headers = self._get_request_headers(
+                {"Cookie": "id=%s" % self._sid})
+            if method == 'get':
+                response = self._get(
+                    url, encoded_param, verify=self._verify, headers=headers)
+            else:
+                response = self._post(
+                    url, encoded_param, verify=self._verify, headers=headers)
+            response.raise_for_status()
+            return response
+
+        try:
+            response = self._send_with_relogin(
+                send, self._retry_policy.is_idempotent(req_param["method"]))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            raise SynoConnectionError(error_message=e.args[0])
+        except requests.exceptions.HTTPError as e:
+            raise HTTPError(error_message=str(e.args))
+        finally:
+            self._invalidate_cache(
+                [{'api': api_name, 'method': req_param['method']}])
+
+        error_code = 0
+        try:
+            error_code = self._get_error_code(decode_response(response))
+        except requests.exceptions.JSONDecodeError:
+            pass
+
+        if error_code:
+            self._raise_webapi_error(api_name, error_code)
 
         if response_json is True:
-            return response.json()
-        else:
-            return response
-
-    def request_webapi_data(self,
-                            api_name: str,
-                            api_path: str,
-                            req_param: dict[str, object],
-                            method: Optional[str] = None,
-                            response_json: bool = True
-                            ) -> dict[str, object] | str | list | requests.Response:
-        """
-        Send a DSM webapi request using the browser-style JSON API contract.
-
-        DSM APIs marked with `requestFormat: JSON` are submitted by the DSM UI
-        to `/webapi/<path>/<api>` with API/method/version left raw and request
-        parameters JSON-stringified. The UI also authenticates these requests
-        with the session cookie instead of an `_sid` form parameter.
-
-        Parameters
-        ----------
-        api_name : str
-            DSM API name.
-        api_path : str
-            API endpoint path from `SYNO.API.Info`.
-        req_param : dict
-            Request parameters containing at least `method` and `version`.
-        method : str, optional
-            HTTP method to use. Defaults to `post`.
-        response_json : bool, optional
-            If true, return decoded JSON; otherwise return the response object.
-
-        Returns
-        -------
-        dict, str, list or requests.Response
-            Decoded API response, or the raw response object when
-            `response_json` is false.
-        """
-        if method is None:
-            method = 'post'
-
-        encoded_param = {
-            "api": api_name,
-            "method": req_param["method"],
-            "version": req_param["version"],
-        }
-        for key, value in req_param.items():
-            if key in ("api", "method", "version"):
-                continue
-            encoded_param[key] = json.dumps(value)
-
-        url = ('%s%s' % (self._base_url, api_path)) + '/' + api_name
-        headers = self._get_request_headers({"Cookie": "id=%s" % self._sid})
-
-        try:
-            if method == 'get':
-                response = self._get(
-                    url, encoded_param, verify=self._verify, headers=headers)
-            elif method == 'post':
-                response = self._post(
-                    url, encoded_param, verify=self._verify, headers=headers)
-            else:
-                raise ValueError("Unsupported request method: %s" % method)
-            response.raise_for_status()
-        except requests.exceptions.ConnectionError as e:
-            raise SynoConnectionError(error_message=e.args[0])
-        except requests.exceptions.HTTPError as e:
-            raise HTTPError(error_message=str(e.args))
-
-        error_code = 0
-        try:
-            error_code = self._get_error_code(response.json())
-        except requests.exceptions.JSONDecodeError:
-            pass
-
-        if error_code:
-            if self._debug is True:
-                print('Data request failed: ' +
-                      self._get_error_message(error_code, api_name))
-            if USE_EXCEPTIONS:
-                if api_name.find('SYNO.Core') > -1:
-                    raise CoreError(error_code=error_code)
-                raise UndefinedError(error_code=error_code, api_name=api_name)
-
-        if response_json is True:
-            return response.json()
-        else:
-            return response
-
-    def request_data(self,
-                     api_name: str,
-                     api_path: str,
+            return decode_response(response)
+        else:
+            return response
+
+    @staticmethod
+    def _encode_webapi_params(api_name: str, req_param: dict[str, object]) -> dict[str, object]:
+        """
+        Encode parameters the way the DSM UI sends JSON-format APIs.
+
+        Parameters
+        ----------
+        api_name : str
+            DSM API name.
+        req_param : dict
+            Request parameters containing at least `method` and `version`.
+
+        Returns
+        -------
+        dict[str, object]
+            API, method and version as is, other parameters JSON-stringified.
+        """
+        encoded_param = {
+            "api": api_name,
+            "method": req_param["method"],
+            "version": req_param["version"],
+        }
+        for key, value in req_param.items():
+            if key in ("api", "method", "version"):
+                continue
+            encoded_param[key] = json.dumps(value)
+        return encoded_param
+
+    def _raise_webapi_error(self, api_name: str, error_code: int) -> None:
+        """
+        Report the DSM error code of a JSON-format API request.
+
+        Parameters
+        ----------
+        api_name : str
+            DSM API name.
+        error_code : int
+            DSM error code.
+
+        Raises
+        ------
+        CoreError, UndefinedError
+            When exceptions are enabled.
+        """
+        if self._debug is True:
+            print('Data request failed: ' +
+                  self._get_error_message(error_code, api_name))
+        if USE_EXCEPTIONS:
+            if api_name.find('SYNO.Core') > -1:
+                raise CoreError(error_code=error_code)
+            raise UndefinedError(error_code=error_code, api_name=api_name)
+        return
+
+    def request_data(self,
+                     api_name: str,
+                     api_path: str,
                      req_param: dict[str, object],
                      method: Optional[str] = None,
                      data: MultiPartEncoderMonitor | MultipartEncoder | str | None = None,
-                     response_json: bool = True
-                     ) -> dict[str, object] | str | list | requests.Response:  # 'post' or 'get'
+                     response_json: bool = True,
+                     stream: bool = False,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE
+                     ) -> dict[str, object] | str | list | requests.Response | StreamedResponse | BatchCall:  # 'post' or 'get'
         """
         Send a request to the Synology API and handle errors based on the API name.
 
@@ -1026,11 +3002,18 @@ class Authentication:
          The data to send to upload a file like a torrent file.
         response_json : bool, optional
             Whether to return the response as JSON. If False, returns the raw response object.
+        stream : bool, optional
+            Read the body chunk by chunk, for binary downloads. A JSON error
+            body is still detected and raised. Defaults to False.
+        chunk_size : int, optional
+            Bytes read per chunk when streaming. Defaults to 64 KiB.
 
         Returns
         -------
-        dict[str, object] or str or list or requests.Response
+        dict[str, object] or str or list or requests.Response or StreamedResponse or BatchCall
             The response from the API, either as a JSON-decoded object, string, list, or the raw response.
+            With `stream`, a `StreamedResponse` to iterate, read or save, then close.
+            Inside a `batch` block, a handle resolved when the batch is sent.
 
         Raises
         ------
@@ -1041,187 +3024,308 @@ class Authentication:
         DownloadStationError, FileStationError, AudioStationError, ActiveBackupError, ActiveBackupMicrosoftError, VirtualizationError, BackupError, CloudSyncError, CertificateError, DHCPServerError, DirectoryServerError, DockerError, DriveAdminError, LogCenterError, NoteStationError, OAUTHError, PhotosError, SecurityAdvisorError, TaskSchedulerError, EventSchedulerError, UniversalSearchError, USBCopyError, VPNError, CoreError, CoreSysInfoError, UndefinedError
             If the API returns an error code specific to the API being called.
         """
-        # Convert all boolean in string in lowercase because Synology API is waiting for "true" or "false"
-        for k, v in req_param.items():
-            if isinstance(v, bool):
-                req_param[k] = str(v).lower()
+        self._lowercase_booleans(req_param)
+
+        batch = self._active_batch()
+        if batch is not None and data is None and response_json is True and not stream:
+            # Captured by `batch`, sent later in a compound request
+            return batch.add(api_name, req_param)
+
+        if data is not None or response_json is not True or stream:
+            return self._send_request(api_name, api_path, req_param, method, data,
+                                      response_json, stream, chunk_size)
+
+        # Reads may be answered by the cache, or by an identical call in flight
+        cache = self._response_cache
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(
+                api_name, req_param, self._request_scope)
+            if cache_key is not None:
+                cached = cache.get(cache_key)
+                if cached is not MISSING:
+                    return cached
+                cache_generation = cache.generation
+
+        def send() -> dict[str, object] | str | list:
+            """
+            Send the request, for the caller or the coalesced waiters.
+
+            Returns
+            -------
+            dict[str, object] or str or list
+                Decoded response.
+            """
+            return self._send_request(api_name, api_path, req_param, method)
+
+        flight_key = None
+        if self._single_flight is not None:
+            flight_key = self._single_flight.make_key(
+                api_name, req_param, self._request_scope)
+        if flight_key is not None:
+            response = self._single_flight.do(flight_key, send)
+        else:
+            response = send()
+
+        if cache_key is not None and isinstance(response, dict) and not self._get_error_code(response):
+            cache.put(cache_key, response, cache_generation)
+        return response
+
+    def _send_request(self,
+                      api_name: str,
+                      api_path: str,
+                      req_param: dict[str, object],
+                      method: Optional[str] = None,
+                      data: MultiPartEncoderMonitor | MultipartEncoder | str | None = None,
+                      response_json: bool = True,
+                      stream: bool = False,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE
+                      ) -> dict[str, object] | str | list | requests.Response | StreamedResponse:
+        """
+        Send an API request and check its error code, bypassing batches, cache and coalescing.
+
+        The request is reported to the hooks of the session, if any.
+
+        Parameters
+        ----------
+        api_name : str
+            The name of the Synology API to call.
+        api_path : str
+            The path to the API endpoint.
+        req_param : dict[str, object]
+            The parameters to include in the request.
+        method : str, optional
+            The HTTP method to use ('get' or 'post'). Defaults to 'get'.
+        data : str, optional
+            The data to send to upload a file.
+        response_json : bool, optional
+            Whether to return the response as JSON. Defaults to True.
+        stream : bool, optional
+            Read the body chunk by chunk. Defaults to False.
+        chunk_size : int, optional
+            Bytes read per chunk when streaming. Defaults to 64 KiB.
+
+        Returns
+        -------
+        dict[str, object] or str or list or requests.Response or StreamedResponse
+            The response, see `request_data`.
+        """
+        hooks = self._hooks
+        if not hooks:
+            return self._send_checked_request(None, api_name, api_path, req_param, method, data,
+                                              response_json, stream, chunk_size)
+        url = ('%s%s' % (self._base_url, api_path)) + '?api=' + api_name
+        with self._observe_request(hooks, api_name, req_param, method, url, data) as event:
+            return self._send_checked_request(event, api_name, api_path, req_param, method, data,
+                                              response_json, stream, chunk_size)
+
+    def _send_checked_request(self,
+                              event: Optional[RequestEvent],
+                              api_name: str,
+                              api_path: str,
+                              req_param: dict[str, object],
+                              method: Optional[str] = None,
+                              data: MultiPartEncoderMonitor | MultipartEncoder | str | None = None,
+                              response_json: bool = True,
+                              stream: bool = False,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE
+                              ) -> dict[str, object] | str | list | requests.Response | StreamedResponse:
+        """
+        Send an API request and check its error code.
+
+        Parameters
+        ----------
+        event : RequestEvent, optional
+            Event completed with the attempts, response and error code,
+            None without hooks.
+        api_name : str
+            The name of the Synology API to call.
+        api_path : str
+            The path to the API endpoint.
+        req_param : dict[str, object]
+            The parameters to include in the request.
+        method : str, optional
+            The HTTP method to use ('get' or 'post'). Defaults to 'get'.
+        data : str, optional
+            The data to send to upload a file.
+        response_json : bool, optional
+            Whether to return the response as JSON. Defaults to True.
+        stream : bool, optional
+            Read the body chunk by chunk. Defaults to False.
+        chunk_size : int, optional
+            Bytes read per chunk when streaming. Defaults to 64 KiB.
 
+        Returns
+        -------
+        dict[str, object] or str or list or requests.Response or StreamedResponse
+            The response, see `request_data`.
+        """
         if method is None:
             method = 'get'
 
-        req_param['_sid'] = self._sid
-
         url = ('%s%s' % (self._base_url, api_path)) + '?api=' + api_name
 
+        def send() -> requests.Response | StreamedResponse:
+            """
+            Send one attempt of the request with the live sid.
+
+            Returns
+            -------
+            requests.Response or StreamedResponse
+                Response of the attempt, checked with `raise_for_status`,
+                streamed when `stream` is set.
+            """
+            req_param['_sid'] = self._sid
+            if event is not None:
+                event.attempts += 1
+            if method == 'get':
+                response = self._get(
+                    url,
+                    req_param,
+                    verify=self._verify,
+                    headers=self._get_request_headers(),
+                    stream=stream,
+                )
+            elif method == 'post':
+                if data is None:
+                    response = self._post(
+                        url,
+                        req_param,
+                        verify=self._verify,
+                        headers=self._get_request_headers(),
+                        stream=stream,
+                    )
+                else:
+                    upload_url = ('%s%s' % (self._base_url, api_path)) + \
+                        '/' + api_name
+                    response = self._post(
+                        upload_url,
+                        data=data,
+                        params=req_param,
+                        verify=self._verify,
+                        headers=self._get_request_headers(
+                            {"Content-Type": data.content_type}
+                        ),
+                        stream=stream,
+                    )
+            if event is not None:
+                event.record_response(response, streamed=stream)
+            response.raise_for_status()
+            if stream:
+                # Reads the first chunk, and the whole body if it is JSON
+                return StreamedResponse(response, chunk_size)
+            return response
+
+        # A streamed upload body can not be sent twice
+        idempotent = data is None and self._retry_policy.is_idempotent(
+            req_param.get('method'))
+
         # Do request and check for error:
-        response: Optional[requests.Response] = None
-        if USE_EXCEPTIONS:
-            # Catch and raise our own errors:
-            try:
-                if method == 'get':
-                    response = self._get(
-                        url,
-                        req_param,
-                        verify=self._verify,
-                        headers=self._get_request_headers(),
-                    )
-                elif method == 'post':
-                    if data is None:
-                        response = self._post(
-                            url,
-                            req_param,
-                            verify=self._verify,
-                            headers=self._get_request_headers(),
-                        )
-                    else:
-                        url = ('%s%s' % (self._base_url, api_path)) + \
-                            '/' + api_name
-                        response = self._post(
-                            url,
-                            data=data,
-                            params=req_param,
-                            verify=self._verify,
-                            headers=self._get_request_headers(
-                                {"Content-Type": data.content_type}
-                            ),
-                        )
-                response.raise_for_status()
-            except requests.exceptions.ConnectionError as e:
-                raise SynoConnectionError(error_message=e.args[0])
-            except requests.exceptions.HTTPError as e:
-                raise HTTPError(error_message=str(e.args))
-        else:
-            # Will raise its own error:
-            if method == 'get':
-                response = self._get(
-                    url,
-                    req_param,
-                    verify=self._verify,
-                    headers=self._get_request_headers(),
-                )
-            elif method == 'post':
-                response = self._post(
-                    url,
-                    req_param,
-                    verify=self._verify,
-                    headers=self._get_request_headers(),
-                )
-            response.raise_for_status()
+        response: Optional[requests.Response | StreamedResponse] = None
+        try:
+            if USE_EXCEPTIONS:
+                # Catch and raise our own errors:
+                try:
+                    response = self._send_with_relogin(
+                        send, idempotent, replayable=data is None)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    raise SynoConnectionError(error_message=e.args[0])
+                except requests.exceptions.HTTPError as e:
+                    raise HTTPError(error_message=str(e.args))
+            else:
+                # Will raise its own error:
+                response = self._send_with_relogin(
+                    send, idempotent, replayable=data is None)
+        finally:
+            # A write may have been applied even when its response was lost
+            self._invalidate_cache(
+                [{'api': api_name, 'method': req_param.get('method')}])
+
+        if stream and not response.is_json:
+            # Binary payload, left unread for the caller
+            return response
 
         # Check for error response from dsm:
+        # The body is decoded once, and kept on the response for the return value
         error_code = 0
         if USE_EXCEPTIONS:
             # Catch a JSON Decode error:
             try:
-                error_code = self._get_error_code(response.json())
+                error_code = self._get_error_code(decode_response(response))
             except requests.exceptions.JSONDecodeError:
                 pass
         else:
             # Will raise its own error:
-            error_code = self._get_error_code(response.json())
+            error_code = self._get_error_code(decode_response(response))
 
         if error_code:
-            if self._debug is True:
-                print('Data request failed: ' +
-                      self._get_error_message(error_code, api_name))
-
-            if USE_EXCEPTIONS:
-                # Download station error:
-                if api_name.find('DownloadStation') > -1:
-                    raise DownloadStationError(error_code=error_code)
-                # File station error:
-                elif api_name.find('FileStation') > -1:
-                    raise FileStationError(error_code=error_code)
-                # Audio station error:
-                elif api_name.find('AudioStation') > -1:
-                    raise AudioStationError(error_code=error_code)
-                # ABM (ActiveBackupOffice365) error:
-                elif api_name.find('ActiveBackupOffice365') > -1:
-                    raise ActiveBackupMicrosoftError(error_code=error_code)
-                # Active backup error:
-                elif api_name.find('ActiveBackup') > -1:
-                    raise ActiveBackupError(error_code=error_code)
-                # Virtualization error:
-                elif api_name.find('Virtualization') > -1:
-                    raise VirtualizationError(error_code=error_code)
-                # Syno backup error:
-                elif api_name.find('SYNO.Backup') > -1:
-                    raise BackupError(error_code=error_code)
-                # CloudSync error:
-                elif api_name.find('CloudSync') > -1:
-                    raise CloudSyncError(error_code=error_code)
-                # Core certificate error:
-                elif api_name.find('Core.Certificate') > -1:
-                    raise CertificateError(error_code=error_code)
-                # DHCP Server error:
-                elif api_name.find('DHCPServer') > -1 or api_name == 'SYNO.Core.TFTP':
-                    raise DHCPServerError(error_code=error_code)
-                # Active Directory error:
-                elif api_name.find('ActiveDirectory') > -1 or api_name in ('SYNO.Auth.ForgotPwd', 'SYNO.Entry.Request'):
-                    raise DirectoryServerError(error_code=error_code)
-                # Docker Error:
-                elif api_name.find('Docker') > -1:
-                    raise DockerError(error_code=error_code)
-                # Synology drive admin error:
-                elif api_name.find('SynologyDrive') > -1 or api_name == 'SYNO.C2FS.Share':
-                    raise DriveAdminError(error_code=error_code)
-                # Log center error:
-                elif api_name.find('LogCenter') > -1:
-                    raise LogCenterError(error_code=error_code)
-                # Note station error:
-                elif api_name.find('NoteStation') > -1:
-                    raise NoteStationError(error_code=error_code)
-                # OAUTH error:
-                elif api_name.find('SYNO.OAUTH') > -1:
-                    raise OAUTHError(error_code=error_code)
-                # Photo station error:
-                elif api_name.find('SYNO.Foto') > -1:
-                    raise PhotosError(error_code=error_code)
-                # Security advisor error:
-                elif api_name.find('SecurityAdvisor') > -1:
-                    raise SecurityAdvisorError(error_code=error_code)
-                # Task Scheduler error:
-                elif api_name.find('SYNO.Core.TaskScheduler') > -1:
-                    raise TaskSchedulerError(error_code=error_code)
-                # Event Scheduler error:
-                elif api_name.find('SYNO.Core.EventScheduler') > -1:
-                    raise EventSchedulerError(error_code=error_code)
-                # ISCSI LUN error:
-                elif api_name.find('SYNO.Core.ISCSI.LUN') > -1:
-                    raise LunError(error_code=error_code)
-                # ISCSI Target error:
-                elif api_name.find('SYNO.Core.ISCSI.Target') > -1:
-                    raise TargetError(error_code=error_code)
-                # Universal search error:
-                elif api_name.find('SYNO.Finder') > -1:
-                    raise UniversalSearchError(error_code=error_code)
-                # USB Copy error:
-                elif api_name.find('SYNO.USBCopy') > -1:
-                    raise USBCopyError(error_code=error_code)
-                # VPN Server error:
-                elif api_name.find('VPNServer') > -1:
-                    raise VPNError(error_code=error_code)
-                # Core:
-                elif api_name.find('SYNO.Core') > -1:
-                    raise CoreError(error_code=error_code)
-                # Core Sys Info:
-                elif api_name.find('SYNO.Storage') > -1:
-                    raise CoreSysInfoError(error_code=error_code)
-                elif api_name.find('SYNO.ResourceMonitor') > -1:
-                    raise CoreSysInfoError(error_code=error_code)
-                elif (api_name in ('SYNO.Backup.Service.NetworkBackup', 'SYNO.Finder.FileIndexing.Status',
-                                   'SYNO.S2S.Server.Pair')):
-                    raise CoreSysInfoError(error_code=error_code)
-                # Unhandled API:
-                else:
-                    raise UndefinedError(
-                        error_code=error_code, api_name=api_name)
-
-        if response_json is True:
-            return response.json()
+            if event is not None:
+                event.error_code = error_code
+            if error_code == CODE_API_NOT_FOUND and self._api_catalog_from_cache:
+                # The cached catalog is outdated, e.g. after a DSM update.
+                self._load_api_catalog(refresh=True)
+            self._raise_api_error(api_name, error_code)
+
+        if response_json is True and not stream:
+            return decode_response(response)
         else:
             return response
 
+    def _invalidate_cache(self, calls: list[dict[str, object]]) -> None:
+        """
+        Drop the cached responses of the API namespaces written by some calls.
+
+        Parameters
+        ----------
+        calls : list[dict[str, object]]
+            Calls sent, with their `api` and `method`.
+        """
+        if self._response_cache is not None:
+            for call in calls:
+                self._response_cache.record_call(
+                    call['api'], call.get('method'))
+        return
+
+    @staticmethod
+    def _lowercase_booleans(req_param: dict[str, object]) -> None:
+        """
+        Convert boolean parameters in place to the "true"/"false" strings DSM expects.
+
+        Parameters
+        ----------
+        req_param : dict[str, object]
+            Request parameters.
+        """
+        for k, v in req_param.items():
+            if isinstance(v, bool):
+                req_param[k] = str(v).lower()
+        return
+
+    def _raise_api_error(self, api_name: str, error_code: int) -> None:
+        """
+        Report a DSM error code, raising the exception matching the API.
+
+        Parameters
+        ----------
+        api_name : str
+            Name of the API that failed.
+        error_code : int
+            DSM error code.
+
+        Raises
+        ------
+        DownloadStationError, FileStationError, AudioStationError, ActiveBackupError, ActiveBackupMicrosoftError, VirtualizationError, BackupError, CloudSyncError, CertificateError, DHCPServerError, DirectoryServerError, DockerError, DriveAdminError, LogCenterError, NoteStationError, OAUTHError, PhotosError, SecurityAdvisorError, TaskSchedulerError, EventSchedulerError, UniversalSearchError, USBCopyError, VPNError, CoreError, CoreSysInfoError, UndefinedError
+            The error matching `api_name`, when exceptions are enabled.
+        """
+        if self._debug is True:
+            print('Data request failed: ' +
+                  self._get_error_message(error_code, api_name))
+
+        error = self._get_api_exception(api_name, error_code)
+        if error is not None:
+            raise error
+        return
+
     @staticmethod
     def _get_error_code(response: dict[str, object]) -> int:
         """
@@ -1383,6 +3487,30 @@ class Authentication:
         """
         return self._base_url
 
+    @property
+    def last_used(self) -> float:
+        """
+        Get the time of the last API request.
+
+        Returns
+        -------
+        float
+            `time.monotonic()` timestamp, used to evict idle sessions.
+        """
+        return self._last_used
+
+    @property
+    def http_session(self) -> Optional[requests.Session]:
+        """
+        Get the pooled HTTP session used for API requests.
+
+        Returns
+        -------
+        requests.Session or None
+            Keep-alive session shared by all requests of this object.
+        """
+        return self._requests_session
+
     @property
     def syno_token(self) -> str:
         """
@@ -1487,6 +3615,9 @@ class AESCipher(object):
         bytes
             Encrypted ciphertext with OpenSSL salt header.
         """
+        from cryptography.hazmat.backends import default_backend
+        from cryptography.hazmat.primitives.ciphers import algorithms, Cipher, modes
+
         cipher = Cipher(
             algorithms.AES(self._key),
             modes.CBC(self._iv),
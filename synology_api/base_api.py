@@ -4,8 +4,20 @@ Base API module for Synology DSM.
 Provides a base class for all API implementations, handling authentication,
 session management, and connection setup to a Synology NAS device.
 """
-from typing import Optional, Any
+from typing import Optional, Any, Iterable
+from requests.adapters import BaseAdapter
 from . import auth as syn
+from .retry import RetryPolicy
+from .api_cache import ApiCatalogCache
+from .session_store import SessionStore
+from .response_cache import ResponseCache
+from .single_flight import SingleFlight
+from .governor import ConcurrencyGovernor
+from .circuit_breaker import CircuitBreaker
+from .quickconnect_cache import QuickConnectCache
+from .instrumentation import RequestHooks
+from .session_registry import SessionRegistry
+from .batch import RequestBatch, DEFAULT_BATCH_SIZE
 
 
 class BaseApi(object):
@@ -13,7 +25,8 @@ class BaseApi(object):
     Base class to be used for all API implementations.
 
     Takes auth and connection information to create a session to the NAS.
-    The session is created on instanciation.
+    The session is created on instanciation, or reused from the session registry
+    when one is already open for the same host, port, user and QuickConnect ID.
 
     Parameters
     ----------
@@ -43,10 +56,41 @@ class BaseApi(object):
         The application context for API list retrieval. Defaults to `'Core'`.
     quickconnect_id : str, optional
         QuickConnect ID for relay-based access. Defaults to `None`.
+    pool_connections : int, optional
+        Number of per-host connection pools of the HTTP session. Defaults to `10`.
+    pool_maxsize : int, optional
+        Maximum number of keep-alive connections per host. Defaults to `10`.
+    retry_policy : RetryPolicy, optional
+        Timeouts and retry behaviour of API requests. Defaults to `None` (timeouts only, no retry).
+    auto_relogin : bool, optional
+        Log in again and replay requests when the DSM session expires. Defaults to `True`.
+    api_cache : ApiCatalogCache, optional
+        On-disk cache of the API catalog, skips its download at startup. Defaults to `None`.
+    session_store : SessionStore, optional
+        Store of login sessions, resumes a still valid session instead of logging in. Defaults to `None`.
+    session_registry : SessionRegistry, optional
+        Registry to take the session from. Defaults to `BaseApi.session_registry`.
+    response_cache : ResponseCache, optional
+        Cache answering repeated read calls from memory. Defaults to `None`.
+    single_flight : SingleFlight, optional
+        Coalescing of identical read calls sent at the same time. Defaults to `None`.
+    governor : ConcurrencyGovernor, optional
+        Adaptive limit of the requests in flight to the NAS. Defaults to `None`.
+    quickconnect_cache : QuickConnectCache, optional
+        Cache of resolved QuickConnect relays. Defaults to `None`.
+    quickconnect_direct : bool, optional
+        Connect directly to the LAN or WAN address of a QuickConnect NAS when
+        one answers, instead of the relay. Defaults to `True`.
+    hooks : Iterable[RequestHooks], optional
+        Callbacks around every API request, e.g. a `MetricsCollector`. Defaults to `None`.
+    transport : BaseAdapter, optional
+        Transport adapter sending the HTTP requests, e.g. a `ReplayTransport`. Defaults to `None`.
+    circuit_breaker : CircuitBreaker, optional
+        Fail fast while the NAS stops answering. Defaults to `None`.
     """
 
-    # Class-level attribute to store the shared session
-    shared_session: Optional[syn.Authentication] = None
+    # Sessions shared by the API objects of the process, keyed by NAS and user
+    session_registry: SessionRegistry = SessionRegistry()
 
     def __init__(self,
                  ip_address: Optional[str] = None,
@@ -62,6 +106,21 @@ class BaseApi(object):
                  device_name: Optional[str] = None,
                  application: str = 'Core',
                  quickconnect_id: Optional[str] = None,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 auto_relogin: bool = True,
+                 api_cache: Optional[ApiCatalogCache] = None,
+                 session_store: Optional[SessionStore] = None,
+                 session_registry: Optional[SessionRegistry] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 governor: Optional[ConcurrencyGovernor] = None,
+                 quickconnect_cache: Optional[QuickConnectCache] = None,
+                 quickconnect_direct: bool = True,
+                 hooks: Optional[Iterable[RequestHooks]] = None,
+                 transport: Optional[BaseAdapter] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
                  ) -> None:
         """
         Initialize the BaseApi object and create or reuse a session.
@@ -95,6 +154,49 @@ class BaseApi(object):
         quickconnect_id : str, optional
             QuickConnect ID for relay-based access. When provided, `ip_address`
             and `port` are not required.
+        pool_connections : int, optional
+            Number of per-host connection pools of the HTTP session. Defaults to `10`.
+        pool_maxsize : int, optional
+            Maximum number of keep-alive connections per host. Defaults to `10`.
+        retry_policy : RetryPolicy, optional
+            Timeouts and retry behaviour of API requests. Defaults to `None` (timeouts only, no retry).
+        auto_relogin : bool, optional
+            Log in again and replay requests when the DSM session expires. Defaults to `True`.
+        api_cache : ApiCatalogCache, optional
+            On-disk cache of the API catalog, skips its download at startup. Defaults to `None`.
+        session_store : SessionStore, optional
+            Store of login sessions, resumes a still valid session instead of logging in. Defaults to `None`.
+        session_registry : SessionRegistry, optional
+            Registry to take the session from. Defaults to `BaseApi.session_registry`.
+            Without credentials, the only session of the registry is reused.
+        response_cache : ResponseCache, optional
+            Cache of read-only responses of the session, see `ResponseCache`.
+            Only used when the session is created. Defaults to `None`.
+        single_flight : SingleFlight, optional
+            Coalescing of identical read calls of the session, see `SingleFlight`.
+            Only used when the session is created. Defaults to `None`.
+        governor : ConcurrencyGovernor, optional
+            Adaptive limit of the requests in flight with priority lanes, see
+            `ConcurrencyGovernor`. Only used when the session is created. Defaults to `None`.
+        quickconnect_cache : QuickConnectCache, optional
+            Cache of resolved QuickConnect relays, reused across sessions and
+            processes. Only used when the session is created. Defaults to `None`.
+        quickconnect_direct : bool, optional
+            Race the direct addresses of a QuickConnect NAS before using the
+            relay. Only used when the session is created. Defaults to `True`.
+        hooks : Iterable[RequestHooks], optional
+            Called around every API request of the session, see `RequestHooks`
+            and `MetricsCollector`. Only used when the session is created,
+            see `Authentication.add_hooks` otherwise. Defaults to `None`.
+        transport : BaseAdapter, optional
+            `requests` transport adapter replacing the connection pool, e.g. a
+            `RecordingTransport` or `ReplayTransport` of `synology_api.cassette`.
+            Only used when the session is created. Defaults to `None`.
+        circuit_breaker : CircuitBreaker, optional
+            Opens after consecutive failures of the NAS: requests then fail
+            fast with `CircuitOpenError` until a health probe succeeds. Share
+            it between the sessions of one NAS. Only used when the session is
+            created. Defaults to `None`.
 
         Returns
         -------
@@ -102,38 +204,157 @@ class BaseApi(object):
             Just actions, no return values.
         """
         self.application = application
+        self._session_registry: SessionRegistry = BaseApi.session_registry if session_registry is None else session_registry
 
-        # Reuse shared session if it exists, otherwise create a new one
-        if BaseApi.shared_session:
-            self.session = BaseApi.shared_session
+        if quickconnect_id:
+            missing_credentials = not all([username, password])
         else:
-            if quickconnect_id:
-                missing_credentials = not all([username, password])
-            else:
-                missing_credentials = not all(
-                    [ip_address, port, username, password])
-            if missing_credentials:
+            missing_credentials = not all(
+                [ip_address, port, username, password])
+
+        if missing_credentials:
+            # Single NAS scripts may open later API objects without credentials
+            keys = self._session_registry.keys()
+            session = self._session_registry.get(
+                keys[0]) if len(keys) == 1 else None
+            if session is None:
                 raise ValueError(
                     "Missing required credentials for initial authentication.")
+            self._session_key = keys[0]
+            self.session = session
+        else:
+            self._session_key = SessionRegistry.make_key(
+                ip_address, port, username, quickconnect_id)
+
+            def create_session() -> syn.Authentication:
+                """
+                Log in to the NAS and load its API catalog.
 
-            self.session = syn.Authentication(
-                ip_address, port, username, password, secure, cert_verify, dsm_version, debug, otp_code,
-                device_id, device_name, quickconnect_id
-            )
-            self.session.login()
-            self.session.get_api_list(self.application)
-            self.session.get_api_list()
+                Returns
+                -------
+                syn.Authentication
+                    Logged in session.
+                """
+                session = syn.Authentication(
+                    ip_address, port, username, password, secure, cert_verify, dsm_version, debug, otp_code,
+                    device_id, device_name, quickconnect_id,
+                    pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                    retry_policy=retry_policy, auto_relogin=auto_relogin,
+                    api_cache=api_cache, session_store=session_store,
+                    response_cache=response_cache, single_flight=single_flight,
+                    governor=governor, quickconnect_cache=quickconnect_cache,
+                    quickconnect_direct=quickconnect_direct, hooks=hooks,
+                    transport=transport, circuit_breaker=circuit_breaker
+                )
+                session.login()
+                session.get_api_list()
+                return session
 
-            # Store the new session in the shared class-level attribute
-            BaseApi.shared_session = self.session
+            self.session = self._session_registry.get_or_create(
+                self._session_key, create_session)
+
+        # The catalog is already loaded, this only filters it locally
+        self.session.get_api_list(self.application)
 
         # Initialize other attributes from the session
         self.request_data: Any = self.session.request_data
         self.batch_request = self.session.request_multi_datas
         self.core_list: Any = self.session.app_api_list
         self.gen_list: Any = self.session.full_api_list
-        self._sid: str = self.session.sid
-        self.base_url: str = self.session.base_url
+
+    @property
+    def base_url(self) -> str:
+        """
+        Get the live base URL of the API, kept current when the session switches route.
+
+        Returns
+        -------
+        str
+            Base URL of the underlying `Authentication`.
+        """
+        return self.session.base_url
+
+    @property
+    def _sid(self) -> Optional[str]:
+        """
+        Get the live session ID, kept current when the session logs in again.
+
+        Returns
+        -------
+        str or None
+            Session ID of the underlying `Authentication`.
+        """
+        return self.session._sid
+
+    @_sid.setter
+    def _sid(self, value: Optional[str]) -> None:
+        """
+        Set the session ID of the underlying `Authentication`.
+
+        Parameters
+        ----------
+        value : str or None
+            Session ID.
+        """
+        self.session._sid = value
+
+    def batch(self,
+              mode: str = 'sequential',
+              batch_size: int = DEFAULT_BATCH_SIZE,
+              concurrency: int = 1
+              ) -> RequestBatch:
+        """
+        Batch the API calls of every module sharing this session.
+
+        Inside ``with nas.batch() as b:``, API methods return a `BatchCall`
+        handle instead of the response, and the calls are sent as compound
+        requests when the block exits::
+
+            with fs.batch(mode='parallel'):
+                info = fs.get_info()
+                shares = fs.get_list_share()
+            print(info.result(), shares.result())
+
+        Only API methods returning the response unchanged are deferred, the
+        ones reading it (e.g. for a task id) send their call at once, see
+        `Authentication.batch`.
+
+        Parameters
+        ----------
+        mode : str, optional
+            "sequential" or "parallel" execution of the calls by DSM. Defaults to `'sequential'`.
+        batch_size : int, optional
+            Maximum number of calls per compound request. Defaults to `50`.
+        concurrency : int, optional
+            Number of compound requests sent at once. Defaults to `1`.
+
+        Returns
+        -------
+        RequestBatch
+            The batch, to use as a context manager.
+        """
+        return self.session.batch(mode=mode, batch_size=batch_size, concurrency=concurrency)
+
+    def lane(self, name: str) -> Any:
+        """
+        Send the calls of the current thread in a priority lane of the session governor.
+
+        Bulk sweeps let interactive calls go first::
+
+            with photos.lane('bulk'):
+                items = photos.list_items(limit=5000)
+
+        Parameters
+        ----------
+        name : str
+            Lane name, e.g. `'interactive'` or `'bulk'`.
+
+        Returns
+        -------
+        contextlib.AbstractContextManager
+            Context manager applying the lane, a no-op without governor.
+        """
+        return self.session.lane(name)
 
     def logout(self) -> None:
         """
@@ -141,11 +362,11 @@ class BaseApi(object):
 
         Returns
         -------
-        None
-            Action, no return values.
+        None or Awaitable[None]
+            Nothing, or the logout coroutine to await when the session is an `AsyncAuthentication`.
         """
+        result = None
         if self.session:
-            self.session.logout()
-            if BaseApi.shared_session == self.session:
-                BaseApi.shared_session = None
-        return
+            result = self.session.logout()
+            self._session_registry.discard(self._session_key, self.session)
+        return result
@@ -0,0 +1,481 @@
+"""
+Batching of API calls into `SYNO.Entry.Request` compound requests.
+
+`Authentication.request_multi_datas` splits large compounds into chunks and
+can report one `SubRequestResult` per request of the compound.
+
+Inside ``with session.batch():`` every `Authentication.request_data` call of
+the current thread, from any API module sharing the session, is queued instead
+of sent. It returns a `BatchCall` handle, resolved when the batch is flushed:
+on exit of the ``with`` block, on `RequestBatch.flush`, or when the result of a
+pending handle is asked for.
+
+API methods returning the response unchanged are deferred. Methods reading the
+response, e.g. ``['data']['taskid']``, get it from the handle, which flushes
+the batch: their call is sent at once, with the calls queued before it.
+Methods testing the type of the response, or decoding it otherwise, cannot run
+inside a batch.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Optional
+
+from .error_codes import CODE_UNKNOWN
+from .exceptions import UndefinedError
+
+if TYPE_CHECKING:
+    from .auth import Authentication
+
+# Calls sent per compound request by default.
+DEFAULT_BATCH_SIZE: int = 50
+
+# Upper bound of the JSON encoded compound of one chunk, in bytes.
+COMPOUND_CHUNK_BYTES: int = 64 * 1024
+
+# Longest URL sent as a GET, longer compound requests go in a POST body.
+# Web servers commonly reject request lines above 4 to 8 KiB.
+MAX_GET_URL_LENGTH: int = 4096
+
+
+class SubRequestResult(object):
+    """
+    Outcome of one request of a compound request.
+
+    Parameters
+    ----------
+    api_name : str
+        Name of the API called.
+    method : str
+        API method called.
+    version : object
+        API version called.
+    response : dict[str, object], optional
+        Response of the request, shaped as the return value of `request_data`.
+    exception : BaseException, optional
+        Exception `request_data` would have raised for this request.
+    skipped : bool, optional
+        The request was not executed, because an earlier one failed with
+        `stop_when_error`. Defaults to `False`.
+    """
+
+    def __init__(self,
+                 api_name: str,
+                 method: str,
+                 version: object,
+                 response: Optional[dict[str, object]] = None,
+                 exception: Optional[BaseException] = None,
+                 skipped: bool = False
+                 ) -> None:
+        """
+        Initialize a sub request result.
+
+        Parameters
+        ----------
+        api_name : str
+            Name of the API called.
+        method : str
+            API method called.
+        version : object
+            API version called.
+        response : dict[str, object], optional
+            Response of the request.
+        exception : BaseException, optional
+            Exception `request_data` would have raised for this request.
+        skipped : bool, optional
+            The request was not executed. Defaults to `False`.
+        """
+        self.api_name: str = api_name
+        self.method: str = method
+        self.version: object = version
+        self.response: Optional[dict[str, object]] = response
+        self.exception: Optional[BaseException] = exception
+        self.skipped: bool = skipped
+
+    @property
+    def success(self) -> bool:
+        """
+        Check whether the request succeeded.
+
+        Returns
+        -------
+        bool
+            True if DSM executed the request without error.
+        """
+        return (self.exception is None and self.response is not None
+                and bool(self.response.get('success')))
+
+    @property
+    def data(self) -> Optional[object]:
+        """
+        Get the `data` member of the response.
+
+        Returns
+        -------
+        object or None
+            Data of a successful request.
+        """
+        return self.response.get('data') if self.response is not None else None
+
+    @property
+    def error_code(self) -> Optional[int]:
+        """
+        Get the DSM error code of a failed request.
+
+        Returns
+        -------
+        int or None
+            Error code, None on success or transport errors.
+        """
+        if self.response is None or self.response.get('success'):
+            return getattr(self.exception, 'error_code', None)
+        return self.response.get('error', {}).get('code', CODE_UNKNOWN)
+
+    def result(self) -> dict[str, object]:
+        """
+        Get the response, raising the error of a failed request.
+
+        Returns
+        -------
+        dict[str, object]
+            The response, shaped as the return value of `request_data`.
+
+        Raises
+        ------
+        Exception
+            The exception of a failed request, `UndefinedError` if it was skipped.
+        """
+        if self.exception is not None:
+            raise self.exception
+        if self.skipped:
+            raise UndefinedError(error_code=CODE_UNKNOWN,
+                                 api_name=self.api_name)
+        return self.response
+
+    def __repr__(self) -> str:
+        """
+        Represent the result.
+
+        Returns
+        -------
+        str
+            API, method and outcome of the request.
+        """
+        if self.skipped:
+            state = 'skipped'
+        elif self.success:
+            state = 'ok'
+        else:
+            state = 'error %s' % self.error_code
+        return '<SubRequestResult %s.%s %s>' % (self.api_name, self.method, state)
+
+
+class BatchCall(object):
+    """
+    Future-like handle of an API call queued in a `RequestBatch`.
+
+    Parameters
+    ----------
+    batch : RequestBatch
+        Batch the call is queued in.
+    api_name : str
+        Name of the API to call.
+    req_param : dict[str, object]
+        Parameters of the call, including `method` and `version`.
+    """
+
+    def __init__(self, batch: RequestBatch, api_name: str, req_param: dict[str, object]) -> None:
+        """
+        Initialize a pending call.
+
+        Parameters
+        ----------
+        batch : RequestBatch
+            Batch the call is queued in.
+        api_name : str
+            Name of the API to call.
+        req_param : dict[str, object]
+            Parameters of the call, including `method` and `version`.
+        """
+        self.api_name: str = api_name
+        self.req_param: dict[str, object] = req_param
+        self._batch: RequestBatch = batch
+        self._done: bool = False
+        self._result: Optional[dict[str, object]] = None
+        self._exception: Optional[BaseException] = None
+
+    def done(self) -> bool:
+        """
+        Check whether the call was sent and its result is known.
+
+        Returns
+        -------
+        bool
+            True once the batch holding the call was flushed.
+        """
+        return self._done
+
+    def result(self) -> dict[str, object]:
+        """
+        Get the response of the call, flushing its batch if still pending.
+
+        Returns
+        -------
+        dict[str, object]
+            The response, shaped as the return value of `request_data`.
+
+        Raises
+        ------
+        Exception
+            The exception `request_data` would have raised for this call.
+        """
+        if not self._done:
+            self._batch.flush()
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self) -> Optional[BaseException]:
+        """
+        Get the exception of the call, flushing its batch if still pending.
+
+        Returns
+        -------
+        BaseException or None
+            The exception of a failed call, None on success.
+        """
+        if not self._done:
+            self._batch.flush()
+        return self._exception
+
+    def __getitem__(self, key: str) -> object:
+        """
+        Read a member of the response, flushing the batch if still pending.
+
+        API methods indexing the response of `request_data` keep working
+        inside a batch, their call is just no longer deferred.
+
+        Parameters
+        ----------
+        key : str
+            Member of the response, e.g. `'data'`.
+
+        Returns
+        -------
+        object
+            The member.
+        """
+        return self.result()[key]
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Check for a member of the response, flushing the batch if still pending.
+
+        Parameters
+        ----------
+        key : str
+            Member of the response.
+
+        Returns
+        -------
+        bool
+            True if the response has the member.
+        """
+        return key in self.result()
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Read a member of the response, flushing the batch if still pending.
+
+        Parameters
+        ----------
+        key : str
+            Member of the response, e.g. `'data'`.
+        default : object, optional
+            Returned when the response has no such member. Defaults to `None`.
+
+        Returns
+        -------
+        object
+            The member, or `default`.
+        """
+        return self.result().get(key, default)
+
+    def _set_result(self, result: dict[str, object]) -> None:
+        """
+        Resolve the call with a response.
+
+        Parameters
+        ----------
+        result : dict[str, object]
+            The response.
+        """
+        self._result = result
+        self._done = True
+        return
+
+    def _set_exception(self, exception: BaseException) -> None:
+        """
+        Resolve the call with an error.
+
+        Parameters
+        ----------
+        exception : BaseException
+            The error.
+        """
+        self._exception = exception
+        self._done = True
+        return
+
+    def __repr__(self) -> str:
+        """
+        Represent the call.
+
+        Returns
+        -------
+        str
+            API, method and state of the call.
+        """
+        state = 'done' if self._done else 'pending'
+        return '<BatchCall %s.%s %s>' % (self.api_name, self.req_param.get('method'), state)
+
+
+class RequestBatch(object):
+    """
+    Queue of API calls sent as compound requests.
+
+    Use `Authentication.batch` or `BaseApi.batch` rather than creating it
+    directly.
+
+    Parameters
+    ----------
+    session : Authentication
+        Session sending the compound requests.
+    mode : str, optional
+        "sequential" or "parallel" execution of the calls by DSM. Defaults to `"sequential"`.
+    batch_size : int, optional
+        Maximum number of calls per compound request. Defaults to `50`.
+    concurrency : int, optional
+        Number of compound requests sent at once. Defaults to `1`.
+    """
+
+    def __init__(self,
+                 session: Authentication,
+                 mode: str = 'sequential',
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrency: int = 1
+                 ) -> None:
+        """
+        Initialize an empty batch.
+
+        Parameters
+        ----------
+        session : Authentication
+            Session sending the compound requests.
+        mode : str, optional
+            "sequential" or "parallel" execution of the calls by DSM. Defaults to `"sequential"`.
+        batch_size : int, optional
+            Maximum number of calls per compound request. Defaults to `50`.
+        concurrency : int, optional
+            Number of compound requests sent at once. Defaults to `1`.
+        """
+        if mode not in ('sequential', 'parallel'):
+            raise ValueError("mode must be 'sequential' or 'parallel'")
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1')
+        self.mode: str = mode
+        self.batch_size: int = batch_size
+        self.concurrency: int = concurrency
+        self._session: Authentication = session
+        self._pending: list[BatchCall] = []
+
+    def __len__(self) -> int:
+        """
+        Count the calls waiting to be sent.
+
+        Returns
+        -------
+        int
+            Number of pending calls.
+        """
+        return len(self._pending)
+
+    def add(self, api_name: str, req_param: dict[str, object]) -> BatchCall:
+        """
+        Queue an API call.
+
+        Parameters
+        ----------
+        api_name : str
+            Name of the API to call.
+        req_param : dict[str, object]
+            Parameters of the call, including `method` and `version`.
+
+        Returns
+        -------
+        BatchCall
+            Handle resolved when the batch is flushed.
+        """
+        params = {key: value for key, value in req_param.items()
+                  if key != '_sid'}
+        call = BatchCall(self, api_name, params)
+        self._pending.append(call)
+        return call
+
+    def flush(self) -> None:
+        """
+        Send the pending calls, in compound requests of up to `batch_size` calls.
+
+        Errors never propagate from here, each handle holds the exception of
+        its own call, including a connection error of its compound request.
+        """
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        compound = [dict(call.req_param, api=call.api_name)
+                    for call in pending]
+        try:
+            results = self._session.request_multi_datas(
+                compound, mode=self.mode, stop_when_error=False,
+                max_chunk_requests=self.batch_size, concurrency=self.concurrency,
+                as_results=True)
+        except Exception as e:
+            for call in pending:
+                call._set_exception(e)
+            return
+
+        for call, result in zip(pending, results):
+            try:
+                call._set_result(result.result())
+            except Exception as e:
+                call._set_exception(e)
+        return
+
+    def __enter__(self) -> RequestBatch:
+        """
+        Start capturing the `request_data` calls of the current thread.
+
+        Returns
+        -------
+        RequestBatch
+            This batch.
+        """
+        self._session._push_batch(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        """
+        Stop capturing calls and flush them, unless the block raised.
+
+        Parameters
+        ----------
+        exc_type : Any
+            Exception type raised in the block, if any.
+        exc_value : Any
+            Exception raised in the block, if any.
+        traceback : Any
+            Traceback of the exception, if any.
+        """
+        self._session._pop_batch(self)
+        if exc_type is None:
+            self.flush()
+        return
@@ -0,0 +1,497 @@
+"""
+Record and replay of DSM web API exchanges.
+
+A `RecordingTransport` given to `Authentication` as its `transport` sends the
+requests to the NAS and keeps every exchange in a cassette file: the request
+method, path and parameters, and the response status, body and latency. Session
+IDs, tokens, credentials and the Noise handshake are redacted before anything
+is stored, and request headers are never kept. The file is gzip compressed
+JSON, so large listings stay small.
+
+A `ReplayTransport` answers from a cassette without network access, at full
+speed or with the recorded latencies. Login included, the client pipeline runs
+unchanged against realistic payloads, for profiling and load tests::
+
+    recorder = RecordingTransport('photos.cassette')
+    auth = Authentication('nas', '5000', 'admin', 'secret', transport=recorder)
+    ...  # run the workflow
+    recorder.save()
+
+    auth = Authentication('nas', '5000', 'admin', 'secret',
+                          transport=ReplayTransport('photos.cassette', realtime=True))
+
+Requests are matched on their method, path and parameters, volatile ones (sid,
+tokens, encrypted credentials) excluded, then on API and method alone. Repeated
+matches cycle through the recorded answers, so a workflow can be replayed in a
+loop.
+"""
+from __future__ import annotations
+
+import base64
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.cookies import cookiejar_from_dict
+from requests.structures import CaseInsensitiveDict
+
+# Bump when the file layout changes, older files are then refused.
+CASSETTE_FORMAT_VERSION = 1
+
+# Stored in place of redacted values.
+REDACTED = 'REDACTED'
+
+# Request parameters redacted and ignored when matching.
+VOLATILE_PARAMS = frozenset((
+    '_sid', 'SynoToken', 'account', 'passwd', 'otp_code', 'device_id', 'ik_message',
+    '__cIpHeRtext', '__cIpHeRtoken',
+))
+
+# Fields of JSON responses redacted, at any depth.
+REDACTED_FIELDS = frozenset(('sid', 'synotoken', 'did', 'device_id'))
+
+# Fields of JSON responses dropped: the Noise handshake cannot be replayed, the
+# client then runs without request hashes.
+DROPPED_FIELDS = frozenset(('ik_message',))
+
+# Response cookies kept, the others may carry the session.
+REPLAYED_COOKIES = frozenset(('_SSID',))
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """Raised by `ReplayTransport` for a request the cassette has no answer to."""
+
+
+def _request_params(request: requests.PreparedRequest) -> dict[str, str]:
+    """
+    Get the query and form parameters of a request.
+
+    Parameters
+    ----------
+    request : requests.PreparedRequest
+        Request being sent.
+
+    Returns
+    -------
+    dict[str, str]
+        Parameters, the form ones overriding the query ones. Other bodies,
+        e.g. multipart uploads, are not read.
+    """
+    params = dict(
+        parse_qsl(urlsplit(request.url).query, keep_blank_values=True))
+    content_type = request.headers.get('Content-Type', '')
+    if content_type.startswith('application/x-www-form-urlencoded') and request.body:
+        body = request.body.decode(
+            'utf-8') if isinstance(request.body, bytes) else request.body
+        params.update(parse_qsl(body, keep_blank_values=True))
+    return params
+
+
+def _match_keys(method: str, path: str, params: dict[str, str]) -> tuple[tuple, tuple]:
+    """
+    Build the exact and loose replay keys of a request.
+
+    Parameters
+    ----------
+    method : str
+        HTTP method.
+    path : str
+        URL path.
+    params : dict[str, str]
+        Request parameters.
+
+    Returns
+    -------
+    tuple[tuple, tuple]
+        Key with every stable parameter, and key with the API and method only.
+    """
+    stable = tuple(sorted((k, v)
+                   for k, v in params.items() if k not in VOLATILE_PARAMS))
+    return ((method, path, stable),
+            (method, path, params.get('api'), params.get('method')))
+
+
+def _redact(value: Any) -> Any:
+    """
+    Redact the session fields of a decoded JSON response.
+
+    Parameters
+    ----------
+    value : Any
+        Decoded JSON.
+
+    Returns
+    -------
+    Any
+        Copy with `REDACTED_FIELDS` replaced and `DROPPED_FIELDS` removed.
+    """
+    if isinstance(value, dict):
+        return {key: REDACTED if key in REDACTED_FIELDS else _redact(item)
+                for key, item in value.items() if key not in DROPPED_FIELDS}
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def _encode_body(content: bytes, content_type: str) -> dict[str, str]:
+    """
+    Encode a response body for the cassette, redacted if it is JSON.
+
+    Parameters
+    ----------
+    content : bytes
+        Response body.
+    content_type : str
+        Content type of the response.
+
+    Returns
+    -------
+    dict[str, str]
+        `body` for text, `body_b64` for binary content.
+    """
+    if 'json' in content_type or 'text' in content_type:
+        try:
+            text = content.decode('utf-8')
+        except UnicodeDecodeError:
+            text = None
+        if text is not None:
+            try:
+                decoded = json.loads(text)
+            except ValueError:
+                return {'body': text}
+            redacted = _redact(decoded)
+            # Unchanged bodies are kept byte for byte
+            return {'body': text if redacted == decoded else json.dumps(redacted)}
+    return {'body_b64': base64.b64encode(content).decode('ascii')}
+
+
+def _build_response(request: requests.PreparedRequest, status: int, content: bytes,
+                    content_type: str, cookies: dict[str, str],
+                    adapter: BaseAdapter) -> requests.Response:
+    """
+    Build the response of a replayed exchange.
+
+    Parameters
+    ----------
+    request : requests.PreparedRequest
+        Request being answered.
+    status : int
+        HTTP status.
+    content : bytes
+        Body, also readable as a stream.
+    content_type : str
+        Content type.
+    cookies : dict[str, str]
+        Cookies set by the response.
+    adapter : BaseAdapter
+        Adapter answering.
+
+    Returns
+    -------
+    requests.Response
+        Response, as an `HTTPAdapter` would build it.
+    """
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict({'Content-Type': content_type,
+                                            'Content-Length': str(len(content))})
+    response._content = content
+    response._content_consumed = True
+    response.raw = io.BytesIO(content)
+    response.encoding = 'utf-8'
+    response.url = request.url
+    response.request = request
+    response.cookies = cookiejar_from_dict(cookies)
+    response.connection = adapter
+    return response
+
+
+class Cassette(object):
+    """
+    Recorded exchanges with a NAS.
+
+    Parameters
+    ----------
+    exchanges : list[dict[str, Any]], optional
+        Exchanges in recording order. Defaults to none.
+    """
+
+    def __init__(self, exchanges: Optional[list[dict[str, Any]]] = None) -> None:
+        """
+        Initialize the cassette.
+
+        Parameters
+        ----------
+        exchanges : list[dict[str, Any]], optional
+            Exchanges in recording order, as stored in the file. Defaults to none.
+        """
+        self.exchanges: list[dict[str, Any]
+                             ] = exchanges if exchanges is not None else []
+
+    @classmethod
+    def load(cls, path: str) -> Cassette:
+        """
+        Read a cassette file.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file, gzip compressed or not.
+
+        Returns
+        -------
+        Cassette
+            The recorded exchanges.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a cassette of this format version.
+        """
+        with open(path, 'rb') as cassette_file:
+            content = cassette_file.read()
+        if content[:2] == b'\x1f\x8b':
+            content = gzip.decompress(content)
+        stored = json.loads(content)
+        if not isinstance(stored, dict) or stored.get('format') != CASSETTE_FORMAT_VERSION:
+            raise ValueError('%s is not a cassette of format %d' %
+                             (path, CASSETTE_FORMAT_VERSION))
+        return cls(stored['exchanges'])
+
+    def save(self, path: str) -> None:
+        """
+        Write the cassette, gzip compressed, through a temporary file renamed over it.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file.
+        """
+        content = json.dumps({'format': CASSETTE_FORMAT_VERSION, 'exchanges': self.exchanges},
+                             separators=(',', ':')).encode('utf-8')
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix='.%s.' % name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(gzip.compress(content))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return
+
+
+class RecordingTransport(BaseAdapter):
+    """
+    Transport adapter recording the exchanges of an `Authentication` with its NAS.
+
+    Parameters
+    ----------
+    path : str, optional
+        Cassette file written by `save` and when the session closes. Defaults
+        to None, keep the exchanges in `cassette` only.
+    inner : BaseAdapter, optional
+        Adapter sending the requests. Defaults to a new `HTTPAdapter`.
+    """
+
+    def __init__(self, path: Optional[str] = None, inner: Optional[BaseAdapter] = None) -> None:
+        """
+        Initialize the recorder.
+
+        Parameters
+        ----------
+        path : str, optional
+            Cassette file written by `save` and when the session closes.
+            Defaults to None, keep the exchanges in `cassette` only.
+        inner : BaseAdapter, optional
+            Adapter sending the requests, e.g. an `HTTPAdapter` with a larger
+            pool. Defaults to a new `HTTPAdapter`.
+        """
+        super().__init__()
+        self.path: Optional[str] = path
+        self.inner: BaseAdapter = inner or HTTPAdapter()
+        self.cassette: Cassette = Cassette()
+        self._lock: threading.Lock = threading.Lock()
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs: Any) -> requests.Response:
+        """
+        Send a request and record its exchange.
+
+        Streamed responses are read in full to be recorded.
+
+        Parameters
+        ----------
+        request : requests.PreparedRequest
+            Request to send.
+        stream : bool, optional
+            Whether the caller streams the response body. Defaults to False.
+        **kwargs : Any
+            Other arguments of `BaseAdapter.send`.
+
+        Returns
+        -------
+        requests.Response
+            Response of the NAS.
+        """
+        started = time.perf_counter()
+        response = self.inner.send(request, stream=stream, **kwargs)
+        content = response.content
+        elapsed = time.perf_counter() - started
+
+        params = _request_params(request)
+        content_type = response.headers.get('Content-Type', '')
+        exchange = {
+            'request': {
+                'method': request.method,
+                'path': urlsplit(request.url).path,
+                'params': {k: REDACTED if k in VOLATILE_PARAMS else v for k, v in params.items()},
+            },
+            'response': {
+                'status': response.status_code,
+                'content_type': content_type,
+                'elapsed': round(elapsed, 6),
+            },
+        }
+        exchange['response'].update(_encode_body(content, content_type))
+        cookies = {name: value for name,
+                   value in response.cookies.items() if name in REPLAYED_COOKIES}
+        if cookies:
+            exchange['response']['cookies'] = cookies
+        with self._lock:
+            self.cassette.exchanges.append(exchange)
+        return response
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Write the exchanges recorded so far.
+
+        Parameters
+        ----------
+        path : str, optional
+            Cassette file. Defaults to the `path` given at creation.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError('No cassette path given')
+        with self._lock:
+            cassette = Cassette(list(self.cassette.exchanges))
+        cassette.save(path)
+        return
+
+    def close(self) -> None:
+        """Save the cassette if a path was given, and close the inner adapter."""
+        if self.path is not None:
+            self.save()
+        self.inner.close()
+        return
+
+
+class ReplayTransport(BaseAdapter):
+    """
+    Transport adapter answering an `Authentication` from a cassette.
+
+    Parameters
+    ----------
+    cassette : str or Cassette
+        Cassette, or path of its file.
+    realtime : bool, optional
+        Wait the recorded latency of every exchange before answering. Defaults
+        to False, answer at once.
+    """
+
+    def __init__(self, cassette: str | Cassette, realtime: bool = False) -> None:
+        """
+        Initialize the replay.
+
+        Parameters
+        ----------
+        cassette : str or Cassette
+            Cassette, or path of its file.
+        realtime : bool, optional
+            Wait the recorded latency of every exchange before answering, to
+            reproduce the timings of the NAS. Defaults to False, answer at once.
+        """
+        super().__init__()
+        if isinstance(cassette, str):
+            cassette = Cassette.load(cassette)
+        self.realtime: bool = realtime
+        self._lock: threading.Lock = threading.Lock()
+        # Replay key -> exchanges, and the index of the next one
+        self._exchanges: dict[tuple, list[dict[str, Any]]] = {}
+        self._next: dict[tuple, int] = {}
+        for exchange in cassette.exchanges:
+            recorded = exchange['request']
+            for key in _match_keys(recorded['method'], recorded['path'], recorded['params']):
+                self._exchanges.setdefault(key, []).append(exchange)
+
+    def _find(self, request: requests.PreparedRequest) -> dict[str, Any]:
+        """
+        Get the recorded exchange answering a request.
+
+        Parameters
+        ----------
+        request : requests.PreparedRequest
+            Request being sent.
+
+        Returns
+        -------
+        dict[str, Any]
+            Next recorded exchange of the exact key, else of the loose one.
+
+        Raises
+        ------
+        CassetteMiss
+            If no exchange matches.
+        """
+        params = _request_params(request)
+        with self._lock:
+            for key in _match_keys(request.method, urlsplit(request.url).path, params):
+                exchanges = self._exchanges.get(key)
+                if exchanges:
+                    index = self._next.get(key, 0)
+                    self._next[key] = index + 1
+                    return exchanges[index % len(exchanges)]
+        raise CassetteMiss('No recorded answer to %s %s %s.%s' % (
+            request.method, urlsplit(request.url).path, params.get('api'), params.get('method')),
+            request=request)
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs: Any) -> requests.Response:
+        """
+        Answer a request from the cassette.
+
+        Parameters
+        ----------
+        request : requests.PreparedRequest
+            Request to answer.
+        stream : bool, optional
+            Whether the caller streams the response body. Defaults to False.
+        **kwargs : Any
+            Other arguments of `BaseAdapter.send`, ignored.
+
+        Returns
+        -------
+        requests.Response
+            Recorded response.
+        """
+        recorded = self._find(request)['response']
+        if self.realtime:
+            time.sleep(recorded['elapsed'])
+        if 'body_b64' in recorded:
+            content = base64.b64decode(recorded['body_b64'])
+        else:
+            content = recorded['body'].encode('utf-8')
+        return _build_response(request, recorded['status'], content, recorded['content_type'],
+                               recorded.get('cookies', {}), self)
+
+    def close(self) -> None:
+        """Nothing to release."""
+        return
@@ -0,0 +1,291 @@
+"""
+Circuit breaker of the requests sent to a NAS.
+
+While a NAS reboots or its web API hangs, every request waits for a full
+connection or read timeout, retries included, and worker pools pile up on the
+dead host. A `CircuitBreaker` given to `Authentication` or `BaseApi` counts
+the consecutive failed requests, connection errors, timeouts and 5xx/429
+answers. At `failure_threshold` it opens: requests then fail at once with
+`CircuitOpenError`, nothing is sent. A background thread probes the NAS with a
+tiny `SYNO.API.Info` query, after `recovery_timeout` then less and less often,
+and closes the circuit when the probe succeeds::
+
+    breaker = CircuitBreaker(failure_threshold=3)
+    session = Authentication(ip, port, user, password, circuit_breaker=breaker)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+import requests
+
+from .governor import is_overload_error
+from .http_adapter import RequestAborted
+
+CLOSED = 'closed'
+OPEN = 'open'
+
+
+def is_failure_status(status_code: int) -> bool:
+    """
+    Tell whether an HTTP status counts as a failure of the NAS.
+
+    Parameters
+    ----------
+    status_code : int
+        HTTP status of a response.
+
+    Returns
+    -------
+    bool
+        True for 429 and 5xx answers.
+    """
+    return status_code == 429 or status_code >= 500
+
+
+def is_failure_error(error: BaseException) -> bool:
+    """
+    Tell whether a request exception counts as a failure of the NAS.
+
+    Parameters
+    ----------
+    error : BaseException
+        Exception raised while sending the request.
+
+    Returns
+    -------
+    bool
+        True for connection errors, timeouts and 429/5xx answers, False for
+        requests aborted on purpose.
+    """
+    return is_overload_error(error) and not isinstance(error, RequestAborted)
+
+
+class CircuitBreaker(object):
+    """
+    Fail fast on a NAS that stopped answering, until a health probe succeeds.
+
+    Share one breaker between the sessions opened on the same NAS, and never
+    between NAS.
+
+    Parameters
+    ----------
+    failure_threshold : int, optional
+        Consecutive failed requests opening the circuit. Defaults to 5.
+    recovery_timeout : float, optional
+        Seconds before the first probe of an open circuit. Defaults to 5.
+    max_recovery_timeout : float, optional
+        Longest wait between probes, doubled after each failed probe up to it.
+        Defaults to 60.
+    probe_timeout : float, optional
+        Connect and read timeout of a probe, in seconds. Defaults to 3.
+    """
+
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 recovery_timeout: float = 5.0,
+                 max_recovery_timeout: float = 60.0,
+                 probe_timeout: float = 3.0
+                 ) -> None:
+        """
+        Initialize the breaker, closed.
+
+        Parameters
+        ----------
+        failure_threshold : int, optional
+            Consecutive failed requests, connection errors, timeouts or 429/5xx
+            answers, opening the circuit. Defaults to 5.
+        recovery_timeout : float, optional
+            Seconds before the first probe of an open circuit. Defaults to 5.
+        max_recovery_timeout : float, optional
+            Longest wait between probes, doubled after each failed probe up to
+            it. Defaults to 60.
+        probe_timeout : float, optional
+            Connect and read timeout of a probe, in seconds. Defaults to 3.
+        """
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be at least 1')
+        self.failure_threshold: int = failure_threshold
+        self.recovery_timeout: float = recovery_timeout
+        self.max_recovery_timeout: float = max_recovery_timeout
+        self.probe_timeout: float = probe_timeout
+        self._lock: threading.Lock = threading.Lock()
+        self._state: str = CLOSED
+        self._failures: int = 0
+        self._next_probe: float = 0.0
+        # Set to stop the probe thread of the current opening
+        self._closed_event: threading.Event = threading.Event()
+        self._closed_event.set()
+        # Counters, read by `stats`
+        self._trips: int = 0
+        self._probes: int = 0
+        self._rejected: int = 0
+
+    @property
+    def state(self) -> str:
+        """
+        Get the state of the circuit.
+
+        Returns
+        -------
+        str
+            `'closed'` when requests are sent, `'open'` when they fail fast.
+        """
+        return self._state
+
+    @property
+    def retry_after(self) -> float:
+        """
+        Get the seconds until the next probe of an open circuit.
+
+        Returns
+        -------
+        float
+            Seconds, 0 when closed or when a probe is running.
+        """
+        if self._state == CLOSED:
+            return 0.0
+        return max(0.0, self._next_probe - time.monotonic())
+
+    def stats(self) -> dict[str, object]:
+        """
+        Get the counters of the breaker.
+
+        Returns
+        -------
+        dict[str, object]
+            `state`, consecutive `failures`, `trips` (openings), `probes` sent
+            and `rejected` requests.
+        """
+        with self._lock:
+            return {'state': self._state, 'failures': self._failures, 'trips': self._trips,
+                    'probes': self._probes, 'rejected': self._rejected}
+
+    def allow_request(self) -> bool:
+        """
+        Tell whether a request may be sent.
+
+        Returns
+        -------
+        bool
+            False while the circuit is open, the request is then counted as rejected.
+        """
+        if self._state == CLOSED:
+            return True
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Report an answered request, resetting the consecutive failures."""
+        if self._failures:
+            with self._lock:
+                if self._state == CLOSED:
+                    self._failures = 0
+        return
+
+    def record_failure(self, probe: Callable[[], bool]) -> None:
+        """
+        Report a failed request, opening the circuit at `failure_threshold`.
+
+        Parameters
+        ----------
+        probe : Callable[[], bool]
+            Checks the NAS without the breaker, True when it answers. Called
+            from the probe thread if this failure opens the circuit.
+        """
+        with self._lock:
+            if self._state != CLOSED:
+                return
+            self._failures += 1
+            if self._failures < self.failure_threshold:
+                return
+            self._state = OPEN
+            self._trips += 1
+            self._next_probe = time.monotonic() + self.recovery_timeout
+            closed_event = self._closed_event = threading.Event()
+        thread = threading.Thread(target=self._probe_until_closed, args=(probe, closed_event),
+                                  name='synology-api-circuit-probe', daemon=True)
+        thread.start()
+        return
+
+    def _probe_until_closed(self, probe: Callable[[], bool], closed_event: threading.Event) -> None:
+        """
+        Probe the NAS with a growing delay until it answers, then close the circuit.
+
+        Parameters
+        ----------
+        probe : Callable[[], bool]
+            Checks the NAS, True when it answers.
+        closed_event : threading.Event
+            Set when the circuit is closed by `reset`, which stops the probes.
+        """
+        delay = self.recovery_timeout
+        while not closed_event.wait(max(0.0, self._next_probe - time.monotonic())):
+            with self._lock:
+                self._probes += 1
+            try:
+                healthy = probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                self._close(closed_event)
+                return
+            delay = min(delay * 2, self.max_recovery_timeout)
+            self._next_probe = time.monotonic() + delay
+        return
+
+    def _close(self, closed_event: threading.Event) -> None:
+        """
+        Close the circuit opened with `closed_event`.
+
+        Parameters
+        ----------
+        closed_event : threading.Event
+            Event of the opening being ended.
+        """
+        with self._lock:
+            if self._closed_event is closed_event:
+                self._state = CLOSED
+                self._failures = 0
+            closed_event.set()
+        return
+
+    def reset(self) -> None:
+        """Close the circuit at once and stop its probes."""
+        self._close(self._closed_event)
+        return
+
+
+def probe_request(session: requests.Session, base_url: str, timeout: float, verify: bool) -> bool:
+    """
+    Query `SYNO.API.Info` about itself, the cheapest request DSM answers.
+
+    Parameters
+    ----------
+    session : requests.Session
+        HTTP session to send the probe with.
+    base_url : str
+        Web API URL of the NAS, ending with `/webapi/`.
+    timeout : float
+        Connect and read timeout, in seconds.
+    verify : bool
+        Whether to verify the SSL certificate.
+
+    Returns
+    -------
+    bool
+        True if DSM answered successfully.
+    """
+    params = {'api': 'SYNO.API.Info', 'version': 1,
+              'method': 'query', 'query': 'SYNO.API.Info'}
+    try:
+        response = session.get(base_url + 'query.cgi',
+                               params=params, timeout=timeout, verify=verify)
+        return response.status_code == 200 and response.json().get('success') is True
+    except (requests.exceptions.RequestException, ValueError, AttributeError):
+        return False
@@ -1,12 +1,11 @@
 """Synology DSM Core Certificate API Wrapper."""
 from __future__ import annotations
 from io import BytesIO
-from typing import Optional
+from typing import Optional, Any
 
 from . import base_api
 
 import os
-import requests
 import json
 
 
@@ -39,6 +38,9 @@ class Certificate(base_api.BaseApi):
         One-time password for 2FA (default is None).
     quickconnect_id : str, optional
         QuickConnect ID for relay-based access. Defaults to None.
+    **kwargs : Any
+        Other keyword parameters of `BaseApi`, such as `retry_policy`,
+        `governor` or `quickconnect_cache`.
     """
 
     _API_NAME = 'SYNO.Core.Certificate.CRT'
@@ -53,7 +55,8 @@ class Certificate(base_api.BaseApi):
                  dsm_version: int = 7,
                  debug: bool = True,
                  otp_code: Optional[str] = None,
-                 quickconnect_id: Optional[str] = None
+                 quickconnect_id: Optional[str] = None,
+                 **kwargs: Any
                  ) -> None:
         """
         Initialize the Certificate API wrapper.
@@ -81,9 +84,12 @@ class Certificate(base_api.BaseApi):
         quickconnect_id : str, optional
             QuickConnect ID for relay-based access. When provided, `ip_address`
             and `port` are not required.
+        **kwargs : Any
+            Other keyword parameters of `BaseApi`, such as `retry_policy`,
+            `governor` or `quickconnect_cache`.
         """
         super(Certificate, self).__init__(ip_address, port, username, password, secure, cert_verify, dsm_version, debug,
-                                          otp_code, application='Core', quickconnect_id=quickconnect_id)
+                                          otp_code, application='Core', quickconnect_id=quickconnect_id, **kwargs)
         self._debug: bool = debug
 
     def _base_certificate_methods(self,
@@ -216,8 +222,6 @@ class Certificate(base_api.BaseApi):
         # ca_cert is optional argument for upload cert
         ca_cert = os.path.abspath(ca_cert) if ca_cert else None
 
-        session = requests.session()
-
         url = ('%s%s' % (self.base_url, api_path)) + '?api=%s&version=%s&method=import&_sid=%s' % (
             api_name, info['minVersion'], self._sid)
 
@@ -233,10 +237,10 @@ class Certificate(base_api.BaseApi):
                 with open(ca_cert, 'rb') as payload_ca_cert:
                     files['inter_cert'] = (
                         ca_cert, payload_ca_cert, 'application/x-x509-ca-cert')
-                    r = session.post(url, files=files, data=data_payload, verify=self.session.verify_cert_enabled(
+                    r = self.session._post(url, files=files, data=data_payload, verify=self.session.verify_cert_enabled(
                     ), headers={"X-SYNO-TOKEN": self.session._syno_token})
             else:
-                r = session.post(url, files=files, data=data_payload, verify=self.session.verify_cert_enabled(
+                r = self.session._post(url, files=files, data=data_payload, verify=self.session.verify_cert_enabled(
                 ), headers={"X-SYNO-TOKEN": self.session._syno_token})
 
         if 200 == r.status_code and r.json()['success']:
@@ -335,16 +339,14 @@ class Certificate(base_api.BaseApi):
             "_sid": self._sid,
         }
 
-        session = requests.session()
-
         url = ('%s%s' % (self.base_url, api_path))
 
         headers = {
             "X-SYNO-TOKEN": self.session._syno_token,
         }
 
-        r = session.post(url, params=paramdict, data=payloaddict, verify=self.session.verify_cert_enabled(),
-                         headers=headers)
+        r = self.session._post(url, params=paramdict, data=payloaddict, verify=self.session.verify_cert_enabled(),
+                               headers=headers)
 
         if 200 == r.status_code and r.json()['success']:
             if self._debug is True:
@@ -371,8 +373,6 @@ class Certificate(base_api.BaseApi):
         info = self.session.app_api_list[api_name]
         api_path = info['path']
 
-        session = requests.session()
-
         url = (
             f"{self.base_url}{api_path}?"
             f"api={api_name}&"
@@ -383,8 +383,8 @@ class Certificate(base_api.BaseApi):
             f"id={cert_id}"
         )
 
-        result = session.get(url, verify=self.session.verify_cert_enabled(), headers={
-                             "X-SYNO-TOKEN": self.session._syno_token})
+        result = self.session._get(url, verify=self.session.verify_cert_enabled(), headers={
+                                   "X-SYNO-TOKEN": self.session._syno_token})
 
         if result.status_code == 200:
             return BytesIO(result.content)
@@ -9,8 +9,6 @@ import json
 from typing import List
 from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
 import os
-import requests
-import tqdm
 import time
 from . import base_api
 
@@ -603,8 +601,6 @@ class Package(base_api.BaseApi):
         api_path = info['path']
         filename = os.path.basename(file_path)
 
-        session = requests.session()
-
         with open(file_path, 'rb') as payload:
             url = ('%s%s' % (self.base_url, api_path)) + '?api=%s&version=%s&method=upload&_sid=%s' % (
                 api_name, info['minVersion'], self._sid)
@@ -615,6 +611,8 @@ class Package(base_api.BaseApi):
             })
 
             if progress_bar:
+                import tqdm
+
                 bar = tqdm.tqdm(desc='Upload Progress',
                                 total=encoder.len,
                                 dynamic_ncols=True,
@@ -626,7 +624,7 @@ class Package(base_api.BaseApi):
                 monitor = MultipartEncoderMonitor(
                     encoder, lambda monitor: bar.update(monitor.bytes_read - bar.n))
 
-                r = session.post(
+                r = self.session._post(
                     url,
                     data=monitor,
                     verify=verify,
@@ -635,7 +633,7 @@ class Package(base_api.BaseApi):
                 )
 
             else:
-                r = session.post(
+                r = self.session._post(
                     url,
                     data=encoder,
                     verify=verify,
@@ -643,7 +641,6 @@ class Package(base_api.BaseApi):
                              'Content-Type': encoder.content_type}
                 )
 
-        session.close()
         if r.status_code != 200 or not r.json()['success']:
             return r.status_code, r.json()
 
@@ -1184,6 +1181,8 @@ class Package(base_api.BaseApi):
         data: dict = response.get("data")
         progress = data.get("progress")
         if not data.get("finished"):
+            import tqdm
+
             with tqdm.tqdm(total=100) as pbar:
                 while not data.get("finished"):
                     response: dict = self.get_dowload_package_status(
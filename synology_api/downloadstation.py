@@ -85,6 +85,9 @@ class DownloadStation(base_api.BaseApi):
         Download Station API version (default is None).
     quickconnect_id : str, optional
         QuickConnect ID for relay-based access. Defaults to None.
+    **kwargs : Any
+        Other keyword parameters of `BaseApi`, such as `retry_policy`,
+        `governor` or `quickconnect_cache`.
     """
 
     def __init__(self,
@@ -101,7 +104,8 @@ class DownloadStation(base_api.BaseApi):
                  device_name: Optional[str] = None,
                  interactive_output: bool = True,
                  download_st_version: int = None,
-                 quickconnect_id: Optional[str] = None
+                 quickconnect_id: Optional[str] = None,
+                 **kwargs: Any
                  ) -> None:
         """
         Initialize the DownloadStation API wrapper.
@@ -137,15 +141,17 @@ class DownloadStation(base_api.BaseApi):
         quickconnect_id : str, optional
             QuickConnect ID for relay-based access. When provided, `ip_address`
             and `port` are not required.
+        **kwargs : Any
+            Other keyword parameters of `BaseApi`, such as `retry_policy`,
+            `governor` or `quickconnect_cache`.
         """
 
         super(DownloadStation, self).__init__(ip_address, port, username, password, secure, cert_verify,
                                               dsm_version, debug, otp_code, device_id, device_name, 'DownloadStation',
-                                              quickconnect_id=quickconnect_id)
+                                              quickconnect_id=quickconnect_id, **kwargs)
 
         self._bt_search_id: str = ''
         self._bt_search_id_list: list[str] = []
-        self.session.get_api_list('DownloadStation')
 
         self.download_list: Any = self.session.app_api_list
 
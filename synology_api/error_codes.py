@@ -8,6 +8,9 @@ from __future__ import annotations
 
 CODE_SUCCESS = 0
 CODE_UNKNOWN = 9999
+CODE_API_NOT_FOUND = 102
+# Codes meaning the sid is no longer valid and a new login is needed:
+SESSION_EXPIRED_CODES = (106, 107, 119)
 # 'Common' Error Codes:
 error_codes = {
     CODE_SUCCESS: 'Success',
@@ -69,6 +69,40 @@ class SynoConnectionError(SynoBaseException):
         return
 
 
+class CircuitOpenError(SynoConnectionError):
+    """
+    Exception raised, without sending the request, while the circuit breaker of a NAS is open.
+
+    Parameters
+    ----------
+    host : str
+        Address of the NAS.
+    retry_after : float
+        Seconds until the next health probe of the NAS.
+    *args : object
+        Additional arguments to pass to the base Exception.
+    """
+
+    def __init__(self, host: str, retry_after: float, *args: object) -> None:
+        """
+        Initialize CircuitOpenError.
+
+        Parameters
+        ----------
+        host : str
+            Address of the NAS.
+        retry_after : float
+            Seconds until the next health probe of the NAS.
+        *args : object
+            Additional arguments to pass to the base Exception.
+        """
+        self.host = host
+        self.retry_after = retry_after
+        super().__init__("Circuit open for %s after repeated failures, next health probe in %.1fs" %
+                         (host, retry_after), *args)
+        return
+
+
 class HTTPError(SynoBaseException):
     """
     Exception raised when an HTTP error occurs.
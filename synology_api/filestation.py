@@ -8,23 +8,23 @@ allowing file management, search, upload, download, and background task operatio
 from __future__ import annotations
 
 import json
-from typing import Optional, Any
+from typing import TYPE_CHECKING, Optional, Any
 import os
 import io
 import time
 from datetime import datetime
 from urllib.parse import urljoin, urlencode
 
-import requests
-import tqdm
 from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
 import sys
 import warnings
 from urllib import parse
-from treelib import Tree
 from . import base_api
 from .utils import validate_path, get_data_for_request_from_file
 
+if TYPE_CHECKING:
+    from treelib import Tree
+
 
 class FileStation(base_api.BaseApi):
     """
@@ -114,6 +114,9 @@ class FileStation(base_api.BaseApi):
         If True, enables interactive output. Default is False.
     quickconnect_id : str, optional
         QuickConnect ID for relay-based access. Defaults to None.
+    **kwargs : Any
+        Other keyword parameters of `BaseApi`, such as `retry_policy`,
+        `governor` or `quickconnect_cache`.
     """
 
     def __init__(self,
@@ -129,7 +132,8 @@ class FileStation(base_api.BaseApi):
                  device_id: Optional[str] = None,
                  device_name: Optional[str] = None,
                  interactive_output: bool = True,
-                 quickconnect_id: Optional[str] = None
+                 quickconnect_id: Optional[str] = None,
+                 **kwargs: Any
                  ) -> None:
         """
         Initialize FileStation API client.
@@ -163,10 +167,13 @@ class FileStation(base_api.BaseApi):
         quickconnect_id : str, optional
             QuickConnect ID for relay-based access. When provided, `ip_address`
             and `port` are not required.
+        **kwargs : Any
+            Other keyword parameters of `BaseApi`, such as `retry_policy`,
+            `governor` or `quickconnect_cache`.
         """
         super(FileStation, self).__init__(ip_address, port, username, password, secure, cert_verify,
                                           dsm_version, debug, otp_code, device_id, device_name, 'FileStation',
-                                          quickconnect_id=quickconnect_id)
+                                          quickconnect_id=quickconnect_id, **kwargs)
 
         self._dir_taskid: str = ''
         self._dir_taskid_list: list[str] = []
@@ -183,8 +190,6 @@ class FileStation(base_api.BaseApi):
         self._compress_taskid: str = ''
         self._compress_taskid_list: list[str] = []
 
-        self.session.get_api_list('FileStation')
-
         self.file_station_list: dict = self.session.app_api_list
 
         self.interactive_output: bool = interactive_output
@@ -1132,8 +1137,6 @@ class FileStation(base_api.BaseApi):
         info = self.file_station_list[api_name]
         api_path = info['path']
 
-        session = requests.session()
-
         base = urljoin(self.base_url, api_path)
         url_params = {
             "api": api_name,
@@ -1150,14 +1153,13 @@ class FileStation(base_api.BaseApi):
         }
         data = get_data_for_request_from_file(
             file_path=file_path, fields=encoder_params, called_from='FileStation', progress_bar=True)
-        r = session.post(
+        r = self.session._post(
             url,
             data=data,
             verify=verify,
             headers={"X-SYNO-TOKEN": self.session._syno_token,
                      'Content-Type': data.content_type}
         )
-        session.close()
         if r.status_code != 200 or not r.json()['success']:
             return r.status_code, r.json()
 
@@ -2193,8 +2195,6 @@ class FileStation(base_api.BaseApi):
         if path is None:
             return 'Enter a valid path'
 
-        session = requests.session()
-
         url = ('%s%s' % (self.base_url, api_path)) + '?api=%s&version=%s&method=download&path=%s&mode=%s&_sid=%s' % (
             api_name, info['maxVersion'], parse.quote_plus(path), mode, self._sid)
 
@@ -2202,14 +2202,14 @@ class FileStation(base_api.BaseApi):
             return 'Enter a valid mode (open / download)'
 
         if mode == r'open':
-            with session.get(url, stream=True, verify=verify, headers={"X-SYNO-TOKEN": self.session._syno_token}) as r:
+            with self.session._get(url, stream=True, verify=verify, headers={"X-SYNO-TOKEN": self.session._syno_token}) as r:
                 r.raise_for_status()
                 for chunk in r.iter_content(chunk_size=chunk_size):
                     if chunk:  # filter out keep-alive new chunks
                         sys.stdout.buffer.write(chunk)
 
         if mode == r'download':
-            with session.get(url, stream=True, verify=verify, headers={"X-SYNO-TOKEN": self.session._syno_token}) as r:
+            with self.session._get(url, stream=True, verify=verify, headers={"X-SYNO-TOKEN": self.session._syno_token}) as r:
                 r.raise_for_status()
                 if not os.path.isdir(dest_path):
                     os.makedirs(dest_path)
@@ -2219,7 +2219,7 @@ class FileStation(base_api.BaseApi):
                             f.write(chunk)
 
         if mode == r'serve':
-            with session.get(url, stream=True, verify=verify, headers={"X-SYNO-TOKEN": self.session._syno_token}) as r:
+            with self.session._get(url, stream=True, verify=verify, headers={"X-SYNO-TOKEN": self.session._syno_token}) as r:
                 r.raise_for_status()
                 return io.BytesIO(r.content)
 
@@ -2244,6 +2244,7 @@ class FileStation(base_api.BaseApi):
         start_depth : int, optional
             Non negative number to start to control tree generation default to '0'.
         """
+        from treelib import Tree
 
         if start_depth < 0:
             start_depth = 0
@@ -0,0 +1,353 @@
+"""
+Adaptive limit of the requests sent at once to a NAS.
+
+A `ConcurrencyGovernor` given to `Authentication` or `BaseApi` bounds the
+HTTP requests in flight. The bound adapts to the NAS the way TCP adapts its
+congestion window (AIMD): it grows by one after a full window of fast
+successful requests, and is cut by `backoff_factor` when a request is slow or
+fails with a connection error, a timeout or a 5xx/429 answer. A low-end unit
+settles at a few requests, a rackstation climbs to `max_limit`.
+
+Requests waiting for a slot are served by lane priority, then in arrival
+order, so interactive calls go ahead of bulk sweeps::
+
+    with photos.lane('bulk'):
+        photos.list_items(limit=5000)
+
+Threads wait with `acquire`, coroutines with `aacquire`, in the same queue.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+import requests
+
+# Priority of each lane, lower values are served first.
+DEFAULT_LANES: dict[str, int] = {'interactive': 0, 'default': 1, 'bulk': 2}
+
+# Lane of each governor, by id, in the current thread or task
+_current_lanes: contextvars.ContextVar[dict[int, str]] = contextvars.ContextVar(
+    'synology_api_lanes', default={})
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """
+    Tell whether a request failure is a sign of an overloaded NAS.
+
+    Parameters
+    ----------
+    error : BaseException
+        Exception raised while sending the request.
+
+    Returns
+    -------
+    bool
+        True for connection errors, timeouts and HTTP 429 or 5xx answers.
+    """
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is not None and (response.status_code == 429 or response.status_code >= 500)
+    return False
+
+
+class ConcurrencyGovernor(object):
+    """
+    AIMD limit of in-flight requests, with priority lanes.
+
+    Share one governor between the sessions opened on the same NAS to bound
+    their requests together.
+
+    Parameters
+    ----------
+    initial_limit : int, optional
+        Requests allowed in flight at first. Defaults to `4`.
+    min_limit : int, optional
+        Lowest limit. Defaults to `1`.
+    max_limit : int, optional
+        Highest limit. Defaults to `32`.
+    latency_target : float, optional
+        Seconds above which a successful request counts as a congestion
+        signal. Defaults to `2`.
+    backoff_factor : float, optional
+        Factor applied to the limit on a congestion signal. Defaults to `0.5`.
+    cooldown : float, optional
+        Minimum seconds between two decreases, so one burst of failures cuts
+        the limit once. Defaults to `latency_target`.
+    lanes : dict[str, int], optional
+        Priority of each lane, lower first. Defaults to `DEFAULT_LANES`.
+    default_lane : str, optional
+        Lane of requests sent outside a `lane` block. Defaults to `'interactive'`.
+    clock : Callable[[], float], optional
+        Monotonic clock in seconds. Defaults to `time.monotonic`.
+    """
+
+    def __init__(self,
+                 initial_limit: int = 4,
+                 min_limit: int = 1,
+                 max_limit: int = 32,
+                 latency_target: float = 2.0,
+                 backoff_factor: float = 0.5,
+                 cooldown: Optional[float] = None,
+                 lanes: Optional[dict[str, int]] = None,
+                 default_lane: str = 'interactive',
+                 clock: Callable[[], float] = time.monotonic
+                 ) -> None:
+        """
+        Initialize the governor.
+
+        Parameters
+        ----------
+        initial_limit : int, optional
+            Requests allowed in flight at first. Defaults to `4`.
+        min_limit : int, optional
+            Lowest limit. Defaults to `1`.
+        max_limit : int, optional
+            Highest limit. Defaults to `32`.
+        latency_target : float, optional
+            Seconds above which a successful request counts as a congestion
+            signal. Defaults to `2`.
+        backoff_factor : float, optional
+            Factor applied to the limit on a congestion signal. Defaults to `0.5`.
+        cooldown : float, optional
+            Minimum seconds between two decreases. Defaults to `latency_target`.
+        lanes : dict[str, int], optional
+            Priority of each lane, lower first. Defaults to `DEFAULT_LANES`.
+        default_lane : str, optional
+            Lane of requests sent outside a `lane` block. Defaults to `'interactive'`.
+        clock : Callable[[], float], optional
+            Monotonic clock in seconds. Defaults to `time.monotonic`.
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                'limits must satisfy 1 <= min_limit <= initial_limit <= max_limit')
+        if not 0 < backoff_factor < 1:
+            raise ValueError('backoff_factor must be between 0 and 1')
+        self.lanes: dict[str, int] = dict(
+            lanes if lanes is not None else DEFAULT_LANES)
+        if default_lane not in self.lanes:
+            raise ValueError('Unknown lane: %s' % default_lane)
+        self.min_limit: int = min_limit
+        self.max_limit: int = max_limit
+        self.latency_target: float = latency_target
+        self.backoff_factor: float = backoff_factor
+        self.cooldown: float = latency_target if cooldown is None else cooldown
+        self.default_lane: str = default_lane
+        self._clock: Callable[[], float] = clock
+        self._condition: threading.Condition = threading.Condition()
+        self._window: float = float(initial_limit)
+        self._in_flight: int = 0
+        # Heap of (priority, arrival number) of the waiting requests
+        self._waiting: list[tuple[int, int]] = []
+        # Loop and future of the waiting coroutines, by heap entry
+        self._async_waiting: dict[tuple[int, int],
+                                  tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._arrivals: Iterator[int] = itertools.count()
+        self._last_decrease: float = float('-inf')
+        self.successes: int = 0
+        self.congestion_signals: int = 0
+
+    @property
+    def limit(self) -> int:
+        """
+        Get the number of requests currently allowed in flight.
+
+        Returns
+        -------
+        int
+            The limit.
+        """
+        return max(self.min_limit, int(self._window))
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Get the number of requests in flight.
+
+        Returns
+        -------
+        int
+            Requests holding a slot.
+        """
+        return self._in_flight
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Get the state of the governor.
+
+        Returns
+        -------
+        dict[str, int]
+            `limit`, `in_flight`, `waiting`, `successes` and `congestion_signals`.
+        """
+        with self._condition:
+            return {'limit': self.limit, 'in_flight': self._in_flight,
+                    'waiting': len(self._waiting), 'successes': self.successes,
+                    'congestion_signals': self.congestion_signals}
+
+    def current_lane(self) -> str:
+        """
+        Get the lane of the requests of the current thread or task.
+
+        Returns
+        -------
+        str
+            Lane name.
+        """
+        return _current_lanes.get().get(id(self), self.default_lane)
+
+    @contextlib.contextmanager
+    def lane(self, name: str) -> Iterator[None]:
+        """
+        Send the requests of the current thread or task in a lane.
+
+        Worker threads do not inherit the lane, enter it again in each of them.
+
+        Parameters
+        ----------
+        name : str
+            Lane name, e.g. `'bulk'`.
+
+        Yields
+        ------
+        None
+            Nothing, the lane applies inside the ``with`` block.
+        """
+        if name not in self.lanes:
+            raise ValueError('Unknown lane: %s' % name)
+        lanes = dict(_current_lanes.get())
+        lanes[id(self)] = name
+        token = _current_lanes.set(lanes)
+        try:
+            yield
+        finally:
+            _current_lanes.reset(token)
+
+    def acquire(self, lane: Optional[str] = None) -> float:
+        """
+        Wait for a slot, after the waiting requests of higher priority lanes.
+
+        Parameters
+        ----------
+        lane : str, optional
+            Lane of the request. Defaults to the lane of the current thread.
+
+        Returns
+        -------
+        float
+            Clock time the slot was obtained, to pass to `release`.
+        """
+        entry = (self.lanes[lane or self.current_lane()], next(self._arrivals))
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while self._waiting[0] != entry or self._in_flight >= self.limit:
+                    self._condition.wait()
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                # The next request in line may fit too
+                self._condition.notify_all()
+            self._in_flight += 1
+            self._wake_coroutines()
+        return self._clock()
+
+    async def aacquire(self, lane: Optional[str] = None) -> float:
+        """
+        Wait for a slot without blocking the event loop, like `acquire`.
+
+        Parameters
+        ----------
+        lane : str, optional
+            Lane of the request. Defaults to the lane of the current task.
+
+        Returns
+        -------
+        float
+            Clock time the slot was obtained, to pass to `release`.
+        """
+        entry = (self.lanes[lane or self.current_lane()], next(self._arrivals))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            self._async_waiting[entry] = (loop, future)
+            self._wake_coroutines()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            with self._condition:
+                if self._async_waiting.pop(entry, None) is not None:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                else:
+                    # The slot was granted meanwhile, give it back
+                    self._in_flight -= 1
+                self._wake_coroutines()
+                self._condition.notify_all()
+            raise
+
+    def _wake_coroutines(self) -> None:
+        """Grant free slots to the coroutines first in line, called with the lock held."""
+        while (self._waiting and self._waiting[0] in self._async_waiting
+               and self._in_flight < self.limit):
+            loop, future = self._async_waiting.pop(
+                heapq.heappop(self._waiting))
+            self._in_flight += 1
+            loop.call_soon_threadsafe(_grant, future, self._clock())
+        return
+
+    def release(self, started: float, congested: bool = False) -> None:
+        """
+        Free a slot and adapt the limit to the outcome of the request.
+
+        Parameters
+        ----------
+        started : float
+            Value returned by `acquire`.
+        congested : bool, optional
+            The request failed in a way showing the NAS is overloaded.
+            Defaults to False.
+        """
+        now = self._clock()
+        with self._condition:
+            self._in_flight -= 1
+            if congested or now - started > self.latency_target:
+                self.congestion_signals += 1
+                if now - self._last_decrease >= self.cooldown:
+                    self._window = max(float(self.min_limit),
+                                       self._window * self.backoff_factor)
+                    self._last_decrease = now
+            else:
+                self.successes += 1
+                # One more slot per window of successful requests
+                self._window = min(float(self.max_limit),
+                                   self._window + 1.0 / self._window)
+            self._wake_coroutines()
+            self._condition.notify_all()
+        return
+
+
+def _grant(future: asyncio.Future, started: float) -> None:
+    """
+    Hand a slot to a waiting coroutine, in its event loop.
+
+    Parameters
+    ----------
+    future : asyncio.Future
+        Future awaited by `aacquire`.
+    started : float
+        Clock time the slot was granted.
+    """
+    if not future.done():
+        future.set_result(started)
+    return
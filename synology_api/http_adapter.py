@@ -0,0 +1,237 @@
+"""
+Connection pool adapter able to abort in-flight requests.
+
+`requests` calls block their thread until the response is read, and nothing in
+its API interrupts them. `AbortableHTTPAdapter` remembers the pooled connection
+each thread is using, so another thread can shut its socket down: the blocked
+call then fails at once with `RequestAborted` instead of running to completion.
+`AsyncClient` uses it to abort the HTTP request of a cancelled task.
+"""
+from __future__ import annotations
+
+import socket
+import threading
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class RequestAborted(requests.exceptions.ConnectionError):
+    """Raised in the thread whose request was aborted through `AbortableHTTPAdapter.abort`."""
+
+
+class AbortableHTTPAdapter(HTTPAdapter):
+    """
+    `HTTPAdapter` tracking the connection checked out by each thread.
+
+    Parameters
+    ----------
+    *args : Any
+        Positional arguments of `HTTPAdapter`.
+    **kwargs : Any
+        Keyword arguments of `HTTPAdapter`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Initialize the adapter.
+
+        Parameters
+        ----------
+        *args : Any
+            Positional arguments of `HTTPAdapter`.
+        **kwargs : Any
+            Keyword arguments of `HTTPAdapter`.
+        """
+        self._active_lock: threading.Lock = threading.Lock()
+        self._active: dict[int, Any] = {}
+        self._aborted: set[int] = set()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Create the pool manager, with connection pools reporting to this adapter.
+
+        Parameters
+        ----------
+        *args : Any
+            Positional arguments of `HTTPAdapter.init_poolmanager`.
+        **kwargs : Any
+            Keyword arguments of `HTTPAdapter.init_poolmanager`.
+        """
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': self._tracking_pool_class(HTTPConnectionPool),
+            'https': self._tracking_pool_class(HTTPSConnectionPool),
+        }
+        return
+
+    def _tracking_pool_class(self, base: type) -> type:
+        """
+        Subclass a urllib3 connection pool to report checkouts to this adapter.
+
+        Parameters
+        ----------
+        base : type
+            `HTTPConnectionPool` or `HTTPSConnectionPool`.
+
+        Returns
+        -------
+        type
+            Pool class bound to this adapter.
+        """
+        adapter = self
+
+        def _get_conn(pool: Any, timeout: Optional[float] = None) -> Any:
+            """
+            Take a connection from the pool and record it for the current thread.
+
+            Parameters
+            ----------
+            pool : Any
+                The connection pool.
+            timeout : float, optional
+                Seconds to wait for a free connection. Defaults to None.
+
+            Returns
+            -------
+            Any
+                The urllib3 connection.
+            """
+            conn = base._get_conn(pool, timeout)
+            adapter._checkout(conn)
+            return conn
+
+        def _put_conn(pool: Any, conn: Any) -> None:
+            """
+            Forget a connection and give it back to the pool.
+
+            Parameters
+            ----------
+            pool : Any
+                The connection pool.
+            conn : Any
+                The urllib3 connection, None when it was discarded.
+            """
+            adapter._checkin(conn)
+            base._put_conn(pool, conn)
+
+        return type('Abortable' + base.__name__, (base,),
+                    {'_get_conn': _get_conn, '_put_conn': _put_conn})
+
+    def _checkout(self, conn: Any) -> None:
+        """
+        Record the connection the current thread is about to use.
+
+        Parameters
+        ----------
+        conn : Any
+            The urllib3 connection taken from a pool.
+        """
+        thread_id = threading.get_ident()
+        with self._active_lock:
+            if thread_id in self._aborted:
+                raise RequestAborted('Request aborted')
+            self._active[thread_id] = conn
+        return
+
+    def _checkin(self, conn: Any) -> None:
+        """
+        Forget a connection returned to its pool.
+
+        Parameters
+        ----------
+        conn : Any
+            The urllib3 connection given back to a pool, None when it was discarded.
+        """
+        with self._active_lock:
+            if conn is None:
+                self._active.pop(threading.get_ident(), None)
+            for thread_id, active in list(self._active.items()):
+                if active is conn:
+                    del self._active[thread_id]
+        return
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        """
+        Send a request, reporting an abort as `RequestAborted`.
+
+        Parameters
+        ----------
+        request : requests.PreparedRequest
+            Request to send.
+        *args : Any
+            Positional arguments of `HTTPAdapter.send`.
+        **kwargs : Any
+            Keyword arguments of `HTTPAdapter.send`.
+
+        Returns
+        -------
+        requests.Response
+            The response.
+        """
+        try:
+            return super().send(request, *args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if self.is_aborted():
+                raise RequestAborted('Request aborted', request=request) from e
+            raise
+
+    def abort(self, thread_id: int) -> bool:
+        """
+        Abort the request of a thread, and any request it sends until `reset`.
+
+        Parameters
+        ----------
+        thread_id : int
+            `threading.get_ident()` of the thread to abort.
+
+        Returns
+        -------
+        bool
+            True if the thread was waiting on a connection, which got shut down.
+        """
+        with self._active_lock:
+            self._aborted.add(thread_id)
+            conn = self._active.get(thread_id)
+        sock = getattr(conn, 'sock', None)
+        if sock is None:
+            return False
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        return True
+
+    def reset(self, thread_id: Optional[int] = None) -> None:
+        """
+        Let a thread send requests again after `abort`.
+
+        Parameters
+        ----------
+        thread_id : int, optional
+            Thread to reset. Defaults to the current thread.
+        """
+        with self._active_lock:
+            self._aborted.discard(threading.get_ident()
+                                  if thread_id is None else thread_id)
+        return
+
+    def is_aborted(self, thread_id: Optional[int] = None) -> bool:
+        """
+        Check whether a thread was aborted.
+
+        Parameters
+        ----------
+        thread_id : int, optional
+            Thread to check. Defaults to the current thread.
+
+        Returns
+        -------
+        bool
+            True between `abort` and `reset`.
+        """
+        with self._active_lock:
+            return (threading.get_ident() if thread_id is None else thread_id) in self._aborted
@@ -0,0 +1,483 @@
+"""
+Hooks and metrics of the requests sent to DSM.
+
+`RequestHooks` given to `Authentication` or `BaseApi` are called before and
+after every API request sent to the NAS, with a `RequestEvent` describing it:
+API, method, size of the request and of the response, HTTP status, DSM error
+code, attempts and latency. Calls answered by a `ResponseCache` or a
+`SingleFlight` send nothing and are not reported.
+
+`MetricsCollector` is the built-in hook. It aggregates the events per API and
+method, in memory and under one lock, and exports them as a dict or in the
+Prometheus text format::
+
+    metrics = MetricsCollector()
+    photos = Photos(..., hooks=[metrics])
+    photos.list_items_in_album(...)
+    print(metrics.snapshot())
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+from urllib.parse import urlencode
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket is unbounded.
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def estimate_request_size(url: str, params: Optional[dict[str, object]] = None, data: Any = None) -> int:
+    """
+    Estimate the bytes of a request line and body, headers excluded.
+
+    Parameters
+    ----------
+    url : str
+        Request URL.
+    params : dict[str, object], optional
+        Query or form parameters.
+    data : Any, optional
+        Upload body, a `MultipartEncoder`, bytes or str.
+
+    Returns
+    -------
+    int
+        Size in bytes.
+    """
+    size = len(url)
+    if params:
+        size += len(urlencode(params, doseq=True))
+    if data is not None:
+        length = getattr(data, 'len', None)
+        if length is None and isinstance(data, (bytes, str)):
+            length = len(data)
+        size += length or 0
+    return size
+
+
+class RequestEvent(object):
+    """
+    One API request sent to the NAS, retries and replay after a new login included.
+
+    Parameters
+    ----------
+    api : str
+        API name, e.g. `SYNO.FileStation.List`.
+    method : str, optional
+        API method, e.g. `list`.
+    version : object, optional
+        API version.
+    http_method : str
+        'get' or 'post'.
+    request_bytes : int, optional
+        Size of the request, see `estimate_request_size`. Defaults to 0.
+    """
+
+    __slots__ = ('api', 'method', 'version', 'http_method', 'request_bytes', 'response_bytes',
+                 'status_code', 'error_code', 'attempts', 'started', 'duration', 'exception')
+
+    def __init__(self,
+                 api: str,
+                 method: Optional[str],
+                 version: object,
+                 http_method: str,
+                 request_bytes: int = 0
+                 ) -> None:
+        """
+        Initialize the event of a request about to be sent.
+
+        Parameters
+        ----------
+        api : str
+            API name.
+        method : str, optional
+            API method.
+        version : object, optional
+            API version.
+        http_method : str
+            'get' or 'post'.
+        request_bytes : int, optional
+            Size of the request. Defaults to 0.
+        """
+        self.api: str = api
+        self.method: Optional[str] = method
+        self.version: object = version
+        self.http_method: str = http_method
+        self.request_bytes: int = request_bytes
+        # Size of the last response, its Content-Length when streamed
+        self.response_bytes: int = 0
+        self.status_code: Optional[int] = None
+        self.error_code: int = 0
+        self.attempts: int = 0
+        self.started: float = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.exception: Optional[BaseException] = None
+
+    @property
+    def retries(self) -> int:
+        """
+        Get the number of times the request was sent again.
+
+        Returns
+        -------
+        int
+            Attempts after the first one.
+        """
+        return max(0, self.attempts - 1)
+
+    def record_response(self, response: Any, streamed: bool = False) -> None:
+        """
+        Record the status and size of the response of an attempt.
+
+        Parameters
+        ----------
+        response : Any
+            `requests.Response` or `AsyncResponse`.
+        streamed : bool, optional
+            The body is not read yet, its Content-Length is used. Defaults to False.
+        """
+        self.status_code = getattr(response, 'status_code', None)
+        if streamed:
+            headers = getattr(response, 'headers', None) or {}
+            try:
+                self.response_bytes = int(headers.get('Content-Length') or 0)
+            except ValueError:
+                self.response_bytes = 0
+        else:
+            self.response_bytes = len(
+                getattr(response, 'content', None) or b'')
+        return
+
+    def __repr__(self) -> str:
+        """
+        Describe the event.
+
+        Returns
+        -------
+        str
+            API, method, status and duration.
+        """
+        return '<RequestEvent %s.%s status=%s error=%s duration=%s>' % (
+            self.api, self.method, self.status_code, self.error_code, self.duration)
+
+
+class RequestHooks(object):
+    """
+    Callbacks around the requests of a session.
+
+    Pass callables, or subclass and override `before_request`,
+    `after_request` and `on_relogin`. Exceptions raised by a hook are
+    ignored, they never fail the request.
+
+    Parameters
+    ----------
+    before : Callable[[RequestEvent], None], optional
+        Called before the first attempt of a request. Defaults to `None`.
+    after : Callable[[RequestEvent], None], optional
+        Called once the request succeeded or failed, with its duration and
+        outcome. Defaults to `None`.
+    """
+
+    def __init__(self,
+                 before: Optional[Callable[[RequestEvent], None]] = None,
+                 after: Optional[Callable[[RequestEvent], None]] = None
+                 ) -> None:
+        """
+        Initialize the hooks.
+
+        Parameters
+        ----------
+        before : Callable[[RequestEvent], None], optional
+            Called before the first attempt of a request. Defaults to `None`.
+        after : Callable[[RequestEvent], None], optional
+            Called once the request succeeded or failed. Defaults to `None`.
+        """
+        self._before: Optional[Callable[[RequestEvent], None]] = before
+        self._after: Optional[Callable[[RequestEvent], None]] = after
+
+    def before_request(self, event: RequestEvent) -> None:
+        """
+        Handle a request about to be sent.
+
+        Parameters
+        ----------
+        event : RequestEvent
+            The request, without outcome yet.
+        """
+        if self._before is not None:
+            self._before(event)
+        return
+
+    def after_request(self, event: RequestEvent) -> None:
+        """
+        Handle a completed request.
+
+        Parameters
+        ----------
+        event : RequestEvent
+            The request with its outcome.
+        """
+        if self._after is not None:
+            self._after(event)
+        return
+
+    def on_relogin(self) -> None:
+        """Handle a new login after the session expired."""
+        return
+
+
+class _CallStats(object):
+    """
+    Aggregated events of one API method.
+
+    Parameters
+    ----------
+    bucket_count : int
+        Number of latency buckets, the unbounded one included.
+    """
+
+    __slots__ = ('calls', 'failures', 'retries', 'request_bytes', 'response_bytes',
+                 'latency_sum', 'latency_max', 'buckets', 'status_codes', 'error_codes')
+
+    def __init__(self, bucket_count: int) -> None:
+        """
+        Initialize empty counters.
+
+        Parameters
+        ----------
+        bucket_count : int
+            Number of latency buckets, the unbounded one included.
+        """
+        self.calls: int = 0
+        self.failures: int = 0
+        self.retries: int = 0
+        self.request_bytes: int = 0
+        self.response_bytes: int = 0
+        self.latency_sum: float = 0.0
+        self.latency_max: float = 0.0
+        self.buckets: list[int] = [0] * bucket_count
+        self.status_codes: dict[int, int] = {}
+        self.error_codes: dict[int, int] = {}
+
+
+class MetricsCollector(RequestHooks):
+    """
+    In-memory metrics of the requests, per API and method.
+
+    Share one collector between sessions to aggregate them.
+
+    Parameters
+    ----------
+    buckets : Iterable[float], optional
+        Upper bounds in seconds of the latency histogram buckets.
+        Defaults to `LATENCY_BUCKETS`.
+    """
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        """
+        Initialize an empty collector.
+
+        Parameters
+        ----------
+        buckets : Iterable[float], optional
+            Upper bounds in seconds of the latency histogram buckets.
+            Defaults to `LATENCY_BUCKETS`.
+        """
+        super(MetricsCollector, self).__init__()
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        self._lock: threading.Lock = threading.Lock()
+        self._stats: dict[tuple[str, Optional[str]], _CallStats] = {}
+        self.relogins: int = 0
+
+    def after_request(self, event: RequestEvent) -> None:
+        """
+        Add a completed request to the metrics.
+
+        Parameters
+        ----------
+        event : RequestEvent
+            The request with its outcome.
+        """
+        duration = event.duration or 0.0
+        bucket = bisect.bisect_left(self.buckets, duration)
+        key = (event.api, event.method)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _CallStats(len(self.buckets) + 1)
+            stats.calls += 1
+            if event.exception is not None:
+                stats.failures += 1
+            stats.retries += event.retries
+            stats.request_bytes += event.request_bytes
+            stats.response_bytes += event.response_bytes
+            stats.latency_sum += duration
+            if duration > stats.latency_max:
+                stats.latency_max = duration
+            stats.buckets[bucket] += 1
+            if event.status_code is not None:
+                stats.status_codes[event.status_code] = stats.status_codes.get(
+                    event.status_code, 0) + 1
+            if event.error_code:
+                stats.error_codes[event.error_code] = stats.error_codes.get(
+                    event.error_code, 0) + 1
+        return
+
+    def on_relogin(self) -> None:
+        """Count a new login after the session expired."""
+        with self._lock:
+            self.relogins += 1
+        return
+
+    def snapshot(self, reset: bool = False) -> dict[str, object]:
+        """
+        Get the metrics collected so far.
+
+        Parameters
+        ----------
+        reset : bool, optional
+            Start over from zero after the snapshot. Defaults to False.
+
+        Returns
+        -------
+        dict[str, object]
+            `relogins`, and `calls`: per API name, per method, `calls`,
+            `failures` (exceptions raised), `retries`, `request_bytes`,
+            `response_bytes`, `status_codes`, `error_codes` (DSM error codes)
+            and `latency` with `sum`, `max`, `mean` and cumulative `buckets`
+            keyed by upper bound, `inf` last.
+        """
+        with self._lock:
+            stats, relogins = self._stats, self.relogins
+            if reset:
+                self._stats, self.relogins = {}, 0
+            else:
+                stats = {key: self._copy(value)
+                         for key, value in stats.items()}
+
+        bounds = [str(bound) for bound in self.buckets] + ['inf']
+        calls: dict[str, dict[str, dict[str, object]]] = {}
+        for (api, method), value in sorted(stats.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            cumulative, buckets = 0, {}
+            for bound, count in zip(bounds, value.buckets):
+                cumulative += count
+                buckets[bound] = cumulative
+            calls.setdefault(api, {})[str(method)] = {
+                'calls': value.calls,
+                'failures': value.failures,
+                'retries': value.retries,
+                'request_bytes': value.request_bytes,
+                'response_bytes': value.response_bytes,
+                'status_codes': dict(value.status_codes),
+                'error_codes': dict(value.error_codes),
+                'latency': {'sum': value.latency_sum, 'max': value.latency_max,
+                            'mean': value.latency_sum / value.calls if value.calls else 0.0,
+                            'buckets': buckets},
+            }
+        return {'relogins': relogins, 'calls': calls}
+
+    @staticmethod
+    def _copy(stats: _CallStats) -> _CallStats:
+        """
+        Copy the counters of an API method.
+
+        Parameters
+        ----------
+        stats : _CallStats
+            Counters to copy.
+
+        Returns
+        -------
+        _CallStats
+            Independent copy.
+        """
+        copy = _CallStats(len(stats.buckets))
+        for name in _CallStats.__slots__:
+            value = getattr(stats, name)
+            setattr(copy, name, value.copy() if isinstance(
+                value, (list, dict)) else value)
+        return copy
+
+    def reset(self) -> None:
+        """Drop the metrics collected so far."""
+        with self._lock:
+            self._stats = {}
+            self.relogins = 0
+        return
+
+    def to_prometheus(self, prefix: str = 'synology_api') -> str:
+        """
+        Export the metrics in the Prometheus text exposition format.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            Prefix of the metric names. Defaults to `'synology_api'`.
+
+        Returns
+        -------
+        str
+            Metrics text, to serve or write to a node exporter textfile.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def add(name: str, kind: str, samples: list[tuple[str, object]]) -> None:
+            """
+            Append a metric type line and its samples.
+
+            Parameters
+            ----------
+            name : str
+                Metric name, without the prefix.
+            kind : str
+                Prometheus metric type, e.g. `'counter'`.
+            samples : list[tuple[str, object]]
+                Label sets, braces included, and their values.
+            """
+            lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+            for labels, value in samples:
+                lines.append('%s_%s%s %s' % (prefix, name, labels, value))
+
+        counters: dict[str, list[tuple[str, object]]] = {
+            name: [] for name in ('requests_total', 'request_failures_total', 'request_retries_total',
+                                  'request_bytes_total', 'response_bytes_total')}
+        statuses, errors, histogram = [], [], []
+        for api, methods in snapshot['calls'].items():
+            for method, value in methods.items():
+                labels = 'api="%s",method="%s"' % (api, method)
+                counters['requests_total'].append(
+                    ('{%s}' % labels, value['calls']))
+                counters['request_failures_total'].append(
+                    ('{%s}' % labels, value['failures']))
+                counters['request_retries_total'].append(
+                    ('{%s}' % labels, value['retries']))
+                counters['request_bytes_total'].append(
+                    ('{%s}' % labels, value['request_bytes']))
+                counters['response_bytes_total'].append(
+                    ('{%s}' % labels, value['response_bytes']))
+                for status, count in sorted(value['status_codes'].items()):
+                    statuses.append(('{%s,status="%s"}' %
+                                    (labels, status), count))
+                for code, count in sorted(value['error_codes'].items()):
+                    errors.append(('{%s,code="%s"}' % (labels, code), count))
+                latency = value['latency']
+                for bound, count in latency['buckets'].items():
+                    histogram.append(('_bucket{%s,le="%s"}' % (labels, '+Inf' if bound == 'inf' else bound),
+                                      count))
+                histogram.append(('_sum{%s}' % labels, latency['sum']))
+                histogram.append(('_count{%s}' % labels, value['calls']))
+
+        for name, samples in counters.items():
+            add(name, 'counter', samples)
+        add('responses_total', 'counter', statuses)
+        add('dsm_errors_total', 'counter', errors)
+        lines.append('# TYPE %s_request_duration_seconds histogram' % prefix)
+        for suffix, value in histogram:
+            lines.append('%s_request_duration_seconds%s %s' %
+                         (prefix, suffix, value))
+        add('relogins_total', 'counter', [('', snapshot['relogins'])])
+        return '\n'.join(lines) + '\n'
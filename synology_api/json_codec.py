@@ -0,0 +1,247 @@
+"""
+JSON codec of DSM requests and responses.
+
+Every response body is decoded once by `decode_response`, and the decoded
+object is shared by the session expiry check, the error code check and the
+return value. The standard library `json` module is used by default;
+``set_json_codec('auto')`` installs orjson or ujson when one is available.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Optional, Union
+
+import requests
+
+# Attribute of a response holding its decoded body.
+_DECODED_ATTRIBUTE: str = '_synology_api_json'
+_MISSING = object()
+
+
+class JsonCodec(object):
+    """Standard library JSON codec, and base class of the other codecs."""
+
+    name: str = 'json'
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        Decode a JSON document.
+
+        Parameters
+        ----------
+        data : bytes or str
+            JSON document.
+
+        Returns
+        -------
+        Any
+            Decoded object.
+        """
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        """
+        Encode an object as JSON.
+
+        Parameters
+        ----------
+        obj : Any
+            Object to encode.
+
+        Returns
+        -------
+        str
+            JSON document.
+        """
+        return json.dumps(obj)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec backed by orjson. Raises ImportError if orjson is not installed."""
+
+    name: str = 'orjson'
+
+    def __init__(self) -> None:
+        """Import orjson."""
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        Decode a JSON document.
+
+        Parameters
+        ----------
+        data : bytes or str
+            JSON document.
+
+        Returns
+        -------
+        Any
+            Decoded object.
+        """
+        return self._orjson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        """
+        Encode an object as JSON.
+
+        Parameters
+        ----------
+        obj : Any
+            Object to encode.
+
+        Returns
+        -------
+        str
+            JSON document.
+        """
+        return self._orjson.dumps(obj).decode('utf-8')
+
+
+class UjsonCodec(JsonCodec):
+    """Codec backed by ujson. Raises ImportError if ujson is not installed."""
+
+    name: str = 'ujson'
+
+    def __init__(self) -> None:
+        """Import ujson."""
+        import ujson
+        self._ujson = ujson
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        Decode a JSON document.
+
+        Parameters
+        ----------
+        data : bytes or str
+            JSON document.
+
+        Returns
+        -------
+        Any
+            Decoded object.
+        """
+        return self._ujson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        """
+        Encode an object as JSON.
+
+        Parameters
+        ----------
+        obj : Any
+            Object to encode.
+
+        Returns
+        -------
+        str
+            JSON document.
+        """
+        return self._ujson.dumps(obj)
+
+
+STDLIB_CODEC: JsonCodec = JsonCodec()
+CODECS: dict[str, type] = {'json': JsonCodec,
+                           'orjson': OrjsonCodec, 'ujson': UjsonCodec}
+# Tried in order by set_json_codec('auto').
+FAST_CODECS: tuple[str, ...] = ('orjson', 'ujson')
+
+_codec: JsonCodec = STDLIB_CODEC
+
+
+def get_json_codec() -> JsonCodec:
+    """
+    Get the codec in use.
+
+    Returns
+    -------
+    JsonCodec
+        The codec.
+    """
+    return _codec
+
+
+def set_json_codec(codec: Optional[Union[JsonCodec, str]] = None) -> JsonCodec:
+    """
+    Install the codec used for every session.
+
+    Parameters
+    ----------
+    codec : JsonCodec or str, optional
+        A codec instance, any object with `loads` and `dumps`, or a name:
+        'json', 'orjson', 'ujson', or 'auto' for the fastest one installed.
+        None restores the standard library codec.
+
+    Returns
+    -------
+    JsonCodec
+        The installed codec.
+
+    Raises
+    ------
+    ImportError
+        If the named library is not installed.
+    ValueError
+        If the name is unknown.
+    """
+    global _codec
+    if codec is None:
+        codec = STDLIB_CODEC
+    elif codec == 'auto':
+        codec = STDLIB_CODEC
+        for name in FAST_CODECS:
+            try:
+                codec = CODECS[name]()
+                break
+            except ImportError:
+                continue
+    elif isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError('Unknown JSON codec: %s' % codec)
+        codec = STDLIB_CODEC if codec == 'json' else CODECS[codec]()
+    _codec = codec
+    return codec
+
+
+def decode_response(response: Any) -> Any:
+    """
+    Decode the JSON body of a response, once.
+
+    The decoded object is kept on the response, later calls return it again.
+
+    Parameters
+    ----------
+    response : requests.Response or AsyncResponse
+        Response to decode.
+
+    Returns
+    -------
+    Any
+        Decoded body.
+
+    Raises
+    ------
+    requests.exceptions.JSONDecodeError
+        If the body is not JSON, whatever the codec.
+    """
+    cache = getattr(response, '__dict__', None)
+    if cache is not None:
+        decoded = cache.get(_DECODED_ATTRIBUTE, _MISSING)
+        if decoded is not _MISSING:
+            return decoded
+
+    codec = _codec
+    if codec is STDLIB_CODEC:
+        decoded = response.json()
+    else:
+        try:
+            decoded = codec.loads(response.content)
+        except ValueError as e:
+            raise requests.exceptions.JSONDecodeError(
+                str(e), '', getattr(e, 'pos', 0)) from e
+
+    if cache is not None:
+        cache[_DECODED_ATTRIBUTE] = decoded
+    return decoded
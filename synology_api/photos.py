@@ -43,6 +43,9 @@ class Photos(base_api.BaseApi):
         Device name for the session.
     quickconnect_id : str, optional
         QuickConnect ID for relay-based access. Defaults to None.
+    **kwargs : Any
+        Other keyword parameters of `BaseApi`, such as `retry_policy`,
+        `governor` or `quickconnect_cache`.
     """
 
     def __init__(self,
@@ -57,7 +60,8 @@ class Photos(base_api.BaseApi):
                  otp_code: Optional[str] = None,
                  device_id: Optional[str] = None,
                  device_name: Optional[str] = None,
-                 quickconnect_id: Optional[str] = None
+                 quickconnect_id: Optional[str] = None,
+                 **kwargs: Any
                  ) -> None:
         """
         Initialize the Photos API interface.
@@ -89,17 +93,17 @@ class Photos(base_api.BaseApi):
         quickconnect_id : str, optional
             QuickConnect ID for relay-based access. When provided, `ip_address`
             and `port` are not required.
+        **kwargs : Any
+            Other keyword parameters of `BaseApi`, such as `retry_policy`,
+            `governor` or `quickconnect_cache`.
         """
 
         super(Photos, self).__init__(ip_address, port, username, password, secure, cert_verify,
                                      dsm_version, debug, otp_code, device_id, device_name, 'Foto',
-                                     quickconnect_id=quickconnect_id)
-
-        self.session.get_api_list('Foto')
+                                     quickconnect_id=quickconnect_id, **kwargs)
 
         self.request_data: Any = self.session.request_data
         self.photos_list: Any = self.session.app_api_list
-        self.base_url: str = self.session.base_url
 
         self._userinfo: Any = None
 
@@ -2061,17 +2065,15 @@ class Photos(base_api.BaseApi):
         req_param = {'version': info['maxVersion'], 'method': 'download',
                      'unit_id': json.dumps([item_id])}
 
-        response = self.request_data(api_name, api_path, req_param,
-                                     response_json=False)
-
-        if response.status_code == 200 and len(response.content) > 100:
+        # Streamed to the file, videos are not held in memory
+        with self.request_data(api_name, api_path, req_param,
+                               stream=True) as response:
+            if response.status_code != 200 or response.is_json:
+                return None
             if dest_path is None:
                 dest_path = os.path.basename(str(item_id)) + '.jpg'
-            with open(dest_path, 'wb') as f:
-                f.write(response.content)
-            return dest_path
-
-        return None
+            response.save(dest_path)
+        return dest_path
 
     def _foto_upload_headers(self) -> dict[str, str]:
         """
@@ -0,0 +1,167 @@
+"""
+Cache of QuickConnect route resolutions.
+
+Resolving a QuickConnect ID takes requests to Synology's global service
+(``get_server_info``, then probes of the direct addresses or
+``request_tunnel``) before the first API call. A `QuickConnectCache` given to
+`Authentication` or `BaseApi` keeps the chosen route, direct or relay, in
+memory, and optionally on disk for other processes. A cached route is checked
+with its ping request only, and resolved again when that ping or a later
+request through the route fails.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from .api_cache import default_cache_dir, write_json_atomic
+
+# Bump when the file layout changes, older files are then ignored.
+CACHE_FORMAT_VERSION = 1
+
+
+class QuickConnectCache(object):
+    """
+    Memory and file cache of resolved QuickConnect relays.
+
+    Share one instance between the `Authentication` objects of a process.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Directory of the cache files. `None` keeps the relays in memory only.
+        Defaults to `None`.
+    max_age : float, optional
+        Seconds a resolution stays valid. Defaults to one day.
+    """
+
+    def __init__(self,
+                 directory: Optional[str] = None,
+                 max_age: float = 24 * 3600
+                 ) -> None:
+        """
+        Initialize the relay cache.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory of the cache files, e.g. `default_cache_dir()`. `None`
+            keeps the relays in memory only. Defaults to `None`.
+        max_age : float, optional
+            Seconds a resolution stays valid. Defaults to one day.
+        """
+        self.directory: Optional[str] = directory
+        self.max_age: float = max_age
+        self._lock: threading.Lock = threading.Lock()
+        # QuickConnect ID -> (stored_at, relay)
+        self._memory: dict[str, tuple[float, dict[str, object]]] = {}
+
+    @classmethod
+    def on_disk(cls, max_age: float = 24 * 3600) -> QuickConnectCache:
+        """
+        Create a cache persisted in the default cache directory.
+
+        Parameters
+        ----------
+        max_age : float, optional
+            Seconds a resolution stays valid. Defaults to one day.
+
+        Returns
+        -------
+        QuickConnectCache
+            Cache writing to `default_cache_dir()`.
+        """
+        return cls(default_cache_dir(), max_age)
+
+    def _path(self, quickconnect_id: str) -> str:
+        """
+        Get the file path of a cache entry.
+
+        Parameters
+        ----------
+        quickconnect_id : str
+            QuickConnect ID.
+
+        Returns
+        -------
+        str
+            Path of the JSON file.
+        """
+        key = hashlib.sha256(
+            quickconnect_id.lower().encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'quickconnect_%s.json' % key)
+
+    def load(self, quickconnect_id: str) -> Optional[dict[str, object]]:
+        """
+        Get the cached relay of a QuickConnect ID.
+
+        Parameters
+        ----------
+        quickconnect_id : str
+            QuickConnect ID.
+
+        Returns
+        -------
+        dict[str, object] or None
+            The relay, or None if missing or expired.
+        """
+        key = quickconnect_id.lower()
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None and self.directory is not None:
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as cache_file:
+                    stored = json.load(cache_file)
+                if isinstance(stored, dict) and stored.get('format') == CACHE_FORMAT_VERSION \
+                        and isinstance(stored.get('relay'), dict):
+                    entry = (stored.get('stored_at', 0), stored['relay'])
+            except (OSError, ValueError):
+                entry = None
+        if entry is None or time.time() - entry[0] > self.max_age:
+            return None
+        with self._lock:
+            self._memory[key] = entry
+        return dict(entry[1])
+
+    def store(self, quickconnect_id: str, relay: dict[str, object]) -> None:
+        """
+        Cache the relay of a QuickConnect ID.
+
+        Parameters
+        ----------
+        quickconnect_id : str
+            QuickConnect ID.
+        relay : dict[str, object]
+            Resolved route, as built by `Authentication`.
+        """
+        key = quickconnect_id.lower()
+        entry = (time.time(), dict(relay))
+        with self._lock:
+            self._memory[key] = entry
+        if self.directory is not None:
+            write_json_atomic(self._path(key), {'format': CACHE_FORMAT_VERSION,
+                                                'stored_at': entry[0], 'relay': entry[1]})
+        return
+
+    def invalidate(self, quickconnect_id: str) -> None:
+        """
+        Forget the relay of a QuickConnect ID.
+
+        Parameters
+        ----------
+        quickconnect_id : str
+            QuickConnect ID.
+        """
+        key = quickconnect_id.lower()
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.directory is not None:
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+        return
@@ -0,0 +1,371 @@
+"""
+In-memory cache of DSM API responses.
+
+A `ResponseCache` given to `Authentication` or `BaseApi` answers repeated
+read calls (``get``, ``list``, ``info`` methods) from memory for a few seconds
+instead of asking the NAS again. Entries expire after a per-API time to live,
+the least recently used ones are evicted above `max_entries`, and every write
+call sent through the same session drops the cached responses of its API
+namespace, so a ``set`` is visible to the next ``get``. The APIs of an
+application of `INVALIDATION_GROUPS`, e.g. FileStation, share one namespace:
+a ``SYNO.FileStation.Delete`` call drops the cached ``SYNO.FileStation.List``
+responses.
+
+Keys include the NAS and account of the session, one cache may be shared
+between sessions. Authentication and encryption calls are never cached.
+"""
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from .retry import IDEMPOTENT_METHOD_PREFIXES
+
+# Dotted components of an API name forming its namespace, e.g. SYNO.Core.Share
+# for SYNO.Core.Share.Permission.
+NAMESPACE_DEPTH: int = 3
+
+# API name prefixes whose APIs change each other's data, mapped to their shared
+# namespace. Their APIs sit at NAMESPACE_DEPTH, e.g. SYNO.FileStation.List.
+INVALIDATION_GROUPS: dict[str, str] = {
+    'SYNO.FileStation': 'SYNO.FileStation',
+    'SYNO.Foto': 'SYNO.Foto',
+    'SYNO.FotoTeam': 'SYNO.Foto',
+    'SYNO.DownloadStation': 'SYNO.DownloadStation',
+    'SYNO.DownloadStation2': 'SYNO.DownloadStation',
+}
+
+# Returned by ResponseCache.get on a miss.
+MISSING: Any = object()
+
+# API name prefixes whose calls are never cached, they carry keys and sessions.
+UNCACHED_API_PREFIXES: tuple[str, ...] = (
+    'SYNO.API.Auth', 'SYNO.API.Encryption')
+
+
+def get_namespace(api_name: str, depth: int = NAMESPACE_DEPTH) -> str:
+    """
+    Get the namespace of an API, invalidated as a whole by write calls.
+
+    Parameters
+    ----------
+    api_name : str
+        API name, e.g. `SYNO.Core.Share.Permission`.
+    depth : int, optional
+        Number of dotted components kept, for APIs outside
+        `INVALIDATION_GROUPS`. Defaults to `3`.
+
+    Returns
+    -------
+    str
+        The namespace, e.g. `SYNO.Core.Share`, or `SYNO.FileStation` for
+        `SYNO.FileStation.List`.
+    """
+    group = api_name.split('.', 2)[:2]
+    namespace = INVALIDATION_GROUPS.get('.'.join(group))
+    if namespace is not None:
+        return namespace
+    return '.'.join(api_name.split('.')[:depth])
+
+
+def make_request_key(api_name: str, req_param: dict[str, object],
+                     scope: Hashable = None) -> tuple:
+    """
+    Build a key identifying an API call, whatever the order of its parameters.
+
+    Parameters
+    ----------
+    api_name : str
+        API name.
+    req_param : dict[str, object]
+        Parameters of the call, including `method` and `version`.
+    scope : Hashable, optional
+        Identity of the session sending the call, e.g. its NAS and account.
+        Defaults to `None`.
+
+    Returns
+    -------
+    tuple
+        API, method, version, the sorted other parameters as strings, and the scope.
+    """
+    params = tuple(sorted((str(key), str(value)) for key, value in req_param.items()
+                          if key not in ('_sid', 'method', 'version')))
+    return api_name, str(req_param.get('method')), str(req_param.get('version')), params, scope
+
+
+class ResponseCache(object):
+    """
+    Time-bounded LRU cache of read-only API responses.
+
+    Parameters
+    ----------
+    default_ttl : float, optional
+        Seconds a response stays valid, for APIs absent from `ttl_by_api`.
+        `None` caches only the APIs of `ttl_by_api`. Defaults to `5`.
+    ttl_by_api : dict[str, float], optional
+        Time to live per API name or namespace, the longest matching prefix
+        wins. `0` or `None` disables caching of an API. Defaults to `None`.
+    max_entries : int, optional
+        Maximum number of cached responses. Defaults to `1024`.
+    read_prefixes : Iterable[str], optional
+        API method prefixes considered read-only, other methods invalidate.
+        Defaults to `IDEMPOTENT_METHOD_PREFIXES`.
+    clock : Callable[[], float], optional
+        Monotonic clock in seconds. Defaults to `time.monotonic`.
+    """
+
+    def __init__(self,
+                 default_ttl: Optional[float] = 5.0,
+                 ttl_by_api: Optional[dict[str, Optional[float]]] = None,
+                 max_entries: int = 1024,
+                 read_prefixes: Iterable[str] = IDEMPOTENT_METHOD_PREFIXES,
+                 clock: Callable[[], float] = time.monotonic
+                 ) -> None:
+        """
+        Initialize an empty cache.
+
+        Parameters
+        ----------
+        default_ttl : float, optional
+            Seconds a response stays valid, for APIs absent from `ttl_by_api`.
+            `None` caches only the APIs of `ttl_by_api`. Defaults to `5`.
+        ttl_by_api : dict[str, float], optional
+            Time to live per API name or namespace, the longest matching prefix
+            wins. `0` or `None` disables caching of an API. Defaults to `None`.
+        max_entries : int, optional
+            Maximum number of cached responses. Defaults to `1024`.
+        read_prefixes : Iterable[str], optional
+            API method prefixes considered read-only, other methods invalidate.
+            Defaults to `IDEMPOTENT_METHOD_PREFIXES`.
+        clock : Callable[[], float], optional
+            Monotonic clock in seconds. Defaults to `time.monotonic`.
+        """
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+        self.default_ttl: Optional[float] = default_ttl
+        self.ttl_by_api: dict[str, Optional[float]] = dict(ttl_by_api or {})
+        self.max_entries: int = max_entries
+        self.read_prefixes: tuple[str, ...] = tuple(
+            prefix.lower() for prefix in read_prefixes)
+        self._clock: Callable[[], float] = clock
+        self._lock: threading.Lock = threading.Lock()
+        # key -> (expiry time, response), oldest use first
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        # Bumped by every invalidation, see `put`
+        self._generation: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+
+    def is_read(self, api_method: Optional[str]) -> bool:
+        """
+        Tell whether an API method only reads.
+
+        Parameters
+        ----------
+        api_method : str, optional
+            Value of the `method` request parameter.
+
+        Returns
+        -------
+        bool
+            True if the method name starts with one of the read prefixes.
+        """
+        if not api_method:
+            return False
+        return str(api_method).lower().startswith(self.read_prefixes)
+
+    def get_ttl(self, api_name: str) -> Optional[float]:
+        """
+        Get the time to live of the responses of an API.
+
+        Parameters
+        ----------
+        api_name : str
+            API name.
+
+        Returns
+        -------
+        float or None
+            Seconds, `None` or `0` if the API is not cached.
+        """
+        best = None
+        for prefix in self.ttl_by_api:
+            if (api_name == prefix or api_name.startswith(prefix + '.')) and (
+                    best is None or len(prefix) > len(best)):
+                best = prefix
+        if best is None:
+            return self.default_ttl
+        return self.ttl_by_api[best]
+
+    def make_key(self, api_name: str, req_param: dict[str, object],
+                 scope: Hashable = None) -> Optional[tuple]:
+        """
+        Build the cache key of a call, if the call can be cached.
+
+        Parameters
+        ----------
+        api_name : str
+            API name.
+        req_param : dict[str, object]
+            Parameters of the call, including `method` and `version`.
+        scope : Hashable, optional
+            NAS and account of the session sending the call, so that sessions
+            sharing the cache never read each other's responses. Defaults to `None`.
+
+        Returns
+        -------
+        tuple or None
+            Key made of the API, method, version, sorted parameters and scope,
+            or `None` for write calls, APIs without time to live and the
+            authentication and encryption APIs.
+        """
+        if api_name.startswith(UNCACHED_API_PREFIXES):
+            return None
+        if not self.is_read(req_param.get('method')) or not self.get_ttl(api_name):
+            return None
+        return make_request_key(api_name, req_param, scope)
+
+    def get(self, key: tuple) -> Any:
+        """
+        Get a cached response.
+
+        Parameters
+        ----------
+        key : tuple
+            Key built by `make_key`.
+
+        Returns
+        -------
+        Any
+            A copy of the response, or the `MISSING` sentinel on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            response = entry[1]
+        # Callers may modify what they get, the cached response must not change
+        return copy.deepcopy(response)
+
+    @property
+    def generation(self) -> int:
+        """
+        Get the invalidation counter, read before sending a call to `put` its response.
+
+        Returns
+        -------
+        int
+            Number of invalidations so far.
+        """
+        return self._generation
+
+    def put(self, key: tuple, response: Any, generation: Optional[int] = None) -> None:
+        """
+        Cache a response.
+
+        Parameters
+        ----------
+        key : tuple
+            Key built by `make_key`.
+        response : Any
+            Decoded response of a successful call.
+        generation : int, optional
+            `generation` when the call was sent. The response is dropped if a
+            write invalidated the cache meanwhile, as it may predate the write.
+        """
+        expiry = self._clock() + self.get_ttl(key[0])
+        response = copy.deepcopy(response)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (expiry, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return
+
+    def invalidate(self, api_name: Optional[str] = None) -> int:
+        """
+        Drop the cached responses of an API namespace, or all of them.
+
+        Parameters
+        ----------
+        api_name : str, optional
+            API whose namespace is dropped. `None` clears the cache.
+
+        Returns
+        -------
+        int
+            Number of responses dropped.
+        """
+        with self._lock:
+            if api_name is None:
+                keys = list(self._entries)
+            else:
+                namespace = get_namespace(api_name)
+                keys = [key for key in self._entries
+                        if get_namespace(key[0]) == namespace]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            self._generation += 1
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop every cached response and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+        return
+
+    def record_call(self, api_name: str, api_method: Optional[str]) -> None:
+        """
+        Invalidate the namespace of an API when a write call is sent to it.
+
+        Parameters
+        ----------
+        api_name : str
+            API name.
+        api_method : str, optional
+            Value of the `method` request parameter.
+        """
+        if not self.is_read(api_method):
+            self.invalidate(api_name)
+        return
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Get the hit and miss counters.
+
+        Returns
+        -------
+        dict[str, int]
+            `hits`, `misses`, `evictions`, `invalidations` and current `size`.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'invalidations': self.invalidations, 'size': len(self._entries)}
+
+    def __len__(self) -> int:
+        """
+        Count the cached responses, expired ones included.
+
+        Returns
+        -------
+        int
+            Number of entries.
+        """
+        return len(self._entries)
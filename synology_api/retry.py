@@ -0,0 +1,212 @@
+"""
+Timeout and retry policy for Synology DSM API requests.
+
+A `RetryPolicy` is accepted by `Authentication` and `BaseApi`. It carries the
+connect/read timeouts passed to every HTTP call, and decides whether a failed
+call may be replayed, and after how long. Uploads only get the connect
+timeout: DSM answers them once the whole file is written, which may take
+longer than any read timeout.
+"""
+from __future__ import annotations
+
+import collections.abc
+import random
+from typing import Any, Optional, Iterable
+
+import requests
+
+# Method name prefixes considered read-only, hence safe to replay.
+IDEMPOTENT_METHOD_PREFIXES: tuple[str, ...] = ('get', 'list', 'info')
+
+# HTTP status codes worth a retry, the DSM web server answers those when a worker is busy or restarting.
+RETRY_STATUS_CODES: tuple[int, ...] = (500, 502, 503, 504)
+
+
+class RetryPolicy(object):
+    """
+    Timeouts and exponential backoff policy for DSM requests.
+
+    Parameters
+    ----------
+    connect_timeout : float, optional
+        Seconds to wait for the TCP/TLS connection. `None` waits forever. Defaults to `10`.
+    read_timeout : float, optional
+        Seconds to wait between two bytes of the response. `None` waits forever. Defaults to `120`.
+        Not applied to uploads, see `upload_timeout`.
+    max_retries : int, optional
+        Number of replays after the first attempt. Defaults to `3`.
+    backoff_factor : float, optional
+        Base delay in seconds, doubled on every retry. Defaults to `0.5`.
+    backoff_max : float, optional
+        Upper bound of a single backoff delay in seconds. Defaults to `10`.
+    jitter : bool, optional
+        Randomize each delay between 0 and its computed value ("full jitter"). Defaults to `True`.
+    retry_budget : float, optional
+        Maximum number of seconds spent sleeping between retries of one call. `None` means no limit.
+        Defaults to `30`.
+    status_forcelist : Iterable[int], optional
+        HTTP status codes that trigger a retry. Defaults to `RETRY_STATUS_CODES`.
+    idempotent_prefixes : Iterable[str], optional
+        API method prefixes that are safe to replay. Defaults to `IDEMPOTENT_METHOD_PREFIXES`.
+    """
+
+    def __init__(self,
+                 connect_timeout: Optional[float] = 10.0,
+                 read_timeout: Optional[float] = 120.0,
+                 max_retries: int = 3,
+                 backoff_factor: float = 0.5,
+                 backoff_max: float = 10.0,
+                 jitter: bool = True,
+                 retry_budget: Optional[float] = 30.0,
+                 status_forcelist: Iterable[int] = RETRY_STATUS_CODES,
+                 idempotent_prefixes: Iterable[str] = IDEMPOTENT_METHOD_PREFIXES
+                 ) -> None:
+        """
+        Initialize the retry policy.
+
+        Parameters
+        ----------
+        connect_timeout : float, optional
+            Seconds to wait for the TCP/TLS connection. `None` waits forever. Defaults to `10`.
+        read_timeout : float, optional
+            Seconds to wait between two bytes of the response. `None` waits forever. Defaults to `120`.
+        max_retries : int, optional
+            Number of replays after the first attempt. Defaults to `3`.
+        backoff_factor : float, optional
+            Base delay in seconds, doubled on every retry. Defaults to `0.5`.
+        backoff_max : float, optional
+            Upper bound of a single backoff delay in seconds. Defaults to `10`.
+        jitter : bool, optional
+            Randomize each delay between 0 and its computed value ("full jitter"). Defaults to `True`.
+        retry_budget : float, optional
+            Maximum number of seconds spent sleeping between retries of one call. `None` means no limit.
+            Defaults to `30`.
+        status_forcelist : Iterable[int], optional
+            HTTP status codes that trigger a retry. Defaults to `RETRY_STATUS_CODES`.
+        idempotent_prefixes : Iterable[str], optional
+            API method prefixes that are safe to replay. Defaults to `IDEMPOTENT_METHOD_PREFIXES`.
+        """
+        if max_retries < 0:
+            raise ValueError("max_retries must be >= 0")
+        self.connect_timeout: Optional[float] = connect_timeout
+        self.read_timeout: Optional[float] = read_timeout
+        self.max_retries: int = max_retries
+        self.backoff_factor: float = backoff_factor
+        self.backoff_max: float = backoff_max
+        self.jitter: bool = jitter
+        self.retry_budget: Optional[float] = retry_budget
+        self.status_forcelist: frozenset[int] = frozenset(status_forcelist)
+        self.idempotent_prefixes: tuple[str, ...] = tuple(
+            prefix.lower() for prefix in idempotent_prefixes)
+
+    @property
+    def timeout(self) -> Optional[tuple[Optional[float], Optional[float]]]:
+        """
+        Get the timeout value passed to `requests`.
+
+        Returns
+        -------
+        tuple[float, float] or None
+            `(connect, read)` timeouts, or `None` when both are disabled.
+        """
+        if self.connect_timeout is None and self.read_timeout is None:
+            return None
+        return self.connect_timeout, self.read_timeout
+
+    @property
+    def upload_timeout(self) -> Optional[tuple[Optional[float], None]]:
+        """
+        Get the timeout value passed to `requests` for uploads.
+
+        Returns
+        -------
+        tuple[float, None] or None
+            `(connect, None)`, the answer to an upload is awaited without read
+            timeout, or `None` when the connect timeout is disabled.
+        """
+        if self.connect_timeout is None:
+            return None
+        return self.connect_timeout, None
+
+    def is_idempotent(self, api_method: Optional[str]) -> bool:
+        """
+        Tell whether a DSM API method may be replayed safely.
+
+        Parameters
+        ----------
+        api_method : str, optional
+            Value of the `method` request parameter, e.g. `list` or `get_info`.
+
+        Returns
+        -------
+        bool
+            True if the method name starts with one of the idempotent prefixes.
+        """
+        if not api_method:
+            return False
+        return str(api_method).lower().startswith(self.idempotent_prefixes)
+
+    def is_retryable_error(self, error: Exception) -> bool:
+        """
+        Tell whether a transport error is transient.
+
+        Parameters
+        ----------
+        error : Exception
+            Exception raised by `requests` while sending the request.
+
+        Returns
+        -------
+        bool
+            True for connection errors, timeouts and HTTP errors listed in `status_forcelist`.
+        """
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        if isinstance(error, requests.exceptions.HTTPError):
+            response = error.response
+            return response is not None and response.status_code in self.status_forcelist
+        return False
+
+    def get_backoff(self, retry_number: int) -> float:
+        """
+        Compute the delay before a retry.
+
+        Parameters
+        ----------
+        retry_number : int
+            Number of the retry about to be sent, starting at 1.
+
+        Returns
+        -------
+        float
+            Delay in seconds.
+        """
+        delay = min(self.backoff_max, self.backoff_factor *
+                    (2 ** (retry_number - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+def is_upload_body(data: Any = None, files: Any = None) -> bool:
+    """
+    Tell whether a request body is an upload streamed to the NAS.
+
+    Parameters
+    ----------
+    data : Any, optional
+        `data` of the request: multipart encoders and files have a `read`
+        method, generators are iterators.
+    files : Any, optional
+        `files` of the request.
+
+    Returns
+    -------
+    bool
+        True for multipart and streamed bodies.
+    """
+    return bool(files) or hasattr(data, 'read') or isinstance(data, collections.abc.Iterator)
+
+
+# Used by `Authentication` when no policy is given: timeouts only, no replay.
+NO_RETRY = RetryPolicy(max_retries=0)
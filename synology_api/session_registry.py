@@ -0,0 +1,295 @@
+"""
+Registry of authenticated DSM sessions.
+
+`BaseApi` looks sessions up here instead of sharing a single one, so a process
+can talk to several NAS units, or to one NAS as several users, each over its
+own pooled connections. Sessions are keyed by host, port, username and
+QuickConnect ID.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+from .auth import Authentication
+
+SessionKey = tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+class SessionRegistry(object):
+    """
+    Thread-safe registry of `Authentication` sessions.
+
+    Parameters
+    ----------
+    idle_timeout : float, optional
+        Seconds without any request after which a session is closed and
+        dropped from the registry. `None` keeps sessions until they are
+        closed explicitly. Defaults to `None`.
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = None) -> None:
+        """
+        Initialize an empty registry.
+
+        Parameters
+        ----------
+        idle_timeout : float, optional
+            Seconds without any request after which a session is closed and
+            dropped from the registry. Defaults to `None`.
+        """
+        self.idle_timeout: Optional[float] = idle_timeout
+        self._sessions: dict[SessionKey, Authentication] = {}
+        self._last_access: dict[SessionKey, float] = {}
+        self._lock: threading.Lock = threading.Lock()
+        # One lock per key, so logging in to one NAS does not block the others.
+        self._key_locks: dict[SessionKey, threading.Lock] = {}
+
+    @staticmethod
+    def make_key(host: Optional[str] = None,
+                 port: Optional[str] = None,
+                 username: Optional[str] = None,
+                 quickconnect_id: Optional[str] = None
+                 ) -> SessionKey:
+        """
+        Build the registry key of a session.
+
+        Parameters
+        ----------
+        host : str, optional
+            IP address or host name of the NAS.
+        port : str, optional
+            Port of the NAS.
+        username : str, optional
+            DSM account of the session.
+        quickconnect_id : str, optional
+            QuickConnect ID of the NAS, replaces host and port when given.
+
+        Returns
+        -------
+        SessionKey
+            Hashable key.
+        """
+        if quickconnect_id:
+            return (None, None, username, quickconnect_id.lower())
+        return (host.lower() if host else host,
+                str(port) if port is not None else None, username, None)
+
+    def __len__(self) -> int:
+        """
+        Count the registered sessions.
+
+        Returns
+        -------
+        int
+            Number of sessions.
+        """
+        with self._lock:
+            return len(self._sessions)
+
+    def __contains__(self, key: SessionKey) -> bool:
+        """
+        Check whether a session is registered.
+
+        Parameters
+        ----------
+        key : SessionKey
+            Key from `make_key`.
+
+        Returns
+        -------
+        bool
+            True if a session is registered under `key`.
+        """
+        with self._lock:
+            return key in self._sessions
+
+    def keys(self) -> list[SessionKey]:
+        """
+        List the keys of the registered sessions.
+
+        Returns
+        -------
+        list[SessionKey]
+            Keys, in registration order.
+        """
+        with self._lock:
+            return list(self._sessions)
+
+    def get(self, key: SessionKey) -> Optional[Authentication]:
+        """
+        Get a registered session.
+
+        Parameters
+        ----------
+        key : SessionKey
+            Key from `make_key`.
+
+        Returns
+        -------
+        Authentication or None
+            The session, or None if none is registered under `key`.
+        """
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._last_access[key] = time.monotonic()
+            return session
+
+    def get_or_create(self, key: SessionKey, factory: Callable[[], Authentication]) -> Authentication:
+        """
+        Get a registered session, creating and registering it if needed.
+
+        Concurrent callers asking for the same key wait for a single call of
+        `factory`. Idle sessions are evicted first when `idle_timeout` is set.
+
+        Parameters
+        ----------
+        key : SessionKey
+            Key from `make_key`.
+        factory : Callable[[], Authentication]
+            Creates a logged in session. Nothing is registered if it raises.
+
+        Returns
+        -------
+        Authentication
+            The registered session.
+        """
+        if self.idle_timeout is not None:
+            self.evict_idle()
+        session = self.get(key)
+        if session is not None:
+            return session
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            session = self.get(key)
+            if session is None:
+                session = factory()
+                self.register(key, session)
+        return session
+
+    def register(self, key: SessionKey, session: Authentication) -> None:
+        """
+        Register a session, replacing any previous one under the same key.
+
+        The replaced session is not closed.
+
+        Parameters
+        ----------
+        key : SessionKey
+            Key from `make_key`.
+        session : Authentication
+            Session to register.
+        """
+        with self._lock:
+            self._sessions[key] = session
+            self._last_access[key] = time.monotonic()
+        return
+
+    def discard(self, key: SessionKey, session: Optional[Authentication] = None) -> Optional[Authentication]:
+        """
+        Drop a session from the registry without closing it.
+
+        Parameters
+        ----------
+        key : SessionKey
+            Key from `make_key`.
+        session : Authentication, optional
+            Only drop the registered session if it is this one.
+
+        Returns
+        -------
+        Authentication or None
+            The dropped session, or None if none was registered.
+        """
+        with self._lock:
+            if session is not None and self._sessions.get(key) is not session:
+                return None
+            self._last_access.pop(key, None)
+            return self._sessions.pop(key, None)
+
+    def close(self, key: SessionKey, logout: bool = False) -> bool:
+        """
+        Drop a session from the registry and release its connections.
+
+        Parameters
+        ----------
+        key : SessionKey
+            Key from `make_key`.
+        logout : bool, optional
+            Also log out from DSM. By default the session is left open on the
+            NAS, where it can be resumed through a session store. Defaults to `False`.
+
+        Returns
+        -------
+        bool
+            True if a session was registered under `key`.
+        """
+        session = self.discard(key)
+        if session is None:
+            return False
+        try:
+            if logout:
+                session.logout()
+        finally:
+            session.close()
+        return True
+
+    def close_all(self, logout: bool = False) -> None:
+        """
+        Close every registered session.
+
+        Parameters
+        ----------
+        logout : bool, optional
+            Also log out from DSM. Defaults to `False`.
+        """
+        for key in self.keys():
+            self.close(key, logout=logout)
+        return
+
+    def last_used(self, key: SessionKey) -> Optional[float]:
+        """
+        Get the last time a session was looked up or sent a request.
+
+        Parameters
+        ----------
+        key : SessionKey
+            Key from `make_key`.
+
+        Returns
+        -------
+        float or None
+            `time.monotonic()` timestamp, or None if no session is registered under `key`.
+        """
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                return None
+            return max(self._last_access[key], getattr(session, 'last_used', 0.0))
+
+    def evict_idle(self, max_idle: Optional[float] = None) -> list[SessionKey]:
+        """
+        Close the sessions idle for longer than `max_idle` seconds.
+
+        Parameters
+        ----------
+        max_idle : float, optional
+            Idle time limit in seconds. Defaults to `idle_timeout`.
+
+        Returns
+        -------
+        list[SessionKey]
+            Keys of the evicted sessions.
+        """
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        if max_idle is None:
+            return []
+        now = time.monotonic()
+        evicted = [key for key in self.keys()
+                   if now - (self.last_used(key) or now) > max_idle]
+        for key in evicted:
+            self.close(key)
+        return evicted
@@ -0,0 +1,213 @@
+"""
+Persistent storage of DSM login sessions.
+
+A session store lets `Authentication` resume a session saved by a previous
+process instead of running the full login (UIConfig round-trip, Noise
+handshake and parameter encryption). `SessionStore` is the interface,
+`FileSessionStore` the default implementation.
+
+The saved Noise nonce is a reservation: the saving process only hashes
+requests with the nonces below it, and saves again before running out. A
+process resuming the session, even after a crash of the saver, starts past
+every nonce the saver may have used, so DSM never sees a nonce twice.
+"""
+from __future__ import annotations
+
+import abc
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional
+
+from .api_cache import default_cache_dir
+
+# Bump when the saved state layout changes, older entries are then ignored.
+SESSION_FORMAT_VERSION = 1
+
+# Request-hash nonces reserved by each save of a session.
+NONCE_RESERVATION = 1000
+
+
+class SessionStore(abc.ABC):
+    """
+    Interface of a session store.
+
+    Subclasses keep one session state per key. A state is a JSON serializable
+    dict produced by `Authentication`, holding the sid, the Synology token,
+    cookies and the Noise cipher state used for request hashes. It is a
+    credential and must be stored accordingly.
+    """
+
+    @staticmethod
+    def make_key(host: Optional[str], port: Optional[str], username: str, dsm_version: int) -> str:
+        """
+        Build the key of a session.
+
+        Parameters
+        ----------
+        host : str
+            IP address, host name or QuickConnect ID of the NAS.
+        port : str
+            Port of the NAS.
+        username : str
+            DSM account the session belongs to.
+        dsm_version : int
+            DSM major version used to talk to the NAS.
+
+        Returns
+        -------
+        str
+            Hex digest usable as a file name.
+        """
+        identity = '%s:%s:%s:%s' % (
+            str(host).lower(), port, username, dsm_version)
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    @abc.abstractmethod
+    def load(self, key: str) -> Optional[dict[str, object]]:
+        """
+        Read a saved session state.
+
+        Parameters
+        ----------
+        key : str
+            Session key from `make_key`.
+
+        Returns
+        -------
+        dict[str, object] or None
+            The saved state, or None if there is none.
+        """
+
+    @abc.abstractmethod
+    def save(self, key: str, state: dict[str, object]) -> None:
+        """
+        Save a session state, replacing the previous one.
+
+        Parameters
+        ----------
+        key : str
+            Session key from `make_key`.
+        state : dict[str, object]
+            Session state to save.
+        """
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Forget a saved session state.
+
+        Parameters
+        ----------
+        key : str
+            Session key from `make_key`.
+        """
+
+
+class FileSessionStore(SessionStore):
+    """
+    Session store keeping one JSON file per session.
+
+    Files are created with owner-only permissions and replaced atomically, so
+    several processes can share the directory.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Directory holding the session files. Defaults to `sessions` in `default_cache_dir()`.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        """
+        Initialize the file session store.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory holding the session files. Defaults to `sessions` in `default_cache_dir()`.
+        """
+        self.directory: str = directory or os.path.join(
+            default_cache_dir(), 'sessions')
+
+    def _path(self, key: str) -> str:
+        """
+        Get the file path of a session.
+
+        Parameters
+        ----------
+        key : str
+            Session key from `make_key`.
+
+        Returns
+        -------
+        str
+            Path of the JSON file.
+        """
+        return os.path.join(self.directory, 'session_%s.json' % key)
+
+    def load(self, key: str) -> Optional[dict[str, object]]:
+        """
+        Read a saved session state.
+
+        Parameters
+        ----------
+        key : str
+            Session key from `make_key`.
+
+        Returns
+        -------
+        dict[str, object] or None
+            The saved state, or None if missing, unreadable or of another format.
+        """
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as session_file:
+                state = json.load(session_file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get('format') != SESSION_FORMAT_VERSION:
+            return None
+        return state
+
+    def save(self, key: str, state: dict[str, object]) -> None:
+        """
+        Save a session state atomically, errors are ignored.
+
+        Parameters
+        ----------
+        key : str
+            Session key from `make_key`.
+        state : dict[str, object]
+            Session state to save.
+        """
+        state = dict(state, format=SESSION_FORMAT_VERSION)
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            # mkstemp creates the file readable by its owner only.
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.directory, prefix='.session_', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+                    json.dump(state, tmp_file)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+        return
+
+    def delete(self, key: str) -> None:
+        """
+        Delete a saved session state.
+
+        Parameters
+        ----------
+        key : str
+            Session key from `make_key`.
+        """
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+        return
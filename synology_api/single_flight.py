@@ -0,0 +1,249 @@
+"""
+Coalescing of identical read calls in flight.
+
+With a `SingleFlight` given to `Authentication` or `BaseApi`, concurrent
+identical read calls of `request_data` (same API, method, version and
+parameters) share one HTTP request: the first caller sends it, the others wait
+for it and receive a copy of its response, or the exception it raised. Nothing
+is kept once the request completes, a later identical call is sent again.
+Keys include the NAS and account of the session, one `SingleFlight` may be
+shared between sessions.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import threading
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+from .response_cache import make_request_key
+from .retry import IDEMPOTENT_METHOD_PREFIXES
+
+
+class _Flight(object):
+    """Request in flight, shared by the callers of identical threaded calls."""
+
+    __slots__ = ('done', 'result', 'exception', 'waiters')
+
+    def __init__(self) -> None:
+        """Initialize an unfinished flight."""
+        self.done: threading.Event = threading.Event()
+        # Copy of the result for the waiters, the leader's caller owns the original
+        self.result: Any = None
+        self.exception: Optional[BaseException] = None
+        self.waiters: int = 0
+
+
+class SingleFlight(object):
+    """
+    Deduplicate identical read calls sent at the same time.
+
+    Parameters
+    ----------
+    apis : Iterable[str], optional
+        API names or namespace prefixes to coalesce, e.g. `SYNO.SurveillanceStation`.
+        `None` coalesces every API. Defaults to `None`.
+    exclude : Iterable[str], optional
+        API names or namespace prefixes never coalesced. Defaults to `None`.
+    read_prefixes : Iterable[str], optional
+        API method prefixes considered read-only, only those are coalesced.
+        Defaults to `IDEMPOTENT_METHOD_PREFIXES`.
+    """
+
+    def __init__(self,
+                 apis: Optional[Iterable[str]] = None,
+                 exclude: Optional[Iterable[str]] = None,
+                 read_prefixes: Iterable[str] = IDEMPOTENT_METHOD_PREFIXES
+                 ) -> None:
+        """
+        Initialize the coalescing of read calls.
+
+        Parameters
+        ----------
+        apis : Iterable[str], optional
+            API names or namespace prefixes to coalesce. `None` coalesces every API.
+            Defaults to `None`.
+        exclude : Iterable[str], optional
+            API names or namespace prefixes never coalesced. Defaults to `None`.
+        read_prefixes : Iterable[str], optional
+            API method prefixes considered read-only, only those are coalesced.
+            Defaults to `IDEMPOTENT_METHOD_PREFIXES`.
+        """
+        self.apis: Optional[tuple[str, ...]] = tuple(
+            apis) if apis is not None else None
+        self.exclude: tuple[str, ...] = tuple(exclude or ())
+        self.read_prefixes: tuple[str, ...] = tuple(
+            prefix.lower() for prefix in read_prefixes)
+        self._lock: threading.Lock = threading.Lock()
+        self._flights: dict[tuple, _Flight] = {}
+        # Futures of the coroutine calls, per event loop
+        self._async_flights: dict[tuple, asyncio.Future] = {}
+        # Number of coroutines awaiting each of them
+        self._async_waiters: dict[tuple, int] = {}
+        # Calls answered by another caller's request
+        self.coalesced: int = 0
+
+    @staticmethod
+    def _matches(api_name: str, prefixes: Iterable[str]) -> bool:
+        """
+        Tell whether an API name is one of, or below one of, some prefixes.
+
+        Parameters
+        ----------
+        api_name : str
+            API name.
+        prefixes : Iterable[str]
+            API names or namespaces.
+
+        Returns
+        -------
+        bool
+            True on a match.
+        """
+        return any(api_name == prefix or api_name.startswith(prefix + '.')
+                   for prefix in prefixes)
+
+    def make_key(self, api_name: str, req_param: dict[str, object],
+                 scope: Hashable = None) -> Optional[tuple]:
+        """
+        Build the key of a call, if the call can be coalesced.
+
+        Parameters
+        ----------
+        api_name : str
+            API name.
+        req_param : dict[str, object]
+            Parameters of the call, including `method` and `version`.
+        scope : Hashable, optional
+            NAS and account of the session sending the call, so that sessions
+            sharing this object never coalesce together. Defaults to `None`.
+
+        Returns
+        -------
+        tuple or None
+            Key identifying identical calls, `None` for write calls and
+            APIs not coalesced.
+        """
+        api_method = req_param.get('method')
+        if not api_method or not str(api_method).lower().startswith(self.read_prefixes):
+            return None
+        if self.apis is not None and not self._matches(api_name, self.apis):
+            return None
+        if self._matches(api_name, self.exclude):
+            return None
+        return make_request_key(api_name, req_param, scope)
+
+    def do(self, key: tuple, send: Callable[[], Any]) -> Any:
+        """
+        Run a call, or wait for the identical call already running.
+
+        Parameters
+        ----------
+        key : tuple
+            Key built by `make_key`.
+        send : Callable[[], Any]
+            Sends the call and returns its result.
+
+        Returns
+        -------
+        Any
+            Result of `send`, a copy of it for the callers that waited.
+
+        Raises
+        ------
+        Exception
+            The exception raised by `send`, for every caller.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.exception is not None:
+                raise flight.exception
+            return copy.deepcopy(flight.result)
+
+        result = None
+        try:
+            result = send()
+            return result
+        except BaseException as e:
+            flight.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            # No waiter joins anymore, copied before the caller can modify it
+            if flight.waiters and flight.exception is None:
+                flight.result = copy.deepcopy(result)
+            flight.done.set()
+
+    async def ado(self, key: tuple, send: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a coroutine call, or await the identical call already running.
+
+        Parameters
+        ----------
+        key : tuple
+            Key built by `make_key`.
+        send : Callable[[], Awaitable[Any]]
+            Sends the call and returns its result.
+
+        Returns
+        -------
+        Any
+            Result of `send`, a copy of it for the callers that waited.
+
+        Raises
+        ------
+        Exception
+            The exception raised by `send`, for every caller.
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop),) + key
+        future = self._async_flights.get(loop_key)
+        if future is not None:
+            self._async_waiters[loop_key] += 1
+            self.coalesced += 1
+            # shield: a cancelled waiter must not cancel the shared request
+            result = await asyncio.shield(future)
+            return copy.deepcopy(result)
+
+        future = loop.create_future()
+        self._async_flights[loop_key] = future
+        self._async_waiters[loop_key] = 0
+        try:
+            result = await send()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Marked as retrieved, there may be no waiter to do it
+                future.exception()
+            raise
+        else:
+            # The waiters resume after the caller, which may modify its result
+            future.set_result(copy.deepcopy(result)
+                              if self._async_waiters[loop_key] else result)
+            return result
+        finally:
+            del self._async_flights[loop_key]
+            del self._async_waiters[loop_key]
+
+    def __len__(self) -> int:
+        """
+        Count the threaded calls in flight.
+
+        Returns
+        -------
+        int
+            Number of distinct calls running.
+        """
+        return len(self._flights)
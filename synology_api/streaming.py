@@ -0,0 +1,293 @@
+"""
+Streamed binary responses.
+
+``request_data(..., stream=True)`` returns a `StreamedResponse` instead of
+reading the whole body: recordings, videos and archives are written to disk in
+constant memory. DSM reports errors of binary endpoints as a small JSON body;
+the first bytes and the content type tell them apart from the payload, so
+errors are still raised before any data is returned.
+"""
+from __future__ import annotations
+
+import os
+from typing import IO, Any, Iterator, Optional, Union
+
+import requests
+
+from .json_codec import decode_response
+
+# Bytes read per chunk by default.
+DEFAULT_CHUNK_SIZE: int = 64 * 1024
+
+# Largest body inspected as a possible JSON error when the content type is not JSON.
+MAX_SNIFFED_JSON_SIZE: int = 64 * 1024
+
+
+class StreamedResponse(object):
+    """
+    Binary response read chunk by chunk.
+
+    Use it as a context manager, or call `close`, to give the connection back
+    to the pool when the body is not read to the end.
+
+    Parameters
+    ----------
+    response : requests.Response
+        Response of a request sent with ``stream=True``.
+    chunk_size : int, optional
+        Bytes read per chunk. Defaults to 64 KiB.
+    """
+
+    def __init__(self, response: requests.Response, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """
+        Read the first chunk of the body to detect JSON error responses.
+
+        Parameters
+        ----------
+        response : requests.Response
+            Response of a request sent with ``stream=True``.
+        chunk_size : int, optional
+            Bytes read per chunk. Defaults to 64 KiB.
+        """
+        self.response: requests.Response = response
+        self.chunk_size: int = chunk_size
+        self._chunks: Iterator[bytes] = response.iter_content(chunk_size)
+        self._buffer: bytes = next(self._chunks, b'')
+        self.is_json: bool = self._detect_json()
+
+    def _detect_json(self) -> bool:
+        """
+        Tell a JSON body from a binary payload, reading JSON bodies entirely.
+
+        Returns
+        -------
+        bool
+            True if the body is a JSON document, now kept on the response.
+        """
+        content_type = self.content_type
+        if 'json' not in content_type:
+            if content_type and not content_type.startswith('text/'):
+                return False
+            if not self._buffer.lstrip().startswith(b'{'):
+                return False
+        body = self._buffer
+        for chunk in self._chunks:
+            body += chunk
+            if 'json' not in content_type and len(body) > MAX_SNIFFED_JSON_SIZE:
+                self._buffer = body
+                return False
+        self._buffer = body
+        self._chunks = iter(())
+        # Let Response.content and decode_response see the body already read
+        self.response._content = body
+        self.response._content_consumed = True
+        try:
+            decoded = decode_response(self.response)
+        except ValueError:
+            return False
+        return isinstance(decoded, dict) and 'success' in decoded
+
+    @property
+    def status_code(self) -> int:
+        """
+        Get the HTTP status code.
+
+        Returns
+        -------
+        int
+            Status code.
+        """
+        return self.response.status_code
+
+    @property
+    def headers(self) -> Any:
+        """
+        Get the response headers.
+
+        Returns
+        -------
+        requests.structures.CaseInsensitiveDict
+            Headers.
+        """
+        return self.response.headers
+
+    @property
+    def content_type(self) -> str:
+        """
+        Get the media type of the body, lower case and without parameters.
+
+        Returns
+        -------
+        str
+            Content type, empty if not sent.
+        """
+        value = self.response.headers.get('Content-Type') or ''
+        return value.split(';')[0].strip().lower()
+
+    @property
+    def content(self) -> bytes:
+        """
+        Get the body of a JSON response.
+
+        Returns
+        -------
+        bytes
+            Body, read when the response was created.
+
+        Raises
+        ------
+        requests.exceptions.JSONDecodeError
+            If the body is a binary payload, which is only read by iteration.
+        """
+        if not self.is_json:
+            raise requests.exceptions.JSONDecodeError(
+                'Streamed binary response', '', 0)
+        return self.response.content
+
+    def json(self) -> Any:
+        """
+        Get the decoded body of a JSON response.
+
+        Returns
+        -------
+        Any
+            Decoded body.
+
+        Raises
+        ------
+        requests.exceptions.JSONDecodeError
+            If the body is a binary payload, which is left unread.
+        """
+        if not self.is_json:
+            raise requests.exceptions.JSONDecodeError(
+                'Streamed binary response', '', 0)
+        return decode_response(self.response)
+
+    def iter_content(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Iterate over the body.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            Ignored, chunks have the size given at creation. Kept for
+            compatibility with `requests.Response.iter_content`.
+
+        Yields
+        ------
+        bytes
+            Chunks of the body.
+        """
+        if self._buffer:
+            buffer, self._buffer = self._buffer, b''
+            yield buffer
+        for chunk in self._chunks:
+            if chunk:
+                yield chunk
+
+    def __iter__(self) -> Iterator[bytes]:
+        """
+        Iterate over the body.
+
+        Returns
+        -------
+        Iterator[bytes]
+            Chunks of the body.
+        """
+        return self.iter_content()
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read bytes from the body, as a binary file does.
+
+        Parameters
+        ----------
+        size : int, optional
+            Maximum number of bytes, all the remaining ones if negative. Defaults to -1.
+
+        Returns
+        -------
+        bytes
+            Bytes read, empty at the end of the body.
+        """
+        data = self._buffer
+        while size < 0 or len(data) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            data += chunk
+        if size < 0:
+            self._buffer = b''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+    def save(self, target: Union[str, os.PathLike, IO[bytes]]) -> int:
+        """
+        Write the rest of the body to a file, one chunk at a time.
+
+        Parameters
+        ----------
+        target : str or os.PathLike or IO[bytes]
+            Path of the file to create, or a binary file object.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+        """
+        if hasattr(target, 'write'):
+            return self._write_to(target)
+        with open(target, 'wb') as f:
+            return self._write_to(f)
+
+    def _write_to(self, f: IO[bytes]) -> int:
+        """
+        Write the rest of the body to a file object and close the response.
+
+        Parameters
+        ----------
+        f : IO[bytes]
+            Binary file object.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+        """
+        written = 0
+        try:
+            for chunk in self.iter_content():
+                f.write(chunk)
+                written += len(chunk)
+        finally:
+            self.close()
+        return written
+
+    def close(self) -> None:
+        """Release the connection, dropping any unread part of the body."""
+        self.response.close()
+        return
+
+    def __enter__(self) -> StreamedResponse:
+        """
+        Enter the context manager.
+
+        Returns
+        -------
+        StreamedResponse
+            This response.
+        """
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """
+        Close the response.
+
+        Parameters
+        ----------
+        *args : Any
+            Exception type, value and traceback.
+        """
+        self.close()
+        return
@@ -2027,7 +2027,8 @@ class SurveillanceStation(base_api.BaseApi):
                             id: int = None,
                             mountId: int = None,
                             offsetTimeMs: int = None,
-                            playTimeMs: int = None) -> dict[str, object] | str:
+                            playTimeMs: int = None,
+                            stream: bool = False) -> dict[str, object] | str:
         """
         Download recordings by specifying recording ID and optional parameters.
 
@@ -2041,6 +2042,10 @@ class SurveillanceStation(base_api.BaseApi):
             Offset time in milliseconds for the download.
         playTimeMs : int, optional
             Playback time in milliseconds for the download.
+        stream : bool, optional
+            Return a `StreamedResponse` to save the recording in constant
+            memory, e.g. ``download_recordings(id=1, stream=True).save('rec.mp4')``.
+            Defaults to False.
 
         Returns
         -------
@@ -2053,11 +2058,12 @@ class SurveillanceStation(base_api.BaseApi):
         req_param = {'version': info['maxVersion'], 'method': 'Download'}
 
         for key, val in locals().items():
-            if key not in ['self', 'api_name', 'info', 'api_path', 'req_param']:
+            if key not in ['self', 'api_name', 'info', 'api_path', 'req_param', 'stream']:
                 if val is not None:
                     req_param[str(key)] = val
 
-        return self.request_data(api_name, api_path, req_param, response_json=False)
+        return self.request_data(api_name, api_path, req_param, response_json=False,
+                                 stream=stream)
 
     def check_if_recording_playable(self,
                                     eventId: int = None,
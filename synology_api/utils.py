@@ -11,7 +11,6 @@ __all__ = ['merge_dicts', 'make_folder_meta_list_from_path',
 from pathlib import Path
 
 from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
-from tqdm import tqdm
 
 
 def merge_dicts(x, y):
@@ -115,6 +114,8 @@ def get_data_for_request_from_file(file_path: str,
     encoder = MultipartEncoder(fields=fields, boundary=boundary)
     print(encoder)
     if progress_bar:
+        from tqdm import tqdm
+
         pbar = tqdm(total=encoder.len, unit="B", unit_scale=True,
                     unit_divisor=1024, desc="Upload Progress")
         monitor = MultipartEncoderMonitor(
@@ -38,6 +38,9 @@ class Virtualization(base_api.BaseApi):
         One-time password for 2FA, if required.
     quickconnect_id : str, optional
         QuickConnect ID for relay-based access. Defaults to None.
+    **kwargs : Any
+        Other keyword parameters of `BaseApi`, such as `retry_policy`,
+        `governor` or `quickconnect_cache`.
     """
 
     def __init__(self,
@@ -50,7 +53,8 @@ class Virtualization(base_api.BaseApi):
                  dsm_version: int = 7,
                  debug: bool = True,
                  otp_code: Optional[str] = None,
-                 quickconnect_id: Optional[str] = None
+                 quickconnect_id: Optional[str] = None,
+                 **kwargs: Any
                  ) -> None:
         """
         Initialize the Virtualization API wrapper.
@@ -78,11 +82,14 @@ class Virtualization(base_api.BaseApi):
         quickconnect_id : str, optional
             QuickConnect ID for relay-based access. When provided, `ip_address`
             and `port` are not required.
+        **kwargs : Any
+            Other keyword parameters of `BaseApi`, such as `retry_policy`,
+            `governor` or `quickconnect_cache`.
         """
 
         super(Virtualization, self).__init__(ip_address, port, username, password, secure, cert_verify,
                                              dsm_version, debug, otp_code, application='Core',
-                                             quickconnect_id=quickconnect_id)
+                                             quickconnect_id=quickconnect_id, **kwargs)
 
         self._taskid_list: Any = []
         self._network_group_list: Any = []
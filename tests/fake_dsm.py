@@ -0,0 +1,642 @@
+"""
+Local fake of the DSM web API, for hermetic tests and benchmarks.
+
+`FakeDsm` serves the DSM web API on 127.0.0.1 from background threads, so
+the real `Authentication` pipeline (login with encrypted credentials and the
+DSM 7 Noise handshake, request hashes, compound requests, uploads and
+downloads) runs without a NAS::
+
+    with FakeDsm() as dsm:
+        dsm.add_file('/home/report.txt', b'...')
+        fs = FileStation('127.0.0.1', dsm.port, 'admin', 'pass')
+        fs.get_file_list('/home')
+
+Built in APIs: SYNO.API.Info, SYNO.API.Auth (UIConfig included),
+SYNO.API.Encryption, SYNO.Entry.Request and SYNO.FileStation Info, List,
+Download and Upload. Others are added with `add_api`. `latency` delays every
+answer and `inject_fault` makes the next matching requests fail.
+
+Without `start`, a `FakeDsmAdapter` mounted on the `requests.Session` of a
+client answers from the same fake in-process, without sockets.
+"""
+import base64
+import email.parser
+import email.policy
+import hashlib
+import io
+import json
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from noise.connection import Keypair, NoiseConnection
+
+NOISE_PROTOCOL = b'Noise_IK_25519_ChaChaPoly_BLAKE2b'
+CIPHER_KEY = '__cIpHeRtext'
+CIPHER_TOKEN = '__cIpHeRtoken'
+
+# DSM error codes answered by the fake.
+ERROR_BAD_REQUEST = 101
+ERROR_NO_PERMISSION = 105
+ERROR_SESSION_INVALID = 119
+ERROR_BAD_CREDENTIALS = 400
+ERROR_NO_SUCH_FILE = 408
+
+_RSA_KEY = None
+_RSA_KEY_LOCK = threading.Lock()
+
+
+def _rsa_key():
+    """Get the RSA key of the login encryption, generated once per process.
+
+    4096 bits, as DSM: the 501 bytes passphrase of the client fits no smaller key.
+    """
+    global _RSA_KEY
+    with _RSA_KEY_LOCK:
+        if _RSA_KEY is None:
+            _RSA_KEY = rsa.generate_private_key(
+                public_exponent=65537, key_size=4096)
+        return _RSA_KEY
+
+
+def _b64_encode(data):
+    """Encode bytes as DSM does in cookies: URL-safe base64 without padding."""
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64_decode(text):
+    """Decode the URL-safe base64 of `_b64_encode`."""
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class DsmError(Exception):
+    """Raised by API handlers to answer a DSM error code."""
+
+    def __init__(self, code):
+        super(DsmError, self).__init__(code)
+        self.code = code
+
+
+class DsmRequest(object):
+    """Request passed to the API handlers."""
+
+    def __init__(self, api, method, version, params, files, headers, session):
+        self.api = api
+        self.method = method
+        self.version = version
+        # Query, form and multipart text fields, as strings
+        self.params = params
+        # Multipart file fields: name -> (filename, content)
+        self.files = files
+        self.headers = headers
+        # Session of the request sid, None for anonymous APIs
+        self.session = session
+
+
+class Fault(object):
+    """Failure injected into the next matching requests."""
+
+    def __init__(self, api, method, error_code, status, drop, count):
+        self.api = api
+        self.method = method
+        self.error_code = error_code
+        self.status = status
+        self.drop = drop
+        self.remaining = count
+
+    def matches(self, api, method):
+        return (self.api is None or self.api == api) and (self.method is None or self.method == method)
+
+
+class _Session(object):
+    """Logged in session of the fake."""
+
+    def __init__(self, sid, synotoken, account):
+        self.sid = sid
+        self.synotoken = synotoken
+        self.account = account
+        self.noise_decrypt = None
+        self.handshake_hash = None
+        # Nonces of the accepted X-SYNO-HASH headers, DSM refuses a replay
+        self.used_nonces = set()
+        self.lock = threading.Lock()
+
+
+class FakeDsm(object):
+    """
+    In-process fake DSM HTTP server.
+
+    Parameters
+    ----------
+    username, password : str
+        Accepted credentials.
+    latency : float or callable
+        Seconds slept before answering an API request, or a function of
+        (api, method) returning them.
+    verify_request_hash : bool
+        Check the X-SYNO-HASH header of Noise sessions, error 119 when wrong.
+    """
+
+    def __init__(self, username='admin', password='pass', latency=0.0, verify_request_hash=True):
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.verify_request_hash = verify_request_hash
+        self.files = {}
+        self.catalog = {}
+        self._handlers = {}
+        self._sessions = {}
+        self._faults = []
+        self._lock = threading.Lock()
+        self._noise_key = X25519PrivateKey.generate()
+        self._server = None
+        self._thread = None
+        # Counters, read by the tests
+        self.logins = 0
+        self.requests = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._register_builtin_apis()
+
+    # Server lifecycle
+
+    def start(self):
+        """Listen on a free port of 127.0.0.1 and serve from a background thread."""
+        dsm = self
+
+        class Handler(_DsmRequestHandler):
+            fake = dsm
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def port(self):
+        return str(self._server.server_address[1])
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:%s/webapi/' % self.port
+
+    # Configuration
+
+    def add_api(self, api, handler, path='entry.cgi', min_version=1, max_version=1):
+        """
+        Serve an API.
+
+        `handler(request)` gets a `DsmRequest` and returns the `data` of the
+        answer, bytes for a binary body, or raises `DsmError`.
+        """
+        self.catalog[api] = {
+            'path': path, 'minVersion': min_version, 'maxVersion': max_version}
+        self._handlers[api] = handler
+
+    def add_file(self, path, content):
+        """Store a file, its folders exist implicitly."""
+        self.files[path] = content
+
+    def inject_fault(self, api=None, method=None, error_code=None, status=None, drop=False, count=1):
+        """
+        Make the next `count` matching requests fail.
+
+        With `error_code`, DSM answers that error; with `status`, the HTTP
+        status; with `drop`, the connection is closed without answer.
+        """
+        with self._lock:
+            self._faults.append(
+                Fault(api, method, error_code, status, drop, count))
+
+    def expire_sessions(self):
+        """Forget every session, as a DSM restart or a timeout does."""
+        with self._lock:
+            self._sessions.clear()
+
+    @property
+    def sessions(self):
+        return dict(self._sessions)
+
+    # Dispatch
+
+    def handle(self, path, params, files, headers):
+        """
+        Answer a parsed HTTP request.
+
+        Returns (status, body, content type, cookies), or None to drop the
+        connection.
+        """
+        if path.endswith('SYNO.API.Auth.UIConfig'):
+            return 200, b'{"success": true, "data": {}}', 'application/json', {'_SSID': self.ssid_cookie}
+        api = params.get('api') or path.rpartition('/')[2]
+        method = params.get('method')
+
+        with self._lock:
+            self.requests[(api, method)] += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            self._sleep(api, method)
+            fault = self._take_fault(api, method)
+            if fault is not None and fault.drop:
+                return None
+            if fault is not None and fault.status:
+                return fault.status, b'', 'text/html', {}
+            if fault is not None and fault.error_code:
+                success, data = False, fault.error_code
+            else:
+                success, data = self.call(api, params, files, headers)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        if not success:
+            payload = {'success': False, 'error': {'code': data}}
+        elif isinstance(data, bytes):
+            return 200, data, 'application/octet-stream', {}
+        else:
+            payload = {'success': True, 'data': data}
+        return 200, json.dumps(payload).encode('utf-8'), 'application/json', {}
+
+    def _take_fault(self, api, method):
+        with self._lock:
+            for fault in self._faults:
+                if fault.remaining > 0 and fault.matches(api, method):
+                    fault.remaining -= 1
+                    return fault
+        return None
+
+    def _sleep(self, api, method):
+        latency = self.latency(api, method) if callable(
+            self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+    def _session(self, params, headers):
+        with self._lock:
+            session = self._sessions.get(params.get('_sid'))
+        if session is None:
+            raise DsmError(ERROR_SESSION_INVALID)
+        request_hash = headers.get('X-SYNO-HASH')
+        if self.verify_request_hash and session.noise_decrypt is not None and request_hash:
+            self._check_request_hash(session, request_hash)
+        return session
+
+    def _check_request_hash(self, session, request_hash):
+        try:
+            encrypted, nonce = request_hash[8:].rsplit('.', 1)
+            nonce = int(_b64_decode(nonce))
+            with session.lock:
+                if nonce in session.used_nonces:
+                    raise ValueError('Nonce reused: %d' % nonce)
+                session.noise_decrypt.n = nonce
+                session.noise_decrypt.decrypt_with_ad(
+                    b'', _b64_decode(encrypted))
+                session.used_nonces.add(nonce)
+        except Exception:
+            raise DsmError(ERROR_SESSION_INVALID)
+        if request_hash[:8] != session.handshake_hash[:8]:
+            raise DsmError(ERROR_SESSION_INVALID)
+
+    def call(self, api, params, files=None, headers=None):
+        """Run an API call, return (success, data or error code)."""
+        method = params.get('method')
+        handler = self._handlers.get(api)
+        try:
+            if handler is None:
+                raise DsmError(102)
+            session = None
+            if api not in ('SYNO.API.Info', 'SYNO.API.Auth', 'SYNO.API.Encryption'):
+                session = self._session(params, headers or {})
+            request = DsmRequest(api, method, params.get('version'), params, files or {},
+                                 headers or {}, session)
+            return True, handler(request)
+        except DsmError as e:
+            return False, e.code
+
+    # Built in APIs
+
+    def _register_builtin_apis(self):
+        self.add_api('SYNO.API.Info', self._api_info, 'query.cgi')
+        self.add_api('SYNO.API.Auth', self._api_auth, 'auth.cgi', 1, 7)
+        self.add_api('SYNO.API.Encryption',
+                     self._api_encryption, 'encryption.cgi')
+        self.add_api('SYNO.Entry.Request', self._entry_request, 'entry.cgi')
+        self.add_api('SYNO.FileStation.Info',
+                     self._file_info, 'entry.cgi', 1, 2)
+        self.add_api('SYNO.FileStation.List',
+                     self._file_list, 'entry.cgi', 1, 2)
+        self.add_api('SYNO.FileStation.Download',
+                     self._file_download, 'entry.cgi', 1, 2)
+        self.add_api('SYNO.FileStation.Upload',
+                     self._file_upload, 'entry.cgi', 1, 2)
+
+    def _api_info(self, request):
+        query = request.params.get('query', 'all')
+        if query == 'all':
+            return dict(self.catalog)
+        names = query.split(',')
+        return {name: info for name, info in self.catalog.items() if name in names}
+
+    def _api_encryption(self, request):
+        return {'public_key': '%x' % _rsa_key().public_key().public_numbers().n,
+                'cipherkey': CIPHER_KEY, 'ciphertoken': CIPHER_TOKEN,
+                'server_time': int(time.time())}
+
+    def _api_auth(self, request):
+        params = request.params
+        if request.method == 'logout':
+            with self._lock:
+                self._sessions.pop(params.get('_sid'), None)
+            return {}
+        if request.method != 'login':
+            raise DsmError(ERROR_BAD_REQUEST)
+
+        credentials = params
+        if CIPHER_KEY in params:
+            credentials = self._decrypt_credentials(params[CIPHER_KEY])
+        if credentials.get('account') != self.username or credentials.get('passwd') != self.password:
+            raise DsmError(ERROR_BAD_CREDENTIALS)
+
+        with self._lock:
+            self.logins += 1
+            sid = 'sid-%d' % self.logins
+            session = self._sessions[sid] = _Session(sid, 'token-%d' % self.logins,
+                                                     credentials['account'])
+        data = {'sid': sid, 'synotoken': session.synotoken, 'did': ''}
+        if params.get('ik_message'):
+            data['ik_message'] = self._finish_noise_handshake(
+                session, params['ik_message'])
+        return data
+
+    def _decrypt_credentials(self, encrypted):
+        """Decrypt the RSA and AES encrypted login parameters."""
+        try:
+            envelope = json.loads(encrypted)
+            passphrase = _rsa_key().decrypt(
+                base64.b64decode(envelope['rsa']), padding.PKCS1v15())
+            data = base64.b64decode(envelope['aes'])
+            salt, ciphertext = data[8:16], data[16:]
+            # OpenSSL EVP_BytesToKey with MD5
+            derived = block = b''
+            while len(derived) < 48:
+                block = hashlib.md5(block + passphrase + salt).digest()
+                derived += block
+            decryptor = Cipher(algorithms.AES(
+                derived[:32]), modes.CBC(derived[32:48])).decryptor()
+            plain = decryptor.update(ciphertext) + decryptor.finalize()
+            plain = plain[:-plain[-1]].decode('utf-8')
+        except (ValueError, KeyError, TypeError):
+            raise DsmError(ERROR_BAD_CREDENTIALS)
+        return dict(urllib.parse.parse_qsl(plain))
+
+    def _finish_noise_handshake(self, session, ik_message):
+        """Answer the Noise IK handshake of a DSM 7 login."""
+        noise = NoiseConnection.from_name(NOISE_PROTOCOL)
+        noise.set_as_responder()
+        noise.set_keypair_from_private_bytes(
+            Keypair.STATIC, self._noise_key.private_bytes_raw())
+        noise.start_handshake()
+        try:
+            noise.read_message(_b64_decode(ik_message))
+        except Exception:
+            raise DsmError(ERROR_BAD_CREDENTIALS)
+        reply = noise.write_message(b'')
+        session.noise_decrypt = noise.noise_protocol.cipher_state_decrypt
+        session.handshake_hash = _b64_encode(noise.get_handshake_hash())
+        return _b64_encode(reply)
+
+    @property
+    def ssid_cookie(self):
+        """Value of the `_SSID` cookie: the Noise public key of the server."""
+        return _b64_encode(self._noise_key.public_key().public_bytes_raw())
+
+    def _entry_request(self, request):
+        try:
+            compound = json.loads(request.params.get('compound', '[]'))
+        except ValueError:
+            raise DsmError(ERROR_BAD_REQUEST)
+        stop_when_error = request.params.get(
+            'stop_when_error', 'true') == 'true'
+        # The request hash was checked once for the whole compound request
+        headers = {key: value for key,
+                   value in request.headers.items() if key != 'X-SYNO-HASH'}
+        results, has_fail = [], False
+        for sub_request in compound:
+            params = {key: value if isinstance(value, str) else json.dumps(value)
+                      for key, value in sub_request.items()}
+            params['_sid'] = request.params.get('_sid')
+            with self._lock:
+                self.requests[(params.get('api'), params.get('method'))] += 1
+            success, data = self.call(
+                params.get('api'), params, headers=headers)
+            result = {'api': sub_request.get('api'), 'method': sub_request.get('method'),
+                      'version': sub_request.get('version'), 'success': success}
+            if success:
+                result['data'] = data
+            else:
+                result['error'] = {'code': data}
+                has_fail = True
+            results.append(result)
+            if has_fail and stop_when_error:
+                break
+        return {'has_fail': has_fail, 'result': results}
+
+    def _file_info(self, request):
+        return {'hostname': 'fake-dsm', 'is_manager': True, 'support_sharing': True,
+                'uid': 1026, 'support_virtual_protocol': 'cifs,iso'}
+
+    def _children(self, folder):
+        """List the direct files and folders of a folder, sorted by name."""
+        prefix = folder.rstrip('/') + '/'
+        entries = {}
+        for path in self.files:
+            if not path.startswith(prefix):
+                continue
+            name, _, rest = path[len(prefix):].partition('/')
+            entries[name] = bool(rest) or entries.get(name, False)
+        return sorted(entries.items())
+
+    def _file_list(self, request):
+        params = request.params
+        if request.method == 'list_share':
+            entries = [(name, True) for name, _ in self._children('')]
+            folder = ''
+        elif request.method == 'list':
+            folder = params.get('folder_path')
+            if not folder:
+                raise DsmError(ERROR_BAD_REQUEST)
+            entries = self._children(folder)
+            if not entries:
+                raise DsmError(ERROR_NO_SUCH_FILE)
+        else:
+            raise DsmError(ERROR_BAD_REQUEST)
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 0)) or len(entries)
+        items = []
+        for name, is_dir in entries[offset:offset + limit]:
+            path = '%s/%s' % (folder.rstrip('/'), name)
+            item = {'isdir': is_dir, 'name': name, 'path': path}
+            if not is_dir:
+                item['additional'] = {'size': len(self.files[path])}
+            items.append(item)
+        key = 'shares' if request.method == 'list_share' else 'files'
+        return {key: items, 'offset': offset, 'total': len(entries)}
+
+    def _file_download(self, request):
+        path = request.params.get('path')
+        if path not in self.files:
+            raise DsmError(ERROR_NO_SUCH_FILE)
+        return self.files[path]
+
+    def _file_upload(self, request):
+        folder = request.params.get('path')
+        if not folder or 'files' not in request.files:
+            raise DsmError(ERROR_BAD_REQUEST)
+        filename, content = request.files['files']
+        path = '%s/%s' % (folder.rstrip('/'), filename)
+        if path in self.files and request.params.get('overwrite') == 'false':
+            raise DsmError(414)
+        self.files[path] = content
+        return {}
+
+
+def parse_request(target, headers, body):
+    """
+    Parse the parameters of an HTTP request to the web API.
+
+    Returns (path below /webapi/, params, files), query, form and multipart
+    fields merged in params and multipart files in files.
+    """
+    url = urllib.parse.urlsplit(target)
+    params = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+    files = {}
+    content_type = headers.get('Content-Type', '')
+    if content_type.startswith('application/x-www-form-urlencoded'):
+        params.update(urllib.parse.parse_qsl(
+            body.decode('utf-8'), keep_blank_values=True))
+    elif content_type.startswith('multipart/form-data'):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            content = part.get_payload(decode=True)
+            if part.get_filename():
+                files[name] = (part.get_filename(), content)
+            else:
+                params[name] = content.decode('utf-8')
+    # Some URLs end with the API name: entry.cgi/SYNO.API.Auth.UIConfig
+    path = url.path.split('/webapi/', 1)[-1]
+    return path, params, files
+
+
+class _DsmRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a `FakeDsm`."""
+
+    protocol_version = 'HTTP/1.1'
+    fake = None
+
+    def log_message(self, format, *args):
+        return
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                chunk = self.rfile.read(size + 2)
+                if size == 0:
+                    return body
+                body += chunk[:-2]
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _handle(self):
+        path, params, files = parse_request(
+            self.path, self.headers, self._read_body())
+        answer = self.fake.handle(path, params, files, self.headers)
+        if answer is None:
+            self.close_connection = True
+            return
+        status, body, content_type, cookies = answer
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in cookies.items():
+            self.send_header('Set-Cookie', '%s=%s; path=/' % (name, value))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeDsmAdapter(requests.adapters.BaseAdapter):
+    """
+    Transport adapter answering from a `FakeDsm` without sockets.
+
+    Mounted on the `requests.Session` of a client, requests are dispatched
+    in-process, which leaves the client CPU time as the main cost: used by the
+    client overhead benchmarks. `server_time` totals the thread CPU seconds
+    the fake spent answering.
+    """
+
+    def __init__(self, fake):
+        super(FakeDsmAdapter, self).__init__()
+        self.fake = fake
+        self.server_time = 0.0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        body = request.body or b''
+        if hasattr(body, 'read'):
+            body = body.read()
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+        started = time.thread_time()
+        path, params, files = parse_request(request.url, request.headers, body)
+        answer = self.fake.handle(path, params, files, request.headers)
+        self.server_time += time.thread_time() - started
+        if answer is None:
+            raise requests.exceptions.ConnectionError('Connection dropped by the fake DSM',
+                                                      request=request)
+        status, body, content_type, cookies = answer
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers = requests.structures.CaseInsensitiveDict({
+            'Content-Type': content_type, 'Content-Length': str(len(body))})
+        response._content = body
+        response._content_consumed = True
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        response.cookies = requests.cookies.cookiejar_from_dict(cookies)
+        response.connection = self
+        return response
+
+    def close(self):
+        return
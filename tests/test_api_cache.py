@@ -0,0 +1,163 @@
+"""Unit tests for synology_api.api_cache and its use by Authentication."""
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from synology_api.api_cache import ApiCatalogCache
+from synology_api.auth import Authentication
+from synology_api.exceptions import FileStationError
+
+CATALOG = {
+    'SYNO.API.Auth': {'path': 'entry.cgi', 'minVersion': 1, 'maxVersion': 7},
+    'SYNO.API.Info': {'path': 'query.cgi', 'minVersion': 1, 'maxVersion': 1},
+    'SYNO.FileStation.List': {'path': 'entry.cgi', 'minVersion': 1, 'maxVersion': 2},
+}
+
+
+def _json_response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+class TestApiCatalogCache(unittest.TestCase):
+    """Tests for the file based catalog cache."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = ApiCatalogCache(self._tmp.name)
+        self.key = ApiCatalogCache.make_key('nas', '5000', 7)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_key_depends_on_identity(self):
+        self.assertEqual(self.key, ApiCatalogCache.make_key('NAS', '5000', 7))
+        self.assertNotEqual(
+            self.key, ApiCatalogCache.make_key('nas', '5001', 7))
+        self.assertNotEqual(
+            self.key, ApiCatalogCache.make_key('nas', '5000', 6))
+
+    def test_store_and_load(self):
+        self.assertIsNone(self.cache.load(self.key))
+        self.cache.store(self.key, CATALOG)
+        self.assertEqual(self.cache.load(self.key), CATALOG)
+        self.assertEqual(os.listdir(self._tmp.name), [
+                         'api_info_%s.json' % self.key])
+
+    def test_stale_and_corrupt_entries_are_ignored(self):
+        self.cache.store(self.key, CATALOG)
+        self.assertIsNone(ApiCatalogCache(
+            self._tmp.name, max_age=-1).load(self.key))
+
+        with open(os.path.join(self._tmp.name, 'api_info_%s.json' % self.key), 'w') as f:
+            f.write('{"format": 1, "catalog": {')
+        self.assertIsNone(self.cache.load(self.key))
+
+    def test_invalidate(self):
+        self.cache.store(self.key, CATALOG)
+        self.cache.invalidate(self.key)
+        self.assertIsNone(self.cache.load(self.key))
+        self.cache.invalidate(self.key)
+
+    def test_concurrent_writers_leave_a_valid_file(self):
+        catalogs = [{'SYNO.API.Info': {'path': 'query.cgi', 'n': n}}
+                    for n in range(20)]
+        threads = [threading.Thread(target=self.cache.store, args=(self.key, c))
+                   for c in catalogs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn(self.cache.load(self.key), catalogs)
+        self.assertEqual(len(os.listdir(self._tmp.name)), 1)
+
+
+class TestAuthenticationApiCache(unittest.TestCase):
+    """Tests for Authentication reading the catalog from the cache."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _make_auth(self, cache):
+        auth = Authentication('nas', '5000', 'user', 'pass',
+                              debug=False, api_cache=cache)
+        auth._sid = 'sid'
+        auth._requests_session = MagicMock()
+        auth._requests_session.get.return_value = _json_response(
+            {'success': True, 'data': CATALOG})
+        return auth
+
+    def test_second_process_skips_catalog_query(self):
+        first = self._make_auth(ApiCatalogCache(self._tmp.name))
+        first.get_api_list('FileStation')
+        first._requests_session.get.assert_called_once()
+
+        second = self._make_auth(ApiCatalogCache(self._tmp.name))
+        second.get_api_list('FileStation')
+        second.get_api_list()
+
+        second._requests_session.get.assert_not_called()
+        self.assertEqual(second.full_api_list, CATALOG)
+        self.assertIn('SYNO.FileStation.List', second.app_api_list)
+
+    def test_validate_queries_only_core_apis(self):
+        ApiCatalogCache(self._tmp.name).store(
+            ApiCatalogCache.make_key('nas', '5000', 7), CATALOG)
+        auth = self._make_auth(ApiCatalogCache(self._tmp.name, validate=True))
+        auth._requests_session.get.return_value = _json_response({'success': True, 'data': {
+            'SYNO.API.Auth': CATALOG['SYNO.API.Auth']}})
+
+        auth.get_api_list()
+
+        params = auth._requests_session.get.call_args.kwargs['params']
+        self.assertNotEqual(params['query'], 'all')
+        self.assertEqual(auth.full_api_list, CATALOG)
+
+    def test_validate_mismatch_downloads_catalog(self):
+        ApiCatalogCache(self._tmp.name).store(
+            ApiCatalogCache.make_key('nas', '5000', 7), CATALOG)
+        auth = self._make_auth(ApiCatalogCache(self._tmp.name, validate=True))
+        newer = dict(CATALOG, **{'SYNO.API.Auth': {'path': 'entry.cgi',
+                                                   'minVersion': 1, 'maxVersion': 8}})
+        auth._requests_session.get.side_effect = [
+            _json_response(
+                {'success': True, 'data': {'SYNO.API.Auth': newer['SYNO.API.Auth']}}),
+            _json_response({'success': True, 'data': newer}),
+        ]
+
+        auth.get_api_list()
+
+        self.assertEqual(auth.full_api_list, newer)
+        self.assertEqual(auth._requests_session.get.call_args.kwargs['params']['query'],
+                         'all')
+
+    def test_api_not_found_refreshes_cached_catalog(self):
+        cache = ApiCatalogCache(self._tmp.name)
+        key = ApiCatalogCache.make_key('nas', '5000', 7)
+        cache.store(key, {'SYNO.API.Info': CATALOG['SYNO.API.Info']})
+        auth = self._make_auth(cache)
+        auth.get_api_list('FileStation')
+        self.assertNotIn('SYNO.FileStation.List', auth.app_api_list)
+
+        auth._requests_session.get.side_effect = [
+            _json_response({'success': False, 'error': {'code': 102}}),
+            _json_response({'success': True, 'data': CATALOG}),
+        ]
+        with self.assertRaises(FileStationError):
+            auth.request_data('SYNO.FileStation.List', 'entry.cgi',
+                              {'method': 'list', 'version': 2})
+
+        self.assertIn('SYNO.FileStation.List', auth.app_api_list)
+        self.assertEqual(cache.load(key), CATALOG)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Unit tests for synology_api.async_auth against a local fake DSM."""
+
+import asyncio
+import unittest
+
+import requests
+
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from synology_api.base_api import BaseApi
+from synology_api.exceptions import FileStationError, SynoConnectionError
+from synology_api.governor import ConcurrencyGovernor
+from synology_api.instrumentation import MetricsCollector
+from synology_api.session_registry import SessionRegistry
+
+from tests.fake_dsm import FakeDsm
+
+if web is not None:
+    from synology_api.async_auth import AsyncAuthentication, connect, _requests_errors
+
+FILE_CONTENT = b'0123456789' * 10000
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class TestRequestsErrors(unittest.TestCase):
+    """Tests for the translation of aiohttp errors."""
+
+    def test_client_errors_are_connection_errors(self):
+        for error in (aiohttp.ClientPayloadError('truncated body'),
+                      aiohttp.ServerDisconnectedError(), aiohttp.ClientError('other')):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                with _requests_errors():
+                    raise error
+        with self.assertRaises(requests.exceptions.Timeout):
+            with _requests_errors():
+                raise asyncio.TimeoutError()
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class TestAsyncAuthentication(unittest.IsolatedAsyncioTestCase):
+    """Tests for the asyncio transport."""
+
+    def setUp(self):
+        self.dsm = FakeDsm().start()
+        self.dsm.add_file('/home/file.bin', FILE_CONTENT)
+        self.port = self.dsm.port
+
+    def tearDown(self):
+        self.dsm.stop()
+
+    def _auth(self, **kwargs):
+        return AsyncAuthentication('127.0.0.1', self.port, 'admin', 'pass',
+                                   dsm_version=6, debug=False, **kwargs)
+
+    async def test_login_catalog_and_request(self):
+        async with self._auth() as auth:
+            self.assertEqual(auth.sid, 'sid-1')
+            self.assertEqual(auth.full_api_list, self.dsm.catalog)
+            response = await auth.request_data('SYNO.FileStation.Info', 'entry.cgi',
+                                               {'method': 'get', 'version': 2, 'additional': True})
+        self.assertEqual(response['data']['hostname'], 'fake-dsm')
+
+    async def test_concurrent_requests_share_the_pool(self):
+        self.dsm.latency = 0.05
+        async with self._auth(pool_maxsize=20) as auth:
+            responses = await asyncio.gather(*[
+                auth.request_data('SYNO.FileStation.Info', 'entry.cgi',
+                                  {'method': 'get', 'version': 2})
+                for _ in range(100)])
+        self.assertEqual(len(responses), 100)
+        self.assertGreater(self.dsm.peak_in_flight, 1)
+        self.assertLessEqual(self.dsm.peak_in_flight, 20)
+
+    async def test_governor_bounds_the_coroutines(self):
+        self.dsm.latency = 0.02
+        governor = ConcurrencyGovernor(initial_limit=2, max_limit=2)
+        async with self._auth(governor=governor) as auth:
+            with auth.lane('bulk'):
+                responses = await asyncio.gather(*[
+                    auth.request_data('SYNO.FileStation.Info', 'entry.cgi',
+                                      {'method': 'get', 'version': 2})
+                    for _ in range(20)])
+        self.assertTrue(all(r['success'] for r in responses))
+        self.assertEqual(self.dsm.peak_in_flight, 2)
+        self.assertEqual(governor.in_flight, 0)
+
+    async def test_expired_session_logs_in_once(self):
+        async with self._auth() as auth:
+            self.dsm.expire_sessions()
+            responses = await asyncio.gather(*[
+                auth.request_data('SYNO.FileStation.Info', 'entry.cgi',
+                                  {'method': 'get', 'version': 2})
+                for _ in range(10)])
+            self.assertEqual(auth.sid, 'sid-2')
+        self.assertEqual(self.dsm.logins, 2)
+        self.assertTrue(all(r['success'] for r in responses))
+
+    async def test_requests_are_measured(self):
+        metrics = MetricsCollector()
+        async with self._auth(hooks=[metrics]) as auth:
+            self.dsm.expire_sessions()
+            await auth.request_data('SYNO.FileStation.Info', 'entry.cgi',
+                                    {'method': 'get', 'version': 2})
+            await auth.request_multi_datas([
+                {'api': 'SYNO.FileStation.Info', 'method': 'get', 'version': 2}])
+        snapshot = metrics.snapshot()
+        info = snapshot['calls']['SYNO.FileStation.Info']['get']
+        self.assertEqual(snapshot['relogins'], 1)
+        self.assertEqual((info['calls'], info['retries'],
+                         info['status_codes']), (1, 1, {200: 1}))
+        self.assertGreater(info['response_bytes'], 0)
+        self.assertEqual(
+            snapshot['calls']['SYNO.Entry.Request']['request']['calls'], 1)
+
+    async def test_stream_data(self):
+        async with self._auth() as auth:
+            chunks = [chunk async for chunk in auth.stream_data(
+                'SYNO.FileStation.Download', 'entry.cgi',
+                {'method': 'download', 'version': 2, 'path': '/home/file.bin'}, chunk_size=4096)]
+            self.assertEqual(b''.join(chunks), FILE_CONTENT)
+            self.assertGreater(len(chunks), 1)
+
+            with self.assertRaises(FileStationError):
+                async for _ in auth.stream_data('SYNO.FileStation.Download', 'entry.cgi',
+                                                {'method': 'download', 'version': 2, 'path': '/missing'}):
+                    pass
+
+    async def test_connection_error(self):
+        auth = AsyncAuthentication('127.0.0.1', '1', 'admin', 'pass',
+                                   dsm_version=6, debug=False)
+        with self.assertRaises(SynoConnectionError):
+            await auth.login()
+        await auth.aclose()
+
+    async def test_api_classes_run_on_the_async_session(self):
+        from synology_api.filestation import FileStation
+
+        registry_backup = BaseApi.session_registry
+        BaseApi.session_registry = SessionRegistry()
+        try:
+            session = await connect('127.0.0.1', self.port, 'admin', 'pass',
+                                    dsm_version=6, debug=False)
+            fs = FileStation('127.0.0.1', self.port,
+                             'admin', 'pass', dsm_version=6)
+            self.assertIs(fs.session, session)
+            info = await fs.get_info()
+            self.assertEqual(info['data']['hostname'], 'fake-dsm')
+            await fs.logout()
+            await session.aclose()
+        finally:
+            BaseApi.session_registry = registry_backup
+        self.assertEqual(self.dsm.logins, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
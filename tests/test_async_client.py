@@ -0,0 +1,150 @@
+"""Unit tests for synology_api.async_client."""
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synology_api.async_client import AsyncClient
+from synology_api.auth import Authentication
+from synology_api.governor import ConcurrencyGovernor
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answers /fast at once and holds /slow until the test ends."""
+
+    def do_GET(self):
+        if self.path == '/slow':
+            self.server.slow_started.set()
+            self.server.release.wait(10)
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Service(object):
+    """Synchronous API object sending requests through an Authentication."""
+
+    def __init__(self, session, base_url):
+        self.session = session
+        self.base_url = base_url
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.started = []
+        self._lock = threading.Lock()
+
+    def fetch(self, path):
+        response = self.session._requests_session.get(
+            self.base_url + path, timeout=10)
+        return response.text
+
+    def work(self, value, delay=0.02):
+        with self._lock:
+            self.started.append(value)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(delay)
+        with self._lock:
+            self.in_flight -= 1
+        if value == 'fail':
+            raise ValueError(value)
+        return (value, threading.current_thread().name)
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    """Tests for executors, concurrency limits, bulk calls and cancellation."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.slow_started = threading.Event()
+        self.server.release = threading.Event()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.session = Authentication('127.0.0.1', str(self.server.server_port),
+                                      'admin', 'pass', debug=False)
+        self.service = _Service(
+            self.session, 'http://127.0.0.1:%d' % self.server.server_port)
+        self.executor = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix='nas1')
+
+    def tearDown(self):
+        self.server.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    async def test_runs_on_own_executor_with_concurrency_limit(self):
+        client = AsyncClient(
+            self.service, executor=self.executor, max_concurrency=2)
+        results = await client.map('work', range(8))
+
+        self.assertEqual([value for value, _ in results], list(range(8)))
+        self.assertTrue(all(name.startswith('nas1') for _, name in results))
+        self.assertEqual(self.service.peak_in_flight, 2)
+
+    async def test_calls_keep_the_governor_lane(self):
+        governor = ConcurrencyGovernor()
+        client = AsyncClient(governor, executor=self.executor)
+        with governor.lane('bulk'):
+            self.assertEqual(await client.current_lane(), 'bulk')
+        self.assertEqual(await client.current_lane(), 'interactive')
+
+    async def test_gather_cancels_pending_calls_on_failure(self):
+        client = AsyncClient(
+            self.service, executor=self.executor, max_concurrency=1)
+        with self.assertRaises(ValueError):
+            await client.gather(client.work('fail'), client.work('a', delay=0.2), client.work('b'))
+        self.assertNotIn('b', self.service.started)
+
+        results = await client.gather(client.work('fail'), client.work('c'),
+                                      return_exceptions=True)
+        self.assertIsInstance(results[0], ValueError)
+        self.assertEqual(results[1][0], 'c')
+
+    async def test_cancel_aborts_http_request(self):
+        cancelled = []
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown, wait=True)
+        client = AsyncClient(self.service, executor=executor,
+                             on_cancel=lambda name, thread_id: cancelled.append(name))
+
+        task = asyncio.ensure_future(client.fetch('/slow'))
+        await asyncio.get_running_loop().run_in_executor(None, self.server.slow_started.wait, 5)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(cancelled, ['fetch'])
+
+        # The single worker thread is freed at once and can send requests again.
+        start = time.monotonic()
+        self.assertEqual(await asyncio.wait_for(client.fetch('/fast'), 5), 'ok')
+        self.assertLess(time.monotonic() - start, 5)
+
+    async def test_cancel_before_start_skips_call(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown, wait=True)
+        client = AsyncClient(self.service, executor=executor)
+
+        busy = asyncio.ensure_future(client.work('busy', delay=0.2))
+        queued = asyncio.ensure_future(client.work('queued'))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        self.assertEqual((await busy)[0], 'busy')
+        with self.assertRaises(asyncio.CancelledError):
+            await queued
+        self.assertEqual(self.service.started, ['busy'])
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            AsyncClient(self.service, max_concurrency=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,19 @@
 """Unit tests for synology_api.auth."""
 
 import json
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
+import requests
+
 from synology_api.auth import Authentication
+from synology_api.base_api import BaseApi
 from synology_api.error_codes import CODE_SUCCESS, CODE_UNKNOWN
+from synology_api.exceptions import CoreError
+from synology_api.retry import NO_RETRY
+from synology_api.session_registry import SessionRegistry
 
 
 class FakeCipherState:
@@ -21,6 +29,17 @@ class FakeCipherState:
         return b'\x01\x02'
 
 
+class SlowCipherState(FakeCipherState):
+    """Cipher state that yields between reading and advancing its nonce."""
+
+    def encrypt_with_ad(self, ad, plaintext):
+        nonce = self.n
+        time.sleep(0.001)
+        self.calls.append((ad, plaintext, nonce))
+        self.n = nonce + 1
+        return nonce.to_bytes(2, 'big')
+
+
 class FakeNoiseProtocol:
     """Small stand-in for noiseprotocol internals."""
 
@@ -54,7 +73,20 @@ def _make_auth():
     instance._noise_connection = None
     instance._noise_handshake_hash = None
     instance._requests_session = None
+    instance._http_adapter = None
+    instance._batch_local = threading.local()
+    instance._response_cache = None
+    instance._single_flight = None
+    instance._governor = None
+    instance._circuit_breaker = None
+    instance._quickconnect_route = None
+    instance._quickconnect_route_cached = False
+    instance._hooks = ()
     instance._quickconnect_headers = {}
+    instance._retry_policy = NO_RETRY
+    instance._auto_relogin = False
+    instance._request_hash_lock = threading.Lock()
+    instance._nonce_reserved_until = None
     return instance
 
 
@@ -76,6 +108,27 @@ class TestAuthenticationRequestHash(unittest.TestCase):
         )
         self.assertEqual(fake_noise.noise_protocol.cipher_state_encrypt.n, 1)
 
+    def test_get_request_hash_allocates_unique_nonces_across_threads(self):
+        auth = _make_auth()
+        fake_noise = FakeNoiseConnection()
+        cipher_state = SlowCipherState()
+        fake_noise.noise_protocol.cipher_state_encrypt = cipher_state
+        auth._noise_connection = fake_noise
+        auth._noise_handshake_hash = 'abcdefghijk'
+
+        hashes = []
+        threads = [threading.Thread(target=lambda: hashes.append(auth._get_request_hash()))
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(cipher_state.n, 20)
+        self.assertEqual(len(set(hashes)), 20)
+        self.assertEqual(sorted(call[2] for call in cipher_state.calls),
+                         list(range(20)))
+
     def test_get_request_hash_omits_unfinished_noise_session(self):
         auth = _make_auth()
         fake_noise = FakeNoiseConnection()
@@ -151,6 +204,210 @@ class TestAuthenticationRequestHash(unittest.TestCase):
         response.raise_for_status.assert_called_once_with()
 
 
+class TestAuthenticationConnectionPool(unittest.TestCase):
+    """Tests for the pooled keep-alive HTTP session."""
+
+    def test_session_mounts_configured_pool(self):
+        auth = Authentication('nas', '5000', 'user', 'pass', debug=False,
+                              pool_connections=3, pool_maxsize=7)
+
+        for prefix in ('http://', 'https://'):
+            adapter = auth.http_session.get_adapter(prefix + 'nas')
+            self.assertEqual(adapter._pool_connections, 3)
+            self.assertEqual(adapter._pool_maxsize, 7)
+
+    def test_service_constructors_forward_the_pool_options(self):
+        from synology_api.core_certificate import Certificate
+        from synology_api.downloadstation import DownloadStation
+        from synology_api.filestation import FileStation
+        from synology_api.photos import Photos
+        from synology_api.virtualization import Virtualization
+
+        def fake_base_init(instance, *args, **kwargs):
+            instance.session = MagicMock()
+            instance.session.app_api_list = {}
+
+        for service in (Certificate, DownloadStation, FileStation, Photos, Virtualization):
+            with patch('synology_api.base_api.BaseApi.__init__', autospec=True,
+                       side_effect=fake_base_init) as base_init:
+                service('nas', '5000', 'user', 'pass',
+                        pool_connections=3, pool_maxsize=7)
+
+            kwargs = base_init.call_args.kwargs
+            self.assertEqual(kwargs['pool_connections'], 3, service)
+            self.assertEqual(kwargs['pool_maxsize'], 7, service)
+
+    def test_get_and_post_reuse_the_same_session(self):
+        auth = Authentication('nas', '5000', 'user', 'pass', debug=False)
+        auth._requests_session = MagicMock()
+
+        auth._get('http://nas:5000/webapi/query.cgi', {'a': 1}, verify=False)
+        auth._post('http://nas:5000/webapi/auth.cgi', {'b': 2}, verify=False)
+
+        auth._requests_session.get.assert_called_once_with(
+            'http://nas:5000/webapi/query.cgi', params={'a': 1}, verify=False,
+            timeout=(10.0, 120.0))
+        auth._requests_session.post.assert_called_once_with(
+            'http://nas:5000/webapi/auth.cgi', data={'b': 2}, verify=False,
+            timeout=(10.0, 120.0))
+
+
+class TestAuthenticationRelogin(unittest.TestCase):
+    """Tests for transparent re-authentication on session expiry."""
+
+    @staticmethod
+    def _response(payload):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(payload).encode()
+        return response
+
+    def _make_auth(self):
+        auth = Authentication('nas', '5000', 'user', 'pass', debug=False)
+        auth._sid = 'old'
+        auth._syno_token = 'token'
+        auth._session_expire = False
+        auth._requests_session = MagicMock()
+
+        def fake_get(url, params=None, **kwargs):
+            if params['_sid'] == 'old':
+                return self._response({'success': False, 'error': {'code': 119}})
+            return self._response({'success': True, 'data': {'sid': params['_sid']}})
+
+        auth._requests_session.get.side_effect = fake_get
+        return auth
+
+    def test_expired_session_logs_in_and_replays(self):
+        auth = self._make_auth()
+
+        def fake_login():
+            self.assertTrue(auth._session_expire)
+            auth._sid = 'new'
+            auth._session_expire = False
+
+        with patch.object(auth, 'login', side_effect=fake_login) as login:
+            result = auth.request_data(
+                'SYNO.Core.System', 'entry.cgi', {'method': 'info', 'version': 1})
+
+        login.assert_called_once_with()
+        self.assertEqual(result['data']['sid'], 'new')
+        self.assertEqual(auth._requests_session.get.call_count, 2)
+
+    def test_concurrent_expiries_log_in_once(self):
+        auth = self._make_auth()
+        login_calls = []
+
+        def fake_login():
+            login_calls.append(threading.current_thread().name)
+            time.sleep(0.05)
+            auth._sid = 'new'
+
+        results = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            results.append(auth.request_data(
+                'SYNO.Core.System', 'entry.cgi', {'method': 'info', 'version': 1}))
+
+        with patch.object(auth, 'login', side_effect=fake_login):
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(login_calls), 1)
+        self.assertEqual([r['data']['sid'] for r in results], ['new'] * 8)
+
+    def test_relogin_disabled_raises(self):
+        auth = self._make_auth()
+        auth._auto_relogin = False
+
+        with patch.object(auth, 'login') as login:
+            with self.assertRaises(CoreError):
+                auth.request_data(
+                    'SYNO.Core.System', 'entry.cgi', {'method': 'info', 'version': 1})
+
+        login.assert_not_called()
+
+    def test_base_api_reads_live_sid(self):
+        auth = self._make_auth()
+        api = BaseApi.__new__(BaseApi)
+        api.session = auth
+
+        self.assertEqual(api._sid, 'old')
+        auth._sid = 'new'
+        self.assertEqual(api._sid, 'new')
+
+    def test_base_api_reads_live_base_url(self):
+        auth = self._make_auth()
+        api = BaseApi.__new__(BaseApi)
+        api.session = auth
+
+        self.assertEqual(api.base_url, 'http://nas:5000/webapi/')
+        auth._base_url = 'https://192.168.1.10:5001/webapi/'
+        self.assertEqual(api.base_url, 'https://192.168.1.10:5001/webapi/')
+        with self.assertRaises(AttributeError):
+            api.base_url = 'http://other/webapi/'
+
+
+class TestAuthenticationApiCatalog(unittest.TestCase):
+    """Tests for the per-session SYNO.API.Info catalog."""
+
+    CATALOG = {
+        'SYNO.API.Info': {'path': 'query.cgi', 'minVersion': 1, 'maxVersion': 1},
+        'SYNO.Core.User': {'path': 'entry.cgi', 'minVersion': 1, 'maxVersion': 1},
+        'SYNO.FileStation.List': {'path': 'entry.cgi', 'minVersion': 1, 'maxVersion': 2},
+    }
+
+    def _make_auth(self):
+        auth = Authentication('nas', '5000', 'user', 'pass', debug=False)
+        response = MagicMock()
+        response.json.return_value = {'success': True, 'data': self.CATALOG}
+        auth._requests_session = MagicMock()
+        auth._requests_session.get.return_value = response
+        return auth
+
+    def test_catalog_is_fetched_once(self):
+        auth = self._make_auth()
+        full_list = auth.full_api_list
+
+        auth.get_api_list('Core')
+        auth.get_api_list()
+        auth.get_api_list('FileStation')
+        auth.get_api_list('filestation')
+
+        auth._requests_session.get.assert_called_once()
+        self.assertIs(auth.full_api_list, full_list)
+        self.assertEqual(auth.full_api_list, self.CATALOG)
+        self.assertEqual(set(auth.app_api_list),
+                         {'SYNO.Core.User', 'SYNO.FileStation.List'})
+
+    def test_refresh_reloads_catalog_in_place(self):
+        auth = self._make_auth()
+        auth.get_api_list('Core')
+        full_list = auth.full_api_list
+
+        auth._load_api_catalog(refresh=True)
+
+        self.assertEqual(auth._requests_session.get.call_count, 2)
+        self.assertIs(auth.full_api_list, full_list)
+
+    def test_registered_session_adds_module_apis(self):
+        auth = self._make_auth()
+        auth.get_api_list('Core')
+        auth.get_api_list()
+        registry = SessionRegistry()
+        registry.register(SessionRegistry.make_key(
+            'nas', '5000', 'user'), auth)
+        api = BaseApi('nas', '5000', 'user', 'pass', application='FileStation',
+                      session_registry=registry)
+
+        self.assertIn('SYNO.FileStation.List', api.core_list)
+        auth._requests_session.get.assert_called_once()
+
+
 class GetErrorCodeTests(unittest.TestCase):
     """Tests for Authentication._get_error_code (a @staticmethod)."""
 
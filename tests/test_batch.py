@@ -0,0 +1,303 @@
+"""Unit tests for synology_api.batch and compound request batching."""
+
+import contextlib
+import io
+import json
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from synology_api.auth import Authentication
+from synology_api.batch import BatchCall, MAX_GET_URL_LENGTH
+from synology_api.exceptions import CoreError, FileStationError, SynoConnectionError
+
+from tests.fake_dsm import FakeDsm
+
+
+def _json_response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+def _compound_reply(*args, **kwargs):
+    """Answer a compound request, failing the calls on the FileStation API."""
+    params = kwargs.get('data') or kwargs.get('params')
+    compound = json.loads(params['compound'])
+    results = []
+    for request in compound:
+        if request['api'].startswith('SYNO.FileStation'):
+            results.append({'api': request['api'], 'method': request['method'],
+                            'version': request['version'], 'success': False,
+                            'error': {'code': 408}})
+        else:
+            results.append({'api': request['api'], 'method': request['method'],
+                            'version': request['version'], 'success': True,
+                            'data': {'name': request.get('name')}})
+    return _json_response({'success': True, 'data': {'has_fail': False, 'result': results}})
+
+
+class TestRequestBatch(unittest.TestCase):
+    """Tests for capturing request_data calls into compound requests."""
+
+    def setUp(self):
+        self.auth = Authentication('nas', '5000', 'admin', 'pass', debug=False)
+        self.auth._sid = 'sid'
+        self.auth.full_api_list = {'SYNO.Entry.Request': {
+            'path': 'entry.cgi', 'minVersion': 1, 'maxVersion': 1}}
+        self.auth._requests_session = MagicMock()
+        self.auth._requests_session.get.side_effect = _compound_reply
+        self.auth._requests_session.post.side_effect = _compound_reply
+
+    def _sent_params(self):
+        session = self.auth._requests_session
+        return ([call.kwargs['params'] for call in session.get.call_args_list] +
+                [call.kwargs['data'] for call in session.post.call_args_list])
+
+    def _get_user(self, name):
+        return self.auth.request_data('SYNO.Core.User', 'entry.cgi',
+                                      {'method': 'get', 'version': 1, 'name': name})
+
+    def test_calls_are_sent_in_one_compound_request(self):
+        with self.auth.batch(mode='parallel') as batch:
+            first = self._get_user('alice')
+            second = self._get_user('bob')
+            missing = self.auth.request_data('SYNO.FileStation.List', 'entry.cgi',
+                                             {'method': 'list', 'version': 2, 'additional': True})
+            self.assertIsInstance(first, BatchCall)
+            self.assertFalse(first.done())
+            self.assertEqual(len(batch), 3)
+
+        self.assertEqual(len(self._sent_params()), 1)
+        params = self._sent_params()[0]
+        self.assertEqual(params['mode'], 'parallel')
+        self.assertEqual(params['stop_when_error'], 'false')
+        compound = json.loads(params['compound'])
+        self.assertEqual(compound[2], {'api': 'SYNO.FileStation.List', 'method': 'list',
+                                       'version': 2, 'additional': 'true'})
+
+        self.assertEqual(first.result(), {
+                         'success': True, 'data': {'name': 'alice'}})
+        self.assertEqual(second.result()['data']['name'], 'bob')
+        with self.assertRaises(FileStationError):
+            missing.result()
+        self.assertEqual(missing.exception().error_code, 408)
+
+    def test_large_batches_are_chunked(self):
+        with self.auth.batch(batch_size=4):
+            calls = [self._get_user('user%d' % i) for i in range(10)]
+
+        self.assertEqual(len(self._sent_params()), 3)
+        self.assertEqual([call.result()['data']['name'] for call in calls],
+                         ['user%d' % i for i in range(10)])
+
+    def test_result_of_pending_call_flushes_the_batch(self):
+        with self.auth.batch():
+            call = self._get_user('alice')
+            self.assertEqual(call.result()['data']['name'], 'alice')
+            self.assertIsInstance(self._get_user('bob'), BatchCall)
+        self.assertEqual(len(self._sent_params()), 2)
+
+    def test_methods_reading_the_response_flush_the_batch(self):
+        with self.auth.batch():
+            queued = self._get_user('alice')
+            # As a service method returning ['data']['name'] would
+            name = self._get_user('bob')['data']['name']
+            self.assertTrue(queued.done())
+            later = self._get_user('carol')
+            self.assertIn('data', later)
+            self.assertEqual(later.get('missing', 'default'), 'default')
+
+        self.assertEqual(name, 'bob')
+        self.assertEqual(len(self._sent_params()), 2)
+        self.assertEqual(queued.result()['data']['name'], 'alice')
+
+    def test_compound_failure_resolves_every_call(self):
+        self.auth._requests_session.get.side_effect = requests.exceptions.ConnectionError(
+            'unreachable')
+        with self.auth.batch():
+            calls = [self._get_user('alice'), self._get_user('bob')]
+        for call in calls:
+            with self.assertRaises(SynoConnectionError):
+                call.result()
+
+        self.auth._requests_session.get.side_effect = None
+        self.auth._requests_session.get.return_value = _json_response(
+            {'success': False, 'error': {'code': 103}})
+        with self.auth.batch():
+            call = self._get_user('alice')
+        self.assertIsNotNone(call.exception())
+
+    def test_uploads_raw_responses_and_other_threads_are_not_captured(self):
+        self.auth._requests_session.get.side_effect = None
+        self.auth._requests_session.get.return_value = _json_response(
+            {'success': True, 'data': {}})
+        results = []
+        with self.auth.batch() as batch:
+            raw = self.auth.request_data('SYNO.Core.User', 'entry.cgi',
+                                         {'method': 'list', 'version': 1}, response_json=False)
+            thread = threading.Thread(
+                target=lambda: results.append(self._get_user('carol')))
+            thread.start()
+            thread.join()
+            self.assertEqual(len(batch), 0)
+
+        self.assertNotIsInstance(raw, BatchCall)
+        self.assertEqual(results, [{'success': True, 'data': {}}])
+        self.auth._requests_session.post.assert_not_called()
+        self.assertEqual(self.auth._requests_session.get.call_count, 2)
+
+    def test_block_error_leaves_calls_unsent(self):
+        with self.assertRaises(CoreError):
+            with self.auth.batch():
+                call = self._get_user('alice')
+                raise CoreError(error_code=105)
+        self.assertEqual(self._sent_params(), [])
+        self.assertFalse(call.done())
+        self.assertIsNone(self.auth._active_batch())
+
+
+class TestRequestMultiDatas(unittest.TestCase):
+    """Tests for chunking, method selection and per sub request results."""
+
+    def setUp(self):
+        self.auth = Authentication('nas', '5000', 'admin', 'pass', debug=False)
+        self.auth._sid = 'sid'
+        self.auth.full_api_list = {'SYNO.Entry.Request': {
+            'path': 'entry.cgi', 'minVersion': 1, 'maxVersion': 1}}
+        self.auth._requests_session = MagicMock()
+        self.auth._requests_session.get.side_effect = _compound_reply
+        self.auth._requests_session.post.side_effect = _compound_reply
+
+    @staticmethod
+    def _compound(count, api='SYNO.Core.User', padding=''):
+        return [{'api': api, 'method': 'get', 'version': 1, 'name': 'user%d%s' % (i, padding)}
+                for i in range(count)]
+
+    def test_small_compound_is_one_get(self):
+        response = self.auth.request_multi_datas(self._compound(3))
+
+        self.auth._requests_session.get.assert_called_once()
+        self.auth._requests_session.post.assert_not_called()
+        self.assertEqual([r['data']['name'] for r in response['data']['result']],
+                         ['user0', 'user1', 'user2'])
+
+    def test_long_compound_is_posted_in_chunks(self):
+        compound = self._compound(40, padding='x' * 200)
+        self.assertGreater(len(json.dumps(compound)), MAX_GET_URL_LENGTH)
+
+        response = self.auth.request_multi_datas(
+            compound, max_chunk_bytes=4096)
+
+        session = self.auth._requests_session
+        self.assertTrue(session.post.called)
+        for call in session.get.call_args_list:
+            self.assertLessEqual(len(requests.Request('GET', call.args[0], params=call.kwargs['params'])
+                                     .prepare().url), MAX_GET_URL_LENGTH)
+        chunks = [json.loads(call.kwargs['data']['compound'])
+                  for call in session.post.call_args_list]
+        chunks += [json.loads(call.kwargs['params']['compound'])
+                   for call in session.get.call_args_list]
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(json.dumps(chunk))
+                        <= 4096 for chunk in chunks))
+        self.assertEqual(len(response['data']['result']), 40)
+        self.assertEqual(response['data']['result']
+                         [39]['data']['name'], compound[39]['name'])
+
+    def test_per_request_results(self):
+        compound = self._compound(
+            2) + self._compound(1, api='SYNO.FileStation.List')
+        results = self.auth.request_multi_datas(compound, stop_when_error=False,
+                                                as_results=True)
+
+        self.assertEqual([result.success for result in results], [
+                         True, True, False])
+        self.assertEqual(results[1].data, {'name': 'user1'})
+        self.assertEqual(results[2].error_code, 408)
+        self.assertIsInstance(results[2].exception, FileStationError)
+        with self.assertRaises(FileStationError):
+            results[2].result()
+
+    def test_sub_request_errors_are_not_printed(self):
+        self.auth._debug = True
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            results = self.auth.request_multi_datas(
+                self._compound(1, api='SYNO.FileStation.List'), as_results=True)
+
+        self.assertIsInstance(results[0].exception, FileStationError)
+        self.assertEqual(output.getvalue(), '')
+
+    def test_stop_when_error_skips_later_chunks(self):
+        compound = self._compound(
+            1, api='SYNO.FileStation.List') + self._compound(3)
+
+        def reply(*args, **kwargs):
+            response = _compound_reply(*args, **kwargs)
+            payload = response.json.return_value
+            payload['data']['has_fail'] = any(
+                not result['success'] for result in payload['data']['result'])
+            return response
+        self.auth._requests_session.get.side_effect = reply
+
+        results = self.auth.request_multi_datas(
+            compound, max_chunk_requests=2, as_results=True)
+
+        self.assertEqual(self.auth._requests_session.get.call_count, 1)
+        self.assertEqual([result.skipped for result in results], [
+                         False, False, True, True])
+        with self.assertRaises(Exception):
+            results[3].result()
+
+    def test_chunk_transport_error_is_reported_per_request(self):
+        def reply(*args, **kwargs):
+            if 'user0' in kwargs['params']['compound']:
+                raise requests.exceptions.ConnectionError('reset')
+            return _compound_reply(*args, **kwargs)
+        self.auth._requests_session.get.side_effect = reply
+
+        results = self.auth.request_multi_datas(self._compound(4), max_chunk_requests=2,
+                                                stop_when_error=False, concurrency=2,
+                                                as_results=True)
+
+        self.assertIsInstance(results[0].exception, SynoConnectionError)
+        self.assertIsInstance(results[1].exception, SynoConnectionError)
+        self.assertEqual([result.data for result in results[2:]],
+                         [{'name': 'user2'}, {'name': 'user3'}])
+
+    def test_concurrent_chunks_keep_order(self):
+        response = self.auth.request_multi_datas(self._compound(10), max_chunk_requests=3,
+                                                 stop_when_error=False, concurrency=4)
+
+        self.assertEqual(self.auth._requests_session.get.call_count, 4)
+        self.assertEqual([r['data']['name'] for r in response['data']['result']],
+                         ['user%d' % i for i in range(10)])
+        with self.assertRaises(ValueError):
+            self.auth.request_multi_datas(self._compound(10), max_chunk_requests=3,
+                                          concurrency=4)
+
+
+class TestBatchRelogin(unittest.TestCase):
+    """Tests for a session expiring while a batch is flushed."""
+
+    def test_relogin_during_flush(self):
+        with FakeDsm() as dsm:
+            auth = Authentication('127.0.0.1', dsm.port,
+                                  'admin', 'pass', debug=False, dsm_version=7)
+            auth.login()
+            auth.get_api_list()
+            dsm.expire_sessions()
+
+            with auth.batch() as batch:
+                call = batch.add('SYNO.FileStation.Info', {
+                                 'method': 'get', 'version': 2})
+                batch.flush()
+                self.assertEqual(call.result()['data']['hostname'], 'fake-dsm')
+            self.assertEqual(dsm.logins, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
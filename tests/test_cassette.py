@@ -0,0 +1,99 @@
+"""Unit tests for synology_api.cassette."""
+
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+from synology_api.auth import Authentication
+from synology_api.cassette import Cassette, CassetteMiss, RecordingTransport, ReplayTransport
+
+from tests.fake_dsm import FakeDsm
+
+LIST_PARAMS = {'method': 'list', 'version': 2,
+               'folder_path': '/home', 'offset': 0, 'limit': 10}
+DOWNLOAD_PARAMS = {'method': 'download', 'version': 2, 'path': '/home/b.bin'}
+
+
+class TestCassette(unittest.TestCase):
+    """Tests for recording exchanges with a NAS and replaying them offline."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'workflow.cassette')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _auth(self, transport):
+        auth = Authentication('nas', '5000', 'admin',
+                              'pass', debug=False, transport=transport)
+        auth.login()
+        auth.get_api_list()
+        return auth
+
+    def _record(self):
+        with FakeDsm(latency=0.05) as dsm:
+            dsm.add_file('/home/a.txt', b'hello')
+            dsm.add_file('/home/b.bin', bytes(range(256)) * 100)
+            recorder = RecordingTransport(self.path)
+            auth = Authentication('127.0.0.1', dsm.port, 'admin', 'pass', debug=False,
+                                  transport=recorder)
+            auth.login()
+            auth.get_api_list()
+            listing = auth.request_data(
+                'SYNO.FileStation.List', 'entry.cgi', LIST_PARAMS)
+            auth.request_data('SYNO.FileStation.Download',
+                              'entry.cgi', DOWNLOAD_PARAMS, response_json=False)
+            auth.close()
+        return listing
+
+    def test_recording_is_redacted(self):
+        self._record()
+        with open(self.path, 'rb') as cassette_file:
+            content = gzip.decompress(cassette_file.read()).decode('utf-8')
+        for secret in ('sid-1', 'token-1', '"pass"', 'X-SYNO'):
+            self.assertNotIn(secret, content)
+        exchanges = Cassette.load(self.path).exchanges
+        login = [e for e in exchanges if e['request']
+                 ['params'].get('method') == 'login'][0]
+        self.assertEqual(login['request']['params']
+                         ['__cIpHeRtext'], 'REDACTED')
+        self.assertEqual(login['request']['params']['ik_message'], 'REDACTED')
+        self.assertNotIn('ik_message', login['response']['body'])
+        self.assertGreaterEqual(exchanges[-1]['response']['elapsed'], 0.05)
+
+    def test_replay(self):
+        listing = self._record()
+        replay = ReplayTransport(self.path)
+        auth = self._auth(replay)
+        self.assertEqual(auth.sid, 'REDACTED')
+
+        started = time.monotonic()
+        for _ in range(3):
+            # Repeated calls cycle through the recorded answer
+            self.assertEqual(auth.request_data(
+                'SYNO.FileStation.List', 'entry.cgi', LIST_PARAMS), listing)
+        self.assertLess(time.monotonic() - started, 0.05)
+        download = auth.request_data('SYNO.FileStation.Download', 'entry.cgi', DOWNLOAD_PARAMS,
+                                     response_json=False)
+        self.assertEqual(download.content, bytes(range(256)) * 100)
+        # Other parameters fall back to the answer of the same API and method
+        other = dict(LIST_PARAMS, offset=5)
+        self.assertEqual(auth.request_data(
+            'SYNO.FileStation.List', 'entry.cgi', other), listing)
+        with self.assertRaises(CassetteMiss):
+            auth.request_data('SYNO.Core.System', 'entry.cgi', {
+                              'method': 'info', 'version': 1})
+
+    def test_realtime_replay(self):
+        self._record()
+        auth = self._auth(ReplayTransport(self.path, realtime=True))
+        started = time.monotonic()
+        auth.request_data('SYNO.FileStation.List', 'entry.cgi', LIST_PARAMS)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""Unit tests for synology_api.circuit_breaker."""
+
+import threading
+import time
+import unittest
+
+from synology_api.auth import Authentication
+from synology_api.circuit_breaker import CircuitBreaker
+from synology_api.exceptions import CircuitOpenError, HTTPError, SynoConnectionError
+
+from tests.fake_dsm import FakeDsm
+from tests import test_quickconnect
+
+INFO_PARAMS = {'method': 'get', 'version': 2}
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Condition not met in %.1fs' % timeout)
+        time.sleep(0.01)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests for the states of the breaker."""
+
+    def test_opens_at_threshold_and_probes_until_healthy(self):
+        breaker = CircuitBreaker(
+            failure_threshold=3, recovery_timeout=0.02, max_recovery_timeout=0.05)
+        answers = iter([False, False, True])
+        probed = threading.Event()
+
+        def probe():
+            healthy = next(answers)
+            if healthy:
+                probed.set()
+            return healthy
+
+        breaker.record_failure(probe)
+        breaker.record_failure(probe)
+        breaker.record_success()
+        breaker.record_failure(probe)
+        self.assertTrue(breaker.allow_request())
+
+        breaker.record_failure(probe)
+        breaker.record_failure(probe)
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow_request())
+        self.assertTrue(probed.wait(2))
+        _wait_for(lambda: breaker.state == 'closed')
+        stats = breaker.stats()
+        self.assertEqual(
+            (stats['trips'], stats['probes'], stats['rejected']), (1, 3, 1))
+
+    def test_reset_stops_the_probes(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        breaker.record_failure(lambda: False)
+        self.assertEqual(breaker.state, 'open')
+        self.assertGreater(breaker.retry_after, 50)
+        breaker.reset()
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.stats()['probes'], 0)
+
+
+class TestAuthenticationCircuitBreaker(unittest.TestCase):
+    """Tests for Authentication failing fast on a NAS that stopped answering."""
+
+    def setUp(self):
+        self.dsm = FakeDsm().start()
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, recovery_timeout=0.05)
+        self.auth = Authentication('127.0.0.1', self.dsm.port, 'admin', 'pass', debug=False,
+                                   circuit_breaker=self.breaker)
+        self.auth.login()
+        self.auth.get_api_list()
+
+    def tearDown(self):
+        self.breaker.reset()
+        self.dsm.stop()
+
+    def _info(self):
+        return self.auth.request_data('SYNO.FileStation.Info', 'entry.cgi', dict(INFO_PARAMS))
+
+    def test_fails_fast_while_open(self):
+        self.dsm.inject_fault('SYNO.FileStation.Info', status=503, count=2)
+        # The first probe fails too
+        self.dsm.inject_fault('SYNO.API.Info', status=503)
+        for _ in range(2):
+            with self.assertRaises(HTTPError):
+                self._info()
+
+        with self.assertRaises(CircuitOpenError) as raised:
+            self._info()
+        self.assertIsInstance(raised.exception, SynoConnectionError)
+        self.assertEqual(raised.exception.host, '127.0.0.1')
+        self.assertEqual(
+            self.dsm.requests[('SYNO.FileStation.Info', 'get')], 2)
+
+        _wait_for(lambda: self.breaker.state == 'closed')
+        self.assertEqual(self.breaker.stats()['probes'], 2)
+        self.assertTrue(self._info()['success'])
+
+    def test_connection_errors_open_the_circuit(self):
+        self.dsm.inject_fault(drop=True, count=10)
+        for _ in range(2):
+            with self.assertRaises(SynoConnectionError):
+                self._info()
+        self.assertEqual(self.breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            self.auth.login()
+
+
+class TestQuickConnectCircuitBreaker(unittest.TestCase):
+    """Tests for the QuickConnect route probes, sent past the breaker."""
+
+    setUp = test_quickconnect.TestQuickConnectRacing.setUp
+    _get = test_quickconnect.TestQuickConnectRacing._get
+    _auth = test_quickconnect.TestQuickConnectRacing._auth
+
+    def test_unreachable_candidates_are_not_failures(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        auth = self._auth(circuit_breaker=breaker)
+        self.assertEqual(auth.quickconnect_path, 'relay')
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(breaker.stats()['failures'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,8 +23,8 @@ def _make_instance(certs, dsm_version=7):
     session._syno_token = 'token'
     session.verify_cert_enabled.return_value = False
 
+    session.base_url = 'https://nas.example/webapi/'
     instance.session = session
-    instance.base_url = 'https://nas.example/webapi/'
     instance._sid = 'sid'
     instance._debug = False
     instance.list_cert = MagicMock(
@@ -32,8 +32,8 @@ def _make_instance(certs, dsm_version=7):
     return instance
 
 
-def _post_settings(mock_requests_session):
-    post_call = mock_requests_session.return_value.post.call_args
+def _post_settings(session):
+    post_call = session._post.call_args
     return json.loads(post_call.kwargs['data']['settings'])
 
 
@@ -47,16 +47,15 @@ class TestCoreCertificate(unittest.TestCase):
         }]
         instance = _make_instance(certs)
 
-        with patch('synology_api.core_certificate.requests.session') as mock_session:
-            mock_session.return_value.post.return_value.status_code = 200
-            mock_session.return_value.post.return_value.json.return_value = {
-                'success': True}
-            status_code, response = instance.set_certificate_for_service(
-                'new-cert')
+        instance.session._post.return_value.status_code = 200
+        instance.session._post.return_value.json.return_value = {
+            'success': True}
+        status_code, response = instance.set_certificate_for_service(
+            'new-cert')
 
         self.assertEqual(status_code, 200)
         self.assertEqual(response, {'success': True})
-        settings = _post_settings(mock_session)
+        settings = _post_settings(instance.session)
         self.assertEqual(settings[0]['old_id'], 'old-cert')
         self.assertEqual(settings[0]['id'], 'new-cert')
         self.assertEqual(
@@ -82,16 +81,15 @@ class TestCoreCertificate(unittest.TestCase):
         }]
         instance = _make_instance(certs)
 
-        with patch('synology_api.core_certificate.requests.session') as mock_session:
-            mock_session.return_value.post.return_value.status_code = 200
-            mock_session.return_value.post.return_value.json.return_value = {
-                'success': True}
-            status_code, response = instance.set_certificate_for_service(
-                'new-cert', 'Reverse Proxy - photos.example.com')
+        instance.session._post.return_value.status_code = 200
+        instance.session._post.return_value.json.return_value = {
+            'success': True}
+        status_code, response = instance.set_certificate_for_service(
+            'new-cert', 'Reverse Proxy - photos.example.com')
 
         self.assertEqual(status_code, 200)
         self.assertEqual(response, {'success': True})
-        settings = _post_settings(mock_session)
+        settings = _post_settings(instance.session)
         self.assertEqual(settings[0]['old_id'], 'old-cert')
         self.assertEqual(settings[0]['id'], 'new-cert')
         self.assertEqual(settings[0]['service'], reverse_proxy_service)
@@ -110,11 +108,10 @@ class TestCoreCertificate(unittest.TestCase):
         }]
         instance = _make_instance(certs)
 
-        with patch('synology_api.core_certificate.requests.session') as mock_session:
-            result = instance.set_certificate_for_service('same-cert')
+        result = instance.set_certificate_for_service('same-cert')
 
         self.assertEqual(result, (200, 'Certificate already set, aborting'))
-        mock_session.assert_not_called()
+        instance.session._post.assert_not_called()
 
 
 if __name__ == '__main__':
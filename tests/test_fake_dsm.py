@@ -0,0 +1,170 @@
+"""Unit tests running the synchronous client against the local fake DSM."""
+
+import os
+import tempfile
+import time
+import unittest
+
+import requests
+
+from synology_api.auth import Authentication
+from synology_api.base_api import BaseApi
+from synology_api.exceptions import HTTPError, SynoConnectionError
+from synology_api.filestation import FileStation
+from synology_api.retry import RetryPolicy
+from synology_api.session_registry import SessionRegistry
+from synology_api.session_store import FileSessionStore
+
+from tests.fake_dsm import FakeDsm, FakeDsmAdapter
+
+
+class TestFakeDsm(unittest.TestCase):
+    """Tests for the DSM 7 login, compound requests, FileStation and faults."""
+
+    def setUp(self):
+        self.dsm = FakeDsm().start()
+        self.dsm.add_file('/home/a.txt', b'hello')
+        self.dsm.add_file('/home/b.txt', b'world')
+        self.dsm.add_file('/home/docs/c.txt', b'!')
+        self.registry_backup = BaseApi.session_registry
+        BaseApi.session_registry = SessionRegistry()
+
+    def tearDown(self):
+        BaseApi.session_registry = self.registry_backup
+        self.dsm.stop()
+
+    def _auth(self, **kwargs):
+        auth = Authentication('127.0.0.1', self.dsm.port, 'admin', 'pass', debug=False,
+                              dsm_version=7, **kwargs)
+        auth.login()
+        auth.get_api_list()
+        return auth
+
+    def test_encrypted_login_with_noise_handshake(self):
+        auth = self._auth()
+        session = self.dsm.sessions[auth.sid]
+        self.assertIsNotNone(session.noise_decrypt)
+        self.assertEqual(auth._syno_token, session.synotoken)
+
+        # Requests carry a valid X-SYNO-HASH, a forged one is refused
+        response = auth.request_data('SYNO.FileStation.Info', 'entry.cgi', {
+                                     'method': 'get', 'version': 2})
+        self.assertEqual(response['data']['hostname'], 'fake-dsm')
+        forged = requests.get(self.dsm.base_url + 'entry.cgi', headers={'X-SYNO-HASH': 'x' * 40}, params={
+            'api': 'SYNO.FileStation.Info', 'method': 'get', 'version': 2, '_sid': auth.sid}).json()
+        self.assertEqual(forged['error']['code'], 119)
+        # A valid header is accepted once
+        headers = auth._get_request_headers()
+        params = {'api': 'SYNO.FileStation.Info',
+                  'method': 'get', 'version': 2, '_sid': auth.sid}
+        replies = [requests.get(self.dsm.base_url + 'entry.cgi', headers=headers, params=params).json()
+                   for _ in range(2)]
+        self.assertTrue(replies[0]['success'])
+        self.assertEqual(replies[1]['error']['code'], 119)
+
+        with self.assertRaises(Exception):
+            Authentication('127.0.0.1', self.dsm.port, 'admin',
+                           'wrong', debug=False).login()
+
+    def test_resumed_session_never_reuses_a_nonce(self):
+        params = {'method': 'get', 'version': 2}
+        # Answers the check of a resumed session
+        self.dsm.add_api('SYNO.Core.NormalUser', lambda request: {})
+        with tempfile.TemporaryDirectory() as directory:
+            first = self._auth(session_store=FileSessionStore(directory))
+            for _ in range(3):
+                first.request_data('SYNO.FileStation.Info',
+                                   'entry.cgi', params)
+            # The first process dies without saving, the second one resumes its session
+            second = self._auth(session_store=FileSessionStore(directory))
+            self.assertEqual(second.sid, first.sid)
+            self.assertTrue(second.request_data(
+                'SYNO.FileStation.Info', 'entry.cgi', params)['success'])
+            self.assertTrue(first.request_data(
+                'SYNO.FileStation.Info', 'entry.cgi', params)['success'])
+        self.assertEqual(self.dsm.logins, 1)
+
+    def test_compound_request(self):
+        auth = self._auth()
+        response = auth.request_multi_datas([
+            {'api': 'SYNO.FileStation.Info', 'method': 'get', 'version': 2},
+            {'api': 'SYNO.FileStation.List', 'method': 'list',
+                'version': 2, 'folder_path': '/missing'},
+            {'api': 'SYNO.FileStation.Info', 'method': 'get', 'version': 2},
+        ])
+        results = response['data']['result']
+        self.assertTrue(response['data']['has_fail'])
+        self.assertEqual([r['success'] for r in results], [True, False])
+        self.assertEqual(results[1]['error']['code'], 408)
+
+    def test_filestation_list_upload_and_download(self):
+        fs = FileStation('127.0.0.1', self.dsm.port, 'admin', 'pass', debug=False,
+                         interactive_output=False)
+        page = fs.get_file_list('/home', offset=1, limit=2)['data']
+        self.assertEqual((page['total'], page['offset']), (3, 1))
+        self.assertEqual([f['name'] for f in page['files']], ['b.txt', 'docs'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            local_path = os.path.join(directory, 'upload.bin')
+            with open(local_path, 'wb') as local_file:
+                local_file.write(b'\x00\x01' * 5000)
+            self.assertTrue(fs.upload_file(
+                '/home/new', local_path, progress_bar=False)['success'])
+            self.assertEqual(
+                self.dsm.files['/home/new/upload.bin'], b'\x00\x01' * 5000)
+
+            fs.get_file('/home/a.txt', mode='download', dest_path=directory)
+            with open(os.path.join(directory, 'a.txt'), 'rb') as downloaded:
+                self.assertEqual(downloaded.read(), b'hello')
+
+    def test_faults_and_latency(self):
+        auth = self._auth(retry_policy=RetryPolicy(
+            max_retries=1, backoff_factor=0))
+        params = {'method': 'get', 'version': 2}
+
+        self.dsm.inject_fault('SYNO.FileStation.Info', status=503)
+        self.assertTrue(auth.request_data(
+            'SYNO.FileStation.Info', 'entry.cgi', params)['success'])
+        self.dsm.inject_fault('SYNO.FileStation.Info', status=500, count=2)
+        with self.assertRaises(HTTPError):
+            auth.request_data('SYNO.FileStation.Info', 'entry.cgi', params)
+        self.dsm.inject_fault('SYNO.FileStation.Info', drop=True, count=2)
+        with self.assertRaises(SynoConnectionError):
+            auth.request_data('SYNO.FileStation.Info', 'entry.cgi', params)
+
+        self.dsm.inject_fault('SYNO.FileStation.Info', error_code=119)
+        self.assertTrue(auth.request_data(
+            'SYNO.FileStation.Info', 'entry.cgi', params)['success'])
+        self.assertEqual(self.dsm.logins, 2)
+
+        self.dsm.latency = 0.1
+        started = time.monotonic()
+        auth.request_data('SYNO.FileStation.Info', 'entry.cgi', params)
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual(
+            self.dsm.requests[('SYNO.FileStation.Info', 'get')], 9)
+
+
+class TestFakeDsmAdapter(unittest.TestCase):
+    """Tests for the in-process transport of the fake."""
+
+    def test_requests_are_answered_without_sockets(self):
+        dsm = FakeDsm()
+        dsm.inject_fault('SYNO.FileStation.Info', drop=True)
+        auth = Authentication('fake-dsm', '5000', 'admin', 'pass', debug=False, dsm_version=7,
+                              retry_policy=RetryPolicy(max_retries=1, backoff_factor=0))
+        adapter = FakeDsmAdapter(dsm)
+        auth._requests_session.mount('http://fake-dsm:5000/', adapter)
+        auth.login()
+        auth.get_api_list()
+
+        response = auth.request_data('SYNO.FileStation.Info', 'entry.cgi', {
+                                     'method': 'get', 'version': 2})
+        self.assertEqual(response['data']['hostname'], 'fake-dsm')
+        self.assertEqual(dsm.requests[('SYNO.FileStation.Info', 'get')], 2)
+        self.assertIsNotNone(dsm.sessions[auth.sid].noise_decrypt)
+        self.assertGreater(adapter.server_time, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+"""Unit tests for synology_api.governor and governed requests."""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from synology_api.auth import Authentication
+from synology_api.base_api import BaseApi
+from synology_api.governor import ConcurrencyGovernor, is_overload_error
+from synology_api.photos import Photos
+from synology_api.session_registry import SessionRegistry
+
+from tests.fake_dsm import FakeDsm
+
+
+class FakeClock(object):
+    """Clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.exceptions.HTTPError(response=response)
+
+
+class TestConcurrencyGovernor(unittest.TestCase):
+    """Tests for the AIMD limit and the priority lanes."""
+
+    def test_additive_increase_multiplicative_decrease(self):
+        clock = FakeClock()
+        governor = ConcurrencyGovernor(initial_limit=4, max_limit=6, latency_target=1,
+                                       clock=clock)
+        for _ in range(4):
+            governor.release(governor.acquire())
+        self.assertEqual(governor.limit, 4)
+        for _ in range(30):
+            governor.release(governor.acquire())
+        self.assertEqual(governor.limit, 6)
+
+        governor.release(governor.acquire(), congested=True)
+        self.assertEqual(governor.limit, 3)
+        # A burst of failures within the cooldown cuts the limit once
+        governor.release(governor.acquire(), congested=True)
+        self.assertEqual(governor.limit, 3)
+
+        clock.now += 5
+        started = governor.acquire()
+        clock.now += 2
+        governor.release(started)
+        self.assertEqual(governor.limit, 1)
+        self.assertEqual(governor.stats['congestion_signals'], 3)
+
+    def test_overload_errors(self):
+        self.assertTrue(is_overload_error(
+            requests.exceptions.ConnectTimeout()))
+        self.assertTrue(is_overload_error(_http_error(503)))
+        self.assertTrue(is_overload_error(_http_error(429)))
+        self.assertFalse(is_overload_error(_http_error(404)))
+
+    def test_interactive_lane_goes_first(self):
+        governor = ConcurrencyGovernor(initial_limit=1)
+        held = governor.acquire()
+        order = []
+
+        def request(lane):
+            with governor.lane(lane):
+                started = governor.acquire()
+            order.append(lane)
+            governor.release(started)
+
+        threads = []
+        for lane in ('bulk', 'bulk', 'interactive'):
+            threads.append(threading.Thread(target=request, args=(lane,)))
+            threads[-1].start()
+            time.sleep(0.05)
+        self.assertEqual(governor.stats['waiting'], 3)
+
+        governor.release(held)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ['interactive', 'bulk', 'bulk'])
+        with self.assertRaises(ValueError):
+            with governor.lane('urgent'):
+                pass
+
+    def test_coroutines_wait_in_the_same_queue(self):
+        governor = ConcurrencyGovernor(initial_limit=1)
+        order = []
+
+        async def request(lane):
+            with governor.lane(lane):
+                started = await governor.aacquire()
+            order.append(lane)
+            await asyncio.sleep(0.01)
+            governor.release(started)
+
+        async def main():
+            held = governor.acquire()
+            tasks = [asyncio.create_task(request(lane))
+                     for lane in ('bulk', 'bulk', 'interactive')]
+            cancelled = asyncio.create_task(request('interactive'))
+            await asyncio.sleep(0.05)
+            self.assertEqual(governor.stats['waiting'], 4)
+            cancelled.cancel()
+            await asyncio.gather(cancelled, return_exceptions=True)
+            # Released from another thread, like a threaded request would
+            threading.Thread(target=governor.release, args=(held,)).start()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        self.assertEqual(order, ['interactive', 'bulk', 'bulk'])
+        self.assertEqual(
+            (governor.in_flight, governor.stats['waiting']), (0, 0))
+
+
+class TestGovernedRequests(unittest.TestCase):
+    """Tests for Authentication sending through the governor."""
+
+    def test_requests_in_flight_are_bounded(self):
+        governor = ConcurrencyGovernor(initial_limit=2, max_limit=2)
+        auth = Authentication('nas', '5000', 'admin',
+                              'pass', debug=False, governor=governor)
+        auth._sid = 'sid'
+        auth._requests_session = MagicMock()
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def get(*args, **kwargs):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+            response = requests.Response()
+            response.status_code = 200
+            response._content = json.dumps(
+                {'success': True, 'data': {}}).encode()
+            return response
+        auth._requests_session.get.side_effect = get
+
+        def call():
+            with auth.lane('bulk'):
+                auth.request_data('SYNO.Foto.Browse.Item', 'entry.cgi',
+                                  {'method': 'list', 'version': 1})
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(state['peak'], 2)
+        self.assertEqual(governor.stats['successes'], 8)
+        self.assertEqual(governor.in_flight, 0)
+
+    def test_chunk_workers_keep_the_lane(self):
+        governor = ConcurrencyGovernor()
+        auth = Authentication('nas', '5000', 'admin',
+                              'pass', debug=False, governor=governor)
+        auth._sid = 'sid'
+        auth.full_api_list = {'SYNO.Entry.Request': {
+            'path': 'entry.cgi', 'minVersion': 1, 'maxVersion': 1}}
+        auth._requests_session = MagicMock()
+        lanes = []
+
+        def get(*args, **kwargs):
+            lanes.append(governor.current_lane())
+            compound = json.loads(kwargs['params']['compound'])
+            response = requests.Response()
+            response.status_code = 200
+            response._content = json.dumps({'success': True, 'data': {'has_fail': False, 'result': [
+                {'api': call['api'], 'method': call['method'], 'version': call['version'],
+                 'success': True, 'data': {}} for call in compound]}}).encode()
+            return response
+        auth._requests_session.get.side_effect = get
+
+        calls = [{'api': 'SYNO.Core.User', 'method': 'get', 'version': 1, 'name': 'user%d' % i}
+                 for i in range(4)]
+        with auth.lane('bulk'):
+            auth.request_multi_datas(calls, max_chunk_requests=1, stop_when_error=False,
+                                     concurrency=4)
+        self.assertEqual(lanes, ['bulk'] * 4)
+
+    def test_photos_takes_a_governor(self):
+        registry_backup = BaseApi.session_registry
+        BaseApi.session_registry = SessionRegistry()
+        self.addCleanup(setattr, BaseApi, 'session_registry', registry_backup)
+        governor = ConcurrencyGovernor(initial_limit=4, max_limit=32)
+        with FakeDsm() as dsm:
+            dsm.add_api('SYNO.Foto.Browse.Folder',
+                        lambda request: {'folder': {'id': 0}})
+            photos = Photos('127.0.0.1', dsm.port, 'admin', 'pass', debug=False,
+                            governor=governor)
+            successes = governor.stats['successes']
+            with photos.lane('bulk'):
+                folder = photos.get_folder()
+
+        self.assertEqual(folder['data'], {'folder': {'id': 0}})
+        self.assertEqual(governor.stats['successes'], successes + 1)
+        self.assertEqual(governor.in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
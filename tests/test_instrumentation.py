@@ -0,0 +1,138 @@
+"""Unit tests for synology_api.instrumentation and instrumented requests."""
+
+import json
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from synology_api.auth import Authentication
+from synology_api.exceptions import FileStationError, HTTPError
+from synology_api.instrumentation import MetricsCollector, RequestEvent, RequestHooks
+from synology_api.response_cache import ResponseCache
+from synology_api.retry import RetryPolicy
+
+
+def _response(payload, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+class TestMetricsCollector(unittest.TestCase):
+    """Tests for the aggregation and export of events."""
+
+    def _event(self, duration, **kwargs):
+        event = RequestEvent('SYNO.Foto.Browse.Item',
+                             'list', 1, 'get', request_bytes=10)
+        event.attempts = 1
+        event.duration = duration
+        for name, value in kwargs.items():
+            setattr(event, name, value)
+        return event
+
+    def test_snapshot(self):
+        metrics = MetricsCollector(buckets=(0.1, 1.0))
+        metrics.after_request(self._event(
+            0.05, status_code=200, response_bytes=100))
+        metrics.after_request(self._event(
+            0.5, status_code=200, error_code=408, attempts=3))
+        metrics.after_request(self._event(2.0, exception=ValueError()))
+        metrics.on_relogin()
+
+        snapshot = metrics.snapshot(reset=True)
+        stats = snapshot['calls']['SYNO.Foto.Browse.Item']['list']
+        self.assertEqual(snapshot['relogins'], 1)
+        self.assertEqual(
+            (stats['calls'], stats['failures'], stats['retries']), (3, 1, 2))
+        self.assertEqual(
+            (stats['request_bytes'], stats['response_bytes']), (30, 100))
+        self.assertEqual(stats['status_codes'], {200: 2})
+        self.assertEqual(stats['error_codes'], {408: 1})
+        self.assertEqual(stats['latency']['buckets'], {
+                         '0.1': 1, '1.0': 2, 'inf': 3})
+        self.assertEqual(stats['latency']['max'], 2.0)
+        self.assertEqual(metrics.snapshot(), {'relogins': 0, 'calls': {}})
+
+    def test_prometheus(self):
+        metrics = MetricsCollector(buckets=(0.1,))
+        metrics.after_request(self._event(0.05, status_code=200))
+
+        text = metrics.to_prometheus()
+        labels = 'api="SYNO.Foto.Browse.Item",method="list"'
+        self.assertIn('synology_api_requests_total{%s} 1' % labels, text)
+        self.assertIn(
+            'synology_api_responses_total{%s,status="200"} 1' % labels, text)
+        self.assertIn(
+            'synology_api_request_duration_seconds_bucket{%s,le="+Inf"} 1' % labels, text)
+        self.assertIn('synology_api_relogins_total 0', text)
+
+
+class TestInstrumentedRequests(unittest.TestCase):
+    """Tests for Authentication reporting its requests to hooks."""
+
+    def setUp(self):
+        self.metrics = MetricsCollector()
+        self.auth = Authentication('nas', '5000', 'admin', 'pass', debug=False,
+                                   retry_policy=RetryPolicy(
+                                       max_retries=1, backoff_factor=0),
+                                   hooks=[self.metrics])
+        self.auth._sid = 'sid'
+        self.auth._requests_session = MagicMock()
+
+    def _stats(self, api, method):
+        return self.metrics.snapshot()['calls'][api][method]
+
+    def test_requests_are_measured(self):
+        self.auth._requests_session.get.side_effect = [
+            requests.exceptions.ConnectionError('reset'),
+            _response({'success': True, 'data': {'items': [1, 2, 3]}}),
+            _response({'success': False, 'error': {'code': 408}}),
+            _response({}, status_code=500),
+            _response({}, status_code=500),
+        ]
+        self.auth.request_data('SYNO.FileStation.List', 'entry.cgi',
+                               {'method': 'list', 'version': 2, 'folder_path': '/home'})
+        with self.assertRaises(FileStationError):
+            self.auth.request_data('SYNO.FileStation.List', 'entry.cgi',
+                                   {'method': 'list', 'version': 2, 'folder_path': '/missing'})
+        with self.assertRaises(HTTPError):
+            self.auth.request_data('SYNO.FileStation.Info', 'entry.cgi',
+                                   {'method': 'get', 'version': 2})
+
+        listed = self._stats('SYNO.FileStation.List', 'list')
+        self.assertEqual(
+            (listed['calls'], listed['failures'], listed['retries']), (2, 1, 1))
+        self.assertEqual(listed['error_codes'], {408: 1})
+        self.assertEqual(listed['status_codes'], {200: 2})
+        self.assertGreater(listed['request_bytes'], len('folder_path=%2Fhome'))
+        self.assertGreater(listed['response_bytes'], 0)
+        info = self._stats('SYNO.FileStation.Info', 'get')
+        self.assertEqual((info['failures'], info['retries'],
+                         info['status_codes']), (1, 1, {500: 1}))
+
+    def test_hooks(self):
+        events = []
+        failing = RequestHooks(before=lambda event: 1 / 0)
+        self.auth.add_hooks(RequestHooks(before=lambda event: events.append(('before', event.api)),
+                                         after=lambda event: events.append(('after', event.duration))),
+                            failing)
+        self.auth._response_cache = ResponseCache()
+        self.auth._requests_session.get.return_value = _response(
+            {'success': True, 'data': {}})
+
+        for _ in range(2):
+            # The second call is answered by the cache and sends nothing
+            self.auth.request_data('SYNO.Core.System', 'entry.cgi', {
+                                   'method': 'info', 'version': 1})
+
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0], ('before', 'SYNO.Core.System'))
+        self.assertGreaterEqual(events[1][1], 0)
+        self.auth.remove_hooks(self.metrics, failing)
+        self.assertEqual(len(self.auth._hooks), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Unit tests for synology_api.json_codec and decode-once responses."""
+
+import json
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from synology_api import json_codec
+from synology_api.auth import Authentication
+from synology_api.exceptions import FileStationError
+from synology_api.json_codec import JsonCodec, decode_response, get_json_codec, set_json_codec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class CountingCodec(JsonCodec):
+    """Standard library codec counting its calls."""
+
+    name = 'counting'
+
+    def __init__(self):
+        self.loads_calls = 0
+
+    def loads(self, data):
+        self.loads_calls += 1
+        return super().loads(data)
+
+
+def _response(payload, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = payload if isinstance(
+        payload, bytes) else json.dumps(payload).encode()
+    return response
+
+
+class TestJsonCodec(unittest.TestCase):
+    """Tests for codec selection and decoding."""
+
+    def tearDown(self):
+        set_json_codec(None)
+
+    def test_default_is_stdlib(self):
+        self.assertIs(get_json_codec(), json_codec.STDLIB_CODEC)
+        self.assertIs(set_json_codec('json'), json_codec.STDLIB_CODEC)
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_auto_prefers_orjson(self):
+        codec = set_json_codec('auto')
+        self.assertEqual(codec.name, 'orjson')
+        self.assertEqual(decode_response(
+            _response({'a': [1, 2]})), {'a': [1, 2]})
+        self.assertEqual(json.loads(codec.dumps({'a': 'é'})), {'a': 'é'})
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            set_json_codec('yaml')
+
+    def test_decode_once_and_errors(self):
+        codec = set_json_codec(CountingCodec())
+        response = _response({'success': True})
+
+        self.assertIs(decode_response(response), decode_response(response))
+        self.assertEqual(codec.loads_calls, 1)
+
+        with self.assertRaises(requests.exceptions.JSONDecodeError):
+            decode_response(_response(b'<html>'))
+
+
+class TestRequestDataDecodesOnce(unittest.TestCase):
+    """Tests for request_data decoding each response body once."""
+
+    def setUp(self):
+        self.codec = set_json_codec(CountingCodec())
+        self.auth = Authentication('nas', '5000', 'admin', 'pass', debug=False)
+        self.auth._sid = 'sid'
+        self.auth._requests_session = MagicMock()
+
+    def tearDown(self):
+        set_json_codec(None)
+
+    def test_success(self):
+        payload = {'success': True, 'data': {
+            'files': [{'name': str(i)} for i in range(100)]}}
+        self.auth._requests_session.get.return_value = _response(payload)
+
+        result = self.auth.request_data('SYNO.FileStation.List', 'entry.cgi',
+                                        {'method': 'list', 'version': 2})
+
+        self.assertEqual(result, payload)
+        self.assertEqual(self.codec.loads_calls, 1)
+
+    def test_error(self):
+        self.auth._requests_session.get.return_value = _response(
+            {'success': False, 'error': {'code': 408}})
+
+        with self.assertRaises(FileStationError):
+            self.auth.request_data('SYNO.FileStation.List', 'entry.cgi',
+                                   {'method': 'list', 'version': 2})
+        self.assertEqual(self.codec.loads_calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
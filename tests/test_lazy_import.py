@@ -0,0 +1,46 @@
+"""Unit tests for the lazy submodule loading of synology_api."""
+
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+_BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+def _loaded_modules(code):
+    """Run code in a fresh interpreter and list the modules it loaded."""
+    output = subprocess.run(
+        [sys.executable, '-c', code +
+            '\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))'],
+        cwd=_BASE_DIR, check=True, capture_output=True, text=True).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+class TestLazyImport(unittest.TestCase):
+    """Tests for PEP 562 attribute loading of the submodules."""
+
+    def test_package_import_loads_no_submodule(self):
+        modules = _loaded_modules('import synology_api')
+        self.assertEqual(
+            {name for name in modules if name.startswith('synology_api.')}, set())
+
+    def test_submodule_import_defers_heavy_dependencies(self):
+        modules = _loaded_modules('import synology_api.filestation')
+        for dependency in ('aiohttp', 'cryptography', 'noise', 'tqdm', 'treelib'):
+            self.assertNotIn(dependency, modules)
+        self.assertNotIn('synology_api.surveillancestation', modules)
+
+    def test_attribute_access_imports_submodule(self):
+        import synology_api
+
+        self.assertIn('photos', dir(synology_api))
+        self.assertEqual(synology_api.photos.Photos.__name__, 'Photos')
+        self.assertIn('filestation', synology_api.__all__)
+        with self.assertRaises(AttributeError):
+            synology_api.not_a_module
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,18 @@
 """Unit tests for QuickConnect transport support."""
 
+import tempfile
 import unittest
 from unittest.mock import ANY, MagicMock, patch
 
+import requests
+
 from synology_api.auth import Authentication
 from synology_api.base_api import BaseApi
+from synology_api.exceptions import SynoConnectionError
+from synology_api.downloadstation import DownloadStation
 from synology_api.filestation import FileStation
+from synology_api.photos import Photos
+from synology_api.quickconnect_cache import QuickConnectCache
 
 
 class FakeResponse:
@@ -42,7 +49,7 @@ class TestQuickConnect(unittest.TestCase):
     """Tests for QuickConnect request contracts."""
 
     def tearDown(self):
-        BaseApi.shared_session = None
+        BaseApi.session_registry.close_all()
 
     @patch.object(Authentication, "get_ik_message", return_value="ik-message")
     @patch("synology_api.auth.requests.Session")
@@ -86,7 +93,8 @@ class TestQuickConnect(unittest.TestCase):
                 "is_gofile": False,
                 "path": ""
             }],
-            verify=False
+            verify=False,
+            timeout=(10.0, 120.0)
         )
         post.assert_any_call(
             "https://control.quickconnect.to/Serv.php",
@@ -100,12 +108,14 @@ class TestQuickConnect(unittest.TestCase):
                 "is_gofile": False,
                 "path": ""
             }],
-            verify=False
+            verify=False,
+            timeout=(10.0, 120.0)
         )
         session.get.assert_called_once_with(
             "https://my-nas.us.quickconnect.to/webman/pingpong.cgi",
             params=None,
             verify=False,
+            timeout=(10.0, 120.0),
             headers={
                 "Origin": "https://my-nas.us.quickconnect.to",
                 "Referer": "https://my-nas.us.quickconnect.to"
@@ -204,7 +214,21 @@ class TestQuickConnect(unittest.TestCase):
             None,
             None,
             None,
-            "my-nas"
+            "my-nas",
+            pool_connections=10,
+            pool_maxsize=10,
+            retry_policy=None,
+            auto_relogin=True,
+            api_cache=None,
+            session_store=None,
+            response_cache=None,
+            single_flight=None,
+            governor=None,
+            quickconnect_cache=None,
+            quickconnect_direct=True,
+            hooks=None,
+            transport=None,
+            circuit_breaker=None
         )
         session.login.assert_called_once()
         session.get_api_list.assert_any_call("Core")
@@ -216,12 +240,12 @@ class TestQuickConnect(unittest.TestCase):
             session = MagicMock()
             session.app_api_list = {}
             session.request_data = MagicMock()
+            session.base_url = "https://my-nas.us.quickconnect.to/webapi/"
             instance.session = session
             instance.request_data = session.request_data
             instance.core_list = {}
             instance.gen_list = {}
             instance._sid = "sid-123"
-            instance.base_url = "https://my-nas.us.quickconnect.to/webapi/"
 
         base_init.side_effect = fake_base_init
 
@@ -248,6 +272,221 @@ class TestQuickConnect(unittest.TestCase):
             quickconnect_id="my-nas"
         )
 
+    @patch("synology_api.base_api.BaseApi.__init__", autospec=True)
+    def test_services_pass_the_quickconnect_options(self, base_init):
+        def fake_base_init(instance, *args, **kwargs):
+            instance.session = MagicMock()
+            instance.session.app_api_list = {}
+
+        base_init.side_effect = fake_base_init
+        cache = QuickConnectCache()
+
+        for service in (FileStation, Photos, DownloadStation):
+            base_init.reset_mock()
+            service(username="user", password="pass", quickconnect_id="my-nas",
+                    quickconnect_cache=cache, quickconnect_direct=False)
+
+            kwargs = base_init.call_args.kwargs
+            self.assertEqual(kwargs["quickconnect_id"], "my-nas", service)
+            self.assertIs(kwargs["quickconnect_cache"], cache, service)
+            self.assertFalse(kwargs["quickconnect_direct"], service)
+
+
+class TestQuickConnectCache(unittest.TestCase):
+    """Tests for reusing resolved QuickConnect relays."""
+
+    def setUp(self):
+        patcher = patch("synology_api.auth.requests.Session")
+        self.session = MagicMock()
+        self.session.get.return_value = FakeResponse({"success": True})
+        patcher.start().return_value = self.session
+        self.addCleanup(patcher.stop)
+        patcher = patch("synology_api.auth.requests.post")
+        self.post = patcher.start()
+        self.post.side_effect = lambda *args, **kwargs: _quickconnect_post_responses()[
+            0 if "global" in args[0] else 1]
+        self.addCleanup(patcher.stop)
+
+    def _auth(self, cache):
+        return Authentication(username="user", password="pass", quickconnect_id="My-NAS",
+                              debug=False, quickconnect_cache=cache)
+
+    def test_relay_is_resolved_once(self):
+        cache = QuickConnectCache()
+        self._auth(cache)
+        auth = self._auth(cache)
+
+        self.assertEqual(self.post.call_count, 2)
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertEqual(
+            auth.base_url, "https://My-NAS.us.quickconnect.to/webapi/")
+        self.assertTrue(auth._quickconnect_route_cached)
+
+    def test_relay_is_shared_on_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self._auth(QuickConnectCache(directory))
+            self._auth(QuickConnectCache(directory))
+            self.assertEqual(self.post.call_count, 2)
+
+            self.assertIsNone(QuickConnectCache(
+                directory, max_age=-1).load("my-nas"))
+
+    def test_failed_ping_resolves_again(self):
+        cache = QuickConnectCache()
+        cache.store("my-nas", {"control_host": "old.quickconnect.to", "relay_region": "eu",
+                               "pingpong_path": "/webman/pingpong.cgi"})
+        self.session.get.side_effect = [requests.exceptions.ConnectionError("gone"),
+                                        FakeResponse({"success": True})]
+
+        auth = self._auth(cache)
+
+        self.assertEqual(self.post.call_count, 2)
+        self.assertEqual(
+            auth.base_url, "https://My-NAS.us.quickconnect.to/webapi/")
+        self.assertEqual(cache.load("my-nas")["relay_region"], "us")
+
+    def test_failed_request_through_cached_relay_resolves_again(self):
+        cache = QuickConnectCache()
+        cache.store("my-nas", {"control_host": "old.quickconnect.to", "relay_region": "eu",
+                               "pingpong_path": "/webman/pingpong.cgi"})
+        auth = self._auth(cache)
+        auth._sid = "sid"
+        self.assertEqual(self.post.call_count, 0)
+        self.session.get.side_effect = [requests.exceptions.ConnectionError("relay down"),
+                                        FakeResponse({"success": True})]
+
+        with self.assertRaises(SynoConnectionError):
+            auth.request_data("SYNO.FileStation.Info", "entry.cgi", {
+                              "version": 2, "method": "get"})
+
+        self.assertEqual(self.post.call_count, 2)
+        self.assertEqual(
+            auth.base_url, "https://My-NAS.us.quickconnect.to/webapi/")
+        self.assertFalse(auth._quickconnect_route_cached)
+
+
+SERVER_INFO = {
+    "errno": 0,
+    "env": {"control_host": "control.quickconnect.to"},
+    "server": {"ezid": "5f0c2a", "interface": [{"ip": "192.168.1.10"}], "ddns": "NULL",
+               "fqdn": "nas.example.com", "external": {"ip": "203.0.113.7"}},
+    "service": {"port": 5001, "ext_port": 15001},
+    "smartdns": {"lan": ["192-168-1-10.my-nas.direct.quickconnect.to"],
+                 "external": "203-0-113-7.my-nas.direct.quickconnect.to"}
+}
+
+
+class TestQuickConnectRacing(unittest.TestCase):
+    """Tests for choosing between the direct addresses and the relay."""
+
+    def setUp(self):
+        patcher = patch("synology_api.auth.requests.Session")
+        self.session = MagicMock()
+        self.session.get.side_effect = self._get
+        patcher.start().return_value = self.session
+        self.addCleanup(patcher.stop)
+        patcher = patch("synology_api.auth.requests.post")
+        self.post = patcher.start()
+        self.post.side_effect = lambda *args, **kwargs: (
+            FakeResponse([SERVER_INFO]) if "global" in args[0]
+            else _quickconnect_post_responses()[1])
+        self.addCleanup(patcher.stop)
+        self.reachable = set()
+        self.foreign = set()
+
+    def _get(self, url, **kwargs):
+        host = url.split("/")[2].rsplit(":", 1)[0]
+        if host.endswith(".quickconnect.to") and ".direct." not in host:
+            return FakeResponse({"success": True})
+        if host not in self.reachable:
+            raise requests.exceptions.ConnectTimeout("unreachable")
+        # Another DSM answers on the addresses in self.foreign
+        ezid = "9b71e4" if host in self.foreign else "5f0c2a"
+        return FakeResponse({"success": True, "ezid": ezid, "data": {}})
+
+    def _auth(self, **kwargs):
+        return Authentication(username="user", password="pass", quickconnect_id="my-nas",
+                              debug=False, **kwargs)
+
+    def test_candidates(self):
+        candidates = Authentication._quickconnect_candidates(SERVER_INFO)
+
+        self.assertEqual([(c["path"], c["host"], c["port"]) for c in candidates], [
+            ("lan", "192-168-1-10.my-nas.direct.quickconnect.to", "5001"),
+            ("lan", "192.168.1.10", "5001"),
+            ("wan", "203-0-113-7.my-nas.direct.quickconnect.to", "15001"),
+            ("wan", "nas.example.com", "15001"),
+            ("wan", "203.0.113.7", "15001"),
+        ])
+        self.assertEqual({c["ezid"] for c in candidates}, {"5f0c2a"})
+        self.assertEqual(
+            Authentication._quickconnect_candidates({"server": {}}), [])
+        self.assertEqual(Authentication._quickconnect_candidates(
+            dict(SERVER_INFO, server=dict(SERVER_INFO["server"], ezid=None))), [])
+
+    def test_reachable_direct_address_is_used(self):
+        self.reachable = {"192.168.1.10", "nas.example.com"}
+        auth = self._auth()
+
+        self.assertIn(auth.quickconnect_path, ("lan", "wan"))
+        self.assertIn(auth.base_url, ("https://192.168.1.10:5001/webapi/",
+                                      "https://nas.example.com:15001/webapi/"))
+        self.assertEqual(auth._quickconnect_headers, {})
+        # No tunnel is requested
+        self.assertEqual(self.post.call_count, 1)
+        for call in self.session.get.call_args_list:
+            self.assertEqual(call.kwargs["timeout"], 2.0)
+
+    def test_relay_is_the_fallback(self):
+        auth = self._auth()
+        self.assertEqual(auth.quickconnect_path, "relay")
+        self.assertEqual(
+            auth.base_url, "https://my-nas.us.quickconnect.to/webapi/")
+        self.assertEqual(self.post.call_count, 2)
+
+        self.reachable = {"192.168.1.10"}
+        auth = self._auth(quickconnect_direct=False)
+        self.assertEqual(auth.quickconnect_path, "relay")
+
+    def test_foreign_nas_falls_back_to_the_relay(self):
+        self.reachable = self.foreign = {"192.168.1.10"}
+        auth = self._auth()
+
+        self.assertEqual(auth.quickconnect_path, "relay")
+        self.assertEqual(
+            auth.base_url, "https://my-nas.us.quickconnect.to/webapi/")
+
+    def test_cached_route_to_a_foreign_nas_resolves_again(self):
+        self.reachable = {"192.168.1.10"}
+        cache = QuickConnectCache()
+        self._auth(quickconnect_cache=cache)
+        self.assertEqual(cache.load("my-nas")["host"], "192.168.1.10")
+
+        # Another network, where the address belongs to another DSM
+        self.foreign = {"192.168.1.10"}
+        auth = self._auth(quickconnect_cache=cache)
+
+        self.assertEqual(auth.quickconnect_path, "relay")
+        self.assertEqual(cache.load("my-nas")["path"], "relay")
+
+    def test_failing_direct_route_is_raced_again(self):
+        self.reachable = {"192.168.1.10"}
+        auth = self._auth()
+        auth._sid = "sid"
+        self.assertEqual(auth.quickconnect_path, "lan")
+
+        # The laptop left the LAN
+        self.reachable = {"nas.example.com"}
+        with self.assertRaises(SynoConnectionError):
+            auth.request_data("SYNO.FileStation.Info", "entry.cgi", {
+                              "version": 2, "method": "get"})
+
+        self.assertEqual(auth.quickconnect_path, "wan")
+        self.assertEqual(
+            auth.base_url, "https://nas.example.com:15001/webapi/")
+        auth.request_data("SYNO.FileStation.Info", "entry.cgi", {
+                          "version": 2, "method": "get"})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,199 @@
+"""Unit tests for synology_api.response_cache and cached request_data calls."""
+
+import json
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from synology_api.auth import Authentication
+from synology_api.base_api import BaseApi
+from synology_api.exceptions import CoreError
+from synology_api.filestation import FileStation
+from synology_api.response_cache import MISSING, ResponseCache, get_namespace
+from synology_api.session_registry import SessionRegistry
+
+from tests.fake_dsm import FakeDsm
+
+
+class FakeClock(object):
+    """Clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _response(payload):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+class TestResponseCache(unittest.TestCase):
+    """Tests for keys, expiry, eviction and invalidation."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(default_ttl=10, max_entries=2, clock=self.clock,
+                                   ttl_by_api={'SYNO.Core.System.Utilization': 1,
+                                               'SYNO.SurveillanceStation': None})
+
+    def test_keys(self):
+        key = self.cache.make_key('SYNO.Core.Share', {'method': 'list', 'version': 1,
+                                                      'offset': 0, '_sid': 'a'})
+        self.assertEqual(key, self.cache.make_key(
+            'SYNO.Core.Share', {'version': '1', '_sid': 'b', 'offset': '0', 'method': 'list'}))
+        self.assertIsNone(self.cache.make_key(
+            'SYNO.Core.Share', {'method': 'set', 'version': 1}))
+        self.assertIsNone(self.cache.make_key('SYNO.SurveillanceStation.Camera',
+                                              {'method': 'List', 'version': 9}))
+        self.assertIsNone(self.cache.make_key(
+            'SYNO.API.Encryption', {'method': 'getinfo', 'version': 1}))
+        self.assertIsNone(self.cache.make_key(
+            'SYNO.API.Auth.Key', {'method': 'get', 'version': 7}))
+        self.assertNotEqual(
+            self.cache.make_key('SYNO.Core.Share', {
+                                'method': 'list', 'version': 1}, ('nas', '5000', 'admin')),
+            self.cache.make_key('SYNO.Core.Share', {'method': 'list', 'version': 1}, ('nas', '5000', 'guest')))
+        self.assertEqual(self.cache.get_ttl('SYNO.Core.System.Utilization'), 1)
+        self.assertEqual(self.cache.get_ttl('SYNO.Core.System'), 10)
+        self.assertEqual(get_namespace(
+            'SYNO.Core.Share.Permission'), 'SYNO.Core.Share')
+        self.assertEqual(get_namespace(
+            'SYNO.FileStation.CopyMove'), 'SYNO.FileStation')
+        self.assertEqual(get_namespace(
+            'SYNO.FotoTeam.Browse.Item'), 'SYNO.Foto')
+        self.assertEqual(get_namespace(
+            'SYNO.DownloadStation2.Task'), 'SYNO.DownloadStation')
+
+    def test_expiry_lru_and_stats(self):
+        share = self.cache.make_key(
+            'SYNO.Core.Share', {'method': 'list', 'version': 1})
+        util = self.cache.make_key('SYNO.Core.System.Utilization', {
+                                   'method': 'get', 'version': 1})
+        user = self.cache.make_key(
+            'SYNO.Core.User', {'method': 'list', 'version': 1})
+
+        self.assertIs(self.cache.get(share), MISSING)
+        self.cache.put(share, {'data': {'shares': []}})
+        self.cache.put(util, {'data': {}})
+        cached = self.cache.get(share)
+        cached['data']['shares'].append('modified')
+        self.assertEqual(self.cache.get(share), {'data': {'shares': []}})
+
+        self.cache.put(user, {'data': {}})
+        self.assertIs(self.cache.get(util), MISSING)
+
+        self.clock.now += 11
+        self.assertIs(self.cache.get(share), MISSING)
+        self.assertEqual(self.cache.stats, {'hits': 2, 'misses': 3, 'evictions': 1,
+                                            'invalidations': 0, 'size': 1})
+
+    def test_write_invalidates_namespace(self):
+        share = self.cache.make_key(
+            'SYNO.Core.Share', {'method': 'list', 'version': 1})
+        user = self.cache.make_key(
+            'SYNO.Core.User', {'method': 'list', 'version': 1})
+        self.cache.put(share, {})
+        self.cache.put(user, {})
+        generation = self.cache.generation
+
+        self.cache.record_call('SYNO.Core.Share.Permission', 'get')
+        self.assertEqual(len(self.cache), 2)
+        self.cache.record_call('SYNO.Core.Share.Permission', 'set')
+        self.assertIs(self.cache.get(share), MISSING)
+        self.assertEqual(self.cache.get(user), {})
+
+        # A read sent before the write must not cache its older response
+        self.cache.put(share, {'stale': True}, generation)
+        self.assertIs(self.cache.get(share), MISSING)
+
+
+class TestCachedRequestData(unittest.TestCase):
+    """Tests for request_data answering reads from the cache."""
+
+    def setUp(self):
+        self.cache = ResponseCache(default_ttl=60)
+        self.auth = Authentication('nas', '5000', 'admin', 'pass', debug=False,
+                                   response_cache=self.cache)
+        self.auth._sid = 'sid'
+        self.auth.full_api_list = {'SYNO.Entry.Request': {
+            'path': 'entry.cgi', 'minVersion': 1, 'maxVersion': 1}}
+        self.auth._requests_session = MagicMock()
+        self.auth._requests_session.get.side_effect = lambda *a, **k: _response(
+            {'success': True, 'data': {'shares': ['music']}})
+
+    def _list_shares(self):
+        return self.auth.request_data('SYNO.Core.Share', 'entry.cgi',
+                                      {'method': 'list', 'version': 1, 'additional': ['hidden']})
+
+    def test_reads_are_cached_until_a_write(self):
+        self.assertEqual(self._list_shares(), self._list_shares())
+        self.assertEqual(self.auth._requests_session.get.call_count, 1)
+
+        self.auth.request_data('SYNO.Core.Share', 'entry.cgi',
+                               {'method': 'create', 'version': 1, 'name': 'video'})
+        self._list_shares()
+        self.assertEqual(self.auth._requests_session.get.call_count, 3)
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_batched_writes_invalidate(self):
+        self._list_shares()
+        self.auth._requests_session.get.side_effect = lambda *a, **k: _response(
+            {'success': True, 'data': {'has_fail': False, 'result': [
+                {'api': 'SYNO.Core.Share', 'method': 'delete', 'version': 1, 'success': True}]}})
+        with self.auth.batch():
+            self.auth.request_data('SYNO.Core.Share', 'entry.cgi',
+                                   {'method': 'delete', 'version': 1, 'name': 'music'})
+        self.assertEqual(len(self.cache), 0)
+
+    def test_errors_are_not_cached(self):
+        self.auth._requests_session.get.side_effect = lambda *a, **k: _response(
+            {'success': False, 'error': {'code': 105}})
+        for _ in range(2):
+            with self.assertRaises(CoreError):
+                self._list_shares()
+        self.assertEqual(self.auth._requests_session.get.call_count, 2)
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestCachedFileStation(unittest.TestCase):
+    """Tests for FileStation writes dropping the cached listings."""
+
+    def setUp(self):
+        self.dsm = FakeDsm().start()
+        self.addCleanup(self.dsm.stop)
+        self.dsm.add_file('/home/a.txt', b'hello')
+        self.dsm.add_file('/home/b.txt', b'world')
+        self.dsm.add_api('SYNO.FileStation.Delete',
+                         self._delete, 'entry.cgi', 1, 2)
+        registry_backup = BaseApi.session_registry
+        BaseApi.session_registry = SessionRegistry()
+        self.addCleanup(setattr, BaseApi, 'session_registry', registry_backup)
+
+    def _delete(self, request):
+        self.dsm.files.pop(request.params['path'].strip('"'))
+        return {'taskid': 'FileStation_delete'}
+
+    def test_delete_then_list_is_fresh(self):
+        cache = ResponseCache(default_ttl=60)
+        fs = FileStation('127.0.0.1', self.dsm.port, 'admin', 'pass', debug=False,
+                         interactive_output=False, response_cache=cache)
+
+        def names():
+            return [item['name'] for item in fs.get_file_list('/home')['data']['files']]
+
+        self.assertEqual(names(), ['a.txt', 'b.txt'])
+        self.assertEqual(names(), ['a.txt', 'b.txt'])
+        self.assertEqual(self.dsm.requests['SYNO.FileStation.List', 'list'], 1)
+
+        fs.start_delete_task('/home/a.txt')
+        self.assertEqual(names(), ['b.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""Unit tests for synology_api.retry and its use by Authentication."""
+
+import io
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+from requests_toolbelt import MultipartEncoder
+
+from synology_api.auth import Authentication
+from synology_api.exceptions import SynoConnectionError, HTTPError
+from synology_api.retry import RetryPolicy, NO_RETRY, is_upload_body
+
+
+def _make_auth(policy):
+    """Create a logged-in looking Authentication with a mocked HTTP session."""
+    auth = Authentication('nas', '5000', 'user', 'pass',
+                          debug=False, retry_policy=policy)
+    auth._sid = 'sid'
+    auth._syno_token = 'token'
+    auth._requests_session = MagicMock()
+    return auth
+
+
+def _response(status_code=200, json_data=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b'{"success": true, "data": {}}' if json_data is None else json_data
+    return response
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Tests for RetryPolicy decisions."""
+
+    def test_timeout_tuple(self):
+        self.assertEqual(RetryPolicy(3, 7).timeout, (3, 7))
+        self.assertIsNone(RetryPolicy(None, None).timeout)
+        self.assertEqual(RetryPolicy(3, 7).upload_timeout, (3, None))
+        self.assertIsNone(RetryPolicy(None, 7).upload_timeout)
+
+    def test_upload_bodies(self):
+        self.assertTrue(is_upload_body(
+            MultipartEncoder({'file': ('a', b'x')})))
+        self.assertTrue(is_upload_body(io.BytesIO(b'x')))
+        self.assertTrue(is_upload_body(iter([b'x'])))
+        self.assertTrue(is_upload_body(
+            {'path': '/'}, files={'file': io.BytesIO(b'x')}))
+        self.assertFalse(is_upload_body({'path': '/'}))
+        self.assertFalse(is_upload_body('a=b'))
+
+    def test_uploads_have_no_read_timeout(self):
+        auth = _make_auth(NO_RETRY)
+        auth._requests_session.post.return_value = _response()
+        encoder = MultipartEncoder({'file': ('a.txt', b'hello')})
+
+        auth.request_data('SYNO.FileStation.Upload', 'entry.cgi',
+                          {'method': 'upload', 'version': 2}, method='post', data=encoder)
+        self.assertEqual(
+            auth._requests_session.post.call_args.kwargs['timeout'], (10.0, None))
+        auth._post('http://nas:5000/webapi/entry.cgi', {'method': 'set'})
+        self.assertEqual(
+            auth._requests_session.post.call_args.kwargs['timeout'], (10.0, 120.0))
+
+    def test_only_read_methods_are_idempotent(self):
+        policy = RetryPolicy()
+        for method in ('get', 'list', 'info', 'get_info', 'list_share', 'GET'):
+            self.assertTrue(policy.is_idempotent(method), method)
+        for method in ('set', 'create', 'delete', 'login', 'upload', None, ''):
+            self.assertFalse(policy.is_idempotent(method), method)
+
+    def test_retryable_errors(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.is_retryable_error(
+            requests.exceptions.ConnectionError()))
+        self.assertTrue(policy.is_retryable_error(
+            requests.exceptions.ReadTimeout()))
+        self.assertTrue(policy.is_retryable_error(
+            requests.exceptions.HTTPError(response=_response(503))))
+        self.assertFalse(policy.is_retryable_error(
+            requests.exceptions.HTTPError(response=_response(404))))
+        self.assertFalse(policy.is_retryable_error(ValueError()))
+
+    def test_backoff_is_exponential_and_capped(self):
+        policy = RetryPolicy(backoff_factor=1, backoff_max=5, jitter=False)
+        self.assertEqual([policy.get_backoff(n)
+                         for n in range(1, 5)], [1, 2, 4, 5])
+
+    def test_backoff_jitter_stays_in_range(self):
+        policy = RetryPolicy(backoff_factor=1, backoff_max=5, jitter=True)
+        for _ in range(50):
+            self.assertTrue(0 <= policy.get_backoff(3) <= 4)
+
+    def test_negative_retries_rejected(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_retries=-1)
+
+
+@patch('synology_api.auth.time.sleep')
+class TestAuthenticationRetry(unittest.TestCase):
+    """Tests for retries in Authentication.request_data."""
+
+    def test_read_call_is_retried_after_connection_reset(self, sleep):
+        auth = _make_auth(RetryPolicy(max_retries=2, jitter=False))
+        auth._requests_session.get.side_effect = [
+            requests.exceptions.ConnectionError('reset'),
+            _response(502),
+            _response(),
+        ]
+
+        result = auth.request_data(
+            'SYNO.Core.User', 'entry.cgi', {'method': 'list', 'version': 1})
+
+        self.assertEqual(result, {'success': True, 'data': {}})
+        self.assertEqual(auth._requests_session.get.call_count, 3)
+        self.assertEqual([c.args[0]
+                         for c in sleep.call_args_list], [0.5, 1.0])
+        self.assertEqual(
+            auth._requests_session.get.call_args.kwargs['timeout'], (10.0, 120.0))
+
+    def test_write_call_is_not_retried(self, sleep):
+        auth = _make_auth(RetryPolicy(max_retries=3))
+        auth._requests_session.get.side_effect = requests.exceptions.ConnectionError(
+            'reset')
+
+        with self.assertRaises(SynoConnectionError):
+            auth.request_data('SYNO.Core.User', 'entry.cgi',
+                              {'method': 'delete', 'version': 1})
+
+        self.assertEqual(auth._requests_session.get.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_gives_up_after_max_retries(self, sleep):
+        auth = _make_auth(RetryPolicy(max_retries=2))
+        auth._requests_session.get.return_value = _response(503)
+
+        with self.assertRaises(HTTPError):
+            auth.request_data('SYNO.Core.User', 'entry.cgi',
+                              {'method': 'get', 'version': 1})
+
+        self.assertEqual(auth._requests_session.get.call_count, 3)
+
+    def test_retry_budget_stops_retries(self, sleep):
+        auth = _make_auth(RetryPolicy(max_retries=5, backoff_factor=2,
+                                      jitter=False, retry_budget=5))
+        auth._requests_session.get.side_effect = requests.exceptions.ReadTimeout(
+            'slow')
+
+        with self.assertRaises(SynoConnectionError):
+            auth.request_data('SYNO.Core.User', 'entry.cgi',
+                              {'method': 'list', 'version': 1})
+
+        # Sleeps 2, then 4 would exceed the 5 seconds budget.
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [2])
+        self.assertEqual(auth._requests_session.get.call_count, 2)
+
+    def test_no_retry_policy_sends_once(self, sleep):
+        auth = _make_auth(NO_RETRY)
+        auth._requests_session.get.side_effect = requests.exceptions.ConnectionError(
+            'reset')
+
+        with self.assertRaises(SynoConnectionError):
+            auth.request_data('SYNO.Core.User', 'entry.cgi',
+                              {'method': 'list', 'version': 1})
+
+        self.assertEqual(auth._requests_session.get.call_count, 1)
+
+    def test_compound_retried_only_when_all_reads(self, sleep):
+        auth = _make_auth(RetryPolicy(max_retries=1, jitter=False))
+        auth.full_api_list = {'SYNO.Entry.Request': {
+            'path': 'entry.cgi', 'maxVersion': 1}}
+        auth._requests_session.get.side_effect = [
+            _response(500), _response()]
+
+        auth.request_multi_datas([{'api': 'SYNO.Core.User', 'method': 'list', 'version': 1},
+                                  {'api': 'SYNO.Core.Group', 'method': 'get', 'version': 1}])
+        self.assertEqual(auth._requests_session.get.call_count, 2)
+
+        auth._requests_session.get.reset_mock()
+        auth._requests_session.get.side_effect = [_response(500)]
+        with self.assertRaises(HTTPError):
+            auth.request_multi_datas([{'api': 'SYNO.Core.User', 'method': 'list', 'version': 1},
+                                      {'api': 'SYNO.Core.User', 'method': 'set', 'version': 1}])
+        self.assertEqual(auth._requests_session.get.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
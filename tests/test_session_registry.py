@@ -0,0 +1,141 @@
+"""Unit tests for synology_api.session_registry and its use by BaseApi."""
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from synology_api.base_api import BaseApi
+from synology_api.session_registry import SessionRegistry
+
+
+def _fake_session():
+    session = MagicMock()
+    session.app_api_list = {}
+    session.full_api_list = {}
+    session.last_used = 0.0
+    return session
+
+
+class TestSessionRegistry(unittest.TestCase):
+    """Tests for the registry itself."""
+
+    def setUp(self):
+        self.registry = SessionRegistry()
+        self.key = SessionRegistry.make_key('NAS', 5000, 'admin')
+
+    def test_key(self):
+        self.assertEqual(self.key, SessionRegistry.make_key(
+            'nas', '5000', 'admin'))
+        self.assertNotEqual(self.key, SessionRegistry.make_key(
+            'nas', '5000', 'guest'))
+        self.assertEqual(SessionRegistry.make_key('a', '1', 'admin', 'My-NAS'),
+                         SessionRegistry.make_key(None, None, 'admin', 'my-nas'))
+
+    def test_get_or_create_calls_factory_once(self):
+        created = []
+
+        def factory():
+            time.sleep(0.01)
+            created.append(_fake_session())
+            return created[-1]
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.registry.get_or_create(self.key, factory))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(created), 1)
+        self.assertTrue(all(result is created[0] for result in results))
+
+    def test_failed_factory_registers_nothing(self):
+        def factory():
+            raise ValueError('login failed')
+
+        with self.assertRaises(ValueError):
+            self.registry.get_or_create(self.key, factory)
+        self.assertNotIn(self.key, self.registry)
+
+    def test_close_and_close_all(self):
+        first, second = _fake_session(), _fake_session()
+        other_key = SessionRegistry.make_key('nas2', '5000', 'admin')
+        self.registry.register(self.key, first)
+        self.registry.register(other_key, second)
+
+        self.assertTrue(self.registry.close(self.key, logout=True))
+        first.logout.assert_called_once()
+        first.close.assert_called_once()
+        self.assertFalse(self.registry.close(self.key))
+
+        self.registry.close_all()
+        second.logout.assert_not_called()
+        second.close.assert_called_once()
+        self.assertEqual(len(self.registry), 0)
+
+    def test_evict_idle(self):
+        idle, busy = _fake_session(), _fake_session()
+        busy_key = SessionRegistry.make_key('nas2', '5000', 'admin')
+        self.registry.register(self.key, idle)
+        self.registry.register(busy_key, busy)
+        self.registry._last_access[self.key] -= 60
+        self.registry._last_access[busy_key] -= 60
+        busy.last_used = time.monotonic()
+
+        self.assertEqual(self.registry.evict_idle(30), [self.key])
+        idle.close.assert_called_once()
+        self.assertEqual(self.registry.keys(), [busy_key])
+
+
+@patch('synology_api.base_api.syn.Authentication')
+class TestBaseApiSessionRegistry(unittest.TestCase):
+    """Tests for BaseApi taking its session from a registry."""
+
+    def setUp(self):
+        self.registry = SessionRegistry()
+
+    def _api(self, host, username='admin'):
+        return BaseApi(host, '5000', username, 'pass', debug=False,
+                       session_registry=self.registry)
+
+    def test_sessions_are_isolated_per_nas_and_user(self, auth_class):
+        auth_class.side_effect = lambda *args, **kwargs: _fake_session()
+
+        first = self._api('nas1')
+        second = self._api('nas2')
+        other_user = self._api('nas1', 'backup')
+        again = self._api('nas1')
+
+        self.assertIsNot(first.session, second.session)
+        self.assertIsNot(first.session, other_user.session)
+        self.assertIs(first.session, again.session)
+        self.assertEqual(auth_class.call_count, 3)
+        self.assertEqual(len(self.registry), 3)
+
+    def test_without_credentials_reuses_the_only_session(self, auth_class):
+        auth_class.side_effect = lambda *args, **kwargs: _fake_session()
+        first = self._api('nas1')
+
+        reused = BaseApi(application='FileStation',
+                         session_registry=self.registry)
+        self.assertIs(reused.session, first.session)
+        reused.session.get_api_list.assert_called_with('FileStation')
+
+        self._api('nas2')
+        with self.assertRaises(ValueError):
+            BaseApi(session_registry=self.registry)
+
+    def test_logout_drops_session(self, auth_class):
+        auth_class.side_effect = lambda *args, **kwargs: _fake_session()
+        api = self._api('nas1')
+
+        api.logout()
+
+        api.session.logout.assert_called_once()
+        self.assertEqual(len(self.registry), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""Unit tests for synology_api.session_store and session resumption."""
+
+import os
+import stat
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+from noise.connection import NoiseConnection, Keypair
+
+from synology_api.auth import Authentication
+from synology_api.session_store import FileSessionStore, SessionStore, NONCE_RESERVATION
+
+NOISE_NAME = b"Noise_IK_25519_ChaChaPoly_BLAKE2b"
+
+
+def _json_response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+def _finished_noise_connection():
+    """Run a real IK handshake and return the initiator side."""
+    responder_key = X25519PrivateKey.generate()
+    initiator = NoiseConnection.from_name(NOISE_NAME)
+    initiator.set_as_initiator()
+    initiator.set_keypair_from_private_bytes(
+        Keypair.STATIC, X25519PrivateKey.generate().private_bytes_raw())
+    initiator.set_keypair_from_public_bytes(
+        Keypair.REMOTE_STATIC, responder_key.public_key().public_bytes_raw())
+    responder = NoiseConnection.from_name(NOISE_NAME)
+    responder.set_as_responder()
+    responder.set_keypair_from_private_bytes(
+        Keypair.STATIC, responder_key.private_bytes_raw())
+    initiator.start_handshake()
+    responder.start_handshake()
+    responder.read_message(initiator.write_message(b'{}'))
+    initiator.read_message(responder.write_message(b''))
+    return initiator
+
+
+class TestFileSessionStore(unittest.TestCase):
+    """Tests for the file based session store."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = FileSessionStore(self._tmp.name)
+        self.key = SessionStore.make_key('nas', '5000', 'admin', 7)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_key_depends_on_account(self):
+        self.assertEqual(self.key, SessionStore.make_key(
+            'NAS', '5000', 'admin', 7))
+        self.assertNotEqual(self.key, SessionStore.make_key(
+            'nas', '5000', 'guest', 7))
+
+    def test_save_load_delete(self):
+        self.assertIsNone(self.store.load(self.key))
+        self.store.save(self.key, {'sid': 'abc'})
+        self.assertEqual(self.store.load(self.key)['sid'], 'abc')
+
+        path = os.path.join(self._tmp.name, 'session_%s.json' % self.key)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode) & 0o077, 0)
+
+        self.store.delete(self.key)
+        self.assertIsNone(self.store.load(self.key))
+        self.store.delete(self.key)
+
+    def test_other_format_is_ignored(self):
+        with open(os.path.join(self._tmp.name, 'session_%s.json' % self.key), 'w') as f:
+            f.write('{"format": 0, "sid": "abc"}')
+        self.assertIsNone(self.store.load(self.key))
+
+
+class TestAuthenticationSessionResume(unittest.TestCase):
+    """Tests for Authentication resuming a stored session."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = FileSessionStore(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _make_auth(self):
+        auth = Authentication('nas', '5000', 'admin', 'pass',
+                              debug=False, session_store=self.store)
+        auth._requests_session = MagicMock()
+        auth._requests_session.cookies = {}
+        return auth
+
+    def _save_logged_in_session(self):
+        first = self._make_auth()
+        first._sid = 'saved-sid'
+        first._syno_token = 'saved-token'
+        first._noise_connection = _finished_noise_connection()
+        first._noise_handshake_hash = 'hashhash'
+        first._get_request_hash()
+        first.close()
+        return first
+
+    def _nonce(self, auth):
+        return auth._noise_connection.noise_protocol.cipher_state_encrypt.n
+
+    def test_noise_state_round_trip(self):
+        first = self._save_logged_in_session()
+        resumed = self._make_auth()
+        resumed._import_session_state(
+            self.store.load(resumed._session_store_key))
+
+        self.assertEqual(resumed._sid, 'saved-sid')
+        self.assertEqual(resumed._syno_token, 'saved-token')
+        # The resumed session starts past the nonces reserved by the first one
+        self.assertEqual(self._nonce(resumed), 1 + NONCE_RESERVATION)
+        self.assertEqual(self._nonce(resumed), first._nonce_reserved_until)
+        self.assertTrue(resumed._get_request_hash().endswith(
+            '.' + resumed.encode_ssid_cookie(str(1 + NONCE_RESERVATION).encode())))
+
+    @patch('synology_api.auth.NONCE_RESERVATION', 3)
+    def test_nonces_are_reserved_before_use(self):
+        first = self._save_logged_in_session()
+        for _ in range(10):
+            first._get_request_hash()
+        # No close: the process crashed, the saved state still covers every nonce used
+        saved = self.store.load(first._session_store_key)
+        self.assertGreaterEqual(saved['noise']['nonce'], self._nonce(first))
+
+    def test_store_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            SessionStore()
+
+    def test_valid_session_skips_login(self):
+        self._save_logged_in_session()
+        auth = self._make_auth()
+        auth._requests_session.get.return_value = _json_response(
+            {'success': True, 'data': {}})
+
+        auth.login()
+
+        auth._requests_session.post.assert_not_called()
+        params = auth._requests_session.get.call_args.kwargs['params']
+        self.assertEqual(params['_sid'], 'saved-sid')
+        self.assertIn('X-SYNO-HASH',
+                      auth._requests_session.get.call_args.kwargs['headers'])
+        self.assertEqual(auth.sid, 'saved-sid')
+        self.assertFalse(auth._session_expire)
+
+    def test_expired_session_falls_back_to_login(self):
+        self._save_logged_in_session()
+        auth = self._make_auth()
+        auth._version = 6
+        auth._secure = True
+        auth._requests_session.get.return_value = _json_response(
+            {'success': False, 'error': {'code': 119}})
+        auth._requests_session.post.return_value = _json_response(
+            {'success': True, 'data': {'sid': 'new-sid', 'synotoken': 'new-token'}})
+
+        auth.login()
+
+        auth._requests_session.post.assert_called_once()
+        self.assertEqual(auth.sid, 'new-sid')
+        self.assertEqual(self.store.load(auth._session_store_key)['sid'],
+                         'new-sid')
+
+    def test_logout_forgets_session(self):
+        self._save_logged_in_session()
+        auth = self._make_auth()
+        auth._sid = 'saved-sid'
+        auth._requests_session.get.return_value = _json_response(
+            {'success': True})
+
+        auth.logout()
+
+        self.assertIsNone(self.store.load(auth._session_store_key))
+
+
+if __name__ == '__main__':
+    unittest.main()
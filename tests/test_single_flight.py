@@ -0,0 +1,155 @@
+"""Unit tests for synology_api.single_flight and coalesced request_data calls."""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from synology_api.auth import Authentication
+from synology_api.exceptions import SynoConnectionError
+from synology_api.single_flight import SingleFlight
+
+
+def _response(payload):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Tests for keys and coroutine coalescing."""
+
+    def test_keys(self):
+        flight = SingleFlight(apis=['SYNO.SurveillanceStation'],
+                              exclude=['SYNO.SurveillanceStation.Recording'])
+        self.assertIsNotNone(flight.make_key('SYNO.SurveillanceStation.Camera',
+                                             {'method': 'List', 'version': 9}))
+        self.assertIsNone(flight.make_key('SYNO.SurveillanceStation.Camera',
+                                          {'method': 'Enable', 'version': 9}))
+        self.assertIsNone(flight.make_key('SYNO.SurveillanceStation.Recording',
+                                          {'method': 'List', 'version': 6}))
+        self.assertIsNone(flight.make_key('SYNO.Core.Share',
+                          {'method': 'list', 'version': 1}))
+        params = {'method': 'List', 'version': 9}
+        self.assertNotEqual(flight.make_key('SYNO.SurveillanceStation.Camera', params, ('nas1', '5000', 'admin')),
+                            flight.make_key('SYNO.SurveillanceStation.Camera', params, ('nas2', '5000', 'admin')))
+
+    def test_coroutines_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def send():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'data': [1]}
+
+        async def main():
+            return await asyncio.gather(*[flight.ado(('key',), send) for _ in range(5)])
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'data': [1]}] * 5)
+        self.assertEqual(flight.coalesced, 4)
+
+    def test_callers_modifying_their_result(self):
+        flight = SingleFlight()
+
+        async def send():
+            await asyncio.sleep(0.05)
+            return {'data': [1]}
+
+        async def call():
+            result = await flight.ado(('key',), send)
+            # Runs before the waiters resume when this caller sent the request
+            result['data'].append(2)
+            return result
+
+        async def main():
+            return await asyncio.gather(*[call() for _ in range(3)])
+
+        self.assertEqual(asyncio.run(main()), [{'data': [1, 2]}] * 3)
+
+        def call_threaded(results):
+            result = flight.do(
+                ('key',), lambda: time.sleep(0.05) or {'data': [1]})
+            result['data'].append(2)
+            results.append(result)
+
+        results = []
+        threads = [threading.Thread(
+            target=call_threaded, args=(results,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [{'data': [1, 2]}] * 5)
+
+
+class TestCoalescedRequestData(unittest.TestCase):
+    """Tests for request_data sharing identical concurrent reads."""
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.auth = Authentication('nas', '5000', 'admin', 'pass', debug=False,
+                                   single_flight=self.flight)
+        self.auth._sid = 'sid'
+        self.auth._requests_session = MagicMock()
+        self.release = threading.Event()
+        self.reply = {'success': True, 'data': {'cameras': [{'id': 1}]}}
+
+        def get(*args, **kwargs):
+            self.release.wait(5)
+            if isinstance(self.reply, Exception):
+                raise self.reply
+            return _response(self.reply)
+        self.auth._requests_session.get.side_effect = get
+
+    def _call_concurrently(self, method, count=20):
+        results = [None] * count
+
+        def call(i):
+            try:
+                results[i] = self.auth.request_data(
+                    'SYNO.SurveillanceStation.Camera', 'entry.cgi',
+                    {'method': method, 'version': 9, 'offset': 0})
+            except Exception as e:
+                results[i] = e
+        threads = [threading.Thread(target=call, args=(i,))
+                   for i in range(count)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_reads_share_one_request(self):
+        results = self._call_concurrently('List')
+
+        self.assertEqual(self.auth._requests_session.get.call_count, 1)
+        self.assertTrue(all(result == self.reply for result in results))
+        self.assertEqual(len({id(result) for result in results}), len(results))
+        self.assertEqual(self.flight.coalesced, 19)
+        self.assertEqual(len(self.flight), 0)
+
+    def test_exception_is_shared(self):
+        self.reply = requests.exceptions.ConnectionError('reset')
+        results = self._call_concurrently('List', count=5)
+
+        self.assertEqual(self.auth._requests_session.get.call_count, 1)
+        self.assertTrue(all(isinstance(result, SynoConnectionError)
+                        for result in results))
+
+    def test_writes_are_not_coalesced(self):
+        self._call_concurrently('Enable', count=3)
+        self.assertEqual(self.auth._requests_session.get.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
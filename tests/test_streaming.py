@@ -0,0 +1,115 @@
+"""Unit tests for synology_api.streaming and streamed request_data calls."""
+
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from synology_api.auth import Authentication
+from synology_api.batch import BatchCall
+from synology_api.exceptions import UndefinedError
+from synology_api.streaming import StreamedResponse
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MiB
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serve a binary recording, or a DSM JSON error for unknown ids."""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        if query.get('id') == ['1']:
+            body, content_type = PAYLOAD, 'application/octet-stream'
+        elif query.get('id') == ['2']:
+            body, content_type = b'{"success": true, "data": {}}', 'text/plain'
+        else:
+            body = json.dumps(
+                {'success': False, 'error': {'code': 400}}).encode()
+            content_type = 'application/json; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestStreaming(unittest.TestCase):
+    """Tests for streamed binary downloads."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.auth = Authentication('127.0.0.1', str(self.server.server_port), 'admin', 'pass',
+                                   debug=False)
+        self.auth._sid = 'sid'
+
+    def _download(self, recording_id, **kwargs):
+        return self.auth.request_data('SYNO.SurveillanceStation.Recording', 'entry.cgi',
+                                      {'method': 'Download', 'version': 6,
+                                          'id': recording_id},
+                                      stream=True, **kwargs)
+
+    def test_binary_body_is_read_in_chunks(self):
+        with self._download(1, chunk_size=4096) as response:
+            self.assertIsInstance(response, StreamedResponse)
+            self.assertFalse(response.is_json)
+            self.assertEqual(response.content_type, 'application/octet-stream')
+            self.assertFalse(response.response._content_consumed)
+            chunks = list(response)
+        self.assertTrue(all(len(chunk) <= 4096 for chunk in chunks))
+        self.assertEqual(b''.join(chunks), PAYLOAD)
+
+    def test_save_and_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'recording.mp4')
+            self.assertEqual(self._download(1).save(path), len(PAYLOAD))
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), PAYLOAD)
+
+        with self._download(1, chunk_size=1000) as response:
+            self.assertEqual(response.read(10), PAYLOAD[:10])
+            self.assertEqual(response.read(2500), PAYLOAD[10:2510])
+            out = io.BytesIO()
+            response.save(out)
+        self.assertEqual(out.getvalue(), PAYLOAD[2510:])
+
+    def test_json_error_is_raised(self):
+        with self.assertRaises(UndefinedError) as cm:
+            self._download(3)
+        self.assertEqual(cm.exception.error_code, 400)
+
+    def test_json_body_with_text_content_type(self):
+        with self._download(2) as response:
+            self.assertTrue(response.is_json)
+            self.assertEqual(response.json(), {'success': True, 'data': {}})
+
+        with self._download(1) as response:
+            with self.assertRaises(requests.exceptions.JSONDecodeError):
+                response.json()
+
+    def test_streamed_calls_are_not_batched(self):
+        with self.auth.batch():
+            with self._download(1) as response:
+                self.assertNotIsInstance(response, BatchCall)
+                self.assertEqual(response.read(), PAYLOAD)
+
+
+if __name__ == '__main__':
+    unittest.main()